@@ -0,0 +1,446 @@
+"""
+Event-driven scheduler for the golf betting agent.
+
+Replaces the fixed 12-hour polling loop with independent jobs on one asyncio
+loop:
+
+    odds poller   fetches every odds board, concurrently, at an adaptive
+                  interval - every few minutes as tee time approaches or when
+                  lines are moving, up to update_frequency_hours when nothing
+                  is on and overnight
+    evaluator     re-evaluates only the markets whose boards changed, from a
+                  bounded queue so a slow evaluation holds back the poller
+                  instead of piling up work
+    settlement    fetches final results for events with pending bets and
+                  settles them in one transaction
+    reporting     snapshots performance metrics daily and posts the weekly
+                  recap
+    ingestion     runs the transcript ingestion pipeline over the watch
+                  folder and queue table every interval_minutes, when the
+                  config's ingestion section is enabled
+
+Network calls - odds, results and tweets - run in worker threads. Agent
+work - evaluations, with their simulations and bet placement, and everything
+else that touches the tracker's database - runs on a single agent thread, so
+it never stalls the loop and the SQLite connection is only ever used by one
+piece of work at a time. Picks placed by an evaluation are tweeted after it
+returns, so a slow Twitter call doesn't hold up the evaluations and
+settlement queued behind it. Ingestion writes to the mental form database
+through its own connections and pipeline threads.
+
+Usage:
+    python golf_betting_agent.py --config config.json
+"""
+
+import json
+import asyncio
+import hashlib
+import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from bet_settlement import DataGolfResults, PrefetchedResults, pending_events
+from closing_lines import board_odds
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('golf.agent_scheduler')
+
+# Outright slates are sized across markets together, so they're evaluated as one unit
+OUTRIGHTS = 'outrights'
+
+# Hours before the first tee time at which polling starts speeding up
+LEAD_HOURS = 72
+
+
+def find_current_event(schedule_data, today):
+    """First event in a DataGolf schedule starting today or later, or None"""
+    if not schedule_data or 'schedule' not in schedule_data:
+        return None
+    for event in schedule_data['schedule']:
+        if event['start_date'] >= today:
+            return event
+    return None
+
+
+def event_tee_time(event, first_tee_hour=7):
+    """First tee time of a DataGolf schedule event (its start date at first_tee_hour)"""
+    return datetime.strptime(event['start_date'], "%Y-%m-%d") + timedelta(hours=first_tee_hour)
+
+
+def board_fingerprint(payload):
+    """Hash of a board's prices, ignoring fields like last_updated that change on every fetch"""
+    if not payload:
+        return None
+    prices = payload.get('odds', payload.get('match_list'))
+    return hashlib.sha1(json.dumps(prices, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def board_prices(payload):
+    """
+    Implied probabilities on an outright board.
+
+    Returns:
+        Dict of (dg_id, sportsbook) -> implied probability; empty for matchup boards
+    """
+    return {(player_id, book): 1 / odds for player_id, book, odds in board_odds(payload)}
+
+
+def line_movement(previous, current):
+    """Mean absolute change in implied probability, in percentage points, over prices on both boards"""
+    common = previous.keys() & current.keys()
+    if not common:
+        return 0.0
+    return float(np.mean([abs(current[k] - previous[k]) for k in common]) * 100)
+
+
+def poll_interval(hours_to_tee, movement, overnight, min_interval, max_interval,
+                  movement_threshold=0.25, overnight_interval=3600):
+    """
+    Seconds until the next odds poll.
+
+    Args:
+        hours_to_tee: Hours until the next event's first tee time, or None with no event
+        movement: Latest line movement (percentage points, see line_movement())
+        overnight: Whether it's within the configured quiet hours
+        min_interval: Fastest polling, right before the tee time
+        max_interval: Slowest polling, with no event coming up
+        movement_threshold: Movement above which polling speeds up proportionally
+        overnight_interval: Polling is never faster than this overnight
+
+    Returns:
+        Interval in seconds
+    """
+    if hours_to_tee is None:
+        interval = max_interval
+    else:
+        # Quadratic ramp from max_interval LEAD_HOURS out down to min_interval at the tee
+        closeness = min(max(hours_to_tee, 0) / LEAD_HOURS, 1)
+        interval = min_interval + (max_interval - min_interval) * closeness ** 2
+
+    if movement > movement_threshold:
+        interval /= movement / movement_threshold
+    if overnight:
+        interval = max(interval, overnight_interval)
+    return float(min(max(interval, min_interval), max_interval))
+
+
+class AgentScheduler:
+    """Runs a GolfBettingAgent's jobs on one asyncio loop"""
+
+    def __init__(self, agent, now=datetime.now):
+        """
+        Args:
+            agent: GolfBettingAgent to drive
+            now: Clock, replaceable for replays
+        """
+        self.agent = agent
+        self.now = now
+
+        schedule = agent.config['schedule']
+        self.min_interval = schedule.get('min_poll_minutes', 2) * 60
+        self.max_interval = schedule.get('update_frequency_hours', 12) * 3600
+        self.overnight_interval = schedule.get('overnight_poll_minutes', 60) * 60
+        self.quiet_hours = schedule.get('quiet_hours', [23, 6])
+        self.first_tee_hour = schedule.get('first_tee_hour', 7)
+        self.movement_threshold = schedule.get('line_movement_threshold', 0.25)
+        self.schedule_refresh = schedule.get('schedule_refresh_hours', 6) * 3600
+        self.settle_interval = schedule.get('settle_interval_minutes', 60) * 60
+        self.report_interval = schedule.get('report_interval_hours', 24) * 3600
+        self.fetch_workers = schedule.get('fetch_workers', 8)
+
+        ingestion = agent.config.get('ingestion', {})
+        self.ingest_enabled = ingestion.get('enabled', False)
+        self.ingest_interval = ingestion.get('interval_minutes', 30) * 60
+        self.ingest_options = {key: ingestion[key] for key in ('db_path', 'watch_dir', 'defaults', 'rescore')
+                               if key in ingestion}
+        self._ingestion = None
+
+        # Board keys waiting for the evaluator; a key already queued isn't queued twice
+        self.queue = asyncio.Queue(maxsize=schedule.get('evaluation_queue_size', 16))
+        self._queued = set()
+        self._fetch_limit = asyncio.Semaphore(self.fetch_workers)
+        self._agent_thread = None
+        self._posting = set()
+        self._stopping = asyncio.Event()
+
+        # Latest poll: tour -> current event, (tour, kind, market) -> board / fingerprint / prices
+        self.events = {}
+        self.events_fetched_at = None
+        self.boards = {}
+        self.fingerprints = {}
+        self.prices = {}
+        self.movement = 0.0
+        self.last_recap = None
+
+    async def run(self, duration=None):
+        """
+        Run every job until stopped (or for `duration` seconds).
+
+        A job that raises is logged and carries on at its next interval.
+        """
+        loop = asyncio.get_running_loop()
+        if duration is not None:
+            loop.call_later(duration, self.stop)
+
+        self._agent_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix='agent')
+        await self._agent(self.agent.tracker.refresh_pending_index)
+        logger.info("Agent scheduler running")
+        jobs = [
+            self._periodic("odds poller", self.poll_odds),
+            self._evaluate(),
+            self._periodic("settlement", self.settle, lambda: self.settle_interval),
+            self._periodic("reporting", self.report, lambda: self.report_interval),
+        ]
+        if self.ingest_enabled:
+            jobs.append(self._periodic("ingestion", self.ingest, lambda: self.ingest_interval))
+        tasks = [asyncio.create_task(job) for job in jobs]
+        await self._stopping.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Let an evaluation already running finish placing its bets, then tweet them
+        await asyncio.to_thread(self._agent_thread.shutdown)
+        await asyncio.gather(*self._posting, return_exceptions=True)
+        logger.info("Agent scheduler stopped")
+
+    def stop(self):
+        self._stopping.set()
+        if self._ingestion is not None:
+            self._ingestion.stop()
+
+    async def _sleep(self, seconds):
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _periodic(self, name, job, interval=None):
+        """Run a job, then wait its interval (or the interval it returns)"""
+        while not self._stopping.is_set():
+            wait = None
+            try:
+                wait = await job()
+            except Exception as e:
+                logger.exception(f"{name} failed: {e}")
+            await self._sleep(wait if wait is not None else interval() if interval else self.min_interval)
+
+    async def _fetch(self, fn, *args, **kwargs):
+        """Blocking API call in a worker thread, at most fetch_workers at a time"""
+        async with self._fetch_limit:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+
+    async def _agent(self, fn, *args, **kwargs):
+        """Agent or database work on the agent thread, one call at a time"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._agent_thread, functools.partial(fn, *args, **kwargs))
+
+    # Odds polling
+
+    async def _refresh_events(self):
+        tracker = self.agent.tracker
+        tours = self.agent.config['betting']['target_tours']
+        schedules = await asyncio.gather(*(self._fetch(tracker.fetch_current_events, tour=tour) for tour in tours))
+        today = self.now().strftime("%Y-%m-%d")
+        self.events = {}
+        for tour, schedule_data in zip(tours, schedules):
+            event = find_current_event(schedule_data, today)
+            if event:
+                self.events[tour] = event
+            else:
+                logger.info(f"No upcoming events found for {tour}")
+        self.events_fetched_at = self.now()
+
+    def _board_requests(self):
+        betting = self.agent.config['betting']
+        tracker = self.agent.tracker
+        matchup_markets = betting.get('matchup_markets', ['tournament_matchups', 'round_matchups', '3_balls'])
+        for tour in self.events:
+            for market in betting['outright_markets']:
+                yield (tour, OUTRIGHTS, market), tracker.fetch_betting_odds, {'tour': tour, 'market': market}
+            for market in matchup_markets:
+                yield (tour, 'matchups', market), tracker.fetch_matchup_odds, {'tour': tour, 'market': market}
+
+    def hours_to_tee(self):
+        """Hours until the earliest upcoming first tee time across tours, or None"""
+        tee_times = [event_tee_time(event, self.first_tee_hour) for event in self.events.values()]
+        if not tee_times:
+            return None
+        return (min(tee_times) - self.now()).total_seconds() / 3600
+
+    def next_interval(self):
+        start, end = self.quiet_hours
+        hour = self.now().hour
+        overnight = start <= hour or hour < end if start > end else start <= hour < end
+        return poll_interval(self.hours_to_tee(), self.movement, overnight, self.min_interval,
+                             self.max_interval, self.movement_threshold, self.overnight_interval)
+
+    async def poll_odds(self):
+        """
+        Fetch every odds board and queue the markets that changed.
+
+        Returns:
+            Seconds until the next poll
+        """
+        stale = (self.events_fetched_at is None or
+                 (self.now() - self.events_fetched_at).total_seconds() >= self.schedule_refresh)
+        if stale:
+            await self._refresh_events()
+
+        fetches = list(self._board_requests())
+        payloads = await asyncio.gather(*(self._fetch(fn, **kwargs) for _, fn, kwargs in fetches))
+
+        changed = []
+        movements = []
+        for (key, _, _), payload in zip(fetches, payloads):
+            if not payload:
+                continue
+            fingerprint = board_fingerprint(payload)
+            if fingerprint == self.fingerprints.get(key):
+                continue
+            prices = board_prices(payload)
+            if key in self.prices:
+                movements.append(line_movement(self.prices[key], prices))
+            self.boards[key], self.fingerprints[key], self.prices[key] = payload, fingerprint, prices
+            changed.append(key)
+        self.movement = max(movements) if movements else 0.0
+
+        # Changed outright boards are the latest closing-line candidates
+        outright_odds = {}
+        for tour, kind, market in changed:
+            if kind == OUTRIGHTS:
+                outright_odds.setdefault(tour, {})[market] = self.boards[(tour, kind, market)]
+        await self._agent(self.agent._capture_closing_lines, self.events, outright_odds, captured_at=self.now())
+
+        # One evaluation per tour's outright slate, one per matchup market
+        units = sorted({(tour, kind, None if kind == OUTRIGHTS else market) for tour, kind, market in changed},
+                       key=str)
+        for unit in units:
+            if unit not in self._queued:
+                self._queued.add(unit)
+                await self.queue.put(unit)  # waits while the evaluator is behind
+
+        interval = self.next_interval()
+        logger.info(f"Polled {len(fetches)} boards, {len(changed)} changed (movement {self.movement:.2f}pp); "
+                    f"next poll in {interval / 60:.0f} min")
+        return interval
+
+    # Evaluation
+
+    def _context(self, events, boards):
+        """Run context for one evaluation, from a snapshot of the events and boards"""
+        context = self.agent._new_run_context()
+        context.events = events
+        for (board_tour, kind, market), payload in boards.items():
+            boards = context.outright_odds if kind == OUTRIGHTS else context.matchup_odds
+            boards.setdefault(board_tour, {})[market] = payload
+        return context
+
+    def evaluate(self, unit, events=None, boards=None):
+        """
+        Re-evaluate one changed market (or a tour's whole outright slate).
+
+        Args:
+            unit: (tour, kind, market) queued by poll_odds()
+            events, boards: Snapshot to evaluate (the latest poll by default);
+                the poller keeps updating its own while this runs
+
+        Returns:
+            Picks to tweet, as (bet_id, post function, bet data)
+        """
+        events = dict(self.events) if events is None else events
+        boards = dict(self.boards) if boards is None else boards
+        tour, kind, market = unit
+        if tour not in events:
+            return []
+        context = self._context(events, boards)
+        if context.remaining_budget <= 0:
+            logger.info("Weekly bet limit reached, skipping evaluation")
+            return []
+        context.posts = []
+        if kind == OUTRIGHTS:
+            self.agent._find_outright_bets(context, tour)
+        else:
+            self.agent._find_matchup_bets(context, tour, markets=[market])
+        return context.posts
+
+    async def _evaluate(self):
+        while True:
+            unit = await self.queue.get()
+            self._queued.discard(unit)
+            try:
+                posts = await self._agent(self.evaluate, unit, dict(self.events), dict(self.boards))
+                if posts:
+                    task = asyncio.create_task(self._post_picks(posts))
+                    self._posting.add(task)
+                    task.add_done_callback(self._posting.discard)
+            except Exception as e:
+                logger.exception(f"Evaluating {unit} failed: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _post_picks(self, posts):
+        """Tweet an evaluation's picks in worker threads, marking each posted on the agent thread"""
+        for bet_id, post, bet_data in posts:
+            try:
+                await self._fetch(post, bet_data)
+            except Exception as e:
+                logger.error(f"Failed to post bet {bet_id} to Twitter: {e}")
+                continue
+            await self._agent(self.agent.tracker.mark_bet_as_posted, bet_id)
+            logger.info(f"Posted bet {bet_id} to Twitter")
+
+    # Settlement and reporting
+
+    async def settle(self):
+        """Settle pending bets on every event with final results"""
+        tracker = self.agent.tracker
+        events = await self._agent(pending_events, tracker.db_conn)
+        if not events:
+            return None
+        source = DataGolfResults(tracker, tours=self.agent.config['betting']['target_tours'])
+        payloads = await asyncio.gather(*(self._fetch(source.fetch, event_id, year) for event_id, year in events))
+        summary = await self._agent(tracker.settle_pending_bets, PrefetchedResults(dict(zip(events, payloads))))
+        if summary['bet_ids']:
+            bankroll = await self._agent(tracker.ledger.bankroll)
+            logger.info(f"Settled {len(summary['bet_ids'])} bets; bankroll now ${bankroll:.2f}")
+        return None
+
+    async def ingest(self):
+        """Ingest the transcripts waiting in the watch folder and queue table, then rescore"""
+        # The ingestion pipeline pulls in the extraction and LLM stack; only load it when enabled
+        from ingestion_service import IngestionService
+
+        self._ingestion = IngestionService(**self.ingest_options)
+        try:
+            snapshot = await asyncio.to_thread(self._ingestion.run, once=True)
+        finally:
+            self._ingestion = None
+        stored = snapshot['stages']['insert']['processed']
+        if stored:
+            logger.info(f"Ingestion pass stored insights from {stored} episodes")
+        return None
+
+    async def report(self):
+        """Daily performance snapshot, plus the weekly recap on the configured day"""
+        tracker = self.agent.tracker
+        await self._agent(lambda: tracker.update_performance_metrics(tracker.ledger.bankroll()))
+
+        today = self.now()
+        if (today.strftime("%A") == self.agent.config['schedule']['performance_update_day']
+                and self.last_recap != today.date()):
+            self.last_recap = today.date()
+            update = await self._agent(self.agent._build_performance_update)
+            if update:
+                try:
+                    await self._fetch(self.agent.twitter_bot.post_performance_update, *update)
+                    logger.info("Posted performance update to Twitter")
+                except Exception as e:
+                    logger.error(f"Failed to post performance update: {e}")
+        return None
@@ -0,0 +1,475 @@
+"""
+Historical backtesting of the outright betting strategy.
+
+Every odds refresh stores a snapshot of the field's prices and DataGolf model
+probabilities in bet_recommendations. This module replays those snapshots
+event by event, in timestamp order, through the same pricing code the agent
+uses (opportunity_scanner), with each player's mental form score taken from
+mental_form_history as it stood at the snapshot. Only snapshots taken before
+the event started are used, and results are only read at settlement, so
+nothing a strategy sees comes from the future.
+
+A strategy is a dict of the agent's betting parameters plus the mental form
+knobs (see DEFAULT_STRATEGY). For each one the backtest reports ROI, closing
+line value (the bet's price against the best price in the event's last
+snapshot) and bankroll drawdown. Grids of strategies run across a process
+pool, and the prepared event data is pickled to disk so later grids skip the
+database entirely.
+
+Usage:
+    python backtest.py --min_ev 3 5 7 10 --kelly_fraction 0.1 0.25 --mental_factor 0 0.2 0.4
+"""
+
+import os
+import pickle
+import hashlib
+import sqlite3
+import logging
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from opportunity_scanner import MENTAL_ADJUSTMENT_FACTOR, mental_adjustment, price_candidates
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('golf.backtest')
+
+DEFAULT_DB_PATH = "data/db/mental_form.db"
+DEFAULT_CACHE_DIR = "data/backtest_cache"
+
+# Bump when the prepared event format changes so old pickles are ignored
+CACHE_VERSION = 1
+
+# Finishing position each settled market pays out on
+POSITION_MARKETS = {
+    'win': 1,
+    'top_5': 5,
+    'top_10': 10,
+    'top_20': 20,
+}
+
+DEFAULT_STRATEGY = {
+    'min_ev_percentage': 7.0,
+    'kelly_fraction': 0.25,
+    'mental_factor': MENTAL_ADJUSTMENT_FACTOR,
+    # Only back players at or above this score (None: no requirement)
+    'min_mental_score': None,
+    # Never back players at or below this score (None: no fades)
+    'fade_mental_score': None,
+    'initial_bankroll': 1000.0,
+    'max_stake_per_bet': 30.0,
+    'max_event_stake': 250.0,
+    'min_stake': 1.0,
+    'markets': ('win', 'top_5', 'top_10', 'top_20', 'make_cut', 'mc'),
+    # Sportsbooks to bet at (None: every book in the snapshots)
+    'sportsbooks': None,
+}
+
+
+def payout_fraction(market, position, tied):
+    """
+    Share of a bet on a player that is paid out, given their finish.
+
+    Args:
+        market: Market the bet is in
+        position: Numeric finishing position, or None for a missed cut/WD/DQ
+        tied: Number of players sharing that position
+
+    Returns:
+        Fraction of the payout (dead heats split it), or NaN if the market
+        can't be settled from a finishing position
+    """
+    if market == 'make_cut':
+        return float(position is not None)
+    if market == 'mc':
+        return float(position is None)
+    if market not in POSITION_MARKETS:
+        return np.nan
+    if position is None:
+        return 0.0
+    if market == 'win':
+        # A tie for first is decided by a playoff; the results table lists the winner as 1
+        return float(position == 1 and tied == 1)
+
+    cutoff = POSITION_MARKETS[market]
+    if position > cutoff:
+        return 0.0
+    return min(cutoff - position + 1, tied) / tied
+
+
+def parse_position(finish):
+    """Turn a finish like '1', 'T5' or 'CUT' into a number, or None"""
+    text = str(finish or '').strip().upper().lstrip('T')
+    return int(text) if text.isdigit() else None
+
+
+def _table_exists(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)).fetchone() is not None
+
+
+def _load_frames(db_path):
+    """Read snapshots, mental form history, results and start dates from the database"""
+    conn = sqlite3.connect(db_path)
+    try:
+        snapshots = pd.read_sql_query('''
+        SELECT player_id, event_name, market, sportsbook, decimal_odds, model_probability, timestamp
+        FROM bet_recommendations
+        WHERE player_id IS NOT NULL AND decimal_odds > 1 AND model_probability > 0
+        ''', conn)
+        mental = pd.read_sql_query('''
+        SELECT player_id, score, date FROM mental_form_history WHERE score IS NOT NULL
+        ''', conn)
+        results = pd.read_sql_query('''
+        SELECT player_id, event_name, year, finish_position, event_date FROM tournament_results
+        ''', conn)
+        if _table_exists(conn, 'tournaments') and 'start_date' in {
+                row[1] for row in conn.execute("PRAGMA table_info(tournaments)")}:
+            starts = pd.read_sql_query('''
+            SELECT event_name, start_date FROM tournaments WHERE start_date IS NOT NULL
+            ''', conn)
+        else:
+            starts = pd.DataFrame(columns=['event_name', 'start_date'])
+    finally:
+        conn.close()
+    return snapshots, mental, results, starts
+
+
+def _prepare_event(event_name, start_date, snaps, mental, results):
+    """
+    Build the arrays one event is replayed from.
+
+    Returns:
+        Dict with keys (player_id, market) per row, snapshot timestamps,
+        prices (snapshots x keys x books), model_prob and mental_score
+        (snapshots x keys, NaN where missing) and payout per key
+    """
+    keys = list(snaps.groupby(['player_id', 'market'], sort=True).groups)
+    key_index = {key: i for i, key in enumerate(keys)}
+    timestamps = sorted(snaps['timestamp'].unique())
+    snap_index = {ts: i for i, ts in enumerate(timestamps)}
+    books = sorted(snaps['sportsbook'].unique())
+    book_index = {book: i for i, book in enumerate(books)}
+
+    s = snaps['timestamp'].map(snap_index).to_numpy()
+    k = np.array([key_index[key] for key in zip(snaps['player_id'], snaps['market'])], dtype=int)
+    b = snaps['sportsbook'].map(book_index).to_numpy()
+
+    prices = np.zeros((len(timestamps), len(keys), len(books)))
+    prices[s, k, b] = snaps['decimal_odds'].to_numpy(dtype=float)
+    model_prob = np.full((len(timestamps), len(keys)), np.nan)
+    model_prob[s, k] = snaps['model_probability'].to_numpy(dtype=float) / 100
+
+    # Point-in-time mental score: the latest history entry at or before each snapshot
+    players = np.array([pid for pid, _ in keys])
+    mental_score = np.full((len(timestamps), len(keys)), np.nan)
+    history = mental[mental['player_id'].isin(set(players))]
+    for pid, player_history in history.groupby('player_id'):
+        dates = player_history['date'].to_numpy(dtype=str)
+        order = np.argsort(dates, kind='stable')
+        dates, scores = dates[order], player_history['score'].to_numpy(dtype=float)[order]
+        idx = np.searchsorted(dates, np.array(timestamps, dtype=str), side='right') - 1
+        columns = players == pid
+        mental_score[:, columns] = np.where(idx >= 0, scores[np.maximum(idx, 0)], np.nan)[:, None]
+
+    finishes = {pid: parse_position(finish) for pid, finish in zip(results['player_id'], results['finish_position'])}
+    tied = pd.Series([p for p in finishes.values() if p is not None]).value_counts().to_dict()
+    payout = np.array([
+        payout_fraction(market, finishes[pid], tied.get(finishes[pid], 1)) if pid in finishes else np.nan
+        for pid, market in keys
+    ])
+
+    return {
+        'event_name': event_name,
+        'start_date': start_date,
+        'keys': keys,
+        'markets': np.array([market for _, market in keys], dtype=object),
+        'timestamps': timestamps,
+        'books': books,
+        'prices': prices,
+        'model_prob': model_prob,
+        'mental_score': mental_score,
+        'payout': payout,
+    }
+
+
+def prepare_events(db_path=DEFAULT_DB_PATH):
+    """
+    Load every event with pre-start snapshots and results, oldest first.
+
+    An event's start is its tournaments.start_date, falling back to the
+    earliest event_date in tournament_results for that event and year.
+    """
+    snapshots, mental, results, starts = _load_frames(db_path)
+    start_dates = dict(zip(starts['event_name'], starts['start_date']))
+
+    events = []
+    for event_name, event_snaps in snapshots.groupby('event_name'):
+        event_results = results[results['event_name'] == event_name]
+        if event_results.empty:
+            continue
+
+        # Pick the results year the snapshots were taken in
+        year = int(str(event_snaps['timestamp'].min())[:4])
+        event_results = event_results[event_results['year'] == year]
+        if event_results.empty:
+            continue
+
+        start_date = start_dates.get(event_name)
+        if not start_date or not str(start_date).startswith(str(year)):
+            start_date = event_results['event_date'].dropna().min()
+        if not start_date:
+            continue
+
+        # No look-ahead: only prices quoted before the first tee shot
+        pre_start = event_snaps[event_snaps['timestamp'] < str(start_date)]
+        if pre_start.empty:
+            continue
+        events.append(_prepare_event(event_name, str(start_date), pre_start, mental, event_results))
+
+    events.sort(key=lambda e: e['start_date'])
+    logger.info(f"Prepared {len(events)} events from {db_path}")
+    return events
+
+
+def _cache_path(db_path, cache_dir):
+    stat = os.stat(db_path)
+    key = f"{os.path.abspath(db_path)}:{stat.st_mtime_ns}:{stat.st_size}:{CACHE_VERSION}"
+    return os.path.join(cache_dir, f"{hashlib.sha1(key.encode()).hexdigest()}.pkl")
+
+
+def load_events(db_path=DEFAULT_DB_PATH, cache_dir=DEFAULT_CACHE_DIR, refresh=False):
+    """
+    Prepared events for db_path, from the on-disk cache when the database hasn't changed.
+
+    Returns:
+        (events, cache_path)
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _cache_path(db_path, cache_dir)
+    if not refresh and os.path.exists(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f), path
+
+    events = prepare_events(db_path)
+    with open(path + '.tmp', 'wb') as f:
+        pickle.dump(events, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + '.tmp', path)
+    return events, path
+
+
+def _replay_event(event, strategy, bankroll):
+    """
+    Place an event's bets under a strategy.
+
+    Returns:
+        DataFrame with one row per bet: key index, snapshot, odds, stake, EV,
+        payout fraction, closing odds, and the market, mental score and base
+        and adjusted model probabilities the bet was priced on
+    """
+    markets = event['markets']
+    book_cols = [i for i, book in enumerate(event['books'])
+                 if strategy['sportsbooks'] is None or book in strategy['sportsbooks']]
+    books = [event['books'][i] for i in book_cols]
+    prices = event['prices'][:, :, book_cols]
+    num_snaps, num_keys = event['model_prob'].shape
+
+    # Mental form adjustment, same as OddsRetriever.calculate_adjusted_ev
+    mental_score = event['mental_score']
+    adjusted = event['model_prob'] * (1 + mental_adjustment(mental_score, markets, strategy['mental_factor']))
+    adjusted = np.clip(np.nan_to_num(adjusted), 0, 1)
+
+    priced = price_candidates(adjusted.ravel(), prices.reshape(num_snaps * num_keys, len(books)), books)
+    ev = np.nan_to_num(priced['ev_percentage'].reshape(num_snaps, num_keys), nan=-np.inf)
+    kelly = priced['kelly'].reshape(num_snaps, num_keys) * strategy['kelly_fraction']
+    best_odds = priced['best_odds'].reshape(num_snaps, num_keys)
+
+    eligible = (ev >= strategy['min_ev_percentage']) & np.isin(markets, strategy['markets'])[None, :]
+    eligible &= np.isfinite(event['payout'])[None, :]
+    if strategy['min_mental_score'] is not None:
+        eligible &= mental_score >= strategy['min_mental_score']
+    if strategy['fade_mental_score'] is not None:
+        eligible &= ~(mental_score <= strategy['fade_mental_score'])
+
+    stake = np.minimum(kelly * bankroll, strategy['max_stake_per_bet'])
+    eligible &= stake >= strategy['min_stake']
+    if not eligible.any():
+        return pd.DataFrame()
+
+    # One bet per player and market, at the first snapshot that shows value
+    first = np.where(eligible.any(axis=0), eligible.argmax(axis=0), -1)
+    cols = np.flatnonzero(first >= 0)
+    rows = first[cols]
+    bets = pd.DataFrame({
+        'key': cols,
+        'snapshot': rows,
+        'odds': best_odds[rows, cols],
+        'stake': stake[rows, cols],
+        'ev_percentage': ev[rows, cols],
+        'payout': event['payout'][cols],
+        'closing_odds': best_odds[-1, cols],
+        'market': markets[cols],
+        'mental_score': mental_score[rows, cols],
+        'base_prob': event['model_prob'][rows, cols],
+        'adjusted_prob': adjusted[rows, cols],
+    })
+
+    # Within the event's budget, earlier snapshots first, then by EV like the agent
+    bets = bets.sort_values(['snapshot', 'ev_percentage'], ascending=[True, False], kind='stable')
+    committed = bets['stake'].cumsum().shift(fill_value=0)
+    bets['stake'] = np.clip(strategy['max_event_stake'] - committed, 0, bets['stake'])
+    return bets[bets['stake'] >= strategy['min_stake']]
+
+
+def run_backtest(events, strategy=None, include_bets=False):
+    """
+    Replay every event under one strategy.
+
+    Args:
+        events: Output of prepare_events()/load_events()
+        strategy: Dict overriding DEFAULT_STRATEGY
+        include_bets: Also return every simulated bet as 'bet_log'
+
+    Returns:
+        Dict of summary metrics: bets, staked, profit_loss, roi, hit_rate,
+        clv (mean % by which bet prices beat the closing best price),
+        final_bankroll and max_drawdown (fraction of the running peak)
+    """
+    strategy = {**DEFAULT_STRATEGY, **(strategy or {})}
+    bankroll = strategy['initial_bankroll']
+    equity = [bankroll]
+    frames = []
+
+    for event in events:
+        if bankroll <= 0:
+            break
+        bets = _replay_event(event, strategy, bankroll)
+        if bets.empty:
+            continue
+        bets['profit_loss'] = bets['stake'] * (bets['payout'] * bets['odds'] - 1)
+        bankroll += bets['profit_loss'].sum()
+        equity.append(bankroll)
+        frames.append(bets)
+
+    equity = np.array(equity)
+    peak = np.maximum.accumulate(equity)
+    summary = {
+        'events': len(frames),
+        'bets': 0,
+        'staked': 0.0,
+        'profit_loss': 0.0,
+        'roi': 0.0,
+        'hit_rate': 0.0,
+        'clv': 0.0,
+        'final_bankroll': float(bankroll),
+        'max_drawdown': float(((peak - equity) / peak).max()),
+    }
+    if frames:
+        bets = pd.concat(frames, ignore_index=True)
+        closing = bets['closing_odds'] > 1
+        staked = bets['stake'].sum()
+        summary.update({
+            'bets': len(bets),
+            'staked': float(staked),
+            'profit_loss': float(bets['profit_loss'].sum()),
+            'roi': float(bets['profit_loss'].sum() / staked * 100),
+            'hit_rate': float((bets['payout'] > 0).mean()),
+            'clv': float(((bets['odds'] / bets['closing_odds'] - 1)[closing] * 100).mean()) if closing.any() else 0.0,
+        })
+    if include_bets:
+        summary['bet_log'] = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return summary
+
+
+_worker_events = None
+
+
+def _load_worker_events(cache_path):
+    """Process-pool initializer: read the prepared events once per worker"""
+    global _worker_events
+    with open(cache_path, 'rb') as f:
+        _worker_events = pickle.load(f)
+
+
+def _run_worker(strategy):
+    return {**strategy, **run_backtest(_worker_events, strategy)}
+
+
+def expand_grid(param_grid):
+    """Every combination of a dict of parameter -> list of values"""
+    names = list(param_grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(param_grid[n] for n in names))]
+
+
+def run_grid(param_grid, db_path=DEFAULT_DB_PATH, cache_dir=DEFAULT_CACHE_DIR, workers=None, refresh=False):
+    """
+    Backtest every combination of parameters in parallel.
+
+    Args:
+        param_grid: Dict of strategy parameter -> list of values, or a list of strategy dicts
+        db_path: Database with the snapshots, mental form history and results
+        cache_dir: Directory for the prepared event cache
+        workers: Worker processes (defaults to the CPU count; 1 runs inline)
+        refresh: Rebuild the cache from the database
+
+    Returns:
+        DataFrame with one row per strategy, best ROI first
+    """
+    strategies = expand_grid(param_grid) if isinstance(param_grid, dict) else list(param_grid)
+    events, cache_path = load_events(db_path, cache_dir, refresh)
+    logger.info(f"Backtesting {len(strategies)} strategies over {len(events)} events")
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(strategies) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_load_worker_events,
+                                 initargs=(cache_path,)) as pool:
+            chunksize = max(1, len(strategies) // (workers * 4))
+            rows = list(pool.map(_run_worker, strategies, chunksize=chunksize))
+    else:
+        rows = [{**strategy, **run_backtest(events, strategy)} for strategy in strategies]
+
+    return pd.DataFrame(rows).sort_values('roi', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the betting strategy against stored odds snapshots")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Path to the mental form database")
+    parser.add_argument("--cache_dir", default=DEFAULT_CACHE_DIR, help="Prepared event cache directory")
+    parser.add_argument("--refresh", action="store_true", help="Rebuild the event cache from the database")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (defaults to CPU count)")
+    parser.add_argument("--min_ev", type=float, nargs="+", default=[DEFAULT_STRATEGY['min_ev_percentage']],
+                        help="Minimum EV percentages to try")
+    parser.add_argument("--kelly_fraction", type=float, nargs="+", default=[DEFAULT_STRATEGY['kelly_fraction']],
+                        help="Kelly fractions to try")
+    parser.add_argument("--mental_factor", type=float, nargs="+", default=[DEFAULT_STRATEGY['mental_factor']],
+                        help="Mental adjustment factors to try")
+    parser.add_argument("--min_mental_score", type=float, nargs="+", default=None,
+                        help="Minimum mental scores to try (omit for no requirement)")
+    parser.add_argument("--fade_mental_score", type=float, nargs="+", default=None,
+                        help="Fade thresholds to try (omit for no fades)")
+    parser.add_argument("--top", type=int, default=20, help="Number of strategies to print")
+    parser.add_argument("--output", help="Write all results to this CSV file")
+    args = parser.parse_args()
+
+    grid = {
+        'min_ev_percentage': args.min_ev,
+        'kelly_fraction': args.kelly_fraction,
+        'mental_factor': args.mental_factor,
+        'min_mental_score': args.min_mental_score or [None],
+        'fade_mental_score': args.fade_mental_score or [None],
+    }
+    results = run_grid(grid, args.db, args.cache_dir, args.workers, args.refresh)
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"Wrote {len(results)} results to {args.output}")
+    print(results.head(args.top).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
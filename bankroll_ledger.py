@@ -0,0 +1,318 @@
+"""
+Append-only bankroll ledger.
+
+Every movement of money - deposits, withdrawals, manual adjustments, stakes,
+settlements, voids and corrections to bets - is appended to bankroll_ledger.
+Each entry stores the running cash balance, the open exposure (stakes on
+pending bets) and how much has been wagered so far in the entry's week, so
+the current bankroll, this week's wagering and the balance at any moment in
+the past are each a single indexed lookup.
+
+Bet entries are written by triggers on bets, the same way bet_rollups is
+kept current, so every writer is covered. A bet's effect on the ledger is:
+
+    cash      -stake, plus stake + profit_loss once it's settled
+    exposure  stake while pending, 0 once settled
+    wagered   stake, if it was placed in the current week
+
+and a change to a bet appends the difference. The bankroll is cash plus
+exposure, i.e. what we'd have if every open bet were refunded.
+
+Usage:
+    python bankroll_ledger.py show --db golf_betting_history.db
+    python bankroll_ledger.py deposit 500 --db golf_betting_history.db
+"""
+
+import sqlite3
+import argparse
+import logging
+from datetime import datetime, timedelta
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('golf.bankroll_ledger')
+
+# Entry types
+DEPOSIT = "deposit"
+WITHDRAWAL = "withdrawal"
+ADJUSTMENT = "adjustment"  # bankroll set by hand
+STAKE = "stake"
+SETTLEMENT = "settlement"
+VOID = "void"
+CORRECTION = "correction"  # a bet edited after it was recorded or settled
+REVERSAL = "reversal"      # a bet deleted
+
+# SQLite expressions for "now" and the Monday starting this week, in local time
+# like the timestamps the tracker and web app write
+_NOW_SQL = "strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')"
+_WEEK_SQL = "date('now', 'localtime', '-6 days', 'weekday 1')"
+
+# A bet's effect on the ledger, over a bets row aliased R
+_CASH_SQL = ("-COALESCE(R.stake, 0) + CASE WHEN R.outcome != 'pending' "
+             "THEN COALESCE(R.stake, 0) + COALESCE(R.profit_loss, 0) ELSE 0 END")
+_EXPOSURE_SQL = "CASE WHEN R.outcome != 'pending' THEN 0 ELSE COALESCE(R.stake, 0) END"
+_WAGERED_SQL = f"CASE WHEN date(R.placed_date, '-6 days', 'weekday 1') = {_WEEK_SQL} THEN COALESCE(R.stake, 0) ELSE 0 END"
+
+
+def week_start(timestamp):
+    """ISO date of the Monday starting the week a timestamp falls in"""
+    return (timestamp - timedelta(days=timestamp.weekday())).date().isoformat()
+
+
+def _effect(alias, sign):
+    return [f"{sign} * ({sql.replace('R.', f'{alias}.')})" for sql in (_CASH_SQL, _EXPOSURE_SQL, _WAGERED_SQL)]
+
+
+def _append_sql(entry_type, bet_id, cash, exposure, wagered, notes="NULL", skip_empty=True):
+    """
+    INSERT ... SELECT appending one entry on top of the latest.
+
+    One statement, so reading the latest entry and appending are atomic.
+    Entries that wouldn't change anything are skipped unless skip_empty is False.
+    """
+    where = "WHERE d.cash != 0 OR d.exposure != 0 OR d.wagered != 0" if skip_empty else ""
+    return f'''
+    INSERT INTO bankroll_ledger (created_at, week_start, entry_type, bet_id, amount, exposure_change,
+                                 wagered_change, balance, exposure, week_wagered, notes)
+    SELECT {_NOW_SQL}, {_WEEK_SQL}, {entry_type}, {bet_id}, d.cash, d.exposure, d.wagered,
+           COALESCE(l.balance, 0) + d.cash,
+           COALESCE(l.exposure, 0) + d.exposure,
+           CASE WHEN l.week_start = {_WEEK_SQL} THEN l.week_wagered ELSE 0 END + d.wagered,
+           {notes}
+    FROM (SELECT {cash} AS cash, {exposure} AS exposure, {wagered} AS wagered) d
+    LEFT JOIN (SELECT * FROM bankroll_ledger ORDER BY entry_id DESC LIMIT 1) l ON 1
+    {where};'''
+
+
+def _backfill(conn, opening_balance):
+    """Replay existing bets (and an opening deposit before them) into an empty ledger"""
+    import pandas as pd
+    bets = pd.read_sql_query("SELECT bet_id, stake, outcome, profit_loss, placed_date, settled_date FROM bets", conn)
+    bets['placed_date'] = pd.to_datetime(bets['placed_date'], errors='coerce', format='mixed')
+    bets['settled_date'] = pd.to_datetime(bets['settled_date'], errors='coerce', format='mixed')
+
+    events = []
+    for row in bets.to_dict('records'):
+        placed = row['placed_date'] if pd.notna(row['placed_date']) else datetime.now()
+        stake = row['stake'] or 0
+        events.append((placed, STAKE, row['bet_id'], -stake, stake, stake))
+        if row['outcome'] not in (None, 'pending'):
+            settled = row['settled_date'] if pd.notna(row['settled_date']) else placed
+            entry_type = VOID if row['outcome'] == 'void' else SETTLEMENT
+            events.append((max(settled, placed), entry_type, row['bet_id'], stake + (row['profit_loss'] or 0), -stake, 0.0))
+    events.sort(key=lambda e: e[0])
+
+    if opening_balance:
+        opened = events[0][0] if events else datetime.now()
+        events.insert(0, (opened, DEPOSIT, None, float(opening_balance), 0.0, 0.0))
+
+    balance = exposure = wagered = 0.0
+    current_week = None
+    rows = []
+    for timestamp, entry_type, bet_id, cash, exposure_change, wagered_change in events:
+        week = week_start(timestamp)
+        if week != current_week:
+            current_week, wagered = week, 0.0
+        balance += cash
+        exposure += exposure_change
+        wagered += wagered_change
+        rows.append((timestamp.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3], week, entry_type, bet_id, cash,
+                     exposure_change, wagered_change, balance, exposure, wagered))
+
+    conn.executemany('''
+    INSERT INTO bankroll_ledger (created_at, week_start, entry_type, bet_id, amount,
+                                 exposure_change, wagered_change, balance, exposure, week_wagered)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    logger.info(f"Backfilled bankroll ledger with {len(rows)} entries")
+
+
+def initialize_tables(conn, opening_balance=None, current_bankroll=None):
+    """
+    Create the ledger and its triggers on bets, backfilling on first use.
+
+    Args:
+        conn: Connection to a database with a bets table
+        opening_balance: Deposit recorded before the first bet when the ledger is created
+        current_bankroll: If given when the ledger is created, an adjustment
+                          entry brings the bankroll to this figure after the backfill
+
+    Returns:
+        True if the ledger is in place (False if there's no bets table yet)
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('bets', 'bankroll_ledger')")
+    tables = {row[0] for row in cursor.fetchall()}
+    if 'bets' not in tables:
+        return False
+    if 'bankroll_ledger' in tables:
+        return True
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS bankroll_ledger (
+        entry_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_at TEXT NOT NULL,
+        week_start TEXT NOT NULL,
+        entry_type TEXT NOT NULL,
+        bet_id INTEGER,
+        amount REAL NOT NULL,           -- change to cash
+        exposure_change REAL NOT NULL,
+        wagered_change REAL NOT NULL,
+        balance REAL NOT NULL,          -- running cash
+        exposure REAL NOT NULL,         -- running stakes on pending bets
+        week_wagered REAL NOT NULL,     -- running amount wagered in week_start's week
+        notes TEXT
+    )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_bankroll_ledger_created_at ON bankroll_ledger (created_at)")
+
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(bets)")}
+    tracked = ", ".join(c for c in ('stake', 'outcome', 'profit_loss', 'placed_date') if c in columns)
+    new, old = _effect('NEW', 1), _effect('OLD', -1)
+    update_type = f'''CASE
+        WHEN OLD.outcome = 'pending' AND NEW.outcome = 'void' THEN '{VOID}'
+        WHEN OLD.outcome = 'pending' AND NEW.outcome != 'pending' THEN '{SETTLEMENT}'
+        ELSE '{CORRECTION}'
+    END'''
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS bankroll_ledger_insert AFTER INSERT ON bets
+    BEGIN {_append_sql(f"'{STAKE}'", 'NEW.bet_id', *new)}
+    END
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS bankroll_ledger_update AFTER UPDATE OF {tracked} ON bets
+    BEGIN {_append_sql(update_type, 'NEW.bet_id', *(f"{n} + {o}" for n, o in zip(new, old)))}
+    END
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS bankroll_ledger_delete AFTER DELETE ON bets
+    BEGIN {_append_sql(f"'{REVERSAL}'", 'OLD.bet_id', *old)}
+    END
+    ''')
+
+    _backfill(conn, opening_balance)
+    conn.commit()
+
+    if current_bankroll is not None:
+        BankrollLedger(conn).adjust_to(current_bankroll, notes="Carried over when the ledger was created")
+    return True
+
+
+class BankrollLedger:
+    """Reads and non-bet entries on a database's bankroll_ledger"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def _append(self, entry_type, amount, notes=None):
+        cursor = self.conn.cursor()
+        cursor.execute(_append_sql(':entry_type', 'NULL', ':amount', '0', '0', notes=':notes', skip_empty=False),
+                       {'entry_type': entry_type, 'amount': amount, 'notes': notes})
+        self.conn.commit()
+        return cursor.lastrowid
+
+    def deposit(self, amount, notes=None):
+        """Add money to the bankroll"""
+        return self._append(DEPOSIT, float(amount), notes)
+
+    def withdraw(self, amount, notes=None):
+        """Take money out of the bankroll"""
+        return self._append(WITHDRAWAL, -float(amount), notes)
+
+    def adjust_to(self, bankroll, notes=None):
+        """Record whatever adjustment makes the bankroll equal a figure set by hand"""
+        return self._append(ADJUSTMENT, float(bankroll) - self.bankroll(), notes)
+
+    def _entry(self, where="", params=(), order="entry_id DESC"):
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+        SELECT entry_id, created_at, week_start, entry_type, balance, exposure, week_wagered
+        FROM bankroll_ledger {where}
+        ORDER BY {order} LIMIT 1
+        ''', params)
+        row = cursor.fetchone()
+        return dict(zip([d[0] for d in cursor.description], row)) if row else None
+
+    def latest(self):
+        """Most recent entry as a dict, or None for an empty ledger"""
+        return self._entry()
+
+    def balance(self):
+        """Cash not tied up in open bets"""
+        entry = self.latest()
+        return entry['balance'] if entry else 0.0
+
+    def exposure(self):
+        """Total staked on pending bets"""
+        entry = self.latest()
+        return entry['exposure'] if entry else 0.0
+
+    def bankroll(self):
+        """Cash plus open stakes"""
+        entry = self.latest()
+        return entry['balance'] + entry['exposure'] if entry else 0.0
+
+    def week_wagered(self, now=None):
+        """Amount wagered so far this week (weeks start on Monday)"""
+        entry = self.latest()
+        if not entry or entry['week_start'] != week_start(now or datetime.now()):
+            return 0.0
+        return entry['week_wagered']
+
+    def at(self, timestamp):
+        """
+        The ledger as of a moment in the past.
+
+        Returns:
+            Dict with balance, exposure, bankroll and week_wagered after the
+            last entry at or before timestamp (None if there was none yet)
+        """
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.strftime('%Y-%m-%d %H:%M:%S.%f')
+        entry = self._entry("WHERE created_at <= ?", (str(timestamp),), order="created_at DESC, entry_id DESC")
+        if entry:
+            entry['bankroll'] = entry['balance'] + entry['exposure']
+        return entry
+
+    def history(self):
+        """Every entry as a DataFrame, oldest first, with a bankroll column"""
+        import pandas as pd
+        history = pd.read_sql_query("SELECT * FROM bankroll_ledger ORDER BY entry_id", self.conn)
+        history['bankroll'] = history['balance'] + history['exposure']
+        return history
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or add to the bankroll ledger")
+    parser.add_argument("command", choices=["show", "deposit", "withdraw", "set"],
+                        help="show: current figures; deposit/withdraw AMOUNT; set: adjust the bankroll to AMOUNT")
+    parser.add_argument("amount", type=float, nargs="?", help="Amount for deposit, withdraw or set")
+    parser.add_argument("--db", default="golf_betting_history.db", help="Database with the bets table")
+    parser.add_argument("--notes", help="Note to store with the entry")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if not initialize_tables(conn):
+            print(f"No bets table in {args.db}")
+            return
+        ledger = BankrollLedger(conn)
+        if args.command != "show":
+            if args.amount is None:
+                parser.error(f"{args.command} needs an amount")
+            {"deposit": ledger.deposit, "withdraw": ledger.withdraw, "set": ledger.adjust_to}[args.command](
+                args.amount, notes=args.notes)
+
+        print(f"Bankroll:      ${ledger.bankroll():.2f}")
+        print(f"Cash:          ${ledger.balance():.2f}")
+        print(f"Open exposure: ${ledger.exposure():.2f}")
+        print(f"This week:     ${ledger.week_wagered():.2f} wagered")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,675 @@
+"""
+Offline batch mode for bulk LLM jobs.
+
+Full mental form rescoring, backfilling extraction over old transcripts and
+market analysis over stored insights don't need interactive latency. This
+module collects those requests into batch files, submits them through a
+provider-agnostic batch interface (see llm/batch_provider.py), polls for
+completion and applies the results to the database.
+
+Applying results is idempotent: every request is tracked in the batch_items
+table and is written to the database in the same transaction that marks it
+applied, so re-polling a batch (or resuming after a crash) never double-writes.
+
+Usage:
+    python batch_jobs.py create mental_form --dirty-only --run
+    python batch_jobs.py create extraction --transcripts transcripts/ --event_name "The Masters" --source "Golf Podcast"
+    python batch_jobs.py create markets --since 2025-04-01 --provider local --run
+    python batch_jobs.py run JOB_ID
+    python batch_jobs.py status
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import argparse
+import datetime
+import logging
+
+from llm.batch_provider import get_batch_provider, BATCH_ENDED
+from llm.llm_provider import DEFAULT_MODELS, MAX_CACHE_BREAKPOINTS, cacheable, to_anthropic_content
+from db_utils import (
+    MENTAL_FORM_SYSTEM_PROMPT,
+    MENTAL_FORM_INSTRUCTIONS,
+    get_recent_insights,
+    build_mental_form_prompt,
+    build_validation_prompt,
+    parse_mental_form_response,
+    save_mental_form,
+    add_insights_bulk
+)
+from insights_extractor import (
+    EXTRACTION_SYSTEM_PROMPT,
+    read_transcript,
+    create_claude_prompt,
+    parse_claude_response,
+    save_unmatched_insights
+)
+from market_analyzer import MarketAnalyzer
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('golf.batch_jobs')
+
+# Same model the interactive calls use (batches are Anthropic-only)
+MODEL = DEFAULT_MODELS["anthropic"]
+
+# Item states
+ITEM_PENDING = "pending"
+ITEM_SUBMITTED = "submitted"
+ITEM_APPLIED = "applied"
+ITEM_FAILED = "failed"
+
+
+def cached_prefix_content(prompt, prefix):
+    """
+    Content blocks for a prompt whose static prefix is shared by the whole batch.
+
+    The prefix gets a cache breakpoint so requests after the first read it
+    from the prompt cache. Prompts that don't start with it are returned as is.
+    """
+    if not prompt.startswith(prefix):
+        return prompt
+    return to_anthropic_content([cacheable(prefix), prompt[len(prefix):]], [MAX_CACHE_BREAKPOINTS])
+
+
+class MentalFormBatchHandler:
+    """Two-stage mental form scoring (initial score, then self-review)"""
+
+    kind = "mental_form"
+
+    def build_items(self, conn, dirty_only=False, max_insights=40, **kwargs):
+        """Create one initial-stage item per player with insights"""
+        cursor = conn.cursor()
+
+        query = '''
+        SELECT DISTINCT p.id, p.name
+        FROM players p
+        JOIN insights i ON p.id = i.player_id
+        LEFT JOIN mental_form m ON p.id = m.player_id
+        '''
+        if dirty_only:
+            query += " WHERE m.player_id IS NULL OR m.last_updated IS NULL"
+
+        cursor.execute(query)
+        players = cursor.fetchall()
+
+        today = datetime.datetime.now().strftime("%Y-%m-%d")
+        items = []
+        for player in players:
+            insights = get_recent_insights(cursor, player['id'], max_insights)
+            if not insights:
+                continue
+
+            items.append((f"mf-{player['id']}-initial", {
+                "stage": "initial",
+                "player_id": player['id'],
+                "player_name": player['name'],
+                "prompt": build_mental_form_prompt(player['name'], insights, today),
+                "insights_count": len(insights),
+                "today": today
+            }))
+
+        return items
+
+    def request_params(self, payload):
+        """Build the Messages API params for an item"""
+        if payload["stage"] == "initial":
+            return {
+                "model": MODEL,
+                "max_tokens": 4000,
+                "temperature": 0.3,
+                "system": MENTAL_FORM_SYSTEM_PROMPT,
+                "messages": [{"role": "user", "content": cached_prefix_content(payload["prompt"], MENTAL_FORM_INSTRUCTIONS)}]
+            }
+
+        return {
+            "model": MODEL,
+            "max_tokens": 4000,
+            "temperature": 0.2,  # Lower temperature for validation
+            "system": MENTAL_FORM_SYSTEM_PROMPT,
+            "messages": [
+                {"role": "user", "content": cached_prefix_content(payload["prompt"], MENTAL_FORM_INSTRUCTIONS)},
+                {"role": "assistant", "content": payload["initial_response"]},
+                {"role": "user", "content": build_validation_prompt(payload["today"])}
+            ]
+        }
+
+    def apply(self, conn, payload, response_text):
+        """Queue the validation step, or save the validated score"""
+        if payload["stage"] == "initial":
+            follow_up = dict(payload, stage="validate", initial_response=response_text.strip())
+            return [(f"mf-{payload['player_id']}-validate", follow_up)]
+
+        score, justification = parse_mental_form_response(response_text.strip())
+        save_mental_form(conn.cursor(), payload["player_id"], score, justification, payload["insights_count"])
+        return []
+
+
+class ExtractionBatchHandler:
+    """Insight extraction over stored transcript files"""
+
+    kind = "extraction"
+
+    def build_items(self, conn, transcripts=None, event_name=None, source=None,
+                    episode_title=None, content_url=None, **kwargs):
+        """Create one item per transcript file"""
+        if not transcripts or not event_name or not source:
+            raise ValueError("Extraction jobs require transcripts, event_name and source")
+
+        paths = []
+        for path in transcripts:
+            if os.path.isdir(path):
+                paths.extend(sorted(
+                    os.path.join(path, name) for name in os.listdir(path) if name.endswith(".txt")
+                ))
+            else:
+                paths.append(path)
+
+        items = []
+        for index, path in enumerate(paths):
+            items.append((f"ex-{index}", {
+                "transcript_path": path,
+                "event_name": event_name,
+                "source": source,
+                "episode_title": episode_title or "",
+                "content_url": content_url or "",
+                "date": datetime.datetime.now().strftime("%Y-%m-%d")
+            }))
+
+        return items
+
+    def request_params(self, payload):
+        """Build the Messages API params for an item"""
+        transcript = read_transcript(payload["transcript_path"])
+        return {
+            "model": MODEL,
+            "max_tokens": 4000,
+            "temperature": 0,
+            "system": EXTRACTION_SYSTEM_PROMPT,
+            "messages": [{"role": "user", "content": to_anthropic_content(
+                create_claude_prompt(transcript, payload["event_name"], cache=True), [MAX_CACHE_BREAKPOINTS]
+            )}]
+        }
+
+    def apply(self, conn, payload, response_text):
+        """Store matched insights; write unmatched ones to the insights folder"""
+        results = add_insights_bulk(
+            parse_claude_response(response_text),
+            source=payload["source"],
+            source_type="podcast",
+            content_title=payload["episode_title"],
+            content_url=payload["content_url"],
+            date=payload["date"],
+            conn=conn
+        )
+
+        unmatched_insights = [
+            {"player_name": result["player_name"], "insight": result["insight"]}
+            for result in results if result["player_id"] is None
+        ]
+
+        if unmatched_insights:
+            save_unmatched_insights(
+                unmatched_insights,
+                payload["event_name"],
+                payload["transcript_path"],
+                payload["source"],
+                payload["episode_title"],
+                payload["content_url"]
+            )
+
+        return []
+
+
+class MarketBatchHandler:
+    """Relevant-market analysis for stored insights"""
+
+    kind = "markets"
+
+    def _ensure_table(self, conn):
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS insight_markets (
+            insight_id INTEGER PRIMARY KEY,
+            markets TEXT,
+            analyzed_at TEXT,
+            FOREIGN KEY (insight_id) REFERENCES insights (id)
+        )
+        ''')
+
+    def build_items(self, conn, since=None, **kwargs):
+        """Create one item per insight that hasn't been analyzed yet"""
+        self._ensure_table(conn)
+        cursor = conn.cursor()
+
+        query = '''
+        SELECT i.id, i.text, p.name
+        FROM insights i
+        JOIN players p ON i.player_id = p.id
+        LEFT JOIN insight_markets im ON i.id = im.insight_id
+        WHERE im.insight_id IS NULL
+        '''
+        params = []
+        if since:
+            query += " AND i.date >= ?"
+            params.append(since)
+
+        cursor.execute(query, params)
+
+        return [
+            (f"mk-{row['id']}", {"insight_id": row['id'], "player_name": row['name'], "text": row['text']})
+            for row in cursor.fetchall()
+        ]
+
+    def request_params(self, payload):
+        """Build the Messages API params for an item"""
+        return {
+            "model": MODEL,
+            "max_tokens": 1000,
+            "temperature": 0,
+            "system": MarketAnalyzer.SYSTEM_PROMPT,
+            "messages": [{"role": "user", "content": MarketAnalyzer.create_prompt(payload["player_name"], payload["text"])}]
+        }
+
+    def apply(self, conn, payload, response_text):
+        """Store the selected markets for the insight"""
+        self._ensure_table(conn)
+        markets = MarketAnalyzer.parse_markets(payload["player_name"], response_text.strip())
+        conn.execute('''
+        INSERT OR REPLACE INTO insight_markets (insight_id, markets, analyzed_at)
+        VALUES (?, ?, ?)
+        ''', (payload["insight_id"], json.dumps(markets), datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        return []
+
+
+HANDLERS = {
+    handler.kind: handler
+    for handler in (MentalFormBatchHandler(), ExtractionBatchHandler(), MarketBatchHandler())
+}
+
+
+class BatchJobRunner:
+    """Creates, submits, polls and applies batch jobs"""
+
+    def __init__(self, db_path="data/db/mental_form.db", batch_dir="data/batches"):
+        """
+        Initialize the batch job runner.
+
+        Args:
+            db_path: Path to the mental form database
+            batch_dir: Directory for batch request/result files
+        """
+        self.db_path = db_path
+        self.batch_dir = batch_dir
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self._initialize_tables()
+
+    def _initialize_tables(self):
+        """Create the batch tracking tables"""
+        cursor = self.conn.cursor()
+
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS batch_jobs (
+            job_id TEXT PRIMARY KEY,
+            kind TEXT,
+            provider TEXT,
+            status TEXT,  -- 'open', 'completed'
+            created_at TEXT,
+            completed_at TEXT
+        )
+        ''')
+
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS batch_items (
+            job_id TEXT,
+            custom_id TEXT,
+            payload TEXT,
+            status TEXT,  -- 'pending', 'submitted', 'applied', 'failed'
+            provider_batch_id TEXT,
+            error TEXT,
+            applied_at TEXT,
+            PRIMARY KEY (job_id, custom_id)
+        )
+        ''')
+
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_batch_items_status ON batch_items(job_id, status)
+        ''')
+
+        self.conn.commit()
+
+    def _provider(self, provider_name):
+        if provider_name in ("local", "fake"):
+            return get_batch_provider(provider_name, batch_dir=os.path.join(self.batch_dir, "local"))
+        return get_batch_provider(provider_name)
+
+    def create_job(self, kind, provider="anthropic", **options):
+        """
+        Collect requests for a job kind.
+
+        Args:
+            kind: One of mental_form, extraction, markets
+            provider: Batch provider name
+            **options: Handler-specific options
+
+        Returns:
+            New job ID, or None if there was nothing to do
+        """
+        handler = HANDLERS.get(kind)
+        if not handler:
+            raise ValueError(f"Unknown batch job kind: {kind}")
+
+        items = handler.build_items(self.conn, **options)
+        if not items:
+            logger.info(f"No {kind} requests to batch")
+            return None
+
+        job_id = uuid.uuid4().hex[:8]
+        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        cursor = self.conn.cursor()
+        cursor.execute('''
+        INSERT INTO batch_jobs (job_id, kind, provider, status, created_at)
+        VALUES (?, ?, ?, 'open', ?)
+        ''', (job_id, kind, provider, now))
+
+        cursor.executemany('''
+        INSERT INTO batch_items (job_id, custom_id, payload, status)
+        VALUES (?, ?, ?, ?)
+        ''', [(job_id, custom_id, json.dumps(payload), ITEM_PENDING) for custom_id, payload in items])
+
+        self.conn.commit()
+        logger.info(f"Created {kind} batch job {job_id} with {len(items)} requests")
+        return job_id
+
+    def _get_job(self, job_id):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT * FROM batch_jobs WHERE job_id = ?", (job_id,))
+        job = cursor.fetchone()
+        if not job:
+            raise ValueError(f"Batch job {job_id} not found")
+        return job
+
+    def submit_pending(self, job_id):
+        """
+        Write all pending items to a batch file and submit them.
+
+        Returns:
+            Number of requests submitted
+        """
+        job = self._get_job(job_id)
+        handler = HANDLERS[job['kind']]
+
+        cursor = self.conn.cursor()
+        cursor.execute('''
+        SELECT custom_id, payload FROM batch_items
+        WHERE job_id = ? AND status = ?
+        ''', (job_id, ITEM_PENDING))
+        pending = cursor.fetchall()
+
+        if not pending:
+            return 0
+
+        requests = [
+            {"custom_id": row['custom_id'], "params": handler.request_params(json.loads(row['payload']))}
+            for row in pending
+        ]
+
+        # Keep a copy of exactly what was submitted
+        job_dir = os.path.join(self.batch_dir, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        batch_file = os.path.join(job_dir, f"requests_{datetime.datetime.now().strftime('%Y%m%d%H%M%S%f')}.jsonl")
+        with open(batch_file, 'w', encoding='utf-8') as f:
+            for request in requests:
+                f.write(json.dumps(request) + "\n")
+
+        provider_batch_id = self._provider(job['provider']).submit(requests)
+
+        cursor.executemany('''
+        UPDATE batch_items SET status = ?, provider_batch_id = ?
+        WHERE job_id = ? AND custom_id = ?
+        ''', [(ITEM_SUBMITTED, provider_batch_id, job_id, row['custom_id']) for row in pending])
+        self.conn.commit()
+
+        logger.info(f"Submitted {len(requests)} requests for job {job_id} as batch {provider_batch_id} ({batch_file})")
+        return len(requests)
+
+    def poll(self, job_id):
+        """
+        Apply results from every finished provider batch of a job.
+
+        Returns:
+            Number of items applied in this call
+        """
+        job = self._get_job(job_id)
+        handler = HANDLERS[job['kind']]
+        provider = self._provider(job['provider'])
+
+        cursor = self.conn.cursor()
+        cursor.execute('''
+        SELECT DISTINCT provider_batch_id FROM batch_items
+        WHERE job_id = ? AND status = ?
+        ''', (job_id, ITEM_SUBMITTED))
+        batch_ids = [row['provider_batch_id'] for row in cursor.fetchall()]
+
+        applied = 0
+        for provider_batch_id in batch_ids:
+            if provider.status(provider_batch_id) != BATCH_ENDED:
+                continue
+
+            results_file = os.path.join(self.batch_dir, job_id, f"results_{provider_batch_id}.jsonl")
+            with open(results_file, 'a', encoding='utf-8') as results_out:
+                for custom_id, response_text, error in provider.results(provider_batch_id):
+                    results_out.write(json.dumps({"custom_id": custom_id, "text": response_text, "error": error}) + "\n")
+                    if self._apply_result(job_id, handler, provider_batch_id, custom_id, response_text, error):
+                        applied += 1
+
+            # An ended batch won't report anything more; requests it left out would otherwise stay submitted forever
+            cursor.execute('''
+            UPDATE batch_items SET status = ?, error = ?
+            WHERE job_id = ? AND provider_batch_id = ? AND status = ?
+            ''', (ITEM_FAILED, "missing result", job_id, provider_batch_id, ITEM_SUBMITTED))
+            self.conn.commit()
+            if cursor.rowcount:
+                logger.error(f"Batch {provider_batch_id} ended without results for {cursor.rowcount} requests")
+
+        self._update_job_status(job_id)
+        return applied
+
+    def _apply_result(self, job_id, handler, provider_batch_id, custom_id, response_text, error):
+        """Apply one result in its own transaction. Already-applied results are skipped."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+        SELECT payload, status FROM batch_items
+        WHERE job_id = ? AND custom_id = ? AND provider_batch_id = ?
+        ''', (job_id, custom_id, provider_batch_id))
+        item = cursor.fetchone()
+
+        if not item or item['status'] != ITEM_SUBMITTED:
+            return False
+
+        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        if error is not None:
+            cursor.execute('''
+            UPDATE batch_items SET status = ?, error = ?
+            WHERE job_id = ? AND custom_id = ?
+            ''', (ITEM_FAILED, error, job_id, custom_id))
+            self.conn.commit()
+            logger.error(f"Batch request {custom_id} failed: {error}")
+            return False
+
+        try:
+            follow_ups = handler.apply(self.conn, json.loads(item['payload']), response_text)
+
+            cursor.executemany('''
+            INSERT OR IGNORE INTO batch_items (job_id, custom_id, payload, status)
+            VALUES (?, ?, ?, ?)
+            ''', [(job_id, follow_id, json.dumps(payload), ITEM_PENDING) for follow_id, payload in follow_ups])
+
+            cursor.execute('''
+            UPDATE batch_items SET status = ?, applied_at = ?
+            WHERE job_id = ? AND custom_id = ?
+            ''', (ITEM_APPLIED, now, job_id, custom_id))
+
+            self.conn.commit()
+            return True
+
+        except Exception as e:
+            self.conn.rollback()
+            cursor.execute('''
+            UPDATE batch_items SET status = ?, error = ?
+            WHERE job_id = ? AND custom_id = ?
+            ''', (ITEM_FAILED, str(e), job_id, custom_id))
+            self.conn.commit()
+            logger.error(f"Error applying batch result {custom_id}: {e}")
+            return False
+
+    def _update_job_status(self, job_id):
+        counts = self.job_counts(job_id)
+        if not counts.get(ITEM_PENDING) and not counts.get(ITEM_SUBMITTED):
+            self.conn.execute('''
+            UPDATE batch_jobs SET status = 'completed', completed_at = ?
+            WHERE job_id = ? AND status != 'completed'
+            ''', (datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"), job_id))
+            self.conn.commit()
+
+    def retry_failed(self, job_id):
+        """Move failed items back to pending so the next run resubmits them"""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+        UPDATE batch_items SET status = ?, error = NULL, provider_batch_id = NULL
+        WHERE job_id = ? AND status = ?
+        ''', (ITEM_PENDING, job_id, ITEM_FAILED))
+        self.conn.execute("UPDATE batch_jobs SET status = 'open', completed_at = NULL WHERE job_id = ?", (job_id,))
+        self.conn.commit()
+        return cursor.rowcount
+
+    def job_counts(self, job_id):
+        """Get item counts by status for a job"""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+        SELECT status, COUNT(*) as count FROM batch_items
+        WHERE job_id = ? GROUP BY status
+        ''', (job_id,))
+        return {row['status']: row['count'] for row in cursor.fetchall()}
+
+    def run(self, job_id, poll_interval=60):
+        """
+        Submit, poll and apply until the job has no outstanding items.
+
+        Multi-stage jobs (mental form self-review) submit their follow-up
+        requests as a new batch as soon as the previous stage is applied.
+
+        Returns:
+            Dictionary with final item counts and throughput
+        """
+        start = time.perf_counter()
+        applied = 0
+
+        while True:
+            self.submit_pending(job_id)
+            applied += self.poll(job_id)
+
+            counts = self.job_counts(job_id)
+            if not counts.get(ITEM_PENDING) and not counts.get(ITEM_SUBMITTED):
+                break
+
+            if counts.get(ITEM_SUBMITTED):
+                time.sleep(poll_interval)
+
+        elapsed = time.perf_counter() - start
+        summary = {
+            "job_id": job_id,
+            "counts": self.job_counts(job_id),
+            "applied": applied,
+            "elapsed_seconds": round(elapsed, 3),
+            "items_per_second": round(applied / elapsed, 1) if elapsed > 0 else None
+        }
+        logger.info(f"Batch job {job_id} finished: {summary}")
+        return summary
+
+    def list_jobs(self):
+        """List all batch jobs with item counts"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT * FROM batch_jobs ORDER BY created_at DESC")
+        return [dict(job, counts=self.job_counts(job['job_id'])) for job in cursor.fetchall()]
+
+    def close(self):
+        """Close database connection"""
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline batch mode for bulk LLM jobs")
+    parser.add_argument("--db_path", default="data/db/mental_form.db", help="Path to SQLite database")
+    parser.add_argument("--batch_dir", default="data/batches", help="Directory for batch files")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    create_parser = subparsers.add_parser("create", help="Collect requests into a new batch job")
+    create_parser.add_argument("kind", choices=sorted(HANDLERS), help="Kind of job")
+    create_parser.add_argument("--provider", default="anthropic", help="Batch provider (anthropic, local)")
+    create_parser.add_argument("--run", action="store_true", help="Submit and poll until the job completes")
+    create_parser.add_argument("--poll_interval", type=float, default=60, help="Seconds between polls")
+    create_parser.add_argument("--dirty_only", "--dirty-only", action="store_true",
+                               help="mental_form: only players whose score is stale")
+    create_parser.add_argument("--transcripts", nargs="+", help="extraction: transcript files or directories")
+    create_parser.add_argument("--event_name", help="extraction: golf event discussed")
+    create_parser.add_argument("--source", help="extraction: source name")
+    create_parser.add_argument("--episode_title", help="extraction: episode title")
+    create_parser.add_argument("--content_url", help="extraction: content URL")
+    create_parser.add_argument("--since", help="markets: only insights on or after this date")
+
+    run_parser = subparsers.add_parser("run", help="Submit, poll and apply an existing job")
+    run_parser.add_argument("job_id")
+    run_parser.add_argument("--poll_interval", type=float, default=60, help="Seconds between polls")
+    run_parser.add_argument("--retry_failed", action="store_true", help="Resubmit failed requests")
+
+    status_parser = subparsers.add_parser("status", help="Show batch jobs")
+    status_parser.add_argument("job_id", nargs="?")
+
+    args = parser.parse_args()
+
+    runner = BatchJobRunner(db_path=args.db_path, batch_dir=args.batch_dir)
+
+    try:
+        if args.command == "create":
+            job_id = runner.create_job(
+                args.kind,
+                provider=args.provider,
+                dirty_only=args.dirty_only,
+                transcripts=args.transcripts,
+                event_name=args.event_name,
+                source=args.source,
+                episode_title=args.episode_title,
+                content_url=args.content_url,
+                since=args.since
+            )
+            if job_id:
+                print(f"Created batch job {job_id}")
+                if args.run:
+                    print(json.dumps(runner.run(job_id, poll_interval=args.poll_interval), indent=2))
+
+        elif args.command == "run":
+            if args.retry_failed:
+                print(f"Retrying {runner.retry_failed(args.job_id)} failed requests")
+            print(json.dumps(runner.run(args.job_id, poll_interval=args.poll_interval), indent=2))
+
+        elif args.command == "status":
+            jobs = runner.list_jobs()
+            if args.job_id:
+                jobs = [job for job in jobs if job['job_id'] == args.job_id]
+            for job in jobs:
+                print(f"{job['job_id']}  {job['kind']:<12} {job['provider']:<10} {job['status']:<10} "
+                      f"created {job['created_at']}  {job['counts']}")
+    finally:
+        runner.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Incremental performance rollups over the bets table.
+
+The performance views (daily metrics, /my-bets and the Head Pro site) used
+to aggregate the whole bets table on every call. Instead, bet_rollups holds
+running totals per dimension and bucket - overall, market, sportsbook, EV
+bucket, mental form bucket and event - and triggers on bets add or remove a
+bet's contribution whenever one is recorded, settled, voided, edited or
+deleted. Every writer (the tracker, the web app, one-off scripts) keeps the
+rollups current without knowing about them, and readers fetch a handful of
+rows no matter how long the bet history gets.
+
+The rollups are created by the writers. A read-only view such as the Head
+Pro site reads them with create=False, and aggregates the bets table itself
+until a writer has put them in place.
+
+Usage:
+    python bet_rollups.py rebuild --db golf_betting_history.db
+"""
+
+import sqlite3
+import argparse
+import logging
+import functools
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('golf.bet_rollups')
+
+# Dimension name -> SQL bucket expression over a bets row aliased R. The EV
+# and mental form buckets match the ones the web app has always shown; bets
+# without an EV get no EV bucket.
+DIMENSIONS = {
+    'overall': "'all'",
+    'market': "R.bet_market",
+    'sportsbook': "R.sportsbook",
+    'ev_bucket': '''CASE
+        WHEN R.expected_value < 0 THEN 'Negative'
+        WHEN R.expected_value < 5 THEN '0-5%'
+        WHEN R.expected_value < 10 THEN '5-10%'
+        WHEN R.expected_value < 20 THEN '10-20%'
+        WHEN R.expected_value IS NOT NULL THEN '20%+'
+    END''',
+    'mental_bucket': '''CASE
+        WHEN R.mental_form_score <= -0.5 THEN 'Strong Negative'
+        WHEN R.mental_form_score <= -0.2 THEN 'Moderate Negative'
+        WHEN R.mental_form_score < 0.2 THEN 'Neutral'
+        WHEN R.mental_form_score < 0.5 THEN 'Moderate Positive'
+        WHEN R.mental_form_score IS NOT NULL THEN 'Strong Positive'
+        ELSE 'Unknown'
+    END''',
+    'event': "R.event_name",
+}
+
+# Display order of the fixed buckets (lowest EV / mental score first)
+BUCKET_ORDER = {
+    'ev_bucket': ['Negative', '0-5%', '5-10%', '10-20%', '20%+'],
+    'mental_bucket': ['Unknown', 'Strong Negative', 'Moderate Negative', 'Neutral',
+                      'Moderate Positive', 'Strong Positive'],
+}
+
+# Rollup column -> a bet's contribution. "Settled" is anything but pending,
+# "decided" only wins and losses.
+MEASURES = {
+    'bets': "1",
+    'wins': "CASE WHEN R.outcome = 'win' THEN 1 ELSE 0 END",
+    'losses': "CASE WHEN R.outcome = 'loss' THEN 1 ELSE 0 END",
+    'pending': "CASE WHEN R.outcome = 'pending' THEN 1 ELSE 0 END",
+    'settled': "CASE WHEN R.outcome != 'pending' THEN 1 ELSE 0 END",
+    'staked': "COALESCE(R.stake, 0)",
+    'settled_staked': "CASE WHEN R.outcome != 'pending' THEN COALESCE(R.stake, 0) ELSE 0 END",
+    'decided_staked': "CASE WHEN R.outcome IN ('win', 'loss') THEN COALESCE(R.stake, 0) ELSE 0 END",
+    'returns': "CASE WHEN R.outcome = 'win' THEN COALESCE(R.potential_return, 0) ELSE 0 END",
+    'profit_loss': "CASE WHEN R.outcome != 'pending' THEN COALESCE(R.profit_loss, 0) ELSE 0 END",
+    'decided_profit_loss': "CASE WHEN R.outcome IN ('win', 'loss') THEN COALESCE(R.profit_loss, 0) ELSE 0 END",
+    'decided_odds': "CASE WHEN R.outcome IN ('win', 'loss') THEN COALESCE(R.odds, 0) ELSE 0 END",
+    'decided_ev': "CASE WHEN R.outcome IN ('win', 'loss') THEN COALESCE(R.expected_value, 0) ELSE 0 END",
+    'decided_ev_count': "CASE WHEN R.outcome IN ('win', 'loss') AND R.expected_value IS NOT NULL THEN 1 ELSE 0 END",
+}
+
+# Measures that count bets rather than sum amounts
+COUNT_MEASURES = {'bets', 'wins', 'losses', 'pending', 'settled', 'decided_ev_count'}
+
+# Only updates to these columns can move a rollup
+TRACKED_COLUMNS = ['outcome', 'stake', 'potential_return', 'profit_loss', 'odds', 'expected_value',
+                   'bet_market', 'sportsbook', 'mental_form_score', 'event_name']
+
+
+def _bets_columns(conn):
+    return {row[1] for row in conn.execute("PRAGMA table_info(bets)")}
+
+
+def _bucket_sql(dimension, columns):
+    expression = DIMENSIONS[dimension]
+    # Older bets tables have no sportsbook column; those bets go in the '' bucket
+    if 'R.sportsbook' in expression and 'sportsbook' not in columns:
+        expression = "NULL"
+    return f"COALESCE({expression}, '')"
+
+
+def _upsert_sql(row_alias, sign, columns):
+    """Statements adding (sign 1) or removing (sign -1) one bets row from every rollup"""
+    names = ", ".join(MEASURES)
+    updates = ", ".join(f"{name} = {name} + excluded.{name}" for name in MEASURES)
+    statements = []
+    for dimension in DIMENSIONS:
+        values = ", ".join(f"{sign} * ({sql})" for sql in MEASURES.values())
+        statement = f'''
+        INSERT INTO bet_rollups (dimension, bucket, {names})
+        VALUES ('{dimension}', {_bucket_sql(dimension, columns)}, {values})
+        ON CONFLICT(dimension, bucket) DO UPDATE SET {updates};'''
+        statements.append(statement.replace('R.', f'{row_alias}.'))
+    return "".join(statements)
+
+
+@functools.lru_cache(maxsize=None)
+def _trigger_sql(columns):
+    """Trigger name -> CREATE TRIGGER statement keeping the rollups current (columns: a frozenset)"""
+    tracked = ", ".join(c for c in TRACKED_COLUMNS if c in columns)
+    return {
+        'bet_rollups_insert': f'''
+    CREATE TRIGGER IF NOT EXISTS bet_rollups_insert AFTER INSERT ON bets
+    BEGIN {_upsert_sql('NEW', 1, columns)}
+    END
+    ''',
+        'bet_rollups_update': f'''
+    CREATE TRIGGER IF NOT EXISTS bet_rollups_update AFTER UPDATE OF {tracked} ON bets
+    BEGIN {_upsert_sql('OLD', -1, columns)}{_upsert_sql('NEW', 1, columns)}
+    END
+    ''',
+        'bet_rollups_delete': f'''
+    CREATE TRIGGER IF NOT EXISTS bet_rollups_delete AFTER DELETE ON bets
+    BEGIN {_upsert_sql('OLD', -1, columns)}
+    END
+    ''',
+    }
+
+
+@functools.lru_cache(maxsize=64)
+def _normalize_sql(sql):
+    return " ".join((sql or "").replace("IF NOT EXISTS ", "").split())
+
+
+def initialize_tables(conn):
+    """
+    Create the rollup table and its triggers on bets, backfilling on first use.
+
+    If the bucket or measure definitions have changed since the triggers were
+    created, the triggers are replaced and the rollups rebuilt.
+
+    Does nothing if the database has no bets table yet.
+
+    Returns:
+        True if the rollups are in place
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('bets', 'bet_rollups')")
+    tables = {row[0] for row in cursor.fetchall()}
+    if 'bets' not in tables:
+        return False
+
+    columns = _bets_columns(conn)
+    triggers = _trigger_sql(frozenset(columns))
+    if 'bet_rollups' in tables:
+        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'bet_rollups_%'")
+        installed = dict(cursor.fetchall())
+        if all(_normalize_sql(installed.get(name)) == _normalize_sql(sql) for name, sql in triggers.items()):
+            return True
+        logger.info("Bet rollup definitions changed, replacing the triggers")
+        for name in installed:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+    measures = ",\n        ".join(f"{name} REAL NOT NULL DEFAULT 0" for name in MEASURES)
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS bet_rollups (
+        dimension TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        {measures},
+        PRIMARY KEY (dimension, bucket)
+    )
+    ''')
+
+    for sql in triggers.values():
+        cursor.execute(sql)
+
+    rebuild_rollups(conn)
+    return True
+
+
+def _rollups_current(conn):
+    """Whether bet_rollups exists with triggers matching the current definitions"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('bets', 'bet_rollups')")
+    if len(cursor.fetchall()) < 2:
+        return False
+    cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'bet_rollups_%'")
+    installed = dict(cursor.fetchall())
+    triggers = _trigger_sql(frozenset(_bets_columns(conn)))
+    return all(_normalize_sql(installed.get(name)) == _normalize_sql(sql) for name, sql in triggers.items())
+
+
+def _aggregate_totals(conn):
+    """Totals over every bet straight from the bets table, for readers that don't create the rollups"""
+    if not _bets_columns(conn):
+        return {name: 0 for name in MEASURES}
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {', '.join(f'COALESCE(SUM({sql}), 0)' for sql in MEASURES.values())} FROM bets R")
+    totals = dict(zip(MEASURES, cursor.fetchone()))
+    totals.update({name: int(totals[name]) for name in COUNT_MEASURES})
+    return totals
+
+
+def rebuild_rollups(conn):
+    """Recompute every rollup from the bets table (one pass per dimension)"""
+    columns = _bets_columns(conn)
+    names = ", ".join(MEASURES)
+    sums = ", ".join(f"SUM({sql})" for sql in MEASURES.values())
+
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM bet_rollups")
+    for dimension in DIMENSIONS:
+        cursor.execute(f'''
+        INSERT INTO bet_rollups (dimension, bucket, {names})
+        SELECT '{dimension}', {_bucket_sql(dimension, columns)} AS bucket, {sums}
+        FROM bets R
+        GROUP BY bucket
+        ''')
+    conn.commit()
+    logger.info("Rebuilt bet rollups")
+
+
+def _fetch(conn, dimension):
+    cursor = conn.cursor()
+    cursor.execute(f'''
+    SELECT bucket, {", ".join(MEASURES)} FROM bet_rollups
+    WHERE dimension = ? AND bets > 0
+    ''', (dimension,))
+    names = [d[0] for d in cursor.description]
+    rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+    for row in rows:
+        row.update({name: int(row[name]) for name in COUNT_MEASURES})
+    return rows
+
+
+def get_totals(conn, create=True):
+    """
+    Rolled-up totals over every bet.
+
+    Args:
+        conn: Connection to a database with a bets table
+        create: Create (and backfill) the rollups if they aren't in place. Read-only
+                callers pass False and get the totals aggregated from bets instead
+
+    Returns:
+        Dict of MEASURES column -> total (all 0 with no bets)
+    """
+    if create:
+        initialize_tables(conn)
+    elif not _rollups_current(conn):
+        return _aggregate_totals(conn)
+    rows = _fetch(conn, 'overall')
+    return rows[0] if rows else {name: 0 for name in MEASURES}
+
+
+def get_breakdown(conn, dimension, settled_only=True):
+    """
+    Rolled-up totals per bucket of a dimension.
+
+    Args:
+        conn: Connection to a database with a bets table
+        dimension: One of DIMENSIONS other than 'overall'
+        settled_only: Skip buckets with no settled bets
+
+    Returns:
+        List of dicts with 'bucket' (None for bets without a value) and the
+        MEASURES columns, in BUCKET_ORDER for the fixed buckets and by name
+        otherwise
+    """
+    initialize_tables(conn)
+    rows = [r for r in _fetch(conn, dimension) if r['settled'] > 0 or not settled_only]
+    order = BUCKET_ORDER.get(dimension)
+    if order:
+        rows.sort(key=lambda r: order.index(r['bucket']) if r['bucket'] in order else len(order))
+    else:
+        rows.sort(key=lambda r: r['bucket'])
+    for row in rows:
+        row['bucket'] = row['bucket'] or None
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain incremental bet performance rollups")
+    parser.add_argument("command", choices=["rebuild"], help="rebuild: recompute rollups from the bets table")
+    parser.add_argument("--db", default="golf_betting_history.db", help="Database with the bets table")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if initialize_tables(conn):
+            rebuild_rollups(conn)
+        else:
+            print(f"No bets table in {args.db}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
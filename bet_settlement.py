@@ -0,0 +1,364 @@
+"""
+Batch settlement of pending bets from final event results.
+
+Pending bets are loaded in one query and grouped by event. Results for each
+event are fetched once, and every outright, matchup and 3-ball bet on it is
+resolved, including dead-heat reductions and voids. The outcomes are written
+with a single executemany in one transaction. The rollup and bankroll ledger
+triggers on bets run inside that same transaction, so a run either settles
+everything it resolved or nothing at all.
+
+Results come from a source with a fetch(event_id, year) method that returns
+a DataGolf historical rounds payload, or None if it has no results yet:
+
+    DataGolfResults    the tracker's DataGolf client
+    LocalResults       JSON files in the same format, for replays and tests
+    PrefetchedResults  payloads already fetched, e.g. concurrently by the scheduler
+
+A payload is only settled once it is final: marked event_completed, or with
+every player through the final round or out of the event (cut, WD, DQ).
+
+Usage:
+    python bet_settlement.py --db golf_betting_history.db --results-dir data/results
+"""
+
+import os
+import json
+import sqlite3
+import argparse
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('golf.bet_settlement')
+
+# Bets on a single round, settled on that round's score
+ROUND_MARKETS = ('round_matchups', '3_balls')
+
+# An event is over once every player has this round's score or is out of it
+FINAL_ROUND = 4
+
+# Finishes that take a player out of the event before the final round
+OUT_OF_EVENT = {'CUT', 'MC', 'MDF', 'WD', 'W/D', 'DQ'}
+
+PENDING_COLUMNS = ['bet_id', 'event_id', 'bet_type', 'bet_market', 'player_id', 'player_name',
+                   'opponent_id', 'opponent_name', 'odds', 'stake', 'potential_return', 'round_num',
+                   'placed_date', 'event_start_date']
+
+
+class EventResults:
+    """Final results of one event, indexed by player"""
+
+    def __init__(self, payload, final_round=FINAL_ROUND):
+        """
+        Args:
+            payload: DataGolf historical rounds response, with a 'scores' list
+                of players holding dg_id, player_name, fin_text and round_N scores
+            final_round: Last round of the event, for payloads without event_completed
+        """
+        # backtest (and pandas with it) is only loaded once there are results to settle
+        from backtest import parse_position
+
+        self.players = {}
+        self.names = {}
+        finished = []
+        for row in payload.get('scores') or []:
+            if row.get('dg_id') is None:
+                continue
+            player_id = int(row['dg_id'])
+            rounds = {}
+            for key, value in row.items():
+                if key.startswith('round_') and isinstance(value, dict) and value.get('score') is not None:
+                    rounds[int(key[len('round_'):])] = value['score']
+            self.players[player_id] = {
+                'position': parse_position(row.get('fin_text')),
+                'rounds': rounds,
+            }
+            out = str(row.get('fin_text') or '').strip().upper() in OUT_OF_EVENT
+            finished.append(out or final_round in rounds)
+            if row.get('player_name'):
+                self.names[row['player_name'].strip().lower()] = player_id
+
+        # Players sharing each finishing position, for dead heats
+        self.tied = Counter(p['position'] for p in self.players.values() if p['position'] is not None)
+
+        # A payload taken mid-event has live positions, and missed cuts would already lose
+        self.completed = bool(payload.get('event_completed')) or (bool(finished) and all(finished))
+
+    def player_id(self, player_id=None, player_name=None):
+        """ID of a player in the field, looked up by name if the ID is missing"""
+        if player_id is not None and int(player_id) in self.players:
+            return int(player_id)
+        if player_name:
+            return self.names.get(player_name.strip().lower())
+        return None
+
+    def finish(self, player_id):
+        """(position, players tied there); position None for a missed cut/WD/DQ"""
+        position = self.players[player_id]['position']
+        return position, self.tied.get(position, 1)
+
+    def round_score(self, player_id, round_num):
+        return self.players[player_id]['rounds'].get(int(round_num))
+
+    def total(self, player_id):
+        """(rounds completed, strokes); more rounds beats fewer, then fewer strokes"""
+        rounds = self.players[player_id]['rounds']
+        return len(rounds), sum(rounds.values())
+
+
+class DataGolfResults:
+    """Final results through the tracker's DataGolf client"""
+
+    def __init__(self, tracker, tours=("pga",)):
+        """
+        Args:
+            tracker: GolfBettingTracker whose API key and client to use
+            tours: Tours to look an event up in, in order
+        """
+        self.tracker = tracker
+        self.tours = list(tours)
+
+    def fetch(self, event_id, year):
+        for tour in self.tours:
+            payload = self.tracker.fetch_event_results(event_id, year, tour=tour)
+            if payload and isinstance(payload.get('scores'), list) and payload['scores']:
+                return payload
+        return None
+
+
+class LocalResults:
+    """Final results from <results_dir>/<event_id>_<year>.json files"""
+
+    def __init__(self, results_dir):
+        self.results_dir = results_dir
+
+    def fetch(self, event_id, year):
+        path = os.path.join(self.results_dir, f"{event_id}_{year}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+
+class PrefetchedResults:
+    """Final results fetched ahead of time, keyed by (event_id, year)"""
+
+    def __init__(self, payloads):
+        self.payloads = {(str(event_id), str(year)): payload for (event_id, year), payload in payloads.items()}
+
+    def fetch(self, event_id, year):
+        return self.payloads.get((str(event_id), str(year)))
+
+
+def _event_key(event_id, event_start_date, placed_date, default_date):
+    """
+    (event_id, year) a bet settles on.
+
+    The year is the event's start year. A bet placed in December on a January
+    event must not settle on last year's edition. Bets recorded without a
+    start date fall back to the year they were placed in.
+    """
+    return str(event_id), str(event_start_date or placed_date or default_date)[:4]
+
+
+def pending_events(conn):
+    """
+    Events with pending bets.
+
+    Returns:
+        List of (event_id, year) to fetch results for
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(bets)")}
+    start_date = 'event_start_date' if 'event_start_date' in columns else 'NULL'
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT DISTINCT event_id, {start_date}, placed_date FROM bets "
+                   f"WHERE outcome = 'pending' AND event_id IS NOT NULL")
+    now = datetime.now()
+    return sorted({_event_key(event_id, event_start_date, placed_date, now)
+                   for event_id, event_start_date, placed_date in cursor.fetchall()})
+
+
+def _outright(bet, results, player_id):
+    from backtest import payout_fraction
+    fraction = payout_fraction(bet['bet_market'], *results.finish(player_id))
+    if np.isnan(fraction):
+        return None
+    return 'win' if fraction > 0 else 'loss', fraction
+
+
+def _head_to_head(bet, results, player_id, opponent_ids):
+    """Outcome of a matchup or 3-ball; ties for the lead dead-heat (3-balls) or push (matchups)"""
+    ids = [player_id] + opponent_ids
+    if bet['bet_market'] in ROUND_MARKETS:
+        if bet['round_num'] is None:
+            return None
+        scores = [results.round_score(p, bet['round_num']) for p in ids]
+        if any(s is None for s in scores):
+            return 'void', 1.0  # a player didn't complete the round
+        keys = [-s for s in scores]
+    else:
+        totals = [results.total(p) for p in ids]
+        if any(rounds == 0 for rounds, _ in totals):
+            return 'void', 1.0  # a player didn't tee off
+        keys = [(rounds, -strokes) for rounds, strokes in totals]
+
+    best = max(keys)
+    if keys[0] != best:
+        return 'loss', 0.0
+    tied = keys.count(best)
+    if tied == 1:
+        return 'win', 1.0
+    if bet['bet_market'] == '3_balls':
+        return 'win', 1.0 / tied
+    return 'void', 1.0
+
+
+def resolve_bet(bet, results):
+    """
+    Work out how a pending bet settles.
+
+    Args:
+        bet: Dict with the PENDING_COLUMNS of a bet
+        results: EventResults of the bet's event
+
+    Returns:
+        (outcome, payout fraction) - a fraction below 1 on a win is a dead
+        heat - or None if the bet can't be settled from these results
+    """
+    player_id = results.player_id(bet['player_id'], bet['player_name'])
+    if player_id is None:
+        return 'void', 1.0  # didn't start
+
+    if bet['bet_type'] == 'outright':
+        return _outright(bet, results, player_id)
+
+    if bet['bet_type'] == '3ball':
+        # 3-balls store the other two players' names only
+        names = (bet['opponent_name'] or '').split(' & ')
+        opponent_ids = [results.player_id(player_name=name) for name in names]
+    else:
+        opponent_ids = [results.player_id(bet['opponent_id'], bet['opponent_name'])]
+    if not opponent_ids or any(p is None for p in opponent_ids):
+        return 'void', 1.0
+    return _head_to_head(bet, results, player_id, opponent_ids)
+
+
+def _settlement(bet, outcome, fraction):
+    """(profit_loss, total paid back, note) for a resolved bet"""
+    stake, odds = bet['stake'] or 0, bet['odds'] or 0
+    if outcome == 'void':
+        return 0.0, stake, None
+    if outcome == 'loss':
+        return -stake, 0.0, None
+    payout = stake * odds * fraction
+    note = None
+    if fraction < 1:
+        note = f"Original potential return: ${bet['potential_return'] or stake * odds:.2f} (dead heat adjusted)"
+    return payout - stake, payout, note
+
+
+def settle_pending_bets(conn, source, settled_date=None):
+    """
+    Settle every pending bet whose event has final results.
+
+    Args:
+        conn: Connection to a database with a bets table
+        source: Results source with fetch(event_id, year)
+        settled_date: Settlement timestamp (now by default)
+
+    Returns:
+        Dictionary with the settled bet IDs and counts of wins, losses,
+        voids, dead heats and bets left pending
+    """
+    if settled_date is None:
+        settled_date = datetime.now()
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(bets)")}
+    select = ", ".join(c if c in columns else f"NULL AS {c}" for c in PENDING_COLUMNS)
+
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {select} FROM bets WHERE outcome = 'pending'")
+    pending = [dict(zip(PENDING_COLUMNS, row)) for row in cursor.fetchall()]
+
+    by_event = defaultdict(list)
+    for bet in pending:
+        if bet['event_id'] is None:
+            continue
+        by_event[_event_key(bet['event_id'], bet['event_start_date'], bet['placed_date'], settled_date)].append(bet)
+
+    summary = {'bet_ids': [], 'win': 0, 'loss': 0, 'void': 0, 'dead_heats': 0, 'events': 0,
+               'unresolved': len(pending)}
+    updates = []
+    for (event_id, year), bets in by_event.items():
+        payload = source.fetch(event_id, year)
+        if not payload:
+            logger.info(f"No final results yet for event {event_id} ({year}), {len(bets)} bets stay pending")
+            continue
+        results = EventResults(payload)
+        if not results.completed:
+            logger.info(f"Event {event_id} ({year}) isn't final yet, {len(bets)} bets stay pending")
+            continue
+        summary['events'] += 1
+
+        for bet in bets:
+            resolved = resolve_bet(bet, results)
+            if resolved is None:
+                logger.warning(f"Can't settle bet {bet['bet_id']} ({bet['bet_type']} {bet['bet_market']}) from results")
+                continue
+            outcome, fraction = resolved
+            profit_loss, payout, note = _settlement(bet, outcome, fraction)
+            dead_heat = outcome == 'win' and fraction < 1
+            updates.append({
+                'bet_id': bet['bet_id'], 'outcome': outcome, 'settled_date': settled_date,
+                'profit_loss': profit_loss, 'note': note,
+                'is_dead_heat': int(dead_heat), 'actual_payout': payout,
+            })
+            summary['bet_ids'].append(bet['bet_id'])
+            summary[outcome] += 1
+            summary['dead_heats'] += dead_heat
+
+    # Web app databases also record dead heats and the actual payout
+    extra = "".join(f", {c} = :{c}" for c in ('is_dead_heat', 'actual_payout') if c in columns)
+    with conn:
+        conn.executemany(f'''
+        UPDATE bets
+        SET outcome = :outcome, settled_date = :settled_date, profit_loss = :profit_loss{extra},
+            notes = CASE
+                WHEN :note IS NULL THEN notes
+                WHEN notes IS NULL OR notes = '' THEN :note
+                ELSE notes || ' | ' || :note
+            END
+        WHERE bet_id = :bet_id AND outcome = 'pending'
+        ''', updates)
+
+    summary['unresolved'] = len(pending) - len(updates)
+    logger.info(f"Settled {len(updates)} bets across {summary['events']} events "
+                f"({summary['win']} won, {summary['loss']} lost, {summary['void']} void, "
+                f"{summary['dead_heats']} dead heats); {summary['unresolved']} still pending")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Settle pending bets from final event results")
+    parser.add_argument("--db", default="golf_betting_history.db", help="Database with the bets table")
+    parser.add_argument("--results-dir", required=True,
+                        help="Directory of <event_id>_<year>.json DataGolf historical rounds files")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        summary = settle_pending_bets(conn, LocalResults(args.results_dir))
+        print(f"Settled {len(summary['bet_ids'])} bets, {summary['unresolved']} still pending")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
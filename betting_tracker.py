@@ -1,22 +1,142 @@
 import requests
-import pandas as pd
 import sqlite3
 import json
 from datetime import datetime
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+from bet_rollups import (initialize_tables as initialize_rollup_tables, get_totals, get_breakdown,
+                         DIMENSIONS, BUCKET_ORDER)
+from bankroll_ledger import initialize_tables as initialize_ledger_tables, BankrollLedger
+from closing_lines import initialize_tables as initialize_clv_tables
+
+# pandas, numpy, matplotlib/seaborn and the settlement and calibration modules
+# (which pull in pandas) are imported by the methods that use them, so
+# tracking a bet or reading a total doesn't pay for the analytics stack.
+
+# EV bucket expression over an unaliased bets row, shared with the rollups
+EV_BUCKET_SQL = DIMENSIONS['ev_bucket'].replace('R.', '')
+
+# analyze_mental_adjustment_impact range name -> mental form bucket
+MENTAL_FORM_RANGES = {
+    'strong_negative': 'Strong Negative',
+    'moderate_negative': 'Moderate Negative',
+    'neutral': 'Neutral',
+    'moderate_positive': 'Moderate Positive',
+    'strong_positive': 'Strong Positive',
+}
+
+def _pyplot():
+    """matplotlib.pyplot on the non-interactive Agg backend, imported on first plot"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _norm_id(value):
+    """Normalize an ID the way SQLite's column affinity would compare it"""
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+class PendingBetIndex:
+    """
+    Hash index of pending bets for O(1) duplicate checks.
+
+    Bets are keyed by (event, bet_type, market, player, opponent, round). A
+    lookup that leaves opponent or round as None matches any value, like the
+    SQL it replaces, so keys are also grouped by (event, bet_type, market,
+    player) to answer those lookups without scanning every pending bet.
+    """
+
+    KEY_COLUMNS = ['event_id', 'bet_type', 'bet_market', 'player_id', 'opponent_id', 'round_num']
+
+    def __init__(self, columns, rows=()):
+        """
+        Args:
+            columns: Column names of the `SELECT * FROM bets` rows being indexed
+            rows: Pending bet rows
+        """
+        self._id_pos = columns.index('bet_id')
+        self._key_pos = [columns.index(c) for c in self.KEY_COLUMNS]
+        self._rows = {}  # full key -> {bet_id: row}
+        self._groups = {}  # (event, bet_type, market, player) -> set of full keys
+        self._keys_by_id = {}
+        for row in rows:
+            self.add(row)
+
+    def __len__(self):
+        return len(self._keys_by_id)
+
+    @staticmethod
+    def _key(event_id, bet_type, bet_market, player_id, opponent_id, round_num):
+        return (str(event_id), bet_type, bet_market, _norm_id(player_id),
+                _norm_id(opponent_id), _norm_id(round_num))
+
+    def add(self, row):
+        """Add a `SELECT * FROM bets` row"""
+        bet_id = row[self._id_pos]
+        key = self._key(*(row[i] for i in self._key_pos))
+        self._rows.setdefault(key, {})[bet_id] = row
+        self._groups.setdefault(key[:4], set()).add(key)
+        self._keys_by_id[bet_id] = key
+
+    def remove(self, bet_id):
+        """Drop a bet once it is no longer pending"""
+        key = self._keys_by_id.pop(bet_id, None)
+        if key is None:
+            return
+        bets = self._rows[key]
+        bets.pop(bet_id, None)
+        if not bets:
+            del self._rows[key]
+            group = self._groups[key[:4]]
+            group.discard(key)
+            if not group:
+                del self._groups[key[:4]]
+
+    def find(self, event_id, bet_type, bet_market, player_id, opponent_id=None, round_num=None):
+        """
+        Find a pending bet matching the given fields.
+
+        Returns:
+            The lowest bet_id matching row, or None
+        """
+        key = self._key(event_id, bet_type, bet_market, player_id, opponent_id, round_num)
+
+        if opponent_id is not None and round_num is not None:
+            candidates = [key] if key in self._rows else []
+        else:
+            candidates = [
+                k for k in self._groups.get(key[:4], ())
+                if (opponent_id is None or k[4] == key[4]) and (round_num is None or k[5] == key[5])
+            ]
+
+        matches = [row for k in candidates for row in self._rows[k].values()]
+        if not matches:
+            return None
+        return min(matches, key=lambda row: row[self._id_pos])
+
 
 class GolfBettingTracker:
-    def __init__(self, api_key, kelly_fraction=0.25, default_sportsbook=None):
+    def __init__(self, api_key, kelly_fraction=0.25, default_sportsbook=None, initial_bankroll=None):
         self.api_key = api_key
         self.base_url = "https://feeds.datagolf.com"
+        self.initial_bankroll = initial_bankroll  # Opening deposit if the bankroll ledger is new
         self.db_conn = self._initialize_database()
+        self.ledger = BankrollLedger(self.db_conn)
+        self._pending_index = None  # Loaded on first duplicate check, see refresh_pending_index()
+        self._report_cache = {}  # (start_date, end_date) -> (db version, report)
         self.kelly_fraction = kelly_fraction  # Set Kelly fraction during initialization
         self.default_sportsbook = default_sportsbook.lower() if default_sportsbook else None
     
     def _initialize_database(self):
         """Set up SQLite database with necessary tables for tracking bets and results"""
-        conn = sqlite3.connect('golf_betting_history.db')
+        # The agent scheduler uses the connection from its agent thread (one caller at a time)
+        conn = sqlite3.connect('golf_betting_history.db', check_same_thread=False)
         cursor = conn.cursor()
         
         # Create bets table for storing bet history
@@ -46,9 +166,14 @@ class GolfBettingTracker:
             expected_value REAL,  -- EV of the bet (in percentage)
             round_num INTEGER,  -- Round number for round-specific bets
             notes TEXT,
-            posted_to_twitter INTEGER DEFAULT 0  -- 0=no, 1=yes
+            posted_to_twitter INTEGER DEFAULT 0,  -- 0=no, 1=yes
+            event_start_date TEXT  -- Event's scheduled start; its year is the results year
         )
         ''')
+
+        # Bets recorded before event_start_date settle on the year they were placed in
+        if 'event_start_date' not in {row[1] for row in cursor.execute("PRAGMA table_info(bets)")}:
+            cursor.execute("ALTER TABLE bets ADD COLUMN event_start_date TEXT")
         
         # Create events table to track tournaments
         cursor.execute('''
@@ -79,6 +204,20 @@ class GolfBettingTracker:
             current_bankroll REAL
         )
         ''')
+
+        # Pending bets are loaded in one query per run for the duplicate index
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_bets_outcome ON bets (outcome)")
+
+        # Performance reports filter on these dates in SQL
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_bets_placed_date ON bets (placed_date)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_bets_settled_date ON bets (settled_date)")
+
+        # Running performance totals and the bankroll ledger, kept current by triggers on bets
+        initialize_rollup_tables(conn)
+        initialize_ledger_tables(conn, opening_balance=self.initial_bankroll)
+
+        # Closing lines and per-bet CLV, filled in as odds boards are polled
+        initialize_clv_tables(conn)
         
         conn.commit()
         return conn
@@ -152,6 +291,21 @@ class GolfBettingTracker:
             print(f"Error fetching model predictions: {response.status_code}")
             return None
     
+    def fetch_event_results(self, event_id, year, tour="pga"):
+        """Fetch final round scores and finishing positions for a completed event
+        
+        Returns None until DataGolf has the event's results; settle_pending_bets()
+        also checks the payload is final (see bet_settlement.EventResults.completed).
+        """
+        url = f"{self.base_url}/historical-raw-data/rounds?tour={tour}&event_id={event_id}&year={year}&file_format=json&key={self.api_key}"
+        response = requests.get(url)
+        
+        if response.status_code == 200:
+            return response.json()
+        else:
+            print(f"Error fetching event results: {response.status_code}")
+            return None
+    
     def calculate_kelly_criterion(self, probability, odds):
         """
         Calculate Kelly Criterion for optimal bet sizing
@@ -296,8 +450,12 @@ class GolfBettingTracker:
     def record_bet(self, event_id, event_name, bet_type, bet_market, player_id, 
                 player_name, odds, stake, base_model_probability, 
                 mental_form_score=None, mental_adjustment=None, adjusted_probability=None,
-                opponent_id=None, opponent_name=None, round_num=None, notes=None):
-        """Record a new bet in the database"""
+                opponent_id=None, opponent_name=None, round_num=None, notes=None, event_start_date=None):
+        """Record a new bet in the database
+
+        event_start_date is the schedule's start_date for the event; settlement
+        fetches results for its year rather than the year the bet was placed.
+        """
         potential_return = stake * odds
         
         # calculate adjusted probability from the base probability and adjustment
@@ -322,18 +480,24 @@ class GolfBettingTracker:
             opponent_id, opponent_name, odds, stake, potential_return, 
             placed_date, outcome, base_model_probability, mental_form_score,
             mental_adjustment, adjusted_probability, book_implied_probability, 
-            expected_value, round_num, notes
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            expected_value, round_num, notes, event_start_date
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             event_id, event_name, bet_type, bet_market, player_id, player_name,
             opponent_id, opponent_name, odds, stake, potential_return,
             datetime.now(), 'pending', base_model_probability, mental_form_score,
             mental_adjustment, adjusted_probability, book_implied_probability,
-            expected_value, round_num, notes
+            expected_value, round_num, notes, event_start_date
         ))
         
         self.db_conn.commit()
-        return cursor.lastrowid
+        bet_id = cursor.lastrowid
+
+        if self._pending_index is not None:
+            cursor.execute("SELECT * FROM bets WHERE bet_id = ?", (bet_id,))
+            self._pending_index.add(cursor.fetchone())
+
+        return bet_id
 
     def identify_recommended_bets(self, db_path="data/db/mental_form.db", min_ev=5.0, bankroll=1000, min_stake=1.0, sportsbook=None, max_recommendations=5):
         """
@@ -487,8 +651,32 @@ class GolfBettingTracker:
         ''', (outcome, settled_date, profit_loss, bet_id))
         
         self.db_conn.commit()
+
+        if self._pending_index is not None and outcome != 'pending':
+            self._pending_index.remove(bet_id)
+
         return True
     
+    def settle_pending_bets(self, results_source, settled_date=None):
+        """
+        Settle every pending bet whose event has final results, in one transaction
+        
+        Args:
+            results_source: bet_settlement.DataGolfResults or LocalResults
+            settled_date: Settlement timestamp (now by default)
+            
+        Returns:
+            Settlement summary from bet_settlement.settle_pending_bets()
+        """
+        from bet_settlement import settle_pending_bets
+        summary = settle_pending_bets(self.db_conn, results_source, settled_date)
+        
+        if self._pending_index is not None:
+            for bet_id in summary['bet_ids']:
+                self._pending_index.remove(bet_id)
+                
+        return summary
+    
     def mark_bet_as_posted(self, bet_id):
         """Mark a bet as posted to Twitter"""
         cursor = self.db_conn.cursor()
@@ -501,6 +689,14 @@ class GolfBettingTracker:
         cursor.execute("SELECT * FROM bets WHERE outcome = 'pending'")
         return cursor.fetchall()
     
+    def get_pending_event_bets(self, event_id, bet_type='outright'):
+        """Pending bets of one type on an event, as dictionaries"""
+        cursor = self.db_conn.cursor()
+        cursor.execute("SELECT * FROM bets WHERE outcome = 'pending' AND event_id = ? AND bet_type = ?",
+                       (str(event_id), bet_type))
+        columns = [d[0] for d in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
     def has_existing_bet(self, event_id, bet_type, bet_market, player_id, opponent_id=None, round_num=None, odds_threshold=0.1):
         """
         Check if a similar bet already exists and is still pending
@@ -517,133 +713,178 @@ class GolfBettingTracker:
         Returns:
             Tuple (exists, existing_bet) where exists is a boolean and existing_bet is the bet data if found
         """
+        if self._pending_index is None:
+            self.refresh_pending_index()
+
+        # Opponent only narrows matchup-style bets, mirroring the original SQL filter
+        if bet_type not in ['matchup', '3ball']:
+            opponent_id = None
+
+        existing_bet = self._pending_index.find(event_id, bet_type, bet_market, player_id,
+                                                opponent_id, round_num)
+        return existing_bet is not None, existing_bet
+
+    def refresh_pending_index(self):
+        """
+        Load all pending bets into the in-memory duplicate index.
+
+        Called lazily by has_existing_bet(); call it again at the start of a
+        run if other processes may have written to the bets table since.
+        """
         cursor = self.db_conn.cursor()
-        
-        # Base query
-        query = '''
-        SELECT * FROM bets 
-        WHERE event_id = ? 
-        AND bet_type = ? 
-        AND bet_market = ? 
-        AND player_id = ?
-        AND outcome = 'pending'
-        '''
-        params = [event_id, bet_type, bet_market, player_id]
-        
-        # For matchups, also check the opponent
-        if bet_type in ['matchup', '3ball'] and opponent_id is not None:
-            query += ' AND opponent_id = ?'
-            params.append(opponent_id)
-        
-        # For round-specific bets, check the round number in notes
-        if round_num is not None:
-            query += " AND round_num = ?"
-            params.append(round_num)
-        
-        # Execute the query
-        cursor.execute(query, tuple(params))
-        
-        existing_bets = cursor.fetchall()
-        
-        # If no existing bets found, return False
-        if not existing_bets:
-            return False, None
-        
-        # Return the first matching bet
-        return True, existing_bets[0]
+        cursor.execute("SELECT * FROM bets WHERE outcome = 'pending'")
+        columns = [d[0] for d in cursor.description]
+        self._pending_index = PendingBetIndex(columns, cursor.fetchall())
+        return len(self._pending_index)
     
     def update_performance_metrics(self, current_bankroll):
         """Update performance metrics table with current stats"""
         cursor = self.db_conn.cursor()
         
-        # Get overall betting stats
-        cursor.execute('''
-        SELECT 
-            COUNT(*) as total_bets,
-            SUM(CASE WHEN outcome = 'win' THEN 1 ELSE 0 END) as winning_bets,
-            SUM(CASE WHEN outcome = 'loss' THEN 1 ELSE 0 END) as losing_bets,
-            SUM(CASE WHEN outcome = 'pending' THEN 1 ELSE 0 END) as pending_bets,
-            SUM(stake) as total_staked,
-            SUM(CASE WHEN outcome = 'win' THEN potential_return ELSE 0 END) as total_returns,
-            SUM(CASE WHEN outcome != 'pending' THEN profit_loss ELSE 0 END) as profit_loss
-        FROM bets
-        ''')
+        # Overall betting stats from the rollups rather than a scan of every bet
+        totals = get_totals(self.db_conn)
+        total_staked = totals['staked']
+        profit_loss = totals['profit_loss']
         
-        results = cursor.fetchone()
+        # Avoid division by zero
+        roi = (profit_loss / total_staked) * 100 if total_staked else 0
         
-        if results:
-            total_bets, winning_bets, losing_bets, pending_bets, total_staked, total_returns, profit_loss = results
-            
-            # Avoid division by zero
-            roi = (profit_loss / total_staked) * 100 if total_staked else 0
-            
-            cursor.execute('''
-            INSERT INTO performance_metrics (
-                date, total_bets, winning_bets, losing_bets, pending_bets,
-                total_staked, total_returns, profit_loss, roi, current_bankroll
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                datetime.now(), total_bets, winning_bets, losing_bets, pending_bets,
-                total_staked, total_returns, profit_loss, roi, current_bankroll
-            ))
-            
-            self.db_conn.commit()
-            return True
+        cursor.execute('''
+        INSERT INTO performance_metrics (
+            date, total_bets, winning_bets, losing_bets, pending_bets,
+            total_staked, total_returns, profit_loss, roi, current_bankroll
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            datetime.now(), totals['bets'], totals['wins'], totals['losses'], totals['pending'],
+            total_staked, totals['returns'], profit_loss, roi, current_bankroll
+        ))
         
-        return False
+        self.db_conn.commit()
+        return True
     
-    def get_betting_history_dataframe(self):
-        """Get betting history as a pandas DataFrame"""
-        return pd.read_sql_query("SELECT * FROM bets", self.db_conn)
+    def get_betting_history_dataframe(self, columns=None):
+        """
+        Get betting history as a pandas DataFrame
+
+        Args:
+            columns: Bets columns to fetch (all of them by default)
+        """
+        import pandas as pd
+        select = ", ".join(columns) if columns else "*"
+        return pd.read_sql_query(f"SELECT {select} FROM bets", self.db_conn)
     
     def get_performance_metrics_dataframe(self):
         """Get performance metrics history as a pandas DataFrame"""
+        import pandas as pd
         return pd.read_sql_query("SELECT * FROM performance_metrics ORDER BY date", self.db_conn)
-    
-    def generate_performance_report(self, start_date=None, end_date=None):
-        """Generate a comprehensive performance report"""
-        bets_df = self.get_betting_history_dataframe()
-        
+
+    def _report_version(self):
+        """Changes whenever this or any other connection writes to the database"""
+        data_version = self.db_conn.execute("PRAGMA data_version").fetchone()[0]
+        return data_version, self.db_conn.total_changes
+
+    def _settled_window(self, start_date=None, end_date=None):
+        """WHERE clause and parameters for settled bets placed/settled inside a window"""
+        clauses, params = ["outcome != 'pending'"], []
         if start_date:
-            bets_df = bets_df[bets_df['placed_date'] >= start_date]
+            clauses.append("placed_date >= ?")
+            params.append(start_date)
         if end_date:
-            bets_df = bets_df[bets_df['settled_date'] <= end_date]
-            
-        # Filter out pending bets for calculations
-        settled_bets = bets_df[bets_df['outcome'] != 'pending']
-        
-        if settled_bets.empty:
+            clauses.append("settled_date <= ?")
+            params.append(end_date)
+        return " AND ".join(clauses), params
+
+    def _grouped_performance(self, bucket_sql, where, params, buckets=None):
+        """
+        Count, profit/loss, stake and ROI of settled bets per bucket, aggregated in SQL
+
+        Args:
+            bucket_sql: SQL expression to group by; bets where it is NULL are skipped
+            where: WHERE clause selecting the bets
+            params: Parameters for the WHERE clause
+            buckets: Fixed bucket order; buckets without bets are included with zeros
+
+        Returns:
+            Dict of column -> {bucket: value}, like DataFrame.to_dict()
+        """
+        cursor = self.db_conn.cursor()
+        cursor.execute(f'''
+        SELECT {bucket_sql} AS bucket, COUNT(*), SUM(profit_loss), SUM(stake)
+        FROM bets
+        WHERE {where} AND bucket IS NOT NULL
+        GROUP BY bucket
+        ''', params)
+        rows = {row[0]: row[1:] for row in cursor.fetchall()}
+        
+        analysis = {'count': {}, 'profit_loss': {}, 'stake': {}, 'roi': {}}
+        for bucket in buckets or sorted(rows):
+            count, profit_loss, stake = rows.get(bucket, (0, 0.0, 0.0))
+            profit_loss, stake = profit_loss or 0.0, stake or 0.0
+            analysis['count'][bucket] = count
+            analysis['profit_loss'][bucket] = profit_loss
+            analysis['stake'][bucket] = stake
+            analysis['roi'][bucket] = (profit_loss / stake) * 100 if stake else float('nan')
+        return analysis
+
+    def generate_performance_report(self, start_date=None, end_date=None):
+        """
+        Generate a comprehensive performance report
+
+        Filtering and grouping run as SQL aggregates over the placed/settled
+        date indexes (or the bet rollups when no window is given), so only the
+        summary rows are loaded. Reports are cached per (start_date, end_date)
+        until the database changes.
+
+        Args:
+            start_date: Only bets placed on or after this date
+            end_date: Only bets settled on or before this date
+
+        Returns:
+            Dictionary with the report, or a status message if no bets settled
+        """
+        version = self._report_version()
+        cached = self._report_cache.get((start_date, end_date))
+        if cached and cached[0] == version:
+            return dict(cached[1])
+
+        where, params = self._settled_window(start_date, end_date)
+        
+        if start_date or end_date:
+            cursor = self.db_conn.cursor()
+            cursor.execute(f'''
+            SELECT COUNT(*), SUM(outcome = 'win'), SUM(stake), SUM(profit_loss)
+            FROM bets WHERE {where}
+            ''', params)
+            total_bets, winning_bets, total_stake, total_profit_loss = cursor.fetchone()
+            market_analysis = self._grouped_performance("bet_market", where, params)
+        else:
+            # Every settled bet counts, which the rollups already hold
+            totals = get_totals(self.db_conn)
+            total_bets, winning_bets = totals['settled'], totals['wins']
+            total_stake, total_profit_loss = totals['settled_staked'], totals['profit_loss']
+            market_analysis = {'count': {}, 'profit_loss': {}, 'stake': {}, 'roi': {}}
+            for row in get_breakdown(self.db_conn, 'market'):
+                if row['bucket'] is None:
+                    continue
+                market_analysis['count'][row['bucket']] = row['settled']
+                market_analysis['profit_loss'][row['bucket']] = row['profit_loss']
+                market_analysis['stake'][row['bucket']] = row['settled_staked']
+                market_analysis['roi'][row['bucket']] = (
+                    (row['profit_loss'] / row['settled_staked']) * 100 if row['settled_staked'] else float('nan')
+                )
+
+        if not total_bets:
             return {
                 "status": "No settled bets in the specified period"
             }
             
         # Calculate key metrics
-        total_bets = len(settled_bets)
-        winning_bets = len(settled_bets[settled_bets['outcome'] == 'win'])
+        winning_bets = winning_bets or 0
+        total_stake = total_stake or 0.0
+        total_profit_loss = total_profit_loss or 0.0
         win_rate = winning_bets / total_bets if total_bets > 0 else 0
-        
-        total_stake = settled_bets['stake'].sum()
-        total_profit_loss = settled_bets['profit_loss'].sum()
         roi = (total_profit_loss / total_stake) * 100 if total_stake > 0 else 0
         
-        # Analyze by bet type
-        bet_type_analysis = settled_bets.groupby('bet_type').agg({
-            'bet_id': 'count',
-            'profit_loss': 'sum',
-            'stake': 'sum'
-        }).rename(columns={'bet_id': 'count'})
-        
-        bet_type_analysis['roi'] = (bet_type_analysis['profit_loss'] / bet_type_analysis['stake']) * 100
-        
-        # Analyze by market type
-        market_analysis = settled_bets.groupby('bet_market').agg({
-            'bet_id': 'count',
-            'profit_loss': 'sum',
-            'stake': 'sum'
-        }).rename(columns={'bet_id': 'count'})
-        
-        market_analysis['roi'] = (market_analysis['profit_loss'] / market_analysis['stake']) * 100
-        
         report = {
             "total_bets": total_bets,
             "winning_bets": winning_bets,
@@ -651,51 +892,47 @@ class GolfBettingTracker:
             "total_stake": total_stake,
             "total_profit_loss": total_profit_loss,
             "roi": roi,
-            "bet_type_analysis": bet_type_analysis.to_dict(),
-            "market_analysis": market_analysis.to_dict(),
-            "ev_analysis": self._analyze_value_performance(settled_bets)
+            "bet_type_analysis": self._grouped_performance("bet_type", where, params),
+            "market_analysis": market_analysis,
+            "ev_analysis": self._analyze_value_performance(where, params)
         }
         
-        return report
+        self._report_cache[(start_date, end_date)] = (version, report)
+        return dict(report)
     
-    def _analyze_value_performance(self, bets_df):
-        """Analyze performance based on Expected Value (EV)"""
-        # Create EV buckets using the proper column
-        bets_df['ev_bucket'] = pd.cut(
-            bets_df['expected_value'], 
-            bins=[-float('inf'), 0, 5, 10, 20, float('inf')],
-            labels=['Negative', '0-5%', '5-10%', '10-20%', '20%+']
-        )
-        
-        # Analyze by EV buckets
-        ev_analysis = bets_df.groupby('ev_bucket').agg({
-            'bet_id': 'count',
-            'profit_loss': 'sum',
-            'stake': 'sum'
-        }).rename(columns={'bet_id': 'count'})
-        
-        ev_analysis['roi'] = (ev_analysis['profit_loss'] / ev_analysis['stake']) * 100
-        
-        return ev_analysis.to_dict()
+    def _analyze_value_performance(self, where="outcome != 'pending'", params=()):
+        """
+        Analyze performance based on Expected Value (EV)
+
+        Args:
+            where: WHERE clause selecting the bets (settled bets by default)
+            params: Parameters for the WHERE clause
+        """
+        # Same EV buckets as the rollups; bets without an EV have none and are left out
+        return self._grouped_performance(EV_BUCKET_SQL, where, params, buckets=BUCKET_ORDER['ev_bucket'])
     
     def plot_bankroll_evolution(self, initial_bankroll=1000):
-        """Plot bankroll evolution over time"""
-        bets_df = self.get_betting_history_dataframe()
-        
-        # Sort by settled date and filter out pending bets
-        settled_bets = bets_df[bets_df['outcome'] != 'pending'].sort_values('settled_date')
+        """
+        Plot bankroll evolution over time from the bankroll ledger
+
+        initial_bankroll is only added when the ledger has no deposits, i.e.
+        it was created without an opening balance.
+        """
+        history = self.ledger.history()
         
-        if settled_bets.empty:
-            print("No settled bets to plot")
+        if history.empty:
+            print("No bankroll history to plot")
             return None
-            
-        # Calculate cumulative profit/loss
-        settled_bets['cumulative_pl'] = settled_bets['profit_loss'].cumsum()
-        settled_bets['bankroll'] = initial_bankroll + settled_bets['cumulative_pl']
+        
+        if not (history['entry_type'] == 'deposit').any():
+            history['bankroll'] += initial_bankroll
+        import pandas as pd
+        history['created_at'] = pd.to_datetime(history['created_at'])
         
         # Create plot
+        plt = _pyplot()
         plt.figure(figsize=(12, 6))
-        plt.plot(settled_bets['settled_date'], settled_bets['bankroll'])
+        plt.step(history['created_at'], history['bankroll'], where='post')
         plt.title('Bankroll Evolution Over Time')
         plt.xlabel('Date')
         plt.ylabel('Bankroll')
@@ -703,28 +940,29 @@ class GolfBettingTracker:
         
         # Save the plot
         plt.savefig('bankroll_evolution.png')
+        plt.close()
         return 'bankroll_evolution.png'
     
     def plot_ev_vs_roi(self):
         """Plot relationship between Expected Value and actual ROI"""
-        bets_df = self.get_betting_history_dataframe()
-        settled_bets = bets_df[bets_df['outcome'] != 'pending']
+        # ROI per EV bucket straight from the rollups
+        rows = {row['bucket']: row for row in get_breakdown(self.db_conn, 'ev_bucket')}
         
-        if settled_bets.empty:
+        if not rows:
             print("No settled bets to plot")
             return None
-            
-        # Create EV buckets using the proper column
-        settled_bets['ev_bucket'] = pd.cut(
-            settled_bets['expected_value'], 
-            bins=[-float('inf'), 0, 5, 10, 20, float('inf')],
-            labels=['Negative', '0-5%', '5-10%', '10-20%', '20%+']
-        )
         
-        # Calculate ROI by EV bucket
-        ev_roi = settled_bets.groupby('ev_bucket').apply(
-            lambda x: (x['profit_loss'].sum() / x['stake'].sum()) * 100 if x['stake'].sum() > 0 else 0
-        ).reset_index(name='roi')
+        import pandas as pd
+        import seaborn as sns
+        plt = _pyplot()
+        ev_roi = pd.DataFrame({
+            'ev_bucket': BUCKET_ORDER['ev_bucket'],
+            'roi': [
+                (rows[b]['profit_loss'] / rows[b]['settled_staked']) * 100
+                if b in rows and rows[b]['settled_staked'] > 0 else 0
+                for b in BUCKET_ORDER['ev_bucket']
+            ]
+        })
         
         # Create plot
         plt.figure(figsize=(10, 6))
@@ -736,6 +974,7 @@ class GolfBettingTracker:
         
         # Save the plot
         plt.savefig('ev_vs_roi.png')
+        plt.close()
         return 'ev_vs_roi.png'
 
     def analyze_mental_adjustment_impact(self):
@@ -743,78 +982,69 @@ class GolfBettingTracker:
         Analyze how mental form adjustments are affecting betting performance
         
         Returns:
-            Dictionary with performance metrics
+            Dictionary with performance metrics, plus 'calibration' comparing
+            base and adjusted probabilities (see calibration.calibration_report)
         """
-        cursor = self.db_conn.cursor()
+        import numpy as np
+        import pandas as pd
+        from calibration import load_settled_bets, calibration_report, mental_bucket
         
-        # Get all settled bets with both base and adjusted probabilities
-        cursor.execute('''
-        SELECT 
-            bet_id, player_name, outcome, stake, profit_loss,
-            base_model_probability, adjusted_probability, mental_adjustment,
-            odds, mental_form_score
+        # One columnar load of the settled bets with both probabilities
+        bets = pd.read_sql_query('''
+        SELECT outcome, stake, profit_loss, mental_adjustment, mental_form_score
         FROM bets 
         WHERE outcome != 'pending'
         AND base_model_probability IS NOT NULL
         AND adjusted_probability IS NOT NULL
-        ''')
+        ''', self.db_conn)
         
-        bets = cursor.fetchall()
-        
-        if not bets:
+        if bets.empty:
             return {"error": "No settled bets with both base and adjusted probabilities"}
         
+        stake = bets['stake'].to_numpy(dtype=float)
+        profit = bets['profit_loss'].to_numpy(dtype=float)
+        won = (bets['outcome'] == 'win').to_numpy()
+        adjustment = bets['mental_adjustment'].to_numpy(dtype=float)
+        score = bets['mental_form_score'].to_numpy(dtype=float)
+        
+        def roi(mask):
+            total_stake = stake[mask].sum()
+            return float(profit[mask].sum() / total_stake) * 100 if mask.any() and total_stake > 0 else 0
+        
         # Calculate key metrics
         results = {
             "total_bets": len(bets),
-            "winning_bets": sum(1 for bet in bets if bet[2] == 'win'),
-            "total_stake": sum(bet[3] for bet in bets),
-            "total_profit": sum(bet[4] for bet in bets),
-            "positive_adjustments": sum(1 for bet in bets if bet[7] > 0),
-            "negative_adjustments": sum(1 for bet in bets if bet[7] < 0),
-            "neutral_adjustments": sum(1 for bet in bets if bet[7] == 0),
+            "winning_bets": int(won.sum()),
+            "total_stake": float(stake.sum()),
+            "total_profit": float(profit.sum()),
+            "positive_adjustments": int((adjustment > 0).sum()),
+            "negative_adjustments": int((adjustment < 0).sum()),
+            "neutral_adjustments": int((adjustment == 0).sum()),
         }
         
-        # ROI calculation
-        results["overall_roi"] = (results["total_profit"] / results["total_stake"]) * 100 if results["total_stake"] > 0 else 0
-        
-        # Group by adjustment direction
-        positive_adj_bets = [bet for bet in bets if bet[7] > 0]
-        negative_adj_bets = [bet for bet in bets if bet[7] < 0]
-        neutral_adj_bets = [bet for bet in bets if bet[7] == 0]
-        
-        # Calculate ROI by adjustment direction
-        results["positive_adj_roi"] = (sum(bet[4] for bet in positive_adj_bets) / sum(bet[3] for bet in positive_adj_bets)) * 100 if positive_adj_bets and sum(bet[3] for bet in positive_adj_bets) > 0 else 0
-        results["negative_adj_roi"] = (sum(bet[4] for bet in negative_adj_bets) / sum(bet[3] for bet in negative_adj_bets)) * 100 if negative_adj_bets and sum(bet[3] for bet in negative_adj_bets) > 0 else 0
-        results["neutral_adj_roi"] = (sum(bet[4] for bet in neutral_adj_bets) / sum(bet[3] for bet in neutral_adj_bets)) * 100 if neutral_adj_bets and sum(bet[3] for bet in neutral_adj_bets) > 0 else 0
-        
-        # Analyze by mental form score range
-        mental_form_ranges = [
-            ('strong_negative', lambda x: x <= -0.5),
-            ('moderate_negative', lambda x: -0.5 < x <= -0.2),
-            ('neutral', lambda x: -0.2 < x < 0.2),
-            ('moderate_positive', lambda x: 0.2 <= x < 0.5),
-            ('strong_positive', lambda x: x >= 0.5)
-        ]
+        # ROI calculation, overall and by adjustment direction
+        everything = np.ones(len(bets), dtype=bool)
+        results["overall_roi"] = roi(everything)
+        results["positive_adj_roi"] = roi(adjustment > 0)
+        results["negative_adj_roi"] = roi(adjustment < 0)
+        results["neutral_adj_roi"] = roi(adjustment == 0)
         
+        # Analyze by mental form score range (the rollups' mental form buckets)
+        buckets = mental_bucket(score)
         mental_form_analysis = {}
-        for name, condition in mental_form_ranges:
-            range_bets = [bet for bet in bets if bet[9] is not None and condition(bet[9])]
-            
-            if range_bets:
-                total_stake = sum(bet[3] for bet in range_bets)
-                total_profit = sum(bet[4] for bet in range_bets)
-                roi = (total_profit / total_stake) * 100 if total_stake > 0 else 0
-                
+        for name, bucket in MENTAL_FORM_RANGES.items():
+            mask = buckets == bucket
+            if mask.any():
                 mental_form_analysis[name] = {
-                    "count": len(range_bets),
-                    "stake": total_stake,
-                    "profit": total_profit,
-                    "roi": roi,
-                    "win_rate": sum(1 for bet in range_bets if bet[2] == 'win') / len(range_bets)
+                    "count": int(mask.sum()),
+                    "stake": float(stake[mask].sum()),
+                    "profit": float(profit[mask].sum()),
+                    "roi": roi(mask),
+                    "win_rate": float(won[mask].mean())
                 }
         
         results["mental_form_analysis"] = mental_form_analysis
+        results["calibration"] = calibration_report(load_settled_bets(self.db_conn))
         
         return results
         
@@ -0,0 +1,251 @@
+"""
+Probability calibration of the model, with and without the mental form adjustment.
+
+Settled bets (from the bets table, or a backtest's bet log) are loaded once
+into columns: market, mental score, base model probability, mental-adjusted
+probability and the result as a number (1 for a win, 0 for a loss, the paid
+share for a dead heat). Every statistic is then computed with array
+operations for both probability columns side by side:
+
+    brier      mean squared error of the probability
+    log_loss   mean negative log likelihood
+    expected   sum of probabilities (hits the model expected)
+    actual     sum of results (hits we got)
+
+overall, per market and per mental form bucket, plus reliability curves
+(observed hit rate against predicted probability, in equal-count bins). If the
+adjustment adds edge, the adjusted column should score the lower Brier score
+and log loss, and its reliability curve should track the diagonal more closely.
+
+Usage:
+    python calibration.py --db golf_betting_history.db
+    python calibration.py --backtest --db data/db/mental_form.db
+"""
+
+import sqlite3
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('golf.calibration')
+
+MODELS = ('base', 'adjusted')
+
+# Same mental form buckets as bet_rollups, lowest score first
+MENTAL_BUCKETS = ['Unknown', 'Strong Negative', 'Moderate Negative', 'Neutral',
+                  'Moderate Positive', 'Strong Positive']
+
+# Probabilities are clipped this far from 0 and 1 so log loss stays finite
+EPSILON = 1e-6
+
+
+def mental_bucket(scores):
+    """Mental form bucket of each score, vectorized (NaN -> 'Unknown')"""
+    scores = np.asarray(scores, dtype=float)
+    with np.errstate(invalid='ignore'):
+        conditions = [
+            np.isnan(scores),
+            scores <= -0.5,
+            scores <= -0.2,
+            scores < 0.2,
+            scores < 0.5,
+        ]
+    return np.select(conditions, MENTAL_BUCKETS[:5], default=MENTAL_BUCKETS[5])
+
+
+def _as_probability(values):
+    """Probabilities stored either as fractions or as percentages -> fractions"""
+    values = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+    return np.where(values > 1, values / 100, values)
+
+
+def _frame(market, mental_score, base, adjusted, result):
+    base = np.clip(base, EPSILON, 1 - EPSILON)
+    # Bets recorded without an adjustment are scored as unadjusted
+    adjusted = np.clip(np.where(np.isnan(adjusted), base, adjusted), EPSILON, 1 - EPSILON)
+    return pd.DataFrame({
+        'market': np.asarray(market, dtype=object),
+        'mental_bucket': mental_bucket(mental_score),
+        'base': base,
+        'adjusted': adjusted,
+        'result': np.clip(result, 0, 1),
+    })
+
+
+def load_settled_bets(conn):
+    """
+    Settled win/loss bets with a model probability, as calibration columns.
+
+    Args:
+        conn: Connection to a database with a bets table
+
+    Returns:
+        DataFrame with market, mental_bucket, base, adjusted and result
+    """
+    bets = pd.read_sql_query('''
+    SELECT bet_market, mental_form_score, base_model_probability, adjusted_probability,
+           outcome, stake, odds, profit_loss
+    FROM bets
+    WHERE outcome IN ('win', 'loss') AND base_model_probability IS NOT NULL
+    ''', conn)
+
+    stake = bets['stake'].to_numpy(dtype=float)
+    odds = bets['odds'].to_numpy(dtype=float)
+    profit_loss = bets['profit_loss'].to_numpy(dtype=float)
+    won = (bets['outcome'] == 'win').to_numpy()
+    # A win paid less than full odds was a dead heat; score the share paid
+    with np.errstate(divide='ignore', invalid='ignore'):
+        paid = np.where(stake * odds > 0, (profit_loss + stake) / (stake * odds), 1.0)
+    result = np.where(won, np.nan_to_num(paid, nan=1.0), 0.0)
+
+    return _frame(bets['bet_market'], bets['mental_form_score'].to_numpy(dtype=float),
+                  _as_probability(bets['base_model_probability']),
+                  _as_probability(bets['adjusted_probability']), result)
+
+
+def from_backtest(bet_log):
+    """
+    Calibration columns from a backtest's bet log.
+
+    Args:
+        bet_log: The 'bet_log' DataFrame of backtest.run_backtest(..., include_bets=True)
+    """
+    if bet_log.empty:
+        none = np.array([], dtype=float)
+        return _frame([], none, none, none, none)
+    return _frame(bet_log['market'], bet_log['mental_score'].to_numpy(dtype=float),
+                  bet_log['base_prob'].to_numpy(dtype=float),
+                  bet_log['adjusted_prob'].to_numpy(dtype=float),
+                  bet_log['payout'].to_numpy(dtype=float))
+
+
+def _scores(frame):
+    """Per-bet Brier and log loss terms for each model"""
+    result = frame['result'].to_numpy()
+    scores = {'result': result}
+    for model in MODELS:
+        p = frame[model].to_numpy()
+        scores[f'brier_{model}'] = (p - result) ** 2
+        scores[f'log_loss_{model}'] = -(result * np.log(p) + (1 - result) * np.log(1 - p))
+        scores[f'expected_{model}'] = p
+    return pd.DataFrame(scores, index=frame.index)
+
+
+def _summarize(sums, counts):
+    """Turn grouped sums into means and the adjusted-vs-base comparison"""
+    summary = pd.DataFrame({'bets': counts})
+    for model in MODELS:
+        summary[f'brier_{model}'] = sums[f'brier_{model}'] / counts
+        summary[f'log_loss_{model}'] = sums[f'log_loss_{model}'] / counts
+        summary[f'expected_{model}'] = sums[f'expected_{model}']
+    summary['actual'] = sums['result']
+    # Share of the base model's Brier score the adjustment removes (negative: it made things worse)
+    summary['brier_skill'] = 1 - summary['brier_adjusted'] / summary['brier_base']
+    return summary
+
+
+def reliability_curve(frame, bins=10):
+    """
+    Observed hit rate against predicted probability for each model.
+
+    Args:
+        frame: Calibration columns
+        bins: Number of equal-count probability bins, or an array of bin edges
+
+    Returns:
+        DataFrame with model, bin, bets, mean_predicted and observed
+    """
+    result = frame['result'].to_numpy()
+    curves = []
+    for model in MODELS:
+        p = frame[model].to_numpy()
+        if np.isscalar(bins):
+            edges = np.unique(np.quantile(p, np.linspace(0, 1, int(bins) + 1)))
+        else:
+            edges = np.asarray(bins, dtype=float)
+        idx = np.clip(np.searchsorted(edges, p, side='right') - 1, 0, max(len(edges) - 2, 0))
+        size = max(len(edges) - 1, 1)
+        counts = np.bincount(idx, minlength=size)
+        filled = counts > 0
+        curves.append(pd.DataFrame({
+            'model': model,
+            'bin': np.arange(size)[filled],
+            'bets': counts[filled],
+            'mean_predicted': np.bincount(idx, weights=p, minlength=size)[filled] / counts[filled],
+            'observed': np.bincount(idx, weights=result, minlength=size)[filled] / counts[filled],
+        }))
+    return pd.concat(curves, ignore_index=True)
+
+
+def calibration_report(frame, bins=10):
+    """
+    Calibration of base vs mental-adjusted probabilities.
+
+    Args:
+        frame: Output of load_settled_bets() or from_backtest()
+        bins: Reliability curve bins (see reliability_curve())
+
+    Returns:
+        Dict with 'overall' (one row), 'by_market' and 'by_mental_bucket'
+        DataFrames of bets, brier_*, log_loss_*, expected_* (per model),
+        actual and brier_skill, and 'reliability' (see reliability_curve());
+        empty frames without settled bets
+    """
+    if frame.empty:
+        empty = pd.DataFrame()
+        return {'overall': empty, 'by_market': empty, 'by_mental_bucket': empty, 'reliability': empty}
+
+    scores = _scores(frame)
+    overall = _summarize(scores.sum().to_frame('all').T, pd.Series({'all': len(scores)}))
+
+    by = {}
+    for column in ('market', 'mental_bucket'):
+        grouped = scores.groupby(frame[column].fillna('unknown'), sort=True)
+        by[column] = _summarize(grouped.sum(), grouped.size())
+    by['mental_bucket'] = by['mental_bucket'].reindex([b for b in MENTAL_BUCKETS if b in by['mental_bucket'].index])
+
+    return {
+        'overall': overall,
+        'by_market': by['market'],
+        'by_mental_bucket': by['mental_bucket'],
+        'reliability': reliability_curve(frame, bins),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibration of base vs mental-adjusted probabilities")
+    parser.add_argument("--db", default="golf_betting_history.db", help="Database with the bets table")
+    parser.add_argument("--backtest", action="store_true",
+                        help="Score a backtest of the default strategy on --db instead of placed bets")
+    parser.add_argument("--bins", type=int, default=10, help="Reliability curve bins")
+    args = parser.parse_args()
+
+    if args.backtest:
+        from backtest import load_events, run_backtest
+        events, _ = load_events(args.db)
+        frame = from_backtest(run_backtest(events, include_bets=True)['bet_log'])
+    else:
+        conn = sqlite3.connect(args.db)
+        try:
+            frame = load_settled_bets(conn)
+        finally:
+            conn.close()
+
+    report = calibration_report(frame, args.bins)
+    if report['overall'].empty:
+        print("No settled bets with model probabilities")
+        return
+    with pd.option_context('display.width', 200, 'display.max_columns', 20):
+        for name in ('overall', 'by_market', 'by_mental_bucket', 'reliability'):
+            print(f"\n{name}\n{report[name].round(4).to_string()}")
+
+
+if __name__ == "__main__":
+    main()
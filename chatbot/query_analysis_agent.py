@@ -1,16 +1,23 @@
+import os
+import sys
 import logging
 import re
 import json
-import anthropic
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
+# Add the parent directory to the path so we can import the shared LLM layer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm.llm_provider import cacheable
+from llm.router import complete
+
 logger = logging.getLogger("head_pro.query_agent")
 
 class QueryAnalysisAgent:
     def __init__(self, api_key: str, current_tournament: str = "Unknown Tournament"):
         """Initialize the query analysis agent with the Anthropic API key."""
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.api_key = api_key
         self.model = "claude-3-7-sonnet-20250219"
         self.current_tournament = current_tournament
 
@@ -72,18 +79,18 @@ class QueryAnalysisAgent:
         
         try:
             # Call Claude to analyze the query
-            response = self.client.messages.create(
+            response = complete(
+                prompt,
                 model=self.model,
                 max_tokens=4000,
                 temperature=0.2,
                 system="You analyze golf-related queries to determine what database information is needed.",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
+                feature="chatbot_query_analysis",
+                api_key=self.api_key
             )
             
             # Extract and parse the response
-            response_text = response.content[0].text
+            response_text = response.text
 
             # Add this print statement for testing
             print("\n" + "="*80)
@@ -123,21 +130,20 @@ class QueryAnalysisAgent:
             logger.error(f"Error analyzing query: {e}")
             return self._default_query_info()
     
-    def _create_analysis_prompt(self, user_message: str, context: str) -> str:
-        """Create the simplified prompt for Claude to analyze the query."""
+    def _create_analysis_prompt(self, user_message: str, context: str) -> List[Any]:
+        """
+        Create the simplified prompt for Claude to analyze the query.
+
+        The decision tree only changes with the current tournament, so it comes
+        first and is marked cacheable; the query and conversation follow it.
+        """
         current_date = datetime.now().strftime("%Y-%m-%d")
         
-        prompt = f"""
-Analyze this golf-related query to determine exactly what database information we need to retrieve.
-
-QUERY: "{user_message}"
+        instructions = f"""
+Analyze a golf-related query to determine exactly what database information we need to retrieve. The query, today's date and the previous conversation follow these instructions.
 
-DATE: {current_date}
 CURRENT TOURNAMENT: {self.current_tournament}
 
-PREVIOUS CONVERSATION CONTEXT:
-{context}
-
 Follow this EXACT decision tree - stop at the FIRST YES answer and output the corresponding JSON:
 
 1. Does the query mention specific players?
@@ -181,7 +187,18 @@ Output JSON with EXACTLY these fields:
 
 CRITICAL: Follow the decision tree in exact order. Stop at the FIRST YES answer and output the corresponding JSON.
 """
-        return prompt
+
+        query = f"""
+QUERY: "{user_message}"
+
+DATE: {current_date}
+
+PREVIOUS CONVERSATION CONTEXT:
+{context}
+
+Now follow the decision tree above and output the JSON.
+"""
+        return [cacheable(instructions), query]
 
     def _populate_needs_fields(self, query_info):
         """Populate needs_* fields based on query_type"""
@@ -1,15 +1,22 @@
+import os
+import sys
 import logging
-import anthropic
 import json
 from typing import Dict, List, Any
 from datetime import datetime
 
+# Add the parent directory to the path so we can import the shared LLM layer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm.llm_provider import cacheable
+from llm.router import complete
+
 logger = logging.getLogger("head_pro.response_generator")
 
 class ResponseGenerator:
     def __init__(self, api_key: str, persona_file: str = "head_pro_persona.txt", faqs_file: str = "head_pro_faqs.json"):
         """Initialize the response generator."""
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.api_key = api_key
         self.model = "claude-3-7-sonnet-20250219"
         
         # Load the Head Pro persona
@@ -134,25 +141,31 @@ Explain these limitations concisely but colorfully in your response. Be apologet
         
         try:
             # Call Claude to generate response
-            response = self.client.messages.create(
+            response = complete(
+                prompt,
                 model=self.model,
                 max_tokens=2000,
                 temperature=0.7,
-                system=self.persona,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
+                system=[cacheable(self.persona)],
+                feature="chatbot_response",
+                api_key=self.api_key
             )
             
             # Extract the response
-            return response.content[0].text # type: ignore
+            return response.text
             
         except Exception as e:
             logger.error(f"Error generating response: {e}")
             return self._generate_fallback_response(query, retrieved_data)
     
-    def _create_prompt(self, query: str, context: str, conv_history: str, query_type: str, tournament_name: str, course_name: str) -> str:
-        """Create the prompt for generating a response with new structure."""
+    def _create_prompt(self, query: str, context: str, conv_history: str, query_type: str, tournament_name: str, course_name: str) -> List[Any]:
+        """
+        Create the prompt for generating a response with new structure.
+
+        The instructions (and FAQs) for a query type only change with the date
+        and tournament, so they come first and are marked cacheable; the query,
+        history and retrieved data follow them.
+        """
         current_date = datetime.now().strftime("%A, %B %d, %Y")
         
         # Get complete instructions for this query type
@@ -172,9 +185,15 @@ Explain these limitations concisely but colorfully in your response. Be apologet
                 faqs_section += f"A: {faq['answer']}\n\n"
             faqs_section += "</FAQS>"
         
-        prompt = f"""
+        static_prompt = f"""
+<INSTRUCTIONS>
+{instructions}
+</INSTRUCTIONS>{faqs_section}
+"""
+
+        task_prompt = f"""
 <CURRENT TASK>
-You're currently chatting with a user on the Head Pro website on {current_date}. Please respond directly to the following query:
+You're currently chatting with a user on the Head Pro website on {current_date}. Please respond directly to the following query, following the instructions above:
 
 <QUERY>
 {query}
@@ -185,13 +204,9 @@ Here's your conversation up to this point:
 {conv_history}
 </CONVERSATION HISTORY>
 
-<INSTRUCTIONS>
-{instructions}
-</INSTRUCTIONS>
-
 <DATA>
 {context}
-</DATA>{faqs_section}
+</DATA>
 
 Now please respond to the user as THE HEAD PRO, bluntly and concisely addressing their query. Don't use tags or titles -- keep it conversational. Be concise. Use short paragraphs for easy readability.
 </CURRENT TASK>
@@ -200,10 +215,10 @@ Now please respond to the user as THE HEAD PRO, bluntly and concisely addressing
         print("\n" + "="*80)
         print("FULL PROMPT BEING SENT TO CLAUDE:")
         print("="*80)
-        print(prompt)
+        print(static_prompt + task_prompt)
         print("="*80 + "\n")
         
-        return prompt
+        return [cacheable(static_prompt), task_prompt]
     
     def _format_data_as_context(self, data: Dict[str, Any]) -> str:
         """Format retrieved data as context for Claude."""
@@ -0,0 +1,375 @@
+"""
+Closing line value (CLV) tracking.
+
+Every outright odds board polled before an event's first tee time is folded
+into closing_lines, which keeps the latest pre-tee price per (event, market,
+player, sportsbook). Once play starts, later boards are ignored, so what's
+left is the closing line. As snapshots arrive, the bets on the affected
+(event, market) are joined to their closing prices in one pass, and CLV is
+stored per bet in bet_clv:
+
+    clv           odds taken / closing odds - 1, in percent
+    implied_edge  closing implied probability - implied probability taken,
+                  in percentage points
+
+A bet is compared with the same book's close when we know where it was
+placed, otherwise with the best closing price; bet_clv keeps both books,
+and CLV is credited to the one the bet was placed at. Triggers on bet_clv
+keep running totals in clv_rollups by market, sportsbook, EV bucket and
+mental form bucket, the same way bet_rollups works for P&L, so the CLV
+breakdowns are a handful of rows however many bets there are.
+
+Usage:
+    python closing_lines.py update --db golf_betting_history.db
+    python closing_lines.py report --by mental_bucket --db golf_betting_history.db
+"""
+
+import sqlite3
+import argparse
+import logging
+from datetime import datetime
+
+import numpy as np
+
+from bet_rollups import DIMENSIONS as BET_DIMENSIONS, BUCKET_ORDER
+from opportunity_scanner import OUTRIGHT_METADATA_KEYS
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('golf.closing_lines')
+
+# clv_rollups dimensions; each is a bet_clv column (overall is one bucket)
+DIMENSIONS = ('overall', 'market', 'sportsbook', 'ev_bucket', 'mental_bucket')
+
+# clv_rollups column -> a bet_clv row's contribution
+MEASURES = {
+    'bets': "1",
+    'beat_close': "CASE WHEN R.clv > 0 THEN 1 ELSE 0 END",
+    'clv_sum': "R.clv",
+    'clv_sq_sum': "R.clv * R.clv",
+    'edge_sum': "R.implied_edge",
+}
+
+_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def board_odds(payload):
+    """
+    Sportsbook prices on an outright board.
+
+    Args:
+        payload: Response from GolfBettingTracker.fetch_betting_odds()
+
+    Returns:
+        List of (dg_id, sportsbook, decimal odds) for every valid price
+    """
+    rows = []
+    if not payload or not isinstance(payload.get('odds'), list):
+        return rows
+    for player in payload['odds']:
+        if player.get('dg_id') is None:
+            continue
+        for book, odds in player.items():
+            if book in OUTRIGHT_METADATA_KEYS:
+                continue
+            try:
+                odds = float(odds)
+            except (TypeError, ValueError):
+                continue
+            if odds > 1:
+                rows.append((int(player['dg_id']), book, odds))
+    return rows
+
+
+def _bucket_sql(dimension):
+    return "'all'" if dimension == 'overall' else f"COALESCE(R.{dimension}, '')"
+
+
+def _upsert_sql(row_alias, sign):
+    names = ", ".join(MEASURES)
+    updates = ", ".join(f"{name} = {name} + excluded.{name}" for name in MEASURES)
+    values = ", ".join(f"{sign} * ({sql})" for sql in MEASURES.values())
+    statements = []
+    for dimension in DIMENSIONS:
+        statement = f'''
+        INSERT INTO clv_rollups (dimension, bucket, {names})
+        VALUES ('{dimension}', {_bucket_sql(dimension)}, {values})
+        ON CONFLICT(dimension, bucket) DO UPDATE SET {updates};'''
+        statements.append(statement.replace('R.', f'{row_alias}.'))
+    return "".join(statements)
+
+
+def initialize_tables(conn):
+    """Create the closing line, per-bet CLV and CLV rollup tables and the rollup triggers"""
+    cursor = conn.cursor()
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS closing_lines (
+        event_id TEXT NOT NULL,
+        market TEXT NOT NULL,
+        player_id INTEGER NOT NULL,
+        sportsbook TEXT NOT NULL,
+        decimal_odds REAL NOT NULL,
+        captured_at TEXT NOT NULL,
+        tee_time TEXT NOT NULL,
+        PRIMARY KEY (event_id, market, player_id, sportsbook)
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS bet_clv (
+        bet_id INTEGER PRIMARY KEY,
+        market TEXT,
+        sportsbook TEXT,  -- book the bet was placed at (NULL if unknown)
+        close_book TEXT,  -- book the close came from
+        ev_bucket TEXT,
+        mental_bucket TEXT,
+        placed_odds REAL NOT NULL,
+        closing_odds REAL NOT NULL,
+        clv REAL NOT NULL,
+        implied_edge REAL NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+    ''')
+    # bet_clv used to keep the closing book in sportsbook, crediting fallback closes to the wrong book
+    migrate = 'close_book' not in {row[1] for row in cursor.execute("PRAGMA table_info(bet_clv)")}
+    if migrate:
+        cursor.execute("ALTER TABLE bet_clv ADD COLUMN close_book TEXT")
+        cursor.execute("UPDATE bet_clv SET close_book = sportsbook")
+    measures = ",\n        ".join(f"{name} REAL NOT NULL DEFAULT 0" for name in MEASURES)
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS clv_rollups (
+        dimension TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        {measures},
+        PRIMARY KEY (dimension, bucket)
+    )
+    ''')
+
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS clv_rollups_insert AFTER INSERT ON bet_clv
+    BEGIN {_upsert_sql('NEW', 1)}
+    END
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS clv_rollups_update AFTER UPDATE ON bet_clv
+    BEGIN {_upsert_sql('OLD', -1)}{_upsert_sql('NEW', 1)}
+    END
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS clv_rollups_delete AFTER DELETE ON bet_clv
+    BEGIN {_upsert_sql('OLD', -1)}
+    END
+    ''')
+    conn.commit()
+
+    if migrate:
+        # Recomputing moves each bet to its placed book, and the triggers fix the rollups
+        update_clv(conn)
+
+
+def record_snapshot(conn, event_id, market, payload, tee_time, captured_at=None):
+    """
+    Fold an outright board into the closing lines and refresh the CLV of bets it affects.
+
+    Args:
+        conn: Connection with the CLV tables
+        event_id: DataGolf event ID the board is for
+        market: Outright market (win, top_5, ...)
+        payload: Response from GolfBettingTracker.fetch_betting_odds()
+        tee_time: Event's first tee time; boards captured from then on are ignored
+        captured_at: When the board was fetched (now by default)
+
+    Returns:
+        Number of bets whose CLV was stored or changed
+    """
+    captured_at = captured_at or datetime.now()
+    if captured_at >= tee_time:
+        return 0
+
+    stamp, tee = captured_at.strftime(_TIMESTAMP_FORMAT), tee_time.strftime(_TIMESTAMP_FORMAT)
+    rows = [(str(event_id), market, player_id, book, odds, stamp, tee) for player_id, book, odds in board_odds(payload)]
+    if not rows:
+        return 0
+    with conn:
+        conn.executemany('''
+        INSERT INTO closing_lines (event_id, market, player_id, sportsbook, decimal_odds, captured_at, tee_time)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(event_id, market, player_id, sportsbook) DO UPDATE SET
+            decimal_odds = excluded.decimal_odds, captured_at = excluded.captured_at, tee_time = excluded.tee_time
+        WHERE excluded.captured_at >= closing_lines.captured_at
+        ''', rows)
+    return update_clv(conn, event_id, market)
+
+
+def _load_bets(conn, event_id=None, market=None):
+    """Outright bets with the columns CLV needs, bucketed like the bet rollups"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(bets)")}
+    book = "R.sportsbook" if 'sportsbook' in columns else "NULL"
+    where, params = ["R.bet_type = 'outright'", "R.odds > 1"], []
+    if event_id is not None:
+        where.append("R.event_id = ?")
+        params.append(str(event_id))
+    if market is not None:
+        where.append("R.bet_market = ?")
+        params.append(market)
+    import pandas as pd
+    bets = pd.read_sql_query(f'''
+    SELECT R.bet_id, CAST(R.event_id AS TEXT) AS event_id, R.bet_market AS market, R.player_id,
+           R.odds, R.placed_date, R.notes, {book} AS book,
+           {BET_DIMENSIONS['ev_bucket']} AS ev_bucket,
+           {BET_DIMENSIONS['mental_bucket']} AS mental_bucket
+    FROM bets R
+    WHERE {" AND ".join(where)}
+    ''', conn, params=params)
+
+    # The tracker records the book in the notes ("Book: draftkings, Units: ...")
+    from_notes = bets['notes'].str.extract(r'^Book: ([^,]+)', expand=False).str.strip().str.lower()
+    bets['book'] = bets['book'].where(bets['book'].notna(), from_notes)
+    return bets
+
+
+def update_clv(conn, event_id=None, market=None):
+    """
+    Join outright bets to their closing lines in bulk and store their CLV.
+
+    Args:
+        conn: Connection with the bets and CLV tables
+        event_id: Only bets on this event (all events by default)
+        market: Only bets in this market (all markets by default)
+
+    Returns:
+        Number of bets whose CLV was stored or changed (unchanged ones aren't rewritten)
+    """
+    bets = _load_bets(conn, event_id, market)
+    if bets.empty:
+        return 0
+    where, params = [], []
+    if event_id is not None:
+        where.append("event_id = ?")
+        params.append(str(event_id))
+    if market is not None:
+        where.append("market = ?")
+        params.append(market)
+    import pandas as pd
+    closes = pd.read_sql_query(f'''
+    SELECT event_id, market, player_id, sportsbook, decimal_odds, tee_time FROM closing_lines
+    {"WHERE " + " AND ".join(where) if where else ""}
+    ''', conn, params=params)
+    if closes.empty:
+        return 0
+
+    keys = ['event_id', 'market', 'player_id']
+    same_book = closes.rename(columns={'sportsbook': 'book'})
+    best = closes.loc[closes.groupby(keys)['decimal_odds'].idxmax()]
+
+    merged = bets.merge(same_book[keys + ['book', 'decimal_odds', 'tee_time']], on=keys + ['book'], how='left')
+    fallback = merged.drop(columns=['decimal_odds', 'tee_time']).merge(
+        best[keys + ['sportsbook', 'decimal_odds', 'tee_time']], on=keys, how='left')
+    use_best = merged['decimal_odds'].isna().to_numpy()
+    merged['close_book'] = np.where(use_best, fallback['sportsbook'], merged['book'])
+    merged['decimal_odds'] = np.where(use_best, fallback['decimal_odds'], merged['decimal_odds'])
+    merged['tee_time'] = np.where(use_best, fallback['tee_time'], merged['tee_time'])
+
+    # Only bets placed before the line closed have a closing line to beat
+    placed = merged['placed_date'].astype(str).str.slice(0, 19)
+    merged = merged[merged['decimal_odds'].notna() & (placed < merged['tee_time'].astype(str))]
+    if merged.empty:
+        return 0
+
+    odds = merged['odds'].to_numpy(dtype=float)
+    closing = merged['decimal_odds'].to_numpy(dtype=float)
+    clv = (odds / closing - 1) * 100
+    implied_edge = (1 / closing - 1 / odds) * 100
+
+    now = datetime.now().strftime(_TIMESTAMP_FORMAT)
+    rows = [
+        (int(bet_id), market_name, None if pd.isna(book) else book, close_book, ev_bucket, mental_bucket,
+         float(o), float(c), float(v), float(e), now)
+        for bet_id, market_name, book, close_book, ev_bucket, mental_bucket, o, c, v, e in zip(
+            merged['bet_id'], merged['market'], merged['book'], merged['close_book'], merged['ev_bucket'],
+            merged['mental_bucket'], odds, closing, clv, implied_edge)
+    ]
+    with conn:
+        # Unchanged rows are skipped so the rollup triggers only see real changes
+        cursor = conn.executemany('''
+        INSERT INTO bet_clv (bet_id, market, sportsbook, close_book, ev_bucket, mental_bucket, placed_odds,
+                             closing_odds, clv, implied_edge, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(bet_id) DO UPDATE SET
+            market = excluded.market, sportsbook = excluded.sportsbook, close_book = excluded.close_book,
+            ev_bucket = excluded.ev_bucket, mental_bucket = excluded.mental_bucket,
+            placed_odds = excluded.placed_odds, closing_odds = excluded.closing_odds, clv = excluded.clv,
+            implied_edge = excluded.implied_edge, updated_at = excluded.updated_at
+        WHERE bet_clv.closing_odds != excluded.closing_odds OR bet_clv.placed_odds != excluded.placed_odds
+           OR bet_clv.sportsbook IS NOT excluded.sportsbook OR bet_clv.close_book IS NOT excluded.close_book
+           OR bet_clv.ev_bucket IS NOT excluded.ev_bucket OR bet_clv.mental_bucket IS NOT excluded.mental_bucket
+        ''', rows)
+    # Rows the statements wrote, not counting the rollup triggers
+    return cursor.rowcount
+
+
+def get_clv_breakdown(conn, dimension='overall'):
+    """
+    CLV aggregates per bucket of a dimension, from the rollups.
+
+    Args:
+        conn: Connection with the CLV tables
+        dimension: One of DIMENSIONS
+
+    Returns:
+        DataFrame with bucket (None for bets without a value), bets,
+        beat_close_rate, avg_clv, clv_std and avg_implied_edge, in
+        BUCKET_ORDER for the EV and mental form buckets
+    """
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"Unknown CLV dimension: {dimension}")
+    import pandas as pd
+    rollups = pd.read_sql_query(f'''
+    SELECT bucket, {", ".join(MEASURES)} FROM clv_rollups
+    WHERE dimension = ? AND bets > 0
+    ''', conn, params=(dimension,))
+
+    bets = rollups['bets'].to_numpy(dtype=float)
+    mean = rollups['clv_sum'].to_numpy(dtype=float) / np.where(bets > 0, bets, 1)
+    variance = rollups['clv_sq_sum'].to_numpy(dtype=float) / np.where(bets > 0, bets, 1) - mean ** 2
+    breakdown = pd.DataFrame({
+        'bucket': rollups['bucket'].replace('', None),
+        'bets': bets.astype(int),
+        'beat_close_rate': rollups['beat_close'].to_numpy(dtype=float) / bets,
+        'avg_clv': mean,
+        'clv_std': np.sqrt(np.clip(variance, 0, None)),
+        'avg_implied_edge': rollups['edge_sum'].to_numpy(dtype=float) / bets,
+    })
+
+    order = BUCKET_ORDER.get(dimension)
+    if order:
+        rank = {bucket: i for i, bucket in enumerate(order)}
+        breakdown = breakdown.sort_values('bucket', key=lambda s: s.map(lambda b: rank.get(b, len(rank))))
+    else:
+        breakdown = breakdown.sort_values('bucket', key=lambda s: s.fillna(''))
+    return breakdown.reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Track closing line value of outright bets")
+    parser.add_argument("command", choices=["update", "report"],
+                        help="update: recompute CLV for every bet; report: show CLV by a dimension")
+    parser.add_argument("--by", default="overall", choices=DIMENSIONS, help="Dimension to report by")
+    parser.add_argument("--db", default="golf_betting_history.db", help="Database with the bets table")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        initialize_tables(conn)
+        if args.command == "update":
+            print(f"Stored or changed CLV for {update_clv(conn)} bets")
+        else:
+            print(get_clv_breakdown(conn, args.by).to_string(index=False))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
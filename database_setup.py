@@ -8,6 +8,9 @@ player information, insights, and mental form scores.
 import sqlite3
 import os
 
+from insight_dedup import initialize_tables as initialize_insight_dedup_tables
+from llm.usage_ledger import initialize_tables as initialize_usage_tables
+
 def create_database(db_path="data/db/mental_form.db"):
     """Create the initial database schema"""
     # Create directories if they don't exist
@@ -110,6 +113,12 @@ def create_database(db_path="data/db/mental_form.db"):
     )
     ''')
     
+    # Near-duplicate insight signatures
+    initialize_insight_dedup_tables(conn)
+
+    # LLM token and latency ledger
+    initialize_usage_tables(conn)
+    
     conn.commit()
     conn.close()
     
@@ -1,13 +1,18 @@
 import os
 import json
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import argparse
-import schedule
-import time
+import asyncio
 import logging
+import numpy as np
 from betting_tracker import GolfBettingTracker
+from opportunity_scanner import scan_outright_market, scan_matchup_market
+from portfolio_optimizer import MARKET_POSITIONS, optimize_portfolio
+from tournament_simulator import TournamentSimulator, bankroll_risk
+from bet_settlement import DataGolfResults
+from agent_scheduler import AgentScheduler, find_current_event, event_tee_time
+from closing_lines import record_snapshot, update_clv
 
 # Configure logging
 logging.basicConfig(
@@ -20,6 +25,61 @@ logging.basicConfig(
 )
 logger = logging.getLogger("GolfBettingAgent")
 
+class RunContext:
+    """
+    State shared by every step of one run_daily_update.
+
+    Built once per run: the config constants are resolved, each tour's
+    current event and odds boards are fetched (concurrently, see
+    GolfBettingAgent._build_run_context) and the bankroll is read from the
+    ledger. Placing a bet draws down remaining_budget, so the weekly limit
+    needs no ledger lookup per candidate.
+    """
+
+    def __init__(self, config, bankroll, week_wagered, post_picks=False):
+        """
+        Args:
+            config: Agent configuration
+            bankroll: Bankroll to size this run's bets against
+            week_wagered: Amount already wagered this week
+            post_picks: Whether placed bets are posted to Twitter
+        """
+        betting = config['betting']
+        self.started_at = datetime.now()
+        self.today = self.started_at.strftime("%Y-%m-%d")
+        self.bankroll = bankroll
+        self.post_picks = post_picks
+
+        self.tours = list(betting['target_tours'])
+        self.min_ev = betting['min_ev_percentage']
+        self.unit_size = betting['unit_size']
+        self.kelly_fraction = betting['kelly_fraction']
+        self.max_stake_per_bet = betting['max_stake_per_bet']
+        self.max_weekly_wagering = betting['max_weekly_wagering_amount']
+        self.sportsbooks = betting['available_sportsbooks']
+        self.outright_markets = list(betting['outright_markets'])
+        self.matchup_markets = list(betting.get('matchup_markets', ['tournament_matchups', 'round_matchups', '3_balls']))
+        self.tie_probabilities = betting.get('tie_probabilities', {})
+        self.simulate_field = betting.get('simulate_field', True)
+        self.simulation_count = betting.get('simulation_count', 200000)
+
+        self.remaining_budget = self.max_weekly_wagering - week_wagered
+
+        # Filled in by _build_run_context: tour -> current event, tour -> {market: odds payload}
+        self.events = {}
+        self.outright_odds = {}
+        self.matchup_odds = {}
+        self.api_calls = 0
+
+        # Picks are tweeted as they're placed, unless the caller collects them here
+        # as (bet_id, post function, bet data) to post itself, off its own thread
+        self.posts = None
+
+    def record_stake(self, stake):
+        """Draw a placed bet's stake from this week's remaining budget"""
+        self.remaining_budget -= stake
+
+
 class GolfBettingAgent:
     def __init__(self, config_path='config.json'):
         """Initialize the betting agent with configuration"""
@@ -27,7 +87,10 @@ class GolfBettingAgent:
         self.config = self._load_config(config_path)
 
         # Initialize the tracker
-        self.tracker = GolfBettingTracker(api_key=self.config['data_golf_api_key'])
+        self.tracker = GolfBettingTracker(
+            api_key=self.config['data_golf_api_key'],
+            initial_bankroll=self.config['betting']['initial_bankroll']
+        )
 
         # Initialize Twitter bot if enabled
         if self.config['twitter']['enabled']:
@@ -40,11 +103,24 @@ class GolfBettingAgent:
         else:
             self.twitter_bot = None
 
-        # Set initial bankroll
-        self.bankroll = self.config['betting']['initial_bankroll']
-        self.current_week_wagered = 0.0
+        # Simulated risk of the latest outright slate per tour, for the performance report
+        self.slate_risk = {}
+
+        # Field simulator fitted to each event's latest boards: event_id -> (fingerprint, simulator)
+        self._simulators = {}
+
+        logger.info(f"Golf Betting Agent initialized with ${self.bankroll:.2f} bankroll, "
+                    f"${self.current_week_wagered:.2f} wagered this week")
 
-        logger.info(f"Golf Betting Agent initialized with {self.bankroll} unit bankroll")
+    @property
+    def bankroll(self):
+        """Current bankroll (cash plus open stakes) from the ledger"""
+        return self.tracker.ledger.bankroll()
+
+    @property
+    def current_week_wagered(self):
+        """Amount wagered since Monday, from the ledger - survives restarts and rolls over by itself"""
+        return self.tracker.ledger.week_wagered()
 
     def _load_config(self, config_path):
         """Load configuration from JSON file"""
@@ -68,7 +144,9 @@ class GolfBettingAgent:
                     "bet_types": ["outright", "matchup"],
                     "outright_markets": ["win", "top_5", "top_10", "top_20"],
                     "matchup_markets": ["tournament_matchups", "round_matchups", "3_balls"],
-                    "available_sportsbooks": ["draftkings", "fanduel", "betmgm", "caesars", "pointsbet"]
+                    "available_sportsbooks": ["draftkings", "fanduel", "betmgm", "caesars", "pointsbet"],
+                    "simulate_field": True,
+                    "simulation_count": 200000
                 },
                 "twitter": {
                     "enabled": False,
@@ -84,7 +162,19 @@ class GolfBettingAgent:
                 },
                 "schedule": {
                     "update_frequency_hours": 12,
-                    "performance_update_day": "Monday"
+                    "performance_update_day": "Monday",
+                    "fetch_workers": 8,
+                    "min_poll_minutes": 2,
+                    "overnight_poll_minutes": 60,
+                    "quiet_hours": [23, 6],
+                    "line_movement_threshold": 0.25,
+                    "settle_interval_minutes": 60
+                },
+                "ingestion": {
+                    "enabled": False,
+                    "db_path": "data/db/mental_form.db",
+                    "watch_dir": "transcripts/inbox",
+                    "interval_minutes": 30
                 }
             }
             with open(config_path, 'w') as f:
@@ -99,68 +189,141 @@ class GolfBettingAgent:
         # Check for any pending bet results that need to be updated
         self._update_pending_bets()
 
-        # Update performance metrics
-        self.tracker.update_performance_metrics(self.bankroll)
+        # Fetch everything this run needs once, with the duplicate index loaded
+        context = self._build_run_context()
+        self._capture_closing_lines(context.events, context.outright_odds)
 
         # Find new betting opportunities
-        self._find_and_place_bets()
+        self._find_and_place_bets(context)
+
+        # Update performance metrics, including this run's bets
+        self.tracker.update_performance_metrics(self.bankroll)
 
         # Post performance updates on Mondays
-        today = datetime.now().strftime("%A")
+        today = context.started_at.strftime("%A")
         if today == self.config['schedule']['performance_update_day']:
             self._post_performance_update()
 
+        logger.info(f"Daily update finished in {(datetime.now() - context.started_at).total_seconds():.1f}s "
+                    f"with {context.api_calls} DataGolf calls")
+
     def _update_pending_bets(self):
-        """Update the status of pending bets -- TO BE IMPLEMENTED LATER"""
-        pass
+        """Settle pending bets on every event DataGolf has final results for"""
+        logger.info("Settling pending bets")
+        
+        source = DataGolfResults(self.tracker, tours=self.config['betting']['target_tours'])
+        summary = self.tracker.settle_pending_bets(source)
+        
+        if summary['bet_ids']:
+            logger.info(f"Settled {len(summary['bet_ids'])} bets; bankroll now ${self.bankroll:.2f}")
+
+    def _new_run_context(self):
+        """RunContext with the current bankroll and budget and no events or odds yet"""
+        post_picks = bool(self.twitter_bot and self.config['twitter']['enabled']
+                          and self.config['twitter']['post_schedule']['daily_picks'])
+        return RunContext(self.config, self.bankroll, self.current_week_wagered, post_picks)
+
+    def _build_run_context(self):
+        """
+        Build the context for one run.
+
+        Each tour's schedule is fetched once and its odds boards only if it has
+        a current event. The requests for all tours go out concurrently; the
+        bets themselves are placed one tour at a time since they share the
+        database connection and the weekly budget. Once the weekly budget is
+        spent only the outright boards are fetched, for the closing lines the
+        week's bets still need; the matchup boards are skipped.
+        """
+        context = self._new_run_context()
+        betting = context.remaining_budget > 0
+        if betting:
+            self.tracker.refresh_pending_index()
+        else:
+            logger.info("Weekly bet limit reached, fetching outright boards for closing lines only")
+
+        max_workers = self.config['schedule'].get('fetch_workers', 8)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            schedules = dict(zip(context.tours, executor.map(
+                lambda tour: self.tracker.fetch_current_events(tour=tour), context.tours
+            )))
+            context.api_calls += len(context.tours)
+
+            fetches = {}
+            for tour in context.tours:
+                if not schedules[tour] or 'schedule' not in schedules[tour]:
+                    logger.error(f"Failed to fetch schedule for {tour}")
+                    continue
+                event = find_current_event(schedules[tour], context.today)
+                if not event:
+                    logger.error(f"No upcoming events found for {tour}")
+                    continue
+                context.events[tour] = event
+                for market in context.outright_markets:
+                    fetches[('outright', tour, market)] = executor.submit(
+                        self.tracker.fetch_betting_odds, tour=tour, market=market)
+                for market in context.matchup_markets if betting else ():
+                    fetches[('matchup', tour, market)] = executor.submit(
+                        self.tracker.fetch_matchup_odds, tour=tour, market=market)
+
+            for (kind, tour, market), future in fetches.items():
+                boards = context.outright_odds if kind == 'outright' else context.matchup_odds
+                boards.setdefault(tour, {})[market] = future.result()
+            context.api_calls += len(fetches)
+
+        return context
+
+    def _capture_closing_lines(self, events, outright_odds, captured_at=None):
+        """Fold pre-tee outright boards into the closing lines, refreshing CLV of the bets on them"""
+        first_tee_hour = self.config['schedule'].get('first_tee_hour', 7)
+        for tour, boards in outright_odds.items():
+            event = events.get(tour)
+            if not event:
+                continue
+            tee_time = event_tee_time(event, first_tee_hour)
+            for market, payload in boards.items():
+                if payload:
+                    record_snapshot(self.tracker.db_conn, event['event_id'], market, payload, tee_time, captured_at)
 
-    def _find_and_place_bets(self):
+    def _find_and_place_bets(self, context):
         """Find value bets and place them (i.e., record them as placed)"""
         logger.info("Finding and placing bets")
         
         # Check if we've reached the weekly bet limit
-        if self.current_week_wagered >= self.config['betting']['max_weekly_wagering_amount']:
+        if context.remaining_budget <= 0:
             logger.info("Weekly bet limit reached, skipping bet placement")
             return
         
-        # For each tour, find betting opportunities
-        for tour in self.config['betting']['target_tours']:
+        # For each tour with a current event, find betting opportunities
+        for tour in context.tours:
+            if tour not in context.events:
+                continue
+
             # Find outright betting opportunities
-            self._find_outright_bets(tour)
+            self._find_outright_bets(context, tour)
             
             # Find matchup betting opportunities
-            self._find_matchup_bets(tour)
+            self._find_matchup_bets(context, tour)
 
-    def _find_outright_bets(self, tour):
+    def _find_outright_bets(self, context, tour):
         """Find value in outright betting markets using DataGolf's model odds from the betting endpoint"""
         logger.info(f"Finding outright bets for {tour} tour")
 
-        # First, get current events to identify the event ID
-        schedule_data = self.tracker.fetch_current_events(tour=tour)
-        if not schedule_data or 'schedule' not in schedule_data:
-            logger.error(f"Failed to fetch schedule for {tour}")
-            return
-        
-        # Find the current/upcoming event
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        current_event = None
-        for event in schedule_data['schedule']:
-            # Find event that's starting now or in the near future
-            if event['start_date'] >= current_date:
-                current_event = event
-                break
-        
-        if not current_event:
-            logger.error(f"No upcoming events found for {tour}")
-            return
-        
+        current_event = context.events[tour]
         event_id = current_event['event_id']
         event_name = current_event['event_name']
 
+        min_ev = context.min_ev
+        unit_size = context.unit_size
+
+        # Collect the value bets across all outright markets first, so correlated
+        # positions (same player to win, top 5, top 10) are sized together
+        slate = []
+        player_probs = {}
+
         # For each market we're interested in (win, top 5, etc.)
-        for market in self.config['betting']['outright_markets']:
-            # Fetch current odds (which includes the DataGolf model predictions)
-            odds_data = self.tracker.fetch_betting_odds(tour=tour, market=market)
+        for market in context.outright_markets:
+            # Current odds (which include the DataGolf model predictions), fetched with the run context
+            odds_data = context.outright_odds.get(tour, {}).get(market)
 
             if not odds_data or 'odds' not in odds_data:
                 logger.error(f"Failed to fetch odds for {tour} {market}")
@@ -168,184 +331,186 @@ class GolfBettingAgent:
 
             logger.info(f"Processing {market} market for {odds_data.get('event_name', event_name)}")
 
-            # For each player in the odds
-            for player_odds in odds_data['odds']:
-                player_name = player_odds['player_name']
-                player_id = player_odds['dg_id']
-                
-                # Get model odds directly from this response
-                if 'datagolf' not in player_odds or not player_odds['datagolf']:
-                    continue
-                
-                # Prefer baseline_history_fit model if available
-                if player_odds['datagolf']['baseline_history_fit'] is not None:
-                    model_odds = player_odds['datagolf']['baseline_history_fit']
-                elif player_odds['datagolf']['baseline'] is not None:
-                    model_odds = player_odds['datagolf']['baseline']
-                else:
-                    # Skip if no model odds available
-                    continue
-                
-                # Convert decimal odds to probability
-                model_prob = 1 / model_odds
-                
-                # Find the best available odds across books the user has access to
-                best_odds = 0
-                best_book = None
-
-                for book in player_odds:
-                    # Check if this is a sportsbook (not metadata) and available to the user
-                    if (book not in ['player_name', 'dg_id', 'datagolf'] and 
-                        book in self.config['betting']['available_sportsbooks']):
-                        if player_odds[book] and player_odds[book] > best_odds:
-                            best_odds = player_odds[book]
-                            best_book = book
-                
-                if not best_book:
+            # Price the whole field at once; only rows clearing the EV threshold need the stateful checks
+            table = scan_outright_market(odds_data, context.sportsbooks, context.kelly_fraction)
+            for player_id, model_prob in zip(table['dg_id'], table['model_prob']):
+                player_probs.setdefault(player_id, {})[market] = model_prob
+
+            for row in table[table['ev_percentage'] > min_ev].itertuples(index=False):
+                # Log high EV values for inspection
+                if row.ev_percentage > 50:
+                    logger.info(f"High EV detected for {row.player_name} {market}: {row.ev_percentage:.2f}%. Model prob: {row.model_prob:.4f} ({row.model_odds}), Book odds: {row.best_odds}")
+
+                # Check if a similar bet already exists
+                exists, existing_bet = self.tracker.has_existing_bet(
+                    event_id=event_id,
+                    bet_type='outright',
+                    bet_market=market,
+                    player_id=row.dg_id,
+                    round_num=None  # No round for outright bets
+                )
+
+                if exists:
+                    logger.info(f"Similar bet already exists for {row.player_name} to {market} - skipping")
                     continue
 
-                # Calculate implied probability from odds
-                implied_prob = 1 / best_odds
+                slate.append((market, row))
+
+        if not slate:
+            return
+
+        # Bets already riding on the event are fixed exposure the new ones are sized around
+        # (a player no longer in the field is void, so it doesn't move any scenario)
+        existing = [
+            {'player_id': bet['player_id'], 'market': bet['bet_market'], 'odds': bet['odds'], 'stake': bet['stake'],
+             'prob': player_probs[bet['player_id']].get(bet['bet_market'], bet['base_model_probability'])}
+            for bet in self.tracker.get_pending_event_bets(event_id, 'outright')
+            if bet['player_id'] in player_probs and bet['bet_market'] in MARKET_POSITIONS
+        ]
+
+        # Simulate the field so the sizer sees how the slate's bets land together, dead heats included
+        simulator = None
+        outcomes = None
+        if context.simulate_field:
+            simulator = self._field_simulator(event_id, player_probs, context.outright_markets)
+            outcomes = simulator.outcome_fractions(
+                [{'player_id': row.dg_id, 'market': market, 'odds': row.best_odds} for market, row in slate]
+                + existing
+            )
+
+        # Size the slate together under the per-bet cap and what's left of the weekly budget
+        stakes = optimize_portfolio(
+            player_ids=[row.dg_id for _, row in slate],
+            markets=[market for market, _ in slate],
+            odds=[row.best_odds for _, row in slate],
+            probs=[row.model_prob for _, row in slate],
+            bankroll=context.bankroll,
+            max_stake_per_bet=context.max_stake_per_bet,
+            budget=context.remaining_budget,
+            kelly_fraction=context.kelly_fraction,
+            player_probs=player_probs,
+            outcomes=outcomes,
+            existing=existing
+        )
+        placed = []
+
+        for (market, row), stake in zip(slate, stakes):
+            player_name = row.player_name
+            units = stake / unit_size
+
+            # Skip bets that are too small (less than 0.1 units)
+            if units < 0.1:
+                continue
+
+            logger.info(f"Portfolio stake for {player_name} {market}: units={units:.2f}, stake=${stake:.2f} " +
+            f"(single-bet Kelly {row.kelly:.4f})")
+
+            # Place the bet with units calculation already done
+            bet_id = self.tracker.record_bet(
+                event_id=event_id,
+                event_name=event_name,
+                bet_type='outright',
+                bet_market=market,
+                player_id=row.dg_id,
+                player_name=player_name,
+                odds=row.best_odds,
+                stake=stake,  # This is in dollars
+                base_model_probability=row.model_prob,
+                round_num=None,
+                notes=f"Book: {row.best_book}, Units: {units:.2f}, Kelly: {row.kelly:.4f}, Model odds: {row.model_odds}",
+                event_start_date=current_event.get('start_date')
+            )
+
+            context.record_stake(stake)
+            logger.info(f"Placed {units:.2f} unit bet on {player_name} to {market} at {row.best_odds} odds (EV: {row.ev_percentage:.2f}%) with {row.best_book}")
+
+            # Post to Twitter if enabled
+            if context.post_picks:
+                bet_data = {
+                    'event_name': event_name,
+                    'player_name': player_name,
+                    'bet_type': 'outright',
+                    'bet_market': market,
+                    'odds': row.best_odds,
+                    'probability': row.model_prob * 100,  # Convert to percentage for display
+                    'stake': stake
+                }
                 
-                # Calculate EV (Expected Value)
-                win_amount = best_odds - 1
-                ev_percentage = ((model_prob * win_amount) - ((1 - model_prob) * 1)) * 100
+                self._post_pick(context, bet_id, self.twitter_bot.post_outright_bet, bet_data)
 
-                # Log high EV values for inspection
-                if ev_percentage > 50:
-                    logger.info(f"High EV detected for {player_name} {market}: {ev_percentage:.2f}%. Model prob: {model_prob:.4f} ({model_odds}), Book odds: {best_odds}")
-                    
-                # If EV exceeds our minimum threshold
-                min_ev = self.config['betting']['min_ev_percentage']
-                if ev_percentage > min_ev:
-                    # Calculate Kelly stake
-                    raw_kelly = self.tracker.calculate_kelly_criterion(
-                        model_prob,
-                        best_odds,
-                        self.config['betting']['kelly_fraction']
-                    )
-
-                    # Calculate the stake in units, capped by maximum stake per bet
-                    raw_kelly_amount = raw_kelly * self.bankroll  # This is in dollars
-                    kelly_units = raw_kelly_amount / self.config['betting']['unit_size']  # Convert to units
-                    max_units = self.config['betting']['max_stake_per_bet'] / self.config['betting']['unit_size']
-                    units = min(kelly_units, max_units)  # Cap in units
-
-                    # Convert units back to dollars for weekly limit check and database
-                    stake = units * self.config['betting']['unit_size']
-
-                    # Skip bets that are too small (less than 0.1 units)
-                    if units < 0.1:
-                        continue
+            placed.append({'player_id': row.dg_id, 'market': market, 'odds': row.best_odds, 'stake': stake})
 
-                    logger.info(f"Kelly calculation for {player_name} {market}: raw_kelly={raw_kelly:.4f}, " +
-                    f"kelly_amount=${raw_kelly_amount:.2f}, kelly_units={kelly_units:.2f}")
-
-                    # Add a check to ensure we don't exceed weekly wagering limit
-                    if self.current_week_wagered + stake > self.config['betting']['max_weekly_wagering_amount']:
-                        remaining = self.config['betting']['max_weekly_wagering_amount'] - self.current_week_wagered
-                        if remaining < self.config['betting']['unit_size'] * 0.1:  # Less than 0.1 units
-                            logger.info("Weekly wagering limit reached, skipping bet")
-                            continue
-                        logger.info(f"Adjusting stake from ${stake:.2f} to ${remaining:.2f} to stay within weekly limit")
-                        stake = remaining
-                        units = stake / self.config['betting']['unit_size']
-
-                    # Check if a similar bet already exists
-                    exists, existing_bet = self.tracker.has_existing_bet(
-                        event_id=event_id,
-                        bet_type='outright',
-                        bet_market=market,
-                        player_id=player_id,
-                        round_num=None  # No round for outright bets
-                    )
-                    
-                    if exists:
-                        logger.info(f"Similar bet already exists for {player_name} to {market} - skipping")
-                        continue
+        if simulator and placed:
+            self._record_slate_risk(context, tour, event_name, simulator, placed)
 
-                    logger.info(f"Final stake for {player_name} {market}: units={units:.2f}, stake=${stake:.2f}, " +
-                    f"max_units={max_units:.2f}, max_stake=${self.config['betting']['max_stake_per_bet']:.2f}")
-
-                    # Place the bet with units calculation already done
-                    bet_id = self.tracker.record_bet(
-                        event_id=event_id,
-                        event_name=event_name,
-                        bet_type='outright',
-                        bet_market=market,
-                        player_id=player_id,
-                        player_name=player_name,
-                        odds=best_odds,
-                        stake=stake,  # This is in dollars
-                        model_probability=model_prob,
-                        round_num=None,
-                        notes=f"Book: {best_book}, Units: {units:.2f}, Kelly: {raw_kelly:.4f}, Model odds: {model_odds}"
-                    )
-
-                    logger.info(f"Placed {units:.2f} unit bet on {player_name} to {market} at {best_odds} odds (EV: {ev_percentage:.2f}%) with {best_book}")
-
-                    # Post to Twitter if enabled
-                    if self.twitter_bot and self.config['twitter']['enabled'] and self.config['twitter']['post_schedule']['daily_picks']:
-                        bet_data = {
-                            'event_name': event_name,
-                            'player_name': player_name,
-                            'bet_type': 'outright',
-                            'bet_market': market,
-                            'odds': best_odds,
-                            'probability': model_prob * 100,  # Convert to percentage for display
-                            'stake': stake
-                        }
-                        
-                        try:
-                            tweet_text = self.twitter_bot.post_outright_bet(bet_data)
-                            self.tracker.mark_bet_as_posted(bet_id)
-                            logger.info(f"Posted bet {bet_id} to Twitter")
-                        except Exception as e:
-                            logger.error(f"Failed to post to Twitter: {e}")
-                    
-                    # After placing the bet, increment the wager amount
-                    self.current_week_wagered += stake
-                    
-                    # Check if we've hit our weekly limit
-                    if self.current_week_wagered >= self.config['betting']['max_weekly_wagering_amount']:
-                        logger.info(f"Weekly wagering limit of ${self.config['betting']['max_weekly_wagering_amount']:.2f} reached")
-                        return
-
-    def _find_matchup_bets(self, tour):
-        """Find value in matchup betting markets"""
-        logger.info(f"Finding matchup bets for {tour} tour")
-        
-        # First, get current events to identify the event ID
-        schedule_data = self.tracker.fetch_current_events(tour=tour)
-        if not schedule_data or 'schedule' not in schedule_data:
-            logger.error(f"Failed to fetch schedule for {tour}")
-            return
-        
-        # Find the current/upcoming event
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        current_event = None
-        for event in schedule_data['schedule']:
-            # Find event that's starting now or in the near future
-            if event['start_date'] >= current_date:
-                current_event = event
-                break
-        
-        if not current_event:
-            logger.error(f"No upcoming events found for {tour}")
+        # New bets get their CLV against the closing lines captured so far
+        if placed:
+            update_clv(self.tracker.db_conn, event_id)
+
+    def _post_pick(self, context, bet_id, post, bet_data):
+        """Tweet a placed bet, or leave it on context.posts for the caller to post"""
+        if context.posts is not None:
+            context.posts.append((bet_id, post, bet_data))
             return
+        try:
+            post(bet_data)
+            self.tracker.mark_bet_as_posted(bet_id)
+            logger.info(f"Posted bet {bet_id} to Twitter")
+        except Exception as e:
+            logger.error(f"Failed to post to Twitter: {e}")
+
+    def _field_simulator(self, event_id, player_probs, markets):
+        """
+        Tournament simulator fitted to the event's current outright boards.
+
+        Fitting the field takes seconds and the scheduler re-evaluates a slate
+        whenever a board moves, so the fitted simulator is kept per event and
+        only refitted when the field or its model probabilities change.
+        """
+        field = list(player_probs)
+        market_probs = {market: [player_probs[pid].get(market) for pid in field] for market in markets}
+        fingerprint = (tuple(field),) + tuple(
+            (market, np.array([np.nan if p is None else p for p in probs], dtype=float).tobytes())
+            for market, probs in market_probs.items()
+        )
+
+        cached = self._simulators.get(event_id)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
+        simulator = TournamentSimulator(field, market_probs)
+        self._simulators[event_id] = (fingerprint, simulator)
+        return simulator
+
+    def _record_slate_risk(self, context, tour, event_name, simulator, bets):
+        """Simulate the P&L of the placed outright slate and keep its bankroll risk for the report"""
+        result = simulator.simulate(context.simulation_count, bets=bets)
+        risk = bankroll_risk(result['pnl'], context.bankroll)
+        risk['event_name'] = event_name
+        risk['dead_heat_ev'] = {
+            f"{bet['player_id']}_{bet['market']}": simulator.top_n_ev(result, bet['player_id'], bet['market'], bet['odds'])
+            for bet in bets
+        }
+        self.slate_risk[tour] = risk
+
+        logger.info(f"{tour} slate risk for {event_name}: expected P&L ${risk['expected_pnl']:.2f}, "
+                    f"risk of ruin {risk['risk_of_ruin']:.2%}, "
+                    f"95th percentile drawdown {risk['drawdown_percentiles'][95]:.1%}")
+
+    def _find_matchup_bets(self, context, tour, markets=None):
+        """Find value in matchup betting markets (all of context.matchup_markets by default)"""
+        logger.info(f"Finding matchup bets for {tour} tour")
         
+        current_event = context.events[tour]
         event_id = current_event['event_id']
         event_name = current_event['event_name']
         
-        # Define the matchup markets to check
-        matchup_markets = self.config['betting'].get('matchup_markets', ['tournament_matchups', 'round_matchups', '3_balls'])
-        
         # For each matchup market type
-        for market_type in matchup_markets:
+        for market_type in markets or context.matchup_markets:
             logger.info(f"Checking {market_type} for {tour} tour")
             
-            # Fetch matchup odds for this market type
-            matchup_odds = self.tracker.fetch_matchup_odds(tour=tour, market=market_type)
+            # Matchup odds for this market type, fetched with the run context
+            matchup_odds = context.matchup_odds.get(tour, {}).get(market_type)
             
             if not matchup_odds:
                 logger.error(f"Failed to fetch {market_type} odds for {tour}")
@@ -364,240 +529,148 @@ class GolfBettingAgent:
             # If we have actual matchups, proceed with processing them
             # Get any additional info from the response
             round_num = matchup_odds.get('round_num', None)
-            
-            # For each matchup
-            for matchup in matchup_odds['match_list']:
-                try:
-                    # Check if this is a 3-ball or a 2-player matchup
-                    is_3ball = market_type == '3_balls' or 'p3_player_name' in matchup
-                    
-                    # Extract player info
-                    p1_name = matchup['p1_player_name']
-                    p1_id = matchup['p1_dg_id']
-                    p2_name = matchup['p2_player_name']
-                    p2_id = matchup['p2_dg_id']
-                    
-                    # For 3-balls, also get player 3 info
-                    p3_name = matchup.get('p3_player_name', None) if is_3ball else None
-                    p3_id = matchup.get('p3_dg_id', None) if is_3ball else None
-                    
-                    # Get Data Golf's model odds
-                    if 'odds' in matchup and 'datagolf' in matchup['odds']:
-                        dg_odds = matchup['odds']['datagolf']
-                        dg_p1_odds = dg_odds.get('p1')
-                        
-                        # Skip if no model odds available
-                        if not dg_p1_odds or dg_p1_odds <= 0:
-                            continue
-                        
-                        # Convert odds to probability
-                        dg_p1_prob = 1 / dg_p1_odds
-                        
-                        # For 3-balls, calculate probabilities differently
-                        if is_3ball:
-                            dg_p2_odds = dg_odds.get('p2')
-                            dg_p3_odds = dg_odds.get('p3')
-                            
-                            # Skip if missing odds for any player
-                            if not dg_p2_odds or not dg_p3_odds or dg_p2_odds <= 0 or dg_p3_odds <= 0:
-                                continue
-                                
-                            # Convert to probabilities
-                            dg_p2_prob = 1 / dg_p2_odds
-                            dg_p3_prob = 1 / dg_p3_odds
-                            
-                            # Normalize probabilities to sum to 1
-                            total_prob = dg_p1_prob + dg_p2_prob + dg_p3_prob
-                            dg_p1_prob = dg_p1_prob / total_prob
-                            dg_p2_prob = dg_p2_prob / total_prob
-                            dg_p3_prob = dg_p3_prob / total_prob
-                        else:
-                            # For 2-player matchups
-                            dg_p2_prob = 1 - dg_p1_prob
-                    else:
+
+            # Price every side of the card at once; only rows clearing the EV threshold need the stateful checks
+            candidates = scan_matchup_market(
+                matchup_odds,
+                market_type,
+                context.sportsbooks,
+                context.kelly_fraction,
+                context.tie_probabilities.get(market_type)
+            )
+            candidates = candidates[candidates['ev_percentage'] > context.min_ev]
+
+            for player in candidates.itertuples(index=False):
+                is_3ball = player.is_3ball
+                bet_type = '3ball' if is_3ball else 'matchup'
+                best_odds = player.best_odds
+                best_book = player.best_book
+                ev_percentage = player.ev_percentage
+                raw_kelly = player.kelly
+
+                # Calculate the stake in units, capped by maximum stake per bet
+                raw_kelly_amount = raw_kelly * context.bankroll  # This is in dollars
+                kelly_units = raw_kelly_amount / context.unit_size  # Convert to units
+                max_units = context.max_stake_per_bet / context.unit_size
+                units = min(kelly_units, max_units)  # Cap in units
+
+                # Convert units back to dollars for weekly limit check and database
+                stake = units * context.unit_size
+
+                # Log Kelly calculation details
+                logger.info(f"Kelly calculation for {player.player_name} in {market_type}: raw_kelly={raw_kelly:.4f}, kelly_amount=${raw_kelly_amount:.2f}, kelly_units={kelly_units:.2f}")
+                logger.info(f"Final stake for {player.player_name} in {market_type}: units={units:.2f}, stake=${stake:.2f}, max_units={max_units:.2f}, max_stake=${context.max_stake_per_bet:.2f}")
+
+                # Skip bets that are too small (less than 0.1 units)
+                if units < 0.1:
+                    continue
+
+                # Add a check to ensure we don't exceed weekly wagering limit
+                if stake > context.remaining_budget:
+                    remaining = context.remaining_budget
+                    if remaining < context.unit_size * 0.1:  # Less than 0.1 units
+                        logger.info("Weekly wagering limit reached, skipping bet")
                         continue
-                    
-                    # Process each player in the matchup
-                    players_info = [
-                        {'id': p1_id, 'name': p1_name, 'prob': dg_p1_prob, 'opponent_id': p2_id, 'opponent_name': p2_name},
-                        {'id': p2_id, 'name': p2_name, 'prob': dg_p2_prob, 'opponent_id': p1_id, 'opponent_name': p1_name}
-                    ]
-                    
-                    # Add player 3 for 3-balls
-                    if is_3ball and p3_name and p3_id:
-                        players_info.append({'id': p3_id, 'name': p3_name, 'prob': dg_p3_prob, 'opponent_id': None, 'opponent_name': f"{p1_name} & {p2_name}"})
-                    
-                    # Process each player in the matchup
-                    for player in players_info:
-                        # Find best odds for this player from available sportsbooks
-                        best_odds = 0
-                        best_book = None
-                        
-                        # Player index (p1, p2, p3)
-                        player_idx = f"p{players_info.index(player) + 1}"
-                        
-                        for book in matchup['odds']:
-                            if (book != 'datagolf' and 
-                                book in self.config['betting']['available_sportsbooks'] and
-                                player_idx in matchup['odds'][book] and 
-                                matchup['odds'][book][player_idx] is not None and 
-                                matchup['odds'][book][player_idx] > 0):
-                                
-                                if matchup['odds'][book][player_idx] > best_odds:
-                                    best_odds = matchup['odds'][book][player_idx]
-                                    best_book = book
-                        
-                        # Calculate EV if we found odds
-                        if best_book and best_odds > 0:
-                            implied_prob = 1 / best_odds
-                            
-                            # Calculate EV
-                            win_amount = best_odds - 1
-                            ev_percentage = ((player['prob'] * win_amount) - ((1 - player['prob']) * 1)) * 100
-                            
-                            # Check if EV exceeds our threshold
-                            min_ev = self.config['betting']['min_ev_percentage']
-                            if ev_percentage > min_ev:
-                                # Calculate Kelly stake
-                                raw_kelly = self.tracker.calculate_kelly_criterion(
-                                    player['prob'], 
-                                    best_odds,
-                                    self.config['betting']['kelly_fraction']
-                                )
-                                
-                                # Calculate the stake in units, capped by maximum stake per bet
-                                raw_kelly_amount = raw_kelly * self.bankroll  # This is in dollars
-                                kelly_units = raw_kelly_amount / self.config['betting']['unit_size']  # Convert to units
-                                max_units = self.config['betting']['max_stake_per_bet'] / self.config['betting']['unit_size']
-                                units = min(kelly_units, max_units)  # Cap in units
-
-                                # Convert units back to dollars for weekly limit check and database
-                                stake = units * self.config['betting']['unit_size']
-
-                                # Log Kelly calculation details
-                                logger.info(f"Kelly calculation for {player['name']} in {market_type}: raw_kelly={raw_kelly:.4f}, kelly_amount=${raw_kelly_amount:.2f}, kelly_units={kelly_units:.2f}")
-                                logger.info(f"Final stake for {player['name']} in {market_type}: units={units:.2f}, stake=${stake:.2f}, max_units={max_units:.2f}, max_stake=${self.config['betting']['max_stake_per_bet']:.2f}")
-
-                                # Skip bets that are too small (less than 0.1 units)
-                                if units < 0.1:
-                                    continue
-                                
-                                # Add a check to ensure we don't exceed weekly wagering limit
-                                if self.current_week_wagered + stake > self.config['betting']['max_weekly_wagering_amount']:
-                                    remaining = self.config['betting']['max_weekly_wagering_amount'] - self.current_week_wagered
-                                    if remaining < self.config['betting']['unit_size'] * 0.1:  # Less than 0.1 units
-                                        logger.info("Weekly wagering limit reached, skipping bet")
-                                        continue
-                                    logger.info(f"Adjusting stake from ${stake:.2f} to ${remaining:.2f} to stay within weekly limit")
-                                    stake = remaining
-                                    units = stake / self.config['betting']['unit_size']
-
-                                # Check if a similar bet already exists
-                                exists, existing_bet = self.tracker.has_existing_bet(
-                                    event_id=event_id,
-                                    bet_type='matchup' if not is_3ball else '3ball',
-                                    bet_market=market_type,
-                                    player_id=player['id'],
-                                    opponent_id=player['opponent_id'],
-                                    round_num=round_num
-                                )
-                                
-                                if exists:
-                                    logger.info(f"Similar bet already exists for {player['name']} vs {player['opponent_name']} - skipping")
-                                    continue
-                                
-                                # Format bet details for logging and notes
-                                if is_3ball:
-                                    bet_desc = f"{player['name']} to win 3-ball"
-                                    if round_num:
-                                        bet_desc += f" (Round {round_num})"
-                                else:
-                                    bet_desc = f"{player['name']} over {player['opponent_name']}"
-                                    if market_type == 'round_matchups' and round_num:
-                                        bet_desc += f" (Round {round_num})"
-                                
-                                # Place the bet
-                                bet_id = self.tracker.record_bet(
-                                    event_id=event_id,
-                                    event_name=event_name,
-                                    bet_type='matchup' if not is_3ball else '3ball',
-                                    bet_market=market_type,
-                                    player_id=player['id'],
-                                    player_name=player['name'],
-                                    opponent_id=player['opponent_id'],
-                                    opponent_name=player['opponent_name'],
-                                    odds=best_odds,
-                                    stake=stake,
-                                    model_probability=player['prob'],
-                                    round_num=round_num,
-                                    notes=f"Book: {best_book}, Units: {units:.2f}, Kelly: {raw_kelly:.4f}, Market: {market_type}"
-                                )
-                                
-                                logger.info(f"Placed {units:.2f} unit bet on {bet_desc} at {best_odds} odds (EV: {ev_percentage:.2f}%) with {best_book}")
-                                
-                                # Post to Twitter if enabled
-                                if self.twitter_bot and self.config['twitter']['enabled'] and self.config['twitter']['post_schedule']['daily_picks']:
-                                    bet_data = {
-                                        'event_name': event_name,
-                                        'player_name': player['name'],
-                                        'opponent_name': player['opponent_name'],
-                                        'bet_type': 'matchup' if not is_3ball else '3ball',
-                                        'market_type': market_type,
-                                        'round': round_num,
-                                        'odds': best_odds,
-                                        'probability': player['prob'] * 100,  # Convert to percentage for display
-                                        'stake': stake
-                                    }
-                                    
-                                    try:
-                                        tweet_text = self.twitter_bot.post_matchup_bet(bet_data)
-                                        self.tracker.mark_bet_as_posted(bet_id)
-                                        logger.info(f"Posted matchup bet {bet_id} to Twitter")
-                                    except Exception as e:
-                                        logger.error(f"Failed to post to Twitter: {e}")
-                                
-                                # Update wagered amount
-                                self.current_week_wagered += stake
-                                
-                                # Check weekly limit
-                                if self.current_week_wagered >= self.config['betting']['max_weekly_wagering_amount']:
-                                    logger.info(f"Weekly wagering limit of ${self.config['betting']['max_weekly_wagering_amount']:.2f} reached")
-                                    return
-                        
-                except Exception as e:
-                    logger.error(f"Error processing matchup in {market_type}: {e}")
-                    logger.debug(f"Problematic matchup data: {matchup}")
+                    logger.info(f"Adjusting stake from ${stake:.2f} to ${remaining:.2f} to stay within weekly limit")
+                    stake = remaining
+                    units = stake / context.unit_size
+
+                # Check if a similar bet already exists
+                exists, existing_bet = self.tracker.has_existing_bet(
+                    event_id=event_id,
+                    bet_type=bet_type,
+                    bet_market=market_type,
+                    player_id=player.dg_id,
+                    opponent_id=player.opponent_id,
+                    round_num=round_num
+                )
+
+                if exists:
+                    logger.info(f"Similar bet already exists for {player.player_name} vs {player.opponent_name} - skipping")
                     continue
 
-    def _post_performance_update(self):
-        """Post performance update to Twitter"""
-        logger.info("Posting performance update")
-        
+                # Format bet details for logging and notes
+                if is_3ball:
+                    bet_desc = f"{player.player_name} to win 3-ball"
+                    if round_num:
+                        bet_desc += f" (Round {round_num})"
+                else:
+                    bet_desc = f"{player.player_name} over {player.opponent_name}"
+                    if market_type == 'round_matchups' and round_num:
+                        bet_desc += f" (Round {round_num})"
+
+                # Place the bet
+                bet_id = self.tracker.record_bet(
+                    event_id=event_id,
+                    event_name=event_name,
+                    bet_type=bet_type,
+                    bet_market=market_type,
+                    player_id=player.dg_id,
+                    player_name=player.player_name,
+                    opponent_id=player.opponent_id,
+                    opponent_name=player.opponent_name,
+                    odds=best_odds,
+                    stake=stake,
+                    base_model_probability=player.model_prob,
+                    round_num=round_num,
+                    notes=f"Book: {best_book}, Units: {units:.2f}, Kelly: {raw_kelly:.4f}, Market: {market_type}, Tie-adjusted EV: {player.tie_adjusted_ev:.2f}%",
+                    event_start_date=current_event.get('start_date')
+                )
+
+                context.record_stake(stake)
+                logger.info(f"Placed {units:.2f} unit bet on {bet_desc} at {best_odds} odds (EV: {ev_percentage:.2f}%, tie-adjusted: {player.tie_adjusted_ev:.2f}%) with {best_book}")
+
+                # Post to Twitter if enabled
+                if context.post_picks:
+                    bet_data = {
+                        'event_name': event_name,
+                        'player_name': player.player_name,
+                        'opponent_name': player.opponent_name,
+                        'bet_type': bet_type,
+                        'market_type': market_type,
+                        'round': round_num,
+                        'odds': best_odds,
+                        'probability': player.model_prob * 100,  # Convert to percentage for display
+                        'stake': stake
+                    }
+
+                    self._post_pick(context, bet_id, self.twitter_bot.post_matchup_bet, bet_data)
+
+                # Check weekly limit
+                if context.remaining_budget <= 0:
+                    logger.info(f"Weekly wagering limit of ${context.max_weekly_wagering:.2f} reached")
+                    return
+
+    def _build_performance_update(self):
+        """Performance report and bankroll chart for the weekly recap, or None if the recap is off"""
         if not self.twitter_bot or not self.config['twitter']['enabled'] or not self.config['twitter']['post_schedule']['weekly_recap']:
             logger.info("Twitter posting disabled or weekly recap disabled")
-            return
+            return None
         
         # Generate performance report
         report = self.tracker.generate_performance_report()
+        if report and self.slate_risk:
+            report['slate_risk'] = self.slate_risk
         
         # Generate bankroll evolution chart
         chart_path = self.tracker.plot_bankroll_evolution(self.config['betting']['initial_bankroll'])
         
-        if report and chart_path:
+        if not report or not chart_path:
+            return None
+        return report, chart_path
+
+    def _post_performance_update(self):
+        """Post performance update to Twitter"""
+        logger.info("Posting performance update")
+        
+        update = self._build_performance_update()
+        if update:
             try:
-                self.twitter_bot.post_performance_update(report, chart_path)
+                self.twitter_bot.post_performance_update(*update)
                 logger.info(f"Posted performance update to Twitter")
             except Exception as e:
                 logger.error(f"Failed to post performance update: {e}")
 
-    def reset_weekly_wager_counter(self):
-        """Reset the weekly wagered amount - called every Monday"""
-        if self.current_week_wagered > 0:
-            logger.info(f"Resetting weekly wagered amount from ${self.current_week_wagered:.2f} to $0.00")
-        else:
-            logger.info("Resetting weekly wagered amount")
-        self.current_week_wagered = 0.0
-
 def main():
     """Run the golf betting agent"""
     parser = argparse.ArgumentParser(description='Golf Betting Agent')
@@ -612,18 +685,12 @@ def main():
         agent.run_daily_update()
         return
     
-    # Schedule daily updates
-    schedule.every(agent.config['schedule']['update_frequency_hours']).hours.do(agent.run_daily_update)
-    
-    # Reset weekly wager counter every Monday
-    schedule.every().monday.at("00:01").do(agent.reset_weekly_wager_counter)
-    
+    # Poll, evaluate, settle and report on one event loop until interrupted
     logger.info("Golf betting agent scheduled, running continuously")
-    
-    # Run continuously
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
+    try:
+        asyncio.run(AgentScheduler(agent).run())
+    except KeyboardInterrupt:
+        logger.info("Golf betting agent stopped")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -13,6 +13,7 @@ sys.path.append(os.path.join(project_root, 'chatbot'))  # Add the chatbot direct
 
 # Then import using the absolute path
 from chatbot.head_pro_chatbot import HeadProChatbot
+from bet_rollups import get_totals
 
 # Load environment variables
 load_dotenv()
@@ -168,30 +169,22 @@ def get_model_performance_data(db_path):
     try:
         cursor = conn.cursor()
         
-        # Get overall statistics (copied from your _retrieve_model_performance method)
-        cursor.execute('''
-        SELECT 
-            COUNT(*) as total_bets,
-            SUM(CASE WHEN outcome = 'win' THEN 1 ELSE 0 END) as winning_bets,
-            SUM(CASE WHEN outcome = 'loss' THEN 1 ELSE 0 END) as losing_bets,
-            SUM(stake) as total_staked,
-            SUM(CASE WHEN outcome IN ('win', 'loss') THEN profit_loss ELSE 0 END) as total_profit_loss,
-            AVG(stake) as avg_stake,
-            AVG(odds) as avg_odds,
-            AVG(expected_value) as avg_ev
-        FROM bets
-        WHERE outcome IN ('win', 'loss')
-        ''')
-        
-        stats = cursor.fetchone()
+        # Overall statistics over won and lost bets, from the bet rollups if a writer
+        # has created them (this read-only view never does)
+        totals = get_totals(conn, create=False)
         overview = {}
         
-        if stats:
-            stats_dict = dict(stats)
-            total_bets = stats_dict['total_bets'] or 0
-            winning_bets = stats_dict['winning_bets'] or 0
-            total_staked = stats_dict['total_staked'] or 0
-            total_profit_loss = stats_dict['total_profit_loss'] or 0
+        if totals:
+            total_bets = totals['wins'] + totals['losses']
+            winning_bets = totals['wins']
+            total_staked = totals['decided_staked']
+            total_profit_loss = totals['decided_profit_loss']
+            stats_dict = {
+                'losing_bets': totals['losses'],
+                'avg_stake': total_staked / total_bets if total_bets else None,
+                'avg_odds': totals['decided_odds'] / total_bets if total_bets else None,
+                'avg_ev': totals['decided_ev'] / totals['decided_ev_count'] if totals['decided_ev_count'] else None
+            }
             
             # Calculate ROI and Win Rate
             roi = (total_profit_loss / total_staked * 100) if total_staked > 0 else 0
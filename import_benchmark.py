@@ -0,0 +1,161 @@
+"""
+Startup import benchmark for the CLI entry points and web workers.
+
+Each target module is imported in a fresh interpreter under `python -X
+importtime`, and the cumulative import time is reported with the slowest
+imports it pulled in. pandas, matplotlib, seaborn and the LLM SDKs are only
+needed once a report is built, a chart drawn or a model called, so a target
+that loads any of them at import time fails the check:
+
+    HEAVY_IMPORTS   packages no target may import at startup
+    --max-ms        optional budget for each target's median import time
+
+Timings vary with the machine and a cold disk cache, so each target is
+imported --repeat times and the median is used. The exit status is 1 if any
+target fails, so the script can gate a CI job.
+
+Usage:
+    python import_benchmark.py
+    python import_benchmark.py betting_tracker web.app --max-ms 400 --top 15
+"""
+
+import os
+import re
+import sys
+import argparse
+import logging
+import statistics
+import subprocess
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('golf.import_benchmark')
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# CLI entry points, scheduled jobs and the web app (what a gunicorn worker imports)
+TARGETS = [
+    'golf_betting_agent',
+    'betting_tracker',
+    'bet_settlement',
+    'bankroll_ledger',
+    'closing_lines',
+    'bet_rollups',
+    'db_utils',
+    'web.app',
+]
+
+# Analytics, plotting and LLM client packages, imported lazily at first use
+HEAVY_IMPORTS = ('pandas', 'matplotlib', 'seaborn', 'anthropic', 'google.genai', 'google.generativeai')
+
+# "import time:  self [us] | cumulative | imported package", indented by nesting
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$')
+
+
+def _importtime(code):
+    """{module: cumulative ms} of everything imported running code in a fresh interpreter"""
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if process.returncode != 0:
+        error = process.stderr.strip().splitlines()
+        raise RuntimeError(error[-1] if error else f"exit status {process.returncode}")
+
+    imports = {}
+    for line in process.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            imports[match.group(4)] = int(match.group(2)) / 1000
+    return imports
+
+
+def measure_import(module, interpreter=frozenset()):
+    """
+    Import a module in a fresh interpreter and parse its -X importtime output.
+
+    Args:
+        module: Dotted module name, importable from the repository root
+        interpreter: Modules the interpreter imports before running any code
+            (site and friends), left out of the result
+
+    Returns:
+        Dictionary with the module's cumulative import time in ms ('total_ms'),
+        and 'imports', a {module: cumulative ms} dict of everything imported
+        on the way
+
+    Raises:
+        RuntimeError: If the module can't be imported
+    """
+    imports = _importtime(f'import {module}')
+    return {
+        'total_ms': imports.get(module, 0.0),
+        'imports': {name: ms for name, ms in imports.items() if name not in interpreter},
+    }
+
+
+def benchmark(module, repeat=3, interpreter=frozenset()):
+    """
+    Median startup cost of a module and the heavy packages it imports.
+
+    Args:
+        module: Dotted module name
+        repeat: Number of fresh-interpreter imports to take the median of
+        interpreter: See measure_import()
+
+    Returns:
+        Dictionary with module, total_ms (median), imports (from the median
+        run) and heavy, the HEAVY_IMPORTS it loaded
+    """
+    runs = sorted((measure_import(module, interpreter) for _ in range(repeat)), key=lambda run: run['total_ms'])
+    median = runs[len(runs) // 2]
+    heavy = [name for name in HEAVY_IMPORTS if name in median['imports']]
+    return {
+        'module': module,
+        'total_ms': statistics.median(run['total_ms'] for run in runs),
+        'imports': median['imports'],
+        'heavy': heavy,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure and check startup import time of entry points")
+    parser.add_argument("modules", nargs="*", default=TARGETS, help="Modules to import (default: all entry points)")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh imports per module; the median is reported")
+    parser.add_argument("--max-ms", type=float, help="Fail a module whose median import takes longer than this")
+    parser.add_argument("--top", type=int, default=5, help="Slowest imports to list per module")
+    args = parser.parse_args()
+
+    interpreter = frozenset(_importtime('pass'))
+    failures = 0
+    for module in args.modules:
+        try:
+            result = benchmark(module, max(args.repeat, 1), interpreter)
+        except RuntimeError as e:
+            logger.error(f"{module}: import failed ({e})")
+            failures += 1
+            continue
+
+        problems = []
+        if result['heavy']:
+            problems.append(f"imports {', '.join(result['heavy'])} at startup")
+        if args.max_ms is not None and result['total_ms'] > args.max_ms:
+            problems.append(f"over the {args.max_ms:.0f} ms budget")
+        failures += bool(problems)
+
+        print(f"\n{module}: {result['total_ms']:.1f} ms" + (f"  FAIL: {'; '.join(problems)}" if problems else ""))
+        slowest = sorted(((ms, name) for name, ms in result['imports'].items() if name != module), reverse=True)
+        for ms, name in slowest[:args.top]:
+            print(f"    {ms:8.1f} ms  {name}")
+
+    if failures:
+        print(f"\n{failures} of {len(args.modules)} modules failed the startup import check")
+        sys.exit(1)
+    print(f"\nAll {len(args.modules)} modules passed the startup import check")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,684 @@
+"""
+Long-running transcript ingestion service.
+
+Turns YouTube videos and transcript files into stored insights and fresh
+mental form scores without running youtube_transcript.py,
+insights_extractor.py and calculate_mental_form.py by hand. Work arrives
+from a watched transcripts directory or the ingestion_queue table and flows
+through a pipeline of stages connected by bounded queues:
+
+    fetch -> extract -> resolve -> insert -> rescore
+
+Each stage runs in its own worker threads, so several episodes are in
+flight at once (one being fetched while another is extracted and a third is
+written). Bounded queues give backpressure: a slow stage stalls the stages
+before it instead of letting work pile up in memory.
+
+Usage:
+    python ingestion_service.py enqueue --url https://youtu.be/... --event_name "Masters" --source "The Fried Egg"
+    python ingestion_service.py run --watch_dir transcripts/inbox --event_name "Masters" --source "No Laying Up"
+    python ingestion_service.py run --once --no_rescore
+    python ingestion_service.py status
+
+Files dropped in the watch directory can carry their metadata in a sidecar
+<name>.json (event_name, source, source_type, episode_title, content_url,
+insight_date); otherwise the run command's defaults are used.
+"""
+
+import os
+import json
+import time
+import queue
+import shutil
+import sqlite3
+import argparse
+import datetime
+import threading
+import logging
+from dotenv import load_dotenv
+
+from insights_extractor import read_transcript, extract_insights, save_unmatched_insights
+from player_index import PlayerNameIndex
+from db_utils import add_insights_bulk, calculate_mental_form
+from youtube_transcript import get_video_id_from_url, fetch_transcripts, TranscriptCache, DEFAULT_CACHE_DIR
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('golf.ingestion_service')
+
+load_dotenv()
+
+# Queue row states
+STATUS_PENDING = "pending"
+STATUS_PROCESSING = "processing"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+# Marks the end of the stream so stages shut down in order
+_STOP = object()
+
+
+class Stage:
+    """A pipeline stage: worker threads moving items from an inbox to an outbox"""
+
+    def __init__(self, name, func, inbox, outbox=None, workers=1, on_error=None):
+        """
+        Args:
+            name: Stage name used in logs and metrics
+            func: Callable taking an item and returning the item to pass on
+                  (or None to pass nothing on)
+            inbox: Bounded queue the stage reads from
+            outbox: Queue the stage writes to (None for the last stage)
+            workers: Number of worker threads
+            on_error: Callable(item, exception) for items that fail
+        """
+        self.name = name
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self.workers = workers
+        self.on_error = on_error
+
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.in_flight = 0
+        self._running_workers = workers
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"{self.name}-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def join(self, timeout=None):
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _work(self):
+        while True:
+            item = self.inbox.get()
+
+            if item is _STOP:
+                # Let sibling workers see the stop too; the last one out forwards it
+                with self._lock:
+                    self._running_workers -= 1
+                    last = self._running_workers == 0
+                if not last:
+                    self.inbox.put(_STOP)
+                elif self.outbox is not None:
+                    self.outbox.put(_STOP)
+                return
+
+            with self._lock:
+                self.in_flight += 1
+            started = time.time()
+
+            try:
+                result = self.func(item)
+                ok = True
+            except Exception as e:
+                logger.error(f"[{self.name}] failed: {e}")
+                if self.on_error:
+                    self.on_error(item, e)
+                result = None
+                ok = False
+
+            with self._lock:
+                self.in_flight -= 1
+                self.busy_seconds += time.time() - started
+                if ok:
+                    self.processed += 1
+                else:
+                    self.failed += 1
+
+            if result is not None and self.outbox is not None:
+                self.outbox.put(result)
+
+    def metrics(self, elapsed):
+        """Throughput and backlog for this stage"""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "processed": self.processed,
+                "failed": self.failed,
+                "in_flight": self.in_flight,
+                "backlog": self.inbox.qsize(),
+                "items_per_minute": round(self.processed / elapsed * 60, 2) if elapsed > 0 else 0.0,
+                "avg_seconds_per_item": round(self.busy_seconds / self.processed, 3) if self.processed else None
+            }
+
+
+class IngestionService:
+    """Pipelined ingestion from the watch folder / queue table into the database"""
+
+    def __init__(self, db_path="data/db/mental_form.db", watch_dir=None, defaults=None,
+                 queue_size=4, fetch_workers=2, extract_workers=3, rescore_workers=1,
+                 extractor=None, scorer=None, transport=None, rescore=True,
+                 poll_interval=10, metrics_interval=60, metrics_path="data/ingestion_metrics.json",
+                 transcript_cache_dir=DEFAULT_CACHE_DIR):
+        """
+        Initialize the service.
+
+        Args:
+            db_path: Path to the mental form database
+            watch_dir: Directory to watch for *.txt transcripts (optional)
+            defaults: Default metadata for watched files (event_name, source, ...)
+            queue_size: Capacity of each queue between stages
+            fetch_workers: Concurrent transcript fetches
+            extract_workers: Episodes being extracted at once (each is itself chunked and parallel)
+            rescore_workers: Concurrent mental form recalculations
+            extractor: Callable(transcript, event_name) -> insights; defaults to Claude
+            scorer: Callable(player_id, conn) -> (score, justification); defaults to calculate_mental_form
+            transport: Transcript transport for YouTube jobs; defaults to the YouTube transcript API
+            rescore: Whether to recalculate mental form for players with new insights
+            poll_interval: Seconds between checks of the watch folder and queue table
+            metrics_interval: Seconds between metrics log lines / snapshots
+            metrics_path: Where metric snapshots are written for the status command
+            transcript_cache_dir: Disk cache shared with youtube_transcript.py and the web app
+        """
+        self.db_path = db_path
+        self.watch_dir = watch_dir
+        self.defaults = defaults or {}
+        self.rescore = rescore
+        self.poll_interval = poll_interval
+        self.metrics_interval = metrics_interval
+        self.metrics_path = metrics_path
+
+        self.extractor = extractor or self._claude_extractor
+        self.scorer = scorer or (lambda player_id, conn: calculate_mental_form(player_id, conn=conn))
+        self.transport = transport
+        self.transcript_cache = TranscriptCache(transcript_cache_dir)
+
+        conn = self._connect()
+        self._initialize_tables(conn)
+        conn.close()
+
+        # Players waiting to be rescored, so a burst of episodes rescores each player once
+        self._rescore_pending = set()
+        self._rescore_lock = threading.Lock()
+        self._name_index = None
+        self._name_index_loaded = 0
+
+        # Each worker thread opens its own connection on first use
+        self._thread_local = threading.local()
+
+        self.fetch_queue = queue.Queue(maxsize=queue_size)
+        self.extract_queue = queue.Queue(maxsize=queue_size)
+        self.resolve_queue = queue.Queue(maxsize=queue_size)
+        self.insert_queue = queue.Queue(maxsize=queue_size)
+        self.rescore_queue = queue.Queue(maxsize=queue_size * 16)
+
+        self.stages = [
+            Stage("fetch", self._fetch, self.fetch_queue, self.extract_queue, fetch_workers, self._fail_job),
+            Stage("extract", self._extract, self.extract_queue, self.resolve_queue, extract_workers, self._fail_job),
+            Stage("resolve", self._resolve, self.resolve_queue, self.insert_queue, 1, self._fail_job),
+            Stage("insert", self._insert, self.insert_queue, self.rescore_queue, 1, self._fail_job),
+            Stage("rescore", self._rescore, self.rescore_queue, None, rescore_workers),
+        ]
+
+        self.started_at = None
+        self._stop_event = threading.Event()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _thread_conn(self):
+        """One connection per worker thread - sqlite connections can't be shared"""
+        conn = getattr(self._thread_local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._thread_local.conn = conn
+        return conn
+
+    def _initialize_tables(self, conn):
+        """Create the ingestion queue table if it doesn't exist"""
+        cursor = conn.cursor()
+
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ingestion_queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source_kind TEXT NOT NULL,
+            source_ref TEXT NOT NULL,
+            event_name TEXT NOT NULL,
+            source TEXT NOT NULL,
+            source_type TEXT DEFAULT 'podcast',
+            episode_title TEXT,
+            content_url TEXT,
+            insight_date TEXT,
+            status TEXT DEFAULT 'pending',
+            error TEXT,
+            insights_added INTEGER DEFAULT 0,
+            insights_unmatched INTEGER DEFAULT 0,
+            created_at TEXT,
+            started_at TEXT,
+            completed_at TEXT
+        )
+        ''')
+
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ingestion_queue_status ON ingestion_queue(status)
+        ''')
+
+        conn.commit()
+
+    # ---------------------------------------------------------------- queue
+
+    def enqueue(self, source_kind, source_ref, event_name, source, source_type="podcast",
+                episode_title="", content_url="", insight_date=None, conn=None):
+        """
+        Add an episode to the ingestion queue.
+
+        Args:
+            source_kind: "youtube" (source_ref is a URL or video ID) or "file" (source_ref is a path)
+            source_ref: Video URL/ID or transcript path
+            event_name: Golf event the episode discusses
+            source: Source name (podcast, channel)
+
+        Returns:
+            Queue row ID
+        """
+        close_conn = False
+        if conn is None:
+            conn = self._connect()
+            close_conn = True
+
+        now = datetime.datetime.now().isoformat()
+        if source_kind == "youtube" and not content_url:
+            content_url = source_ref if source_ref.startswith("http") else f"https://www.youtube.com/watch?v={source_ref}"
+
+        cursor = conn.cursor()
+        cursor.execute('''
+        INSERT INTO ingestion_queue
+        (source_kind, source_ref, event_name, source, source_type, episode_title, content_url,
+         insight_date, status, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (source_kind, source_ref, event_name, source, source_type, episode_title or "",
+              content_url or "", insight_date, STATUS_PENDING, now))
+        job_id = cursor.lastrowid
+
+        if close_conn:
+            conn.commit()
+            conn.close()
+
+        return job_id
+
+    def _scan_watch_dir(self, conn):
+        """Enqueue new transcript files from the watch folder"""
+        if not self.watch_dir or not os.path.isdir(self.watch_dir):
+            return 0
+
+        cursor = conn.cursor()
+        added = 0
+
+        for name in sorted(os.listdir(self.watch_dir)):
+            path = os.path.join(self.watch_dir, name)
+            if not name.endswith(".txt") or not os.path.isfile(path):
+                continue
+
+            cursor.execute('''
+            SELECT 1 FROM ingestion_queue
+            WHERE source_kind = 'file' AND source_ref = ? AND status IN (?, ?)
+            ''', (path, STATUS_PENDING, STATUS_PROCESSING))
+            if cursor.fetchone():
+                continue
+
+            metadata = dict(self.defaults)
+            sidecar = os.path.splitext(path)[0] + ".json"
+            if os.path.exists(sidecar):
+                with open(sidecar, 'r', encoding='utf-8') as f:
+                    metadata.update(json.load(f))
+
+            if not metadata.get("event_name") or not metadata.get("source"):
+                logger.warning(f"Skipping {path}: no event_name/source (add a {os.path.basename(sidecar)} sidecar)")
+                continue
+
+            self.enqueue(
+                "file", path,
+                event_name=metadata["event_name"],
+                source=metadata["source"],
+                source_type=metadata.get("source_type", "podcast"),
+                episode_title=metadata.get("episode_title") or os.path.splitext(name)[0],
+                content_url=metadata.get("content_url", ""),
+                insight_date=metadata.get("insight_date"),
+                conn=conn
+            )
+            added += 1
+
+        conn.commit()
+        return added
+
+    def _claim_pending(self, conn):
+        """Mark pending rows as processing and return them"""
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM ingestion_queue WHERE status = ? ORDER BY id', (STATUS_PENDING,))
+        rows = cursor.fetchall()
+
+        now = datetime.datetime.now().isoformat()
+        cursor.executemany('''
+        UPDATE ingestion_queue SET status = ?, started_at = ?, error = NULL WHERE id = ?
+        ''', [(STATUS_PROCESSING, now, row['id']) for row in rows])
+        conn.commit()
+
+        return [dict(row) for row in rows]
+
+    def _finish_job(self, conn, job, status, error=None):
+        cursor = conn.cursor()
+        cursor.execute('''
+        UPDATE ingestion_queue
+        SET status = ?, error = ?, insights_added = ?, insights_unmatched = ?, completed_at = ?
+        WHERE id = ?
+        ''', (status, error, job.get("insights_added", 0), job.get("insights_unmatched", 0),
+              datetime.datetime.now().isoformat(), job["id"]))
+
+        # Move watched files out of the way so they aren't picked up again
+        if job["source_kind"] == "file" and self.watch_dir and \
+                os.path.dirname(os.path.abspath(job["source_ref"])) == os.path.abspath(self.watch_dir):
+            target_dir = os.path.join(self.watch_dir, "processed" if status == STATUS_DONE else "failed")
+            os.makedirs(target_dir, exist_ok=True)
+            for path in (job["source_ref"], os.path.splitext(job["source_ref"])[0] + ".json"):
+                if os.path.exists(path):
+                    shutil.move(path, os.path.join(target_dir, os.path.basename(path)))
+
+    def _fail_job(self, job, error):
+        conn = self._thread_conn()
+        # Discard anything a failed insert left uncommitted
+        conn.rollback()
+        self._finish_job(conn, job, STATUS_FAILED, str(error))
+        conn.commit()
+
+    # --------------------------------------------------------------- stages
+
+    def _youtube_fetcher(self, video_id):
+        # Videos fetched before (by the web app or an earlier run) come from the disk cache
+        result = fetch_transcripts([video_id], cache=self.transcript_cache, transport=self.transport)[video_id]
+        if result["error"]:
+            raise ValueError(f"No transcript available for video {video_id}: {result['error']}")
+        return result["text"]
+
+    def _claude_extractor(self, transcript, event_name):
+        api_key = os.environ.get("ANTHROPIC_API_KEY")
+        if not api_key:
+            raise ValueError("Anthropic API key is required but not found in environment variables")
+
+        insights, _ = extract_insights(transcript, event_name, api_key)
+        return insights
+
+    def _fetch(self, job):
+        if job["source_kind"] == "youtube":
+            job["transcript"] = self._youtube_fetcher(get_video_id_from_url(job["source_ref"]))
+        else:
+            job["transcript"] = read_transcript(job["source_ref"])
+
+        logger.info(f"Fetched job {job['id']} ({len(job['transcript'])} chars)")
+        return job
+
+    def _extract(self, job):
+        job["insights"] = self.extractor(job["transcript"], job["event_name"])
+        del job["transcript"]
+        logger.info(f"Extracted {len(job['insights'])} insights for job {job['id']}")
+        return job
+
+    def _resolve(self, job):
+        # Reload the index periodically so newly imported players are picked up
+        if self._name_index is None or time.time() - self._name_index_loaded > 3600:
+            self._name_index = PlayerNameIndex(self._thread_conn())
+            self._name_index_loaded = time.time()
+
+        self._name_index.resolve_all(item["player_name"] for item in job["insights"])
+        job["name_index"] = self._name_index
+        return job
+
+    def _insert(self, job):
+        conn = self._thread_conn()
+
+        results = add_insights_bulk(
+            job["insights"],
+            source=job["source"],
+            source_type=job["source_type"] or "podcast",
+            content_title=job["episode_title"] or "",
+            content_url=job["content_url"] or "",
+            date=job["insight_date"],
+            conn=conn,
+            name_index=job.pop("name_index")
+        )
+
+        unmatched = [
+            {"player_name": result["player_name"], "insight": result["insight"]}
+            for result in results if result["player_id"] is None
+        ]
+        job["insights_added"] = len(results) - len(unmatched)
+        job["insights_unmatched"] = len(unmatched)
+
+        # Saved before the job is marked done: if this fails, _fail_job rolls the
+        # insights back too, so a retry doesn't store them twice
+        if unmatched:
+            save_unmatched_insights(unmatched, job["event_name"], job["source_ref"], job["source"],
+                                    job["episode_title"], job["content_url"])
+
+        self._finish_job(conn, job, STATUS_DONE)
+        conn.commit()
+
+        logger.info(f"Job {job['id']} stored {job['insights_added']} insights "
+                    f"({job['insights_unmatched']} unmatched)")
+
+        if not self.rescore:
+            return None
+
+        with self._rescore_lock:
+            new_players = sorted({r["player_id"] for r in results if r["player_id"]} - self._rescore_pending)
+            self._rescore_pending.update(new_players)
+
+        for player_id in new_players:
+            self.rescore_queue.put(player_id)
+        return None
+
+    def _rescore(self, player_id):
+        with self._rescore_lock:
+            self._rescore_pending.discard(player_id)
+
+        conn = self._thread_conn()
+        score, _ = self.scorer(player_id, conn)
+        conn.commit()
+        logger.info(f"Rescored player {player_id}: {score}")
+        return None
+
+    # ------------------------------------------------------------- control
+
+    def metrics(self):
+        """Snapshot of per-stage throughput and backlog, plus queue table counts"""
+        elapsed = time.time() - self.started_at if self.started_at else 0.0
+
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT status, COUNT(*) FROM ingestion_queue GROUP BY status')
+        queue_counts = {row[0]: row[1] for row in cursor.fetchall()}
+        conn.close()
+
+        return {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "uptime_seconds": round(elapsed, 1),
+            "queue": queue_counts,
+            "stages": {stage.name: stage.metrics(elapsed) for stage in self.stages}
+        }
+
+    def _report_metrics(self):
+        snapshot = self.metrics()
+        summary = ", ".join(
+            f"{name}: {m['processed']} done/{m['backlog']} queued/{m['in_flight']} active"
+            for name, m in snapshot["stages"].items()
+        )
+        logger.info(f"Pipeline metrics - {summary}")
+
+        if self.metrics_path:
+            os.makedirs(os.path.dirname(self.metrics_path) or ".", exist_ok=True)
+            with open(self.metrics_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, indent=2)
+        return snapshot
+
+    def _has_pending(self, conn):
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*) FROM ingestion_queue WHERE status = ?', (STATUS_PENDING,))
+        return cursor.fetchone()[0] > 0
+
+    def run(self, once=False):
+        """
+        Run the pipeline.
+
+        Args:
+            once: Process what is currently queued/watched, then drain and exit
+        """
+        conn = self._connect()
+
+        # Anything left processing by a previous run was interrupted
+        conn.execute('UPDATE ingestion_queue SET status = ? WHERE status = ?', (STATUS_PENDING, STATUS_PROCESSING))
+        conn.commit()
+
+        self.started_at = time.time()
+        for stage in self.stages:
+            stage.start()
+
+        logger.info(f"Ingestion service started (watch_dir={self.watch_dir}, db={self.db_path})")
+        last_report = time.time()
+
+        try:
+            while not self._stop_event.is_set():
+                self._scan_watch_dir(conn)
+                for job in self._claim_pending(conn):
+                    # Blocks when the fetch stage is saturated
+                    self.fetch_queue.put(job)
+
+                if once and not self._has_pending(conn):
+                    break
+
+                if time.time() - last_report >= self.metrics_interval:
+                    self._report_metrics()
+                    last_report = time.time()
+
+                self._stop_event.wait(self.poll_interval)
+        except KeyboardInterrupt:
+            logger.info("Interrupted, draining pipeline...")
+        finally:
+            conn.close()
+            self.fetch_queue.put(_STOP)
+            for stage in self.stages:
+                stage.join()
+
+        return self._report_metrics()
+
+    def stop(self):
+        """Ask a running service to drain and exit"""
+        self._stop_event.set()
+
+
+def print_status(db_path, metrics_path):
+    """Print queue table counts, recent jobs and the last metrics snapshot"""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT status, COUNT(*) AS n FROM ingestion_queue GROUP BY status')
+    print("Queue:")
+    for row in cursor.fetchall():
+        print(f"  {row['status']}: {row['n']}")
+
+    cursor.execute('''
+    SELECT id, source_kind, source_ref, status, insights_added, insights_unmatched, error
+    FROM ingestion_queue ORDER BY id DESC LIMIT 10
+    ''')
+    print("\nRecent jobs:")
+    for row in cursor.fetchall():
+        line = f"  #{row['id']} [{row['status']}] {row['source_kind']}: {row['source_ref']}"
+        if row['status'] == STATUS_DONE:
+            line += f" - {row['insights_added']} added, {row['insights_unmatched']} unmatched"
+        elif row['error']:
+            line += f" - {row['error']}"
+        print(line)
+    conn.close()
+
+    if metrics_path and os.path.exists(metrics_path):
+        with open(metrics_path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        print(f"\nStage metrics (as of {snapshot['timestamp']}):")
+        for name, m in snapshot["stages"].items():
+            print(f"  {name:<8} processed={m['processed']} failed={m['failed']} backlog={m['backlog']} "
+                  f"in_flight={m['in_flight']} rate={m['items_per_minute']}/min "
+                  f"avg={m['avg_seconds_per_item']}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcript ingestion service")
+    parser.add_argument("--db_path", default="data/db/mental_form.db", help="Path to SQLite database")
+    parser.add_argument("--metrics_path", default="data/ingestion_metrics.json", help="Metrics snapshot file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="Queue a YouTube video or transcript file")
+    enqueue_source = enqueue_parser.add_mutually_exclusive_group(required=True)
+    enqueue_source.add_argument("--url", help="YouTube video URL or ID")
+    enqueue_source.add_argument("--transcript", help="Path to transcript file")
+    enqueue_parser.add_argument("--event_name", required=True, help="Name of the golf event/tournament being discussed")
+    enqueue_parser.add_argument("--source", required=True, help="Source name (e.g., podcast name, publication)")
+    enqueue_parser.add_argument("--source_type", default="podcast", help="Source type")
+    enqueue_parser.add_argument("--episode_title", help="Title of the specific episode or content piece")
+    enqueue_parser.add_argument("--content_url", help="URL to the source content")
+    enqueue_parser.add_argument("--insight_date", help="Date to record for the insights (default: today)")
+
+    run_parser = subparsers.add_parser("run", help="Run the ingestion pipeline")
+    run_parser.add_argument("--watch_dir", help="Directory to watch for transcript .txt files")
+    run_parser.add_argument("--event_name", help="Default event name for watched files")
+    run_parser.add_argument("--source", help="Default source name for watched files")
+    run_parser.add_argument("--source_type", default="podcast", help="Default source type for watched files")
+    run_parser.add_argument("--once", action="store_true", help="Process the current backlog and exit")
+    run_parser.add_argument("--no_rescore", action="store_true", help="Don't recalculate mental form")
+    run_parser.add_argument("--extract_workers", type=int, default=3, help="Episodes extracted concurrently")
+    run_parser.add_argument("--poll_interval", type=int, default=10, help="Seconds between checks for new work")
+    run_parser.add_argument("--metrics_interval", type=int, default=60, help="Seconds between metrics reports")
+
+    subparsers.add_parser("status", help="Show queue and pipeline metrics")
+
+    args = parser.parse_args()
+
+    if args.command == "status":
+        print_status(args.db_path, args.metrics_path)
+        return
+
+    if args.command == "enqueue":
+        service = IngestionService(db_path=args.db_path, metrics_path=args.metrics_path)
+        if args.url:
+            job_id = service.enqueue("youtube", args.url, args.event_name, args.source, args.source_type,
+                                     args.episode_title, args.content_url, args.insight_date)
+        else:
+            job_id = service.enqueue("file", os.path.abspath(args.transcript), args.event_name, args.source,
+                                     args.source_type, args.episode_title, args.content_url, args.insight_date)
+        print(f"Queued ingestion job {job_id}")
+        return
+
+    defaults = {"source_type": args.source_type}
+    if args.event_name:
+        defaults["event_name"] = args.event_name
+    if args.source:
+        defaults["source"] = args.source
+
+    service = IngestionService(
+        db_path=args.db_path,
+        watch_dir=args.watch_dir,
+        defaults=defaults,
+        extract_workers=args.extract_workers,
+        rescore=not args.no_rescore,
+        poll_interval=args.poll_interval,
+        metrics_interval=args.metrics_interval,
+        metrics_path=args.metrics_path
+    )
+    snapshot = service.run(once=args.once)
+    print(json.dumps(snapshot["stages"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+"""
+Near-duplicate detection for player insights.
+
+The same quote often reaches us through several podcasts, and every copy
+inflates a player's insight count, crowds the 40-insight scoring window and
+costs prompt tokens. Each insight gets a MinHash signature over its word
+shingles, stored in insight_signatures next to the insights table. A
+per-player LSH index over those signatures finds likely duplicates of a new
+insight without comparing it against every stored one, so the check at
+insert time takes well under a millisecond.
+
+Usage:
+    python insight_dedup.py backfill              # flag duplicates among existing insights
+    python insight_dedup.py backfill --merge      # remove them, keeping their sources
+    python insight_dedup.py backfill --dry_run    # only report what would happen
+"""
+
+import re
+import zlib
+import random
+import sqlite3
+import argparse
+import datetime
+import logging
+import numpy as np
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('golf.insight_dedup')
+
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16  # 16 bands of 4 rows: ~99% recall at 0.7 similarity
+SHINGLE_SIZE = 3
+
+# Estimated Jaccard similarity at or above which two insights are the same
+DUPLICATE_THRESHOLD = 0.7
+
+# What to do with a duplicate at insert time
+DEDUPE_OFF = None
+DEDUPE_FLAG = "flag"    # store it, but mark it as a duplicate of the original
+DEDUPE_MERGE = "merge"  # don't store it; record its source against the original
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_rng = random.Random(20250401)  # fixed seed - stored signatures must stay comparable
+_A = np.array([_rng.randrange(1, _MERSENNE_PRIME) for _ in range(NUM_PERMUTATIONS)], dtype=np.uint64)
+_B = np.array([_rng.randrange(0, _MERSENNE_PRIME) for _ in range(NUM_PERMUTATIONS)], dtype=np.uint64)
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def initialize_tables(conn):
+    """Create the signature and merged-duplicate tables if they don't exist"""
+    cursor = conn.cursor()
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS insight_signatures (
+        insight_id INTEGER PRIMARY KEY,
+        player_id INTEGER NOT NULL,
+        signature BLOB NOT NULL,
+        duplicate_of INTEGER,
+        similarity REAL,
+        FOREIGN KEY (insight_id) REFERENCES insights (id),
+        FOREIGN KEY (duplicate_of) REFERENCES insights (id)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_insight_signatures_player_id ON insight_signatures(player_id)
+    ''')
+
+    # Sources of duplicates that were merged into an existing insight
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS insight_duplicates (
+        id INTEGER PRIMARY KEY,
+        insight_id INTEGER NOT NULL,
+        text TEXT,
+        source TEXT,
+        source_type TEXT,
+        content_title TEXT,
+        content_url TEXT,
+        date TEXT,
+        similarity REAL,
+        merged_at TEXT,
+        FOREIGN KEY (insight_id) REFERENCES insights (id)
+    )
+    ''')
+
+
+def minhash_signature(text):
+    """
+    Compute the MinHash signature of an insight's word shingles.
+
+    Returns:
+        numpy uint32 array of NUM_PERMUTATIONS values
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) >= SHINGLE_SIZE:
+        shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    else:
+        shingles = {" ".join(words)}
+
+    hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) % _MERSENNE_PRIME for s in shingles),
+                         dtype=np.uint64, count=len(shingles))
+    permuted = (_A[:, None] * hashes[None, :] + _B[:, None]) % _MERSENNE_PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.count_nonzero(signature_a == signature_b)) / NUM_PERMUTATIONS
+
+
+def _band_keys(signature):
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(LSH_BANDS)]
+
+
+class PlayerSignatureIndex:
+    """LSH index over one player's insight signatures"""
+
+    def __init__(self):
+        self.signatures = {}  # insight_id -> signature
+        self.buckets = {}     # (band, band bytes) -> set of insight_ids
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def add(self, insight_id, signature):
+        self.signatures[insight_id] = signature
+        for key in _band_keys(signature):
+            self.buckets.setdefault(key, set()).add(insight_id)
+
+    def remove(self, insight_id):
+        signature = self.signatures.pop(insight_id, None)
+        if signature is None:
+            return
+        for key in _band_keys(signature):
+            self.buckets.get(key, set()).discard(insight_id)
+
+    def find_duplicate(self, signature, threshold=DUPLICATE_THRESHOLD):
+        """
+        Find the most similar indexed insight at or above the threshold.
+
+        Returns:
+            (insight_id, similarity) or (None, best similarity among candidates)
+        """
+        candidates = set()
+        for key in _band_keys(signature):
+            candidates |= self.buckets.get(key, set())
+
+        best_id, best_similarity = None, 0.0
+        for insight_id in candidates:
+            score = similarity(signature, self.signatures[insight_id])
+            if score > best_similarity:
+                best_id, best_similarity = insight_id, score
+
+        if best_similarity >= threshold:
+            return best_id, best_similarity
+        return None, best_similarity
+
+
+class InsightDedupIndex:
+    """
+    Per-player near-duplicate index backed by the insight_signatures table.
+
+    A player's signatures are loaded the first time that player is checked, so
+    one instance can be reused across a whole batch of inserts.
+    """
+
+    def __init__(self, conn, threshold=DUPLICATE_THRESHOLD):
+        """
+        Args:
+            conn: Open database connection
+            threshold: Estimated Jaccard similarity that counts as a duplicate
+        """
+        self.conn = conn
+        self.threshold = threshold
+        self.players = {}
+        initialize_tables(conn)
+
+    def player_index(self, player_id):
+        """Get (loading on first use) the LSH index of a player's original insights"""
+        index = self.players.get(player_id)
+        if index is None:
+            index = PlayerSignatureIndex()
+            cursor = self.conn.cursor()
+            # Flagged duplicates aren't indexed - new copies should match the original.
+            # The join skips signatures whose insight has since been deleted.
+            cursor.execute('''
+            SELECT s.insight_id, s.signature FROM insight_signatures s
+            JOIN insights i ON i.id = s.insight_id
+            WHERE s.player_id = ? AND s.duplicate_of IS NULL
+            ''', (player_id,))
+            for insight_id, blob in cursor.fetchall():
+                index.add(insight_id, np.frombuffer(blob, dtype=np.uint32))
+            self.players[player_id] = index
+        return index
+
+    def check(self, player_id, text):
+        """
+        Check an insight against a player's stored insights.
+
+        Returns:
+            (duplicate_of insight ID or None, similarity, signature)
+        """
+        signature = minhash_signature(text)
+        duplicate_of, score = self.player_index(player_id).find_duplicate(signature, self.threshold)
+        return duplicate_of, score, signature
+
+    def record(self, insight_id, player_id, signature, duplicate_of=None, score=None):
+        """Store a new insight's signature (the caller commits)"""
+        self.conn.execute('''
+        INSERT OR REPLACE INTO insight_signatures (insight_id, player_id, signature, duplicate_of, similarity)
+        VALUES (?, ?, ?, ?, ?)
+        ''', (insight_id, player_id, signature.tobytes(), duplicate_of, score))
+
+        if duplicate_of is None:
+            self.player_index(player_id).add(insight_id, signature)
+
+    def forget(self, insight_id, drop_merged=True):
+        """
+        Remove an insight's signature before it is deleted or edited (the caller commits).
+
+        If the insight was an original with flagged duplicates, the oldest of
+        them becomes the original: the other flagged copies and the merged
+        sources are repointed to it. Otherwise the merged sources are dropped,
+        unless drop_merged is False.
+
+        Args:
+            insight_id: ID of the insight being deleted or edited
+            drop_merged: Whether merged sources with nowhere to go are deleted
+
+        Returns:
+            ID of the flagged duplicate promoted to original, or None
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT player_id, duplicate_of FROM insight_signatures WHERE insight_id = ?', (insight_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        player_id, duplicate_of = row[0], row[1]
+
+        cursor.execute('DELETE FROM insight_signatures WHERE insight_id = ?', (insight_id,))
+        if player_id in self.players:
+            self.players[player_id].remove(insight_id)
+        if duplicate_of is not None:
+            return None
+
+        cursor.execute('''
+        SELECT s.insight_id, s.signature FROM insight_signatures s
+        JOIN insights i ON i.id = s.insight_id
+        WHERE s.duplicate_of = ? AND s.insight_id != ?
+        ORDER BY i.date ASC, i.id ASC
+        LIMIT 1
+        ''', (insight_id, insight_id))
+        successor = cursor.fetchone()
+
+        if successor is None:
+            if drop_merged:
+                cursor.execute('DELETE FROM insight_duplicates WHERE insight_id = ?', (insight_id,))
+            return None
+
+        successor_id = successor[0]
+        cursor.execute('UPDATE insight_signatures SET duplicate_of = NULL, similarity = NULL WHERE insight_id = ?',
+                       (successor_id,))
+        cursor.execute('UPDATE insight_signatures SET duplicate_of = ? WHERE duplicate_of = ?',
+                       (successor_id, insight_id))
+        cursor.execute('UPDATE insight_duplicates SET insight_id = ? WHERE insight_id = ?',
+                       (successor_id, insight_id))
+        if player_id in self.players:
+            self.players[player_id].add(successor_id, np.frombuffer(successor[1], dtype=np.uint32))
+        return successor_id
+
+    def reindex(self, insight_id, player_id, text):
+        """
+        Recompute an edited insight's signature (the caller commits).
+
+        The edited insight is kept either way: it is recorded as an original,
+        or flagged if its new text duplicates another insight. Sources merged
+        into it stay with it unless a flagged copy of its old text takes them.
+
+        Returns:
+            (duplicate_of insight ID or None, similarity)
+        """
+        self.forget(insight_id, drop_merged=False)
+        duplicate_of, score, signature = self.check(player_id, text)
+        self.record(insight_id, player_id, signature, duplicate_of, score if duplicate_of is not None else None)
+        return duplicate_of, score
+
+    def record_merge(self, duplicate_of, text, source, source_type, content_title, content_url, date, score):
+        """Keep the source of a merged duplicate against the original insight (the caller commits)"""
+        self.conn.execute('''
+        INSERT INTO insight_duplicates
+        (insight_id, text, source, source_type, content_title, content_url, date, similarity, merged_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (duplicate_of, text, source, source_type, content_title, content_url, date, score,
+              datetime.datetime.now().isoformat()))
+
+
+def dedupe_insights(insights, threshold=DUPLICATE_THRESHOLD):
+    """
+    Drop near-duplicates from a list of insight rows, keeping the first of each.
+
+    Used by the scoring prompt builder so a quote repeated across sources is
+    only shown (and counted) once.
+
+    Args:
+        insights: Rows or dictionaries with a "text" field, most important first
+        threshold: Estimated Jaccard similarity that counts as a duplicate
+
+    Returns:
+        List of the insights that aren't duplicates of an earlier one
+    """
+    index = PlayerSignatureIndex()
+    kept = []
+    for position, insight in enumerate(insights):
+        signature = minhash_signature(insight["text"])
+        duplicate_of, _ = index.find_duplicate(signature, threshold)
+        if duplicate_of is None:
+            index.add(position, signature)
+            kept.append(insight)
+    return kept
+
+
+def backfill(conn, merge=False, dry_run=False, threshold=DUPLICATE_THRESHOLD):
+    """
+    Compute signatures for existing insights and flag or merge duplicates.
+
+    Insights are processed oldest first, so the earliest copy of a quote is
+    treated as the original.
+
+    Args:
+        conn: Open database connection with row_factory = sqlite3.Row
+        merge: Delete duplicates (keeping their sources in insight_duplicates)
+               instead of flagging them
+        dry_run: Report without writing anything
+        threshold: Estimated Jaccard similarity that counts as a duplicate
+
+    Returns:
+        Dictionary with counts of processed insights and duplicates found
+    """
+    dedup_index = InsightDedupIndex(conn, threshold)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+    SELECT i.* FROM insights i
+    LEFT JOIN insight_signatures s ON s.insight_id = i.id
+    WHERE s.insight_id IS NULL
+    ORDER BY i.date ASC, i.id ASC
+    ''')
+    rows = cursor.fetchall()
+
+    duplicates = 0
+    dirty_players = set()
+
+    for row in rows:
+        duplicate_of, score, signature = dedup_index.check(row['player_id'], row['text'])
+
+        if duplicate_of is not None:
+            duplicates += 1
+            logger.info(f"Insight {row['id']} duplicates {duplicate_of} ({score:.2f})")
+
+        if dry_run:
+            # Still index originals so later rows are compared against them
+            if duplicate_of is None:
+                dedup_index.player_index(row['player_id']).add(row['id'], signature)
+            continue
+
+        if duplicate_of is not None and merge:
+            dedup_index.record_merge(duplicate_of, row['text'], row['source'], row['source_type'],
+                                     row['content_title'], row['content_url'], row['date'], score)
+            cursor.execute('DELETE FROM insights WHERE id = ?', (row['id'],))
+            dirty_players.add(row['player_id'])
+        else:
+            dedup_index.record(row['id'], row['player_id'], signature, duplicate_of, score)
+
+    if not dry_run:
+        # Mental form was scored with the duplicates included
+        cursor.executemany('UPDATE mental_form SET last_updated = NULL WHERE player_id = ?',
+                           [(player_id,) for player_id in sorted(dirty_players)])
+        conn.commit()
+
+    return {"processed": len(rows), "duplicates": duplicates, "merged": duplicates if merge and not dry_run else 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Insight near-duplicate index")
+    parser.add_argument("--db_path", default="data/db/mental_form.db", help="Path to SQLite database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill_parser = subparsers.add_parser("backfill", help="Index existing insights and handle duplicates")
+    backfill_parser.add_argument("--merge", action="store_true", help="Remove duplicates instead of flagging them")
+    backfill_parser.add_argument("--dry_run", action="store_true", help="Only report duplicates")
+    backfill_parser.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD, help="Similarity threshold (0-1)")
+
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db_path)
+    conn.row_factory = sqlite3.Row
+
+    if args.command == "backfill":
+        result = backfill(conn, merge=args.merge, dry_run=args.dry_run, threshold=args.threshold)
+        action = "would be handled" if args.dry_run else ("merged" if args.merge else "flagged")
+        print(f"Indexed {result['processed']} insights; {result['duplicates']} duplicates {action}")
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,26 +4,22 @@ Extract player insights from transcripts using Claude API and store them in the
 
 import os
 import argparse
-import anthropic
 import datetime
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
-from db_utils import add_insight
+from db_utils import add_insights_bulk
+from llm.llm_provider import cacheable
+from llm.router import complete
+from player_index import SPECIAL_CASES
+from transcript_chunker import split_transcript, merge_insights, DEFAULT_CHUNK_CHARS, DEFAULT_OVERLAP_CHARS
 
 load_dotenv()
 
-def read_transcript(file_path):
-    """Read the transcript file"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return f.read()
-
-def create_claude_prompt(transcript, event_name):
-    """Create a prompt for Claude to extract insights"""
-    # Get current date
-    today = datetime.datetime.now().strftime("%Y-%m-%d")
+EXTRACTION_SYSTEM_PROMPT = "You extract precise, structured insights about professional golfers from podcast transcripts."
 
-    prompt = f"""
+EXTRACTION_INSTRUCTIONS = """
 You are a sports psychologist extracting QUALITATIVE insights about professional golfers from media sources. Focus solely on INTANGIBLE factors statistical models cannot capture, especially mental aspects. Ignore performance results. You don't care about stats or scores. 
 
 Focus on QUALITY insights OVER QUANTITY - it's OK if few or no substantive insights exist in the source.
@@ -60,7 +56,7 @@ EXTRACTION GUIDELINES:
    - DO NOT evaluate or interpret the insight - simply extract and lightly polish the information as presented. Be objective!
    - Specify the source if mentioned (player, coach, analyst), as well as any tournaments and rounds. Context is important!
    - You may lightly polish the language for clarity and readability
-   - When time references are ambiguous, interpret them relative to today's date ({today})
+   - When time references are ambiguous, interpret them relative to today's date (given with the transcript below)
 
 For each substantive qualitative insight, format your response exactly as follows:
 
@@ -71,31 +67,111 @@ For each substantive qualitative insight, format your response exactly as follow
 [DETAILED QUALITATIVE INSIGHT INCLUDING RELEVANT CONTEXT]
 </insight>
 
-While this transcript may discuss the {event_name}, extract all substantive qualitative player insights regardless of whether they relate to this specific event. Each insight may only be assigned to one golfer. When possible, INCLUDE CONTEXT DETAILS FOR EACH INSIGHT such as the tournament name, timing information (e.g., "this week at the 2025 Masters," "during Valspar's final round"), golfers' full names, and any other relevant context. This timeline information will help another LLM establish patterns in the player's mental state, physical health, and other intangibles over time.
+While the transcript may discuss a specific event (named with the transcript below), extract all substantive qualitative player insights regardless of whether they relate to this specific event. Each insight may only be assigned to one golfer. When possible, INCLUDE CONTEXT DETAILS FOR EACH INSIGHT such as the tournament name, timing information (e.g., "this week at the 2025 Masters," "during Valspar's final round"), golfers' full names, and any other relevant context. This timeline information will help another LLM establish patterns in the player's mental state, physical health, and other intangibles over time.
 
 Remember, QUALITY OVER QUANTITY! Be selective, and don't infer anything from performance results!
 
-Without further ado, here is the transcript:
+"""
+
+def read_transcript(file_path):
+    """Read the transcript file"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def create_claude_prompt(transcript, event_name, part=None, total_parts=None, cache=False):
+    """
+    Create a prompt for Claude to extract insights
+
+    The static extraction instructions come first and the transcript-specific
+    part last, so the instructions can be served from the prompt cache.
+
+    Args:
+        transcript: Transcript text (or one chunk of it)
+        event_name: Name of the golf event being discussed
+        part: 1-based chunk number when the transcript has been split
+        total_parts: Total number of chunks
+        cache: Return prompt segments with the instructions marked cacheable
+               instead of a single string
+    """
+    # Get current date
+    today = datetime.datetime.now().strftime("%Y-%m-%d")
+
+    if part and total_parts and total_parts > 1:
+        transcript_intro = (f"Without further ado, here is part {part} of {total_parts} of the transcript "
+                            f"(consecutive parts overlap slightly):")
+    else:
+        transcript_intro = "Without further ado, here is the transcript:"
+
+    transcript_prompt = f"""Today's date is {today}. This transcript may discuss the {event_name}.
+
+{transcript_intro}
 {transcript}
 """
-    return prompt
+    if cache:
+        return [cacheable(EXTRACTION_INSTRUCTIONS), transcript_prompt]
+    return EXTRACTION_INSTRUCTIONS + transcript_prompt
 
 def query_claude(prompt, api_key):
     """Query Claude API to extract insights"""
-    client = anthropic.Anthropic(api_key=api_key)
-    
-    message = client.messages.create(
-        model="claude-3-7-sonnet-20250219",
+    response = complete(
+        prompt,
+        system=EXTRACTION_SYSTEM_PROMPT,
         max_tokens=4000,
         temperature=0,
-        system="You extract precise, structured insights about professional golfers from podcast transcripts.",
-        messages=[
-            {"role": "user", "content": prompt}
-        ]
+        feature="extraction",
+        api_key=api_key
     )
-    
+
     # Return the text content from the message
-    return message.content[0].text
+    return response.text
+
+def extract_insights(transcript, event_name, api_key, chunk_chars=DEFAULT_CHUNK_CHARS,
+                     overlap_chars=DEFAULT_OVERLAP_CHARS, max_workers=8):
+    """
+    Extract insights from a transcript of any length.
+
+    Long transcripts are split into overlapping chunks which are sent to Claude
+    concurrently, so wall time is roughly that of a single chunk. The per-chunk
+    results are merged with duplicates from the overlaps removed.
+
+    Args:
+        transcript: Full transcript text
+        event_name: Name of the golf event being discussed
+        api_key: Anthropic API key
+        chunk_chars: Maximum characters per chunk
+        overlap_chars: Characters shared between consecutive chunks
+        max_workers: Maximum concurrent Claude requests
+
+    Returns:
+        Tuple of (insights, raw_response) where raw_response is the chunk
+        responses joined in transcript order
+    """
+    chunks = split_transcript(transcript, chunk_chars, overlap_chars)
+    total = len(chunks)
+
+    def extract_chunk(indexed_chunk):
+        index, chunk = indexed_chunk
+        prompt = create_claude_prompt(chunk, event_name, part=index + 1, total_parts=total, cache=True)
+        return query_claude(prompt, api_key)
+
+    if total == 1:
+        responses = [extract_chunk((0, chunks[0]))]
+    else:
+        print(f"Transcript split into {total} chunks, extracting concurrently...")
+        with ThreadPoolExecutor(max_workers=min(max_workers, total)) as executor:
+            # map() keeps results in transcript order
+            responses = list(executor.map(extract_chunk, enumerate(chunks)))
+
+    insights = merge_insights([parse_claude_response(response) for response in responses])
+
+    if total == 1:
+        raw_response = responses[0]
+    else:
+        raw_response = "\n\n".join(
+            f"=== Part {index + 1} of {total} ===\n{response}" for index, response in enumerate(responses)
+        )
+
+    return insights, raw_response
 
 def parse_claude_response(response):
     """Parse Claude's response to extract player insights"""
@@ -171,74 +247,8 @@ def get_player_by_name(conn, name, fuzzy=True):
             return players[0]
     
     # Handle special cases
-    special_cases = {
-        "JT POSTON": "Poston, J.T.",
-        "VICTOR HOVLAND": "Hovland, Viktor",
-        "NICOLAI HØJGAARD": "Hojgaard, Nicolai",
-        "NIKOLAI HØJGAARD": "Hojgaard, Nicolai",
-        "NIKOLAI HOJGAARD": "Hojgaard, Nicolai",
-        "RASMUS HØJGAARD": "Hojgaard, Rasmus",
-        "AILANO GRILLO": "Grillo, Emiliano",
-        "AILANO GRIO": "Grillo, Emiliano",
-        "EMILIANO GRIO": "Grillo, Emiliano",
-        "CRISTOBAL DEL SOLAR": "Del Solar, Cristobal",
-        "WINDHAM CLARK": "Clark, Wyndham",
-        "MEN WOO LEE": "Lee, Min Woo",
-        "MENWOO LEE": "Lee, Min Woo",
-        "MINWOO LEE": "Lee, Min Woo",
-        "MINU LEE": "Lee, Min Woo",
-        "LUDVIG ÅBERG": "Aberg, Ludvig",
-        "LUDVIG OBERG": "Aberg, Ludvig",
-        "LUDVIG ÄBERG": "Aberg, Ludvig",
-        "STEPHEN JAEGER": "Jaeger, Stephan",
-        "STEVEN Jaeger": "Jaeger, Stephan",
-        "JJ SPAUN": "Spaun, J.J.",
-        "JJ SPAWN": "Spaun, J.J.",
-        "CHARLIE HOFFMAN": "Hoffman, Charley",
-        "TOM MCKIBBEN": "McKibbin, Tom",
-        "ROY MCILROY": "McIlroy, Rory",
-        "JOHN RAHM": "Rahm, Jon",
-        "JOHN ROM": "Rahm, Jon",
-        "HOWTON LEE": "Li, Haotong", 
-        "RICKY FOWLER": "Fowler, Rickie",
-        "THOMAS DIETRY": "Detry, Thomas",
-        "ADRIEN MERONK": "Meronk, Adrian",
-        "MAVERICK MCNEELY": "McNealy, Maverick",
-        "COLIN MORIKAWA": "Morikawa, Collin",
-        "PATRICK ROGERS": "Rodgers, Patrick",
-        "WINDAM CLARK": "Clark, Wyndham",
-        "ALDRI POTGATER": "Potgieter, Aldrich",
-        "JUSTIN SU": "Suh, Justin",
-        "RYAN PEAK": "PEAKE, RYAN",
-        "JOE HEITH": "Highsmith, Joe",
-        "CALLUM HILL": "Hill, Calum",
-        "CARL VILIPS": "Vilips, Karl",
-        "CARL VILLIPS": "Vilips, Karl",
-        "NEIL SHIPLEY": "Shipley, Neal",
-        "JOHNNY VEGAS": "Vegas, Jhonattan",
-        "BRIAN HARMON": "Harman, Brian",
-        "MARK LEISHMAN": "Leishman, Marc",
-        "THORBJØRN OLESEN": "Olesen, Thorbjorn",
-        "SEBASTIAN MUÑOZ": "Munoz, Sebastian",
-        "JOAQUÍN NIEMANN": "Niemann, Joaquin",
-        "JOSE LUIS BALLESTER": "Ballester Barrio, Jose Luis",
-        "JOSÉ LUIS BALLESTER": "Ballester Barrio, Jose Luis",
-        "SCOTTY SCHEFFLER": "Scheffler, Scottie",
-        "EMILIO GONZÁLEZ": "Gonzalez, Emilio",
-        "JULIÁN ETULAIN": "Etulain, Julian",
-        "JORGE FERNÁNDEZ VALDÉS": "Fernandez Valdes, Jorge",
-        "TYRELL HATTON": "Hatton, Tyrrell",
-        "STEVEN YEAGER": "Jaeger, Stephan",
-        "NICO ECHEVARRIA": "Echavarria, Nico",
-        "JHONNY VEGAS": "Vegas, Jhonattan",
-        "RYAN GERRARD": "Gerard, Ryan",
-        "JOHN RAM": "Rahm, Jon",
-        "MATTHEW PAVON": "Pavon, Matthieu",
-        "HAROLD OTT": "Ott, Harrison"
-    }
-    
-    if name.upper() in special_cases:
-        special_case_name = special_cases[name.upper()]
+    if name.upper() in SPECIAL_CASES:
+        special_case_name = SPECIAL_CASES[name.upper()]
         cursor.execute('SELECT * FROM players WHERE LOWER(name) = ?', (special_case_name.lower(),))
         players = cursor.fetchall()
         if players:
@@ -300,6 +310,8 @@ def main():
     parser.add_argument("--content_url", help="URL to the source content (e.g., podcast episode URL)")
     parser.add_argument("--db_path", default="data/db/mental_form.db", help="Path to SQLite database")
     parser.add_argument("--output", help="Output file for Claude's raw response")
+    parser.add_argument("--chunk_chars", type=int, default=DEFAULT_CHUNK_CHARS, help="Maximum transcript characters per extraction request")
+    parser.add_argument("--workers", type=int, default=8, help="Maximum concurrent extraction requests")
     
     args = parser.parse_args()
     
@@ -312,12 +324,12 @@ def main():
     # Read transcript
     transcript = read_transcript(args.transcript)
     
-    # Create prompt
-    prompt = create_claude_prompt(transcript, args.event_name)
-    
-    # Query Claude
+    # Query Claude (long transcripts are chunked and extracted in parallel)
     print(f"Querying Claude to extract insights for {args.event_name}...")
-    claude_response = query_claude(prompt, api_key)
+    insights, claude_response = extract_insights(
+        transcript, args.event_name, api_key,
+        chunk_chars=args.chunk_chars, max_workers=args.workers
+    )
     
     # Save raw response if requested
     if args.output:
@@ -333,47 +345,40 @@ def main():
             f.write(claude_response)
         print(f"Raw Claude response saved to {output_path}")
     
-    # Parse response
-    insights = parse_claude_response(claude_response)
     print(f"Extracted {len(insights)} player insights")
     
     # Connect to database
     conn = sqlite3.connect(args.db_path)
     conn.row_factory = sqlite3.Row
     
+    # Resolve every player and insert all insights in one transaction
+    results = add_insights_bulk(
+        insights,
+        source=args.source,
+        source_type="podcast",
+        content_title=args.episode_title or "",
+        content_url=args.content_url or "",
+        date=datetime.datetime.now().strftime("%Y-%m-%d"),
+        conn=conn
+    )
+    
     # Track which players were updated and which weren't found
     updated_players = []
     unmatched_insights = []
     
-    # For each insight, find the matching player and update
-    for insight_item in insights:
-        player_name = insight_item["player_name"]
-        insight_text = insight_item["insight"]
-        
-        # Try to find the player in the database
-        player = get_player_by_name(conn, player_name)
-        
-        if player:
-            # Add insight
-            player_id = player["id"]
-            add_insight(
-                player_id=player_id,
-                text=insight_text,
-                source=args.source,
-                source_type="podcast",
-                content_title=args.episode_title or "",
-                content_url=args.content_url or "",
-                date=datetime.datetime.now().strftime("%Y-%m-%d")
-            )
-            updated_players.append(player["name"])
-            print(f"Added insight for {player['name']}")
+    for result in results:
+        if result["player_id"] and result["duplicate_of"]:
+            print(f"Merged duplicate insight for {result['matched_name']} into insight {result['duplicate_of']}")
+        elif result["player_id"]:
+            updated_players.append(result["matched_name"])
+            print(f"Added insight for {result['matched_name']}")
         else:
             # Add to unmatched insights
             unmatched_insights.append({
-                "player_name": player_name,
-                "insight": insight_text
+                "player_name": result["player_name"],
+                "insight": result["insight"]
             })
-            print(f"Could not find player: {player_name}")
+            print(f"Could not find player: {result['player_name']}")
     
     # Commit changes
     conn.commit()
@@ -0,0 +1,295 @@
+"""
+Lightweight background job queue backed by a SQLite table.
+
+Slow work (Claude extraction, mental form scoring, odds ingestion) is
+enqueued as a row in the jobs table and picked up by worker threads, so the
+caller - typically a Flask request - returns immediately with a job ID.
+Workers claim jobs inside an IMMEDIATE transaction, so several processes
+(e.g. gunicorn workers each running their own threads) can share one table
+without running a job twice.
+
+Handlers are plain functions registered per job kind. They receive the
+job's payload dictionary and return a JSON-serializable result; a
+"message" key in the result is used for the completion notification.
+"""
+
+import json
+import time
+import uuid
+import sqlite3
+import datetime
+import threading
+import traceback
+import logging
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('golf.job_queue')
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED)
+
+
+class JobQueue:
+    """SQLite-backed job table with in-process worker threads"""
+
+    def __init__(self, db_path, workers=2, poll_interval=1.0, stale_after=3600):
+        """
+        Initialize the job queue.
+
+        Args:
+            db_path: Path to the SQLite database holding the jobs table
+            workers: Number of worker threads started by start()
+            poll_interval: Seconds an idle worker waits before checking for jobs
+            stale_after: Seconds after which a running job is assumed to have
+                         died with its process and is queued again
+        """
+        self.db_path = db_path
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.handlers = {}
+
+        self._threads = []
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._tables_ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+
+        # Created on first use so importing the web app doesn't touch the database
+        if not self._tables_ready:
+            self._initialize_tables(conn)
+            self._tables_ready = True
+        return conn
+
+    def _initialize_tables(self, conn):
+        """Create the jobs table if it doesn't exist"""
+        cursor = conn.cursor()
+
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            payload TEXT,
+            status TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            worker TEXT,
+            notified INTEGER DEFAULT 0,
+            created_at TEXT,
+            started_at TEXT,
+            finished_at TEXT
+        )
+        ''')
+
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)
+        ''')
+
+        conn.commit()
+
+    def register(self, kind, handler):
+        """
+        Register the handler for a job kind.
+
+        Args:
+            kind: Job kind name
+            handler: Callable taking the payload dictionary and returning a result
+        """
+        self.handlers[kind] = handler
+
+    def enqueue(self, kind, payload=None):
+        """
+        Add a job to the queue and make sure workers are running.
+
+        Returns:
+            Job ID
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        job_id = uuid.uuid4().hex[:12]
+        conn = self._connect()
+        conn.execute('''
+        INSERT INTO jobs (id, kind, payload, status, created_at)
+        VALUES (?, ?, ?, ?, ?)
+        ''', (job_id, kind, json.dumps(payload or {}), JOB_QUEUED, datetime.datetime.now().isoformat()))
+        conn.commit()
+        conn.close()
+
+        logger.info(f"Queued {kind} job {job_id}")
+        self.start()
+        self._wake.set()
+        return job_id
+
+    def get(self, job_id):
+        """
+        Get a job's status and, once finished, its result.
+
+        Returns:
+            Dictionary describing the job, or None if it doesn't exist
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM jobs WHERE id = ?', (job_id,))
+        row = cursor.fetchone()
+        conn.close()
+
+        return self._row_to_job(row) if row else None
+
+    def recent(self, limit=20):
+        """Most recently created jobs, newest first"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?', (limit,))
+        jobs = [self._row_to_job(row) for row in cursor.fetchall()]
+        conn.close()
+        return jobs
+
+    def pop_notifications(self):
+        """
+        Get finished jobs nobody has been told about yet and mark them notified.
+
+        Returns:
+            List of finished job dictionaries
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            # Cheap read first - this runs on every page load
+            cursor.execute('''
+            SELECT 1 FROM jobs WHERE notified = 0 AND status IN (?, ?) LIMIT 1
+            ''', FINISHED_STATES)
+            if not cursor.fetchone():
+                return []
+
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('''
+            SELECT * FROM jobs WHERE notified = 0 AND status IN (?, ?) ORDER BY finished_at
+            ''', FINISHED_STATES)
+            rows = cursor.fetchall()
+            cursor.executemany('UPDATE jobs SET notified = 1 WHERE id = ?', [(row['id'],) for row in rows])
+            conn.commit()
+        finally:
+            conn.close()
+
+        return [self._row_to_job(row) for row in rows]
+
+    def _row_to_job(self, row):
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"]) if job["payload"] else {}
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["finished"] = job["status"] in FINISHED_STATES
+        return job
+
+    def _claim(self, worker_name):
+        """Atomically take the oldest queued job"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+
+            # Jobs left running by a process that died get another chance
+            stale_before = (datetime.datetime.now() - datetime.timedelta(seconds=self.stale_after)).isoformat()
+            cursor.execute('''
+            UPDATE jobs SET status = ?, worker = NULL WHERE status = ? AND started_at < ?
+            ''', (JOB_QUEUED, JOB_RUNNING, stale_before))
+
+            cursor.execute('''
+            SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1
+            ''', (JOB_QUEUED,))
+            row = cursor.fetchone()
+
+            if row:
+                cursor.execute('''
+                UPDATE jobs SET status = ?, worker = ?, started_at = ? WHERE id = ?
+                ''', (JOB_RUNNING, worker_name, datetime.datetime.now().isoformat(), row['id']))
+
+            conn.commit()
+            return self._row_to_job(row) if row else None
+        finally:
+            conn.close()
+
+    def _finish(self, job_id, status, result=None, error=None):
+        conn = self._connect()
+        conn.execute('''
+        UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?
+        ''', (status, json.dumps(result) if result is not None else None, error,
+              datetime.datetime.now().isoformat(), job_id))
+        conn.commit()
+        conn.close()
+
+    def run_one(self, worker_name="inline"):
+        """
+        Claim and run a single job.
+
+        Returns:
+            The job ID that was run, or None if the queue was empty
+        """
+        job = self._claim(worker_name)
+        if not job:
+            return None
+
+        handler = self.handlers.get(job["kind"])
+        started = time.time()
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job kind {job['kind']}")
+            result = handler(job["payload"])
+            self._finish(job["id"], JOB_SUCCEEDED, result=result)
+            logger.info(f"{job['kind']} job {job['id']} succeeded in {time.time() - started:.1f}s")
+        except Exception as e:
+            logger.error(f"{job['kind']} job {job['id']} failed: {e}\n{traceback.format_exc()}")
+            self._finish(job["id"], JOB_FAILED, error=str(e))
+
+        return job["id"]
+
+    def _work(self, worker_name):
+        while not self._stop.is_set():
+            try:
+                if self.run_one(worker_name):
+                    continue
+            except sqlite3.OperationalError as e:
+                # Database busy - try again on the next poll
+                logger.warning(f"Job worker {worker_name} could not claim a job: {e}")
+
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def start(self):
+        """Start the worker threads (idempotent)"""
+        with self._start_lock:
+            if self._started or self.workers <= 0:
+                return
+            self._stop.clear()
+            for index in range(self.workers):
+                worker_name = f"{threading.get_native_id()}-{index}"
+                thread = threading.Thread(target=self._work, args=(worker_name,),
+                                          name=f"job-worker-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            self._started = True
+
+        logger.info(f"Started {self.workers} job workers")
+
+    def stop(self, timeout=None):
+        """Stop the worker threads after their current job"""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._started = False
@@ -0,0 +1,235 @@
+"""
+Batch provider interface for offline LLM jobs.
+
+Bulk work (full mental form rescoring, backfilling transcript extraction,
+market analysis over old insights) doesn't need interactive latency. This
+module provides a provider-agnostic interface for submitting many requests
+at once and collecting the results later, plus a local stand-in provider
+that answers requests on disk so the whole pipeline can run offline.
+
+Requests use the same shape as the Anthropic Message Batches API:
+
+    {"custom_id": "...", "params": {"model": ..., "max_tokens": ...,
+                                    "system": ..., "messages": [...]}}
+"""
+
+from abc import ABC, abstractmethod
+import os
+import json
+import time
+import uuid
+import logging
+from dotenv import load_dotenv
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('golf.batch_provider')
+
+load_dotenv()
+
+# Batch processing states reported by status()
+BATCH_IN_PROGRESS = "in_progress"
+BATCH_ENDED = "ended"
+
+
+class BatchProvider(ABC):
+    """Base class for batch LLM providers"""
+
+    @abstractmethod
+    def submit(self, requests):
+        """
+        Submit a batch of requests.
+
+        Args:
+            requests: List of {"custom_id", "params"} dictionaries
+
+        Returns:
+            Provider batch ID
+        """
+        pass
+
+    @abstractmethod
+    def status(self, batch_id):
+        """
+        Get the processing status of a batch.
+
+        Returns:
+            BATCH_IN_PROGRESS or BATCH_ENDED
+        """
+        pass
+
+    @abstractmethod
+    def results(self, batch_id):
+        """
+        Get the results of an ended batch.
+
+        Returns:
+            Iterator of (custom_id, response_text, error) tuples. Exactly one of
+            response_text and error is None.
+        """
+        pass
+
+
+class AnthropicBatchProvider(BatchProvider):
+    """Anthropic Message Batches API implementation"""
+
+    def __init__(self, api_key=None):
+        """Initialize the Anthropic batch provider"""
+        self.api_key = api_key or os.environ.get("ANTHROPIC_API_KEY")
+
+        if not self.api_key:
+            raise ValueError("Anthropic API key is required. Set ANTHROPIC_API_KEY environment variable.")
+
+        import anthropic
+        self.client = anthropic.Anthropic(api_key=self.api_key)
+
+    def submit(self, requests):
+        """Submit requests as a message batch"""
+        batch = self.client.messages.batches.create(requests=requests)
+        logger.info(f"Submitted Anthropic batch {batch.id} with {len(requests)} requests")
+        return batch.id
+
+    def status(self, batch_id):
+        """Check whether the batch has finished processing"""
+        batch = self.client.messages.batches.retrieve(batch_id)
+        return BATCH_ENDED if batch.processing_status == "ended" else BATCH_IN_PROGRESS
+
+    def results(self, batch_id):
+        """Stream results for a finished batch"""
+        for entry in self.client.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                yield entry.custom_id, entry.result.message.content[0].text, None
+            elif entry.result.type == "errored":
+                yield entry.custom_id, None, str(entry.result.error)
+            else:
+                # canceled or expired
+                yield entry.custom_id, None, entry.result.type
+
+
+def default_local_responder(params):
+    """
+    Produce a well-formed canned answer for a request.
+
+    Recognizes the prompt formats used by the mental form scorer, the
+    transcript extractor and the market analyzer, so downstream parsing
+    behaves exactly as it would with real responses.
+    """
+    prompt = params["messages"][-1]["content"]
+    if isinstance(prompt, list):
+        prompt = "".join(block.get("text", "") for block in prompt)
+
+    if "SCORE:" in prompt:
+        return ("SCORE: 0.0\n"
+                "JUSTIFICATION: A neutral placeholder assessment generated by the local batch provider.")
+    if "MARKETS:" in prompt:
+        return 'REASONING: Local batch provider default.\n\nMARKETS: [\n  "win",\n  "top_20"\n]'
+    if "<player>" in prompt:
+        # No insights - a valid (empty) extraction
+        return "No substantive qualitative insights found."
+    return ""
+
+
+class LocalBatchProvider(BatchProvider):
+    """
+    Local stand-in that processes batches on disk.
+
+    Each batch is a directory containing requests.jsonl and, once processed,
+    results.jsonl. Batches report as in progress until processing_delay
+    seconds have passed since submission, which lets polling code be
+    exercised realistically.
+    """
+
+    def __init__(self, batch_dir="data/batches/local", responder=None, processing_delay=0.0):
+        """
+        Initialize the local batch provider.
+
+        Args:
+            batch_dir: Directory where batches are stored
+            responder: Callable mapping request params to response text
+            processing_delay: Seconds before a submitted batch reports as ended
+        """
+        self.batch_dir = batch_dir
+        self.responder = responder or default_local_responder
+        self.processing_delay = processing_delay
+        os.makedirs(self.batch_dir, exist_ok=True)
+
+    def _path(self, batch_id, name):
+        return os.path.join(self.batch_dir, batch_id, name)
+
+    def submit(self, requests):
+        """Write requests to disk and return a new batch ID"""
+        batch_id = f"local_{uuid.uuid4().hex[:12]}"
+        os.makedirs(os.path.join(self.batch_dir, batch_id))
+
+        with open(self._path(batch_id, "requests.jsonl"), 'w', encoding='utf-8') as f:
+            for request in requests:
+                f.write(json.dumps(request) + "\n")
+
+        with open(self._path(batch_id, "batch.json"), 'w', encoding='utf-8') as f:
+            json.dump({"submitted_at": time.time(), "request_count": len(requests)}, f)
+
+        logger.info(f"Submitted local batch {batch_id} with {len(requests)} requests")
+        return batch_id
+
+    def status(self, batch_id):
+        """Report the batch as ended once the processing delay has elapsed"""
+        with open(self._path(batch_id, "batch.json"), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        if time.time() - meta["submitted_at"] < self.processing_delay:
+            return BATCH_IN_PROGRESS
+        return BATCH_ENDED
+
+    def _process(self, batch_id):
+        """Answer every request in the batch and write results.jsonl"""
+        results_path = self._path(batch_id, "results.jsonl")
+        with open(self._path(batch_id, "requests.jsonl"), 'r', encoding='utf-8') as f_in, \
+             open(results_path, 'w', encoding='utf-8') as f_out:
+            for line in f_in:
+                request = json.loads(line)
+                try:
+                    entry = {"custom_id": request["custom_id"], "text": self.responder(request["params"]), "error": None}
+                except Exception as e:
+                    entry = {"custom_id": request["custom_id"], "text": None, "error": str(e)}
+                f_out.write(json.dumps(entry) + "\n")
+
+    def results(self, batch_id):
+        """Yield results for an ended batch, processing it on first read"""
+        results_path = self._path(batch_id, "results.jsonl")
+        if not os.path.exists(results_path):
+            self._process(batch_id)
+
+        with open(results_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                yield entry["custom_id"], entry["text"], entry["error"]
+
+
+# Factory function to get the appropriate batch provider
+def get_batch_provider(provider_name, **kwargs):
+    """
+    Get a batch provider instance based on the provider name.
+
+    Args:
+        provider_name: Name of the provider (anthropic, local)
+        **kwargs: Provider-specific options
+
+    Returns:
+        An instance of the requested batch provider
+    """
+    providers = {
+        "anthropic": AnthropicBatchProvider,
+        "claude": AnthropicBatchProvider,  # Alias
+        "local": LocalBatchProvider,
+        "fake": LocalBatchProvider,  # Alias
+    }
+
+    provider_class = providers.get(provider_name.lower())
+    if not provider_class:
+        logger.error(f"Unknown batch provider: {provider_name}")
+        raise ValueError(f"Unknown batch provider: {provider_name}")
+
+    return provider_class(**kwargs)
@@ -3,10 +3,23 @@ LLM Provider interface for golf mental form analysis system.
 
 This module provides a base class and implementations for different LLM providers
 that can be used for extracting insights and calculating mental scores.
+
+Providers share one SDK client per (provider, API key) across the process, so
+connection pools are reused instead of every call site building its own
+client. Retries, rate limiting and fallback are handled by llm/router.py.
+
+Prompt content (a message's content or the system prompt) is either a string
+or a list of segments - strings, or cacheable() segments that end a static
+prefix. Anthropic gets a cache breakpoint after each cacheable segment, so
+the static instructions shared by many calls are read from the prompt cache
+instead of being processed again. Gemini 2.5 caches repeated prefixes
+implicitly, so segments are just joined.
 """
 
 from abc import ABC, abstractmethod
 import os
+import time
+import threading
 from dotenv import load_dotenv
 import logging
 
@@ -19,14 +32,148 @@ logger = logging.getLogger('golf.lmm_provider')
 
 load_dotenv()
 
+# Model used when a call doesn't ask for a specific one
+DEFAULT_MODELS = {
+    "anthropic": "claude-3-7-sonnet-20250219",
+    "google": "gemini-2.5-pro-preview-03-25",
+}
+
+EXTRACTION_SYSTEM_PROMPT = "You extract precise, structured insights about professional golfers from podcast and interview transcripts."
+
+MENTAL_FORM_SYSTEM_PROMPT = "You are an expert in qualitative golf analysis, specializing in identifying the non-statistical factors that influence player performance. Your task is to evaluate insights about golfers and determine how the qualitative factors mentioned might cause a player to perform differently than pure statistics would predict."
+
+# Anthropic allows at most four cache breakpoints per request
+MAX_CACHE_BREAKPOINTS = 4
+
+_shared_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_shared_client(provider_name, api_key, factory):
+    """
+    Get the process-wide SDK client for a provider and API key.
+
+    Args:
+        provider_name: Canonical provider name
+        api_key: API key the client is bound to
+        factory: Callable creating the client on first use
+
+    Returns:
+        The shared client
+    """
+    key = (provider_name, api_key)
+    with _clients_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            client = factory()
+            _shared_clients[key] = client
+        return client
+
+
+def cacheable(text):
+    """Mark a prompt segment as the end of a static prefix worth caching"""
+    return {"text": text, "cache": True}
+
+
+def segment_text(content):
+    """Plain text of a string or list of prompt segments"""
+    if content is None:
+        return ""
+    if isinstance(content, str):
+        return content
+    return "".join(s if isinstance(s, str) else s["text"] for s in content)
+
+
+def to_anthropic_content(content, breakpoints):
+    """
+    Convert prompt segments to Anthropic text blocks with cache_control.
+
+    Args:
+        content: String or list of prompt segments
+        breakpoints: Single-item list holding the number of breakpoints still
+                     allowed in this request (decremented as they're used)
+
+    Returns:
+        The string unchanged, or a list of text blocks
+    """
+    if isinstance(content, str):
+        return content
+
+    blocks = []
+    for segment in content:
+        text = segment if isinstance(segment, str) else segment["text"]
+        if not text:
+            continue
+        block = {"type": "text", "text": text}
+        if not isinstance(segment, str) and segment.get("cache") and breakpoints[0] > 0:
+            block["cache_control"] = {"type": "ephemeral"}
+            breakpoints[0] -= 1
+        blocks.append(block)
+    return blocks
+
+
+class LLMResponse:
+    """Text and usage of a single LLM call"""
+
+    def __init__(self, text, provider, model, input_tokens=0, output_tokens=0, latency=0.0,
+                 cache_read_tokens=0, cache_write_tokens=0):
+        self.text = text
+        self.provider = provider
+        self.model = model
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.latency = latency
+        self.cache_read_tokens = cache_read_tokens
+        self.cache_write_tokens = cache_write_tokens
+
+    def __repr__(self):
+        return (f"LLMResponse(provider={self.provider!r}, model={self.model!r}, "
+                f"input_tokens={self.input_tokens}, output_tokens={self.output_tokens}, "
+                f"latency={self.latency:.2f})")
+
+
 class LLMProvider(ABC):
     """Base class for LLM providers"""
 
+    name = None
+
     def __init__(self, api_key=None):
         """Initialize the LLM provider with an API key"""
         self.api_key = api_key
+        self.available = False
 
     @abstractmethod
+    def generate(self, messages, system=None, max_tokens=1000, temperature=0, model=None):
+        """
+        Send a conversation to the LLM.
+
+        Errors from the SDK are raised unchanged so the router can decide
+        whether to retry.
+
+        Args:
+            messages: List of {"role": "user"|"assistant", "content"} dictionaries,
+                      where content is a string or a list of prompt segments
+            system: Optional system prompt (string or list of prompt segments)
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            model: Model name (defaults to the provider's default model)
+
+        Returns:
+            LLMResponse
+        """
+        pass
+
+    def _complete_text(self, prompt, system, max_tokens, temperature):
+        if not self.available:
+            return f"Error: {self.__class__.__name__} client not available"
+
+        try:
+            return self.generate([{"role": "user", "content": prompt}], system=system,
+                                 max_tokens=max_tokens, temperature=temperature).text
+        except Exception as e:
+            logger.error(f"Error calling {self.name} API: {e}")
+            return f"Error calling {self.name} API: {str(e)}"
+
     def extract_insights(self, prompt):
         """
         Extract insights using the LLM.
@@ -37,9 +184,8 @@ class LLMProvider(ABC):
         Returns:
             The LLM's response text
         """
-        pass
+        return self._complete_text(prompt, EXTRACTION_SYSTEM_PROMPT, 4000, 0)
 
-    @abstractmethod
     def calculate_mental_form(self, prompt):
         """
         Calculate mental form using the LLM.
@@ -50,12 +196,14 @@ class LLMProvider(ABC):
         Returns:
             The LLM's response text
         """
-        pass
+        return self._complete_text(prompt, MENTAL_FORM_SYSTEM_PROMPT, 1000, 0.3)
 
 
 class AnthropicProvider(LLMProvider):
     """Claude/Anthropic API implementation"""
 
+    name = "anthropic"
+
     def __init__(self, api_key=None):
         """Initialize the Anthropic provider"""
         super().__init__(api_key)
@@ -66,7 +214,11 @@ class AnthropicProvider(LLMProvider):
 
         try:
             import anthropic
-            self.client = anthropic.Anthropic(api_key=self.api_key)
+            # Retries are done by the router, which knows about the other callers
+            self.client = get_shared_client(
+                self.name, self.api_key,
+                lambda: anthropic.Anthropic(api_key=self.api_key, max_retries=0)
+            )
             self.available = True
         except ImportError:
             logger.error("Anthropic SDK not installed. Run: poetry add anthropic")
@@ -75,62 +227,63 @@ class AnthropicProvider(LLMProvider):
             logger.error(f"Error initializing Anthropic client: {e}")
             self.available = False
 
-    def extract_insights(self, prompt):
-        """Extract insights using Claude"""
-        if not self.available:
-            return "Error: Anthropic client not available"
-        
-        try:
-            message = self.client.messages.create(
-                model="claude-3-7-sonnet-20250219",
-                max_tokens=4000,
-                temperature=0,
-                system="You extract precise, structured insights about professional golfers from podcast and interview transcripts.",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            return message.content[0].text
-        except Exception as e:
-            logger.error(f"Error calling Anthropic API: {e}")
-            return f"Error calling Anthropic API: {str(e)}"
-        
-    def calculate_mental_form(self, prompt):
-        """Calculate mental form score using Claude"""
+    def generate(self, messages, system=None, max_tokens=1000, temperature=0, model=None):
+        """Send a conversation to Claude"""
         if not self.available:
-            return "Error: Anthropic client not available"
-        
-        try:
-            message = self.client.messages.create(
-                model="claude-3-7-sonnet-20250219",
-                max_tokens=1000,
-                temperature=0.3,
-                system="You are an expert in qualitative golf analysis, specializing in identifying the non-statistical factors that influence player performance. Your task is to evaluate insights about golfers and determine how the qualitative factors mentioned might cause a player to perform differently than pure statistics would predict.",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            return message.content[0].text
-        except Exception as e:
-            logger.error(f"Error calling Anthropic API: {e}")
-            return f"Error calling Anthropic API: {str(e)}"
+            raise RuntimeError("Anthropic client not available")
+
+        model = model or DEFAULT_MODELS[self.name]
+
+        # Breakpoints are spent in prompt order: system first, then messages
+        breakpoints = [MAX_CACHE_BREAKPOINTS]
+        params = {
+            "model": model,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        if system:
+            params["system"] = to_anthropic_content(system, breakpoints)
+        params["messages"] = [
+            {"role": m["role"], "content": to_anthropic_content(m["content"], breakpoints)}
+            for m in messages
+        ]
+
+        start = time.perf_counter()
+        message = self.client.messages.create(**params)
+        latency = time.perf_counter() - start
+
+        return LLMResponse(
+            text=message.content[0].text,
+            provider=self.name,
+            model=model,
+            input_tokens=message.usage.input_tokens,
+            output_tokens=message.usage.output_tokens,
+            latency=latency,
+            cache_read_tokens=getattr(message.usage, "cache_read_input_tokens", None) or 0,
+            cache_write_tokens=getattr(message.usage, "cache_creation_input_tokens", None) or 0
+        )
+
 
 class GoogleGeminiProvider(LLMProvider):
     """Google Gemini implementation"""
-    
+
+    name = "google"
+
     def __init__(self, api_key=None):
         """Initialize the Google Gemini provider"""
         super().__init__(api_key)
         # Use the provided key or get from environment
         self.api_key = api_key or os.environ.get("GOOGLE_API_KEY")
-        
+
         if not self.api_key:
             logger.warning("No Google API key provided")
-        
+
         try:
             from google import genai
-            genai.configure(api_key=self.api_key)
-            self.genai = genai
+            self.client = get_shared_client(
+                self.name, self.api_key,
+                lambda: genai.Client(api_key=self.api_key)
+            )
             self.available = True
         except ImportError:
             logger.error("Google Generative AI SDK not installed. Run: pip install google-genai")
@@ -138,77 +291,70 @@ class GoogleGeminiProvider(LLMProvider):
         except Exception as e:
             logger.error(f"Error initializing Google Gemini client: {e}")
             self.available = False
-    
-    def extract_insights(self, prompt):
-        """Extract insights using Gemini"""
-        if not self.available:
-            return "Error: Google Gemini client not available"
-        
-        try:
-            from google.genai import types
-            
-            client = self.genai.Client()
-            
-            response = client.models.generate_content(
-                model="gemini-2.5-pro-preview-03-25",
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    system_instruction="You extract precise, structured insights about professional golfers from podcast transcripts.",
-                    temperature=0,
-                    max_output_tokens=4000
-                ),
-            )
-            return response.text
-        except Exception as e:
-            logger.error(f"Error calling Google Gemini API: {e}")
-            return f"Error calling Google Gemini API: {str(e)}"
-    
-    def calculate_mental_form(self, prompt):
-        """Calculate mental form score using Gemini"""
+
+    def generate(self, messages, system=None, max_tokens=1000, temperature=0, model=None):
+        """Send a conversation to Gemini"""
         if not self.available:
-            return "Error: Google Gemini client not available"
-        
-        try:
-            from google.genai import types
-            
-            client = self.genai.Client()
-            
-            response = client.models.generate_content(
-                model="gemini-2.5-pro-preview-03-25",
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    system_instruction="You are an expert in qualitative golf analysis, specializing in identifying the non-statistical factors that influence player performance. Your task is to evaluate insights about golfers and determine how the qualitative factors mentioned might cause a player to perform differently than pure statistics would predict.",
-                    temperature=0.3,
-                    max_output_tokens=1000
-                ),
-            )
-            return response.text
-        except Exception as e:
-            logger.error(f"Error calling Google Gemini API: {e}")
-            return f"Error calling Google Gemini API: {str(e)}"
-        
+            raise RuntimeError("Google Gemini client not available")
+
+        from google.genai import types
+
+        model = model or DEFAULT_MODELS[self.name]
+
+        # Gemini calls the assistant role "model"
+        contents = [
+            types.Content(role="model" if m["role"] == "assistant" else "user",
+                          parts=[types.Part(text=segment_text(m["content"]))])
+            for m in messages
+        ]
+
+        start = time.perf_counter()
+        response = self.client.models.generate_content(
+            model=model,
+            contents=contents,
+            config=types.GenerateContentConfig(
+                system_instruction=segment_text(system) or None,
+                temperature=temperature,
+                max_output_tokens=max_tokens
+            ),
+        )
+        latency = time.perf_counter() - start
+
+        usage = response.usage_metadata
+        return LLMResponse(
+            text=response.text,
+            provider=self.name,
+            model=model,
+            input_tokens=(usage.prompt_token_count or 0) if usage else 0,
+            output_tokens=(usage.candidates_token_count or 0) if usage else 0,
+            latency=latency,
+            cache_read_tokens=(usage.cached_content_token_count or 0) if usage else 0
+        )
+
+
+PROVIDER_CLASSES = {
+    "anthropic": AnthropicProvider,
+    "claude": AnthropicProvider,  # Alias
+    "google": GoogleGeminiProvider,
+    "gemini": GoogleGeminiProvider,  # Alias
+}
+
+
 # Factory function to get the appropriate provider
 def get_llm_provider(provider_name, api_key=None):
     """
     Get an LLM provider instance based on the provider name.
-    
+
     Args:
-        provider_name: Name of the provider (anthropic, openai, google, anyscale)
+        provider_name: Name of the provider (anthropic/claude, google/gemini)
         api_key: Optional API key (if not provided, will use environment variable)
-        
+
     Returns:
         An instance of the requested LLM provider
     """
-    providers = {
-        "anthropic": AnthropicProvider,
-        "claude": AnthropicProvider,  # Alias
-        "google": GoogleGeminiProvider,
-        "gemini": GoogleGeminiProvider,  # Alias
-    }
-    
-    provider_class = providers.get(provider_name.lower())
+    provider_class = PROVIDER_CLASSES.get(provider_name.lower())
     if not provider_class:
         logger.error(f"Unknown provider: {provider_name}")
         raise ValueError(f"Unknown provider: {provider_name}")
-    
-    return provider_class(api_key)
\ No newline at end of file
+
+    return provider_class(api_key)
@@ -0,0 +1,163 @@
+"""
+Rate limiting and failure isolation primitives for LLM calls.
+
+Used by llm/router.py to keep the whole process within provider limits
+(token bucket), stop hammering a provider that is down (circuit breaker) and
+decide when to route around a slow or failing provider (rolling stats).
+"""
+
+import time
+import threading
+from collections import deque
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at a fixed rate"""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        """
+        Args:
+            rate_per_minute: Tokens added per minute
+            capacity: Maximum burst size (defaults to one minute's worth)
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount=1):
+        """
+        Block until the requested number of tokens is available, then take them.
+
+        Requests larger than the bucket's capacity are capped at the capacity so
+        they wait for a full bucket instead of forever.
+
+        Returns:
+            Seconds spent waiting
+        """
+        amount = min(amount, self.capacity)
+        waited = 0.0
+
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                wait = (amount - self.tokens) / self.rate
+
+            time.sleep(wait)
+            waited += wait
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider's circuit breaker is rejecting calls"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Classic three-state circuit breaker.
+
+    Closed: calls go through. After failure_threshold consecutive failures the
+    breaker opens and rejects calls for reset_timeout seconds, then lets a
+    single trial call through (half-open). A success closes it again; a
+    failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may be attempted now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def release(self):
+        """End a call that says nothing about the provider's health (e.g. a 400)"""
+        with self._lock:
+            # A half-open breaker lets the next call be its trial instead
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class RollingStats:
+    """Latency and error rate over a provider's recent calls"""
+
+    def __init__(self, window_size=50, max_age=300):
+        """
+        Args:
+            window_size: Maximum number of recent calls considered
+            max_age: Calls older than this many seconds are ignored
+        """
+        self.max_age = max_age
+        self.samples = deque(maxlen=window_size)  # (timestamp, latency, ok)
+        self._lock = threading.Lock()
+
+    def record(self, latency, ok):
+        with self._lock:
+            self.samples.append((time.monotonic(), latency, ok))
+
+    def _recent(self):
+        cutoff = time.monotonic() - self.max_age
+        return [s for s in self.samples if s[0] >= cutoff]
+
+    def snapshot(self):
+        """
+        Returns:
+            Dictionary with count, error_rate and p50/p95 latency of recent calls
+        """
+        with self._lock:
+            recent = self._recent()
+
+        if not recent:
+            return {"count": 0, "error_rate": 0.0, "p50_latency": None, "p95_latency": None}
+
+        latencies = sorted(s[1] for s in recent)
+        errors = sum(1 for s in recent if not s[2])
+        return {
+            "count": len(recent),
+            "error_rate": errors / len(recent),
+            "p50_latency": latencies[int(0.50 * (len(latencies) - 1))],
+            "p95_latency": latencies[int(0.95 * (len(latencies) - 1))]
+        }
@@ -0,0 +1,408 @@
+"""
+Single entry point for interactive LLM calls.
+
+Every caller (transcript extraction, mental form scoring, market analysis,
+the chatbot and the tweet generator) goes through one LLMRouter per process,
+so together they respect one set of limits:
+
+- a global semaphore capping concurrent in-flight requests
+- token buckets for requests and input tokens per minute
+- retries with exponential backoff and jitter on overload, rate limit,
+  timeout and connection errors (honouring retry-after)
+- a circuit breaker per provider, so a provider that keeps failing is
+  skipped for a while instead of being retried by every caller
+- optional fallback to a second provider when the primary's circuit is
+  open, its recent p95 latency or error rate crosses a threshold, or a call
+  to it fails outright. A request the provider rejected as malformed (a
+  non-retryable 4xx) is raised to the caller instead: the fallback would
+  only reject it again, and the real error would be lost
+
+Each call records its latency and token usage. Recent records are kept in
+memory (see metrics()) and passed to any registered listeners; get_router()
+registers the usage ledger (llm/usage_ledger.py), which stores them.
+
+Configuration comes from environment variables (see get_router()):
+
+    LLM_PROVIDER                 primary provider (default anthropic)
+    LLM_FALLBACK_PROVIDER        fallback provider (default none)
+    LLM_MAX_CONCURRENCY          concurrent requests (default 8)
+    LLM_REQUESTS_PER_MINUTE      request rate limit (default 50)
+    LLM_INPUT_TOKENS_PER_MINUTE  input token rate limit (default none)
+    LLM_MAX_RETRIES              retries per provider (default 4)
+    LLM_FALLBACK_P95_SECONDS     p95 latency that triggers fallback (default none)
+    LLM_FALLBACK_ERROR_RATE      error rate that triggers fallback (default 0.5)
+    LLM_USAGE_DB                 database for the usage ledger (default the main
+                                 database; "off" disables it)
+"""
+
+import os
+import time
+import random
+import threading
+import datetime
+import logging
+from collections import deque
+from dotenv import load_dotenv
+
+from llm.llm_provider import get_llm_provider, segment_text, PROVIDER_CLASSES
+from llm.resilience import TokenBucket, CircuitBreaker, CircuitOpenError, RollingStats
+from llm.usage_ledger import UsageLedger, DEFAULT_DB_PATH as DEFAULT_USAGE_DB_PATH
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('golf.llm_router')
+
+load_dotenv()
+
+# HTTP statuses worth retrying (529 is Anthropic's "overloaded")
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+# SDK exception class names that mean the request never got a response
+RETRYABLE_ERROR_NAMES = {"APIConnectionError", "APITimeoutError", "ConnectionError", "TimeoutError"}
+
+# Rough characters-per-token ratio used to size the input token bucket
+CHARS_PER_TOKEN = 4
+
+# Calls needed in the stats window before latency/error rate can trigger fallback
+MIN_SAMPLES_FOR_FALLBACK = 10
+
+
+def is_retryable(error):
+    """Whether an SDK error is transient and the call may be retried"""
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int) and status in RETRYABLE_STATUSES:
+        return True
+    return type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+
+def _is_caller_error(error):
+    """Whether an error is the request's fault (e.g. 400) rather than the provider's"""
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    return isinstance(status, int) and 400 <= status < 500 and status not in RETRYABLE_STATUSES
+
+
+def _retry_after(error):
+    """Seconds the server asked us to wait, if it said"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _canonical(provider_name):
+    """Map provider aliases (claude, gemini) to their canonical name"""
+    return PROVIDER_CLASSES[provider_name.lower()].name
+
+
+def _estimate_tokens(messages, system):
+    chars = sum(len(segment_text(m["content"])) for m in messages) + len(segment_text(system))
+    return max(1, chars // CHARS_PER_TOKEN)
+
+
+class LLMRouter:
+    """Routes LLM calls through shared limits, retries, circuit breakers and fallback"""
+
+    def __init__(self, primary="anthropic", fallback=None, max_concurrency=8,
+                 requests_per_minute=50, input_tokens_per_minute=None, max_retries=4,
+                 base_delay=1.0, max_delay=30.0, fallback_p95_seconds=None,
+                 fallback_error_rate=0.5, failure_threshold=5, reset_timeout=60,
+                 provider_factory=get_llm_provider, history_size=1000):
+        """
+        Initialize the router.
+
+        Args:
+            primary: Provider used by default
+            fallback: Provider used when the primary is unhealthy (None disables fallback)
+            max_concurrency: Maximum requests in flight across all callers
+            requests_per_minute: Request rate limit (None for no limit)
+            input_tokens_per_minute: Estimated input token rate limit (None for no limit)
+            max_retries: Retries of a transient error per provider before giving up
+            base_delay: First backoff delay in seconds, doubled on each retry
+            max_delay: Longest backoff delay in seconds
+            fallback_p95_seconds: Primary p95 latency that sends calls to the fallback
+            fallback_error_rate: Primary error rate that sends calls to the fallback
+            failure_threshold: Consecutive failures that open a provider's circuit
+            reset_timeout: Seconds an open circuit waits before a trial call
+            provider_factory: Callable (name, api_key) -> LLMProvider
+            history_size: Number of recent call records kept for metrics()
+        """
+        self.primary = _canonical(primary)
+        self.fallback = _canonical(fallback) if fallback else None
+        if self.fallback == self.primary:
+            self.fallback = None
+
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.fallback_p95_seconds = fallback_p95_seconds
+        self.fallback_error_rate = fallback_error_rate
+        self.provider_factory = provider_factory
+
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(input_tokens_per_minute) if input_tokens_per_minute else None
+
+        names = [self.primary] + ([self.fallback] if self.fallback else [])
+        self.breakers = {name: CircuitBreaker(failure_threshold, reset_timeout) for name in names}
+        self.stats = {name: RollingStats() for name in names}
+
+        self.history = deque(maxlen=history_size)
+        self.listeners = []
+        self._providers = {}
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener):
+        """
+        Register a callable that receives every call record.
+
+        Listeners run on the calling thread; exceptions they raise are logged
+        and otherwise ignored.
+        """
+        self.listeners.append(listener)
+
+    def _provider(self, name, api_key=None):
+        key = (name, api_key)
+        with self._lock:
+            provider = self._providers.get(key)
+            if provider is None:
+                provider = self.provider_factory(name, api_key)
+                self._providers[key] = provider
+            return provider
+
+    def _primary_unhealthy(self):
+        """Why calls should skip the primary provider right now, or None"""
+        snapshot = self.stats[self.primary].snapshot()
+        if snapshot["count"] < MIN_SAMPLES_FOR_FALLBACK:
+            return None
+        if self.fallback_error_rate is not None and snapshot["error_rate"] >= self.fallback_error_rate:
+            return f"error rate {snapshot['error_rate']:.0%}"
+        if self.fallback_p95_seconds is not None and snapshot["p95_latency"] > self.fallback_p95_seconds:
+            return f"p95 latency {snapshot['p95_latency']:.1f}s"
+        return None
+
+    def _route(self):
+        """Providers to try for the next call, in order"""
+        if not self.fallback:
+            return [self.primary]
+
+        reason = self._primary_unhealthy()
+        if reason:
+            logger.warning(f"Routing to {self.fallback}: {self.primary} {reason}")
+            return [self.fallback, self.primary]
+        return [self.primary, self.fallback]
+
+    def _call_with_retry(self, provider, messages, system, max_tokens, temperature, model, estimated_tokens):
+        """
+        Call one provider, retrying transient errors with exponential backoff.
+
+        Returns:
+            (LLMResponse, attempts)
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.request_bucket:
+                self.request_bucket.acquire()
+            if self.token_bucket:
+                self.token_bucket.acquire(estimated_tokens)
+
+            try:
+                # Only the request itself holds a slot - not the backoff sleep
+                with self.semaphore:
+                    return provider.generate(messages, system=system, max_tokens=max_tokens,
+                                             temperature=temperature, model=model), attempt
+            except Exception as e:
+                if not is_retryable(e) or attempt > self.max_retries:
+                    raise
+
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+                    delay *= random.uniform(0.5, 1.0)
+                logger.warning(f"{provider.name} call failed ({e}); retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _record(self, record):
+        self.history.append(record)
+        for listener in self.listeners:
+            try:
+                listener(record)
+            except Exception as e:
+                logger.error(f"LLM metrics listener failed: {e}")
+
+    def complete(self, messages, system=None, max_tokens=1000, temperature=0, model=None,
+                 feature="general", api_key=None, provider="anthropic"):
+        """
+        Send a conversation to the first healthy provider.
+
+        Args:
+            messages: A prompt (string or list of prompt segments), or a list of
+                      {"role", "content"} dictionaries
+            system: Optional system prompt (string or list of prompt segments)
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            model: Model to use on `provider` (other providers use their default)
+            feature: Label recorded with the call's metrics (e.g. "extraction")
+            api_key: API key for `provider` (defaults to the environment)
+            provider: Provider that model and api_key belong to; the primary
+                      and fallback use them only if they are that provider
+
+        Returns:
+            LLMResponse
+
+        Raises:
+            A caller error (non-retryable 4xx) as soon as a provider returns
+            it; otherwise the last provider error, or CircuitOpenError if
+            every provider's circuit was open
+        """
+        # A bare prompt rather than a conversation
+        if isinstance(messages, str) or not isinstance(messages[0], dict) or "role" not in messages[0]:
+            messages = [{"role": "user", "content": messages}]
+
+        estimated_tokens = _estimate_tokens(messages, system)
+        last_error = None
+        route = self._route()
+        owner = _canonical(provider) if provider else None
+
+        for name in route:
+            breaker = self.breakers[name]
+            if not breaker.allow():
+                logger.warning(f"Skipping {name}: circuit open")
+                continue
+
+            is_primary = name == self.primary
+            # A key or model for one provider means nothing to another
+            owned = name == owner
+            client = self._provider(name, api_key if owned else None)
+            start = time.perf_counter()
+            record = {
+                "timestamp": datetime.datetime.now().isoformat(),
+                "feature": feature,
+                "provider": name,
+                "model": model if owned and model else None,
+                "fallback": not is_primary,
+                "estimated_input_tokens": estimated_tokens
+            }
+
+            try:
+                response, attempts = self._call_with_retry(
+                    client, messages, system, max_tokens, temperature,
+                    model if owned else None, estimated_tokens
+                )
+            except Exception as e:
+                latency = time.perf_counter() - start
+                # A malformed request says nothing about the provider's health
+                if _is_caller_error(e):
+                    breaker.release()
+                else:
+                    breaker.record_failure()
+                    self.stats[name].record(latency, False)
+                record.update({"success": False, "error": str(e), "latency": latency,
+                               "total_latency": latency, "attempts": None,
+                               "input_tokens": 0, "output_tokens": 0,
+                               "cache_read_tokens": 0, "cache_write_tokens": 0})
+                self._record(record)
+                logger.error(f"{name} call for {feature} failed: {e}")
+                if _is_caller_error(e):
+                    raise
+                last_error = e
+                continue
+
+            breaker.record_success()
+            self.stats[name].record(response.latency, True)
+            record.update({
+                "success": True,
+                "error": None,
+                "model": response.model,
+                "latency": response.latency,
+                "total_latency": time.perf_counter() - start,
+                "attempts": attempts,
+                "input_tokens": response.input_tokens,
+                "output_tokens": response.output_tokens,
+                "cache_read_tokens": response.cache_read_tokens,
+                "cache_write_tokens": response.cache_write_tokens
+            })
+            self._record(record)
+            return response
+
+        raise last_error or CircuitOpenError(f"No LLM provider available (tried {', '.join(route)})")
+
+    def metrics(self):
+        """
+        Summarize recent calls per provider.
+
+        Returns:
+            Dictionary of provider -> {calls, errors, error_rate, p50_latency,
+            p95_latency, input_tokens, output_tokens, cache_read_tokens,
+            cache_hit_rate, circuit}
+        """
+        summary = {}
+        for name, breaker in self.breakers.items():
+            records = [r for r in list(self.history) if r["provider"] == name]
+            latencies = sorted(r["latency"] for r in records if r["success"])
+            errors = sum(1 for r in records if not r["success"])
+            summary[name] = {
+                "calls": len(records),
+                "errors": errors,
+                "error_rate": errors / len(records) if records else 0.0,
+                "p50_latency": latencies[int(0.50 * (len(latencies) - 1))] if latencies else None,
+                "p95_latency": latencies[int(0.95 * (len(latencies) - 1))] if latencies else None,
+                "input_tokens": sum(r["input_tokens"] for r in records),
+                "output_tokens": sum(r["output_tokens"] for r in records),
+                "cache_read_tokens": sum(r["cache_read_tokens"] for r in records),
+                "cache_hit_rate": (sum(1 for r in records if r["cache_read_tokens"]) / len(records)
+                                   if records else 0.0),
+                "circuit": breaker.state
+            }
+        return summary
+
+
+def _env_float(name, default=None):
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router():
+    """Get the process-wide router, configured from the environment on first use"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            requests_per_minute = _env_float("LLM_REQUESTS_PER_MINUTE", 50)
+            input_tokens_per_minute = _env_float("LLM_INPUT_TOKENS_PER_MINUTE")
+            _router = LLMRouter(
+                primary=os.environ.get("LLM_PROVIDER", "anthropic"),
+                fallback=os.environ.get("LLM_FALLBACK_PROVIDER") or None,
+                max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", "8")),
+                requests_per_minute=int(requests_per_minute) if requests_per_minute else None,
+                input_tokens_per_minute=int(input_tokens_per_minute) if input_tokens_per_minute else None,
+                max_retries=int(os.environ.get("LLM_MAX_RETRIES", "4")),
+                fallback_p95_seconds=_env_float("LLM_FALLBACK_P95_SECONDS"),
+                fallback_error_rate=_env_float("LLM_FALLBACK_ERROR_RATE", 0.5)
+            )
+
+            usage_db = os.environ.get("LLM_USAGE_DB", DEFAULT_USAGE_DB_PATH)
+            if usage_db.lower() != "off":
+                if os.path.isdir(os.path.dirname(os.path.abspath(usage_db))):
+                    _router.add_listener(UsageLedger(usage_db).record)
+                else:
+                    logger.warning(f"LLM usage ledger disabled: no database directory for {usage_db}")
+        return _router
+
+
+def complete(messages, system=None, max_tokens=1000, temperature=0, model=None,
+             feature="general", api_key=None, provider="anthropic"):
+    """Send a conversation through the process-wide router (see LLMRouter.complete)"""
+    return get_router().complete(messages, system=system, max_tokens=max_tokens,
+                                 temperature=temperature, model=model,
+                                 feature=feature, api_key=api_key, provider=provider)
@@ -0,0 +1,416 @@
+"""
+Token and latency ledger for LLM calls.
+
+Every call made through llm/router.py is written as one row of the llm_usage
+table: the feature (call site) that made it, provider, model, input/output
+and cache tokens, latency and outcome. Rows are queued and written in
+batches by a background thread, so callers never wait on the database.
+
+The llm_usage_daily view gives p50/p95 latency and token totals per feature
+per day, and the report below points at the most expensive call sites and
+at features whose prompts or latency grew.
+
+Usage:
+    python -m llm.usage_ledger report                  # last 7 days
+    python -m llm.usage_ledger report --days 30 --limit 5
+    python -m llm.usage_ledger daily --feature mental_form
+"""
+
+import os
+import time
+import queue
+import atexit
+import sqlite3
+import argparse
+import datetime
+import threading
+import logging
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('golf.usage_ledger')
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data/db/mental_form.db")
+
+# USD per million tokens: (input, output, cache read, cache write)
+MODEL_PRICES = {
+    "claude-3-7-sonnet": (3.00, 15.00, 0.30, 3.75),
+    "claude-3-5-haiku": (0.80, 4.00, 0.08, 1.00),
+    "gemini-2.5-pro": (1.25, 10.00, 0.31, 0.0),
+}
+
+# Relative growth in average input tokens or p95 latency reported as a regression
+REGRESSION_THRESHOLD = 0.2
+
+
+def estimate_cost(provider, model, input_tokens, output_tokens, cache_read_tokens=0, cache_write_tokens=0):
+    """
+    Estimate the cost of a call in USD.
+
+    Returns:
+        Cost, or None if the model's prices aren't known
+    """
+    prices = next((p for prefix, p in MODEL_PRICES.items() if model and model.startswith(prefix)), None)
+    if prices is None:
+        return None
+
+    input_price, output_price, cache_read_price, cache_write_price = prices
+
+    # Anthropic reports cached tokens separately; Gemini includes them in the prompt count
+    uncached_input = input_tokens - cache_read_tokens if provider == "google" else input_tokens
+    return (uncached_input * input_price + output_tokens * output_price +
+            cache_read_tokens * cache_read_price + cache_write_tokens * cache_write_price) / 1_000_000
+
+
+def _ranked_usage(partition, where="1 = 1"):
+    """SQL ranking llm_usage rows by latency and input tokens within each partition"""
+    return f'''
+    SELECT *,
+           ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY total_latency) AS latency_rank,
+           ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY input_tokens) AS token_rank,
+           COUNT(*) OVER (PARTITION BY {partition}) AS partition_calls
+    FROM llm_usage
+    WHERE {where}
+    '''
+
+
+# Aggregate columns over a _ranked_usage() result
+_AGGREGATES = '''
+    COUNT(*) AS calls,
+    SUM(success = 0) AS errors,
+    SUM(cache_read_tokens > 0) AS cache_hits,
+    SUM(input_tokens) AS input_tokens,
+    SUM(output_tokens) AS output_tokens,
+    SUM(cache_read_tokens) AS cache_read_tokens,
+    ROUND(AVG(input_tokens), 1) AS avg_input_tokens,
+    MAX(CASE WHEN token_rank = CAST(0.95 * (partition_calls - 1) AS INTEGER) + 1 THEN input_tokens END) AS p95_input_tokens,
+    MAX(CASE WHEN latency_rank = CAST(0.50 * (partition_calls - 1) AS INTEGER) + 1 THEN total_latency END) AS p50_latency,
+    MAX(CASE WHEN latency_rank = CAST(0.95 * (partition_calls - 1) AS INTEGER) + 1 THEN total_latency END) AS p95_latency,
+    SUM(total_latency) AS total_seconds,
+    SUM(estimated_cost) AS estimated_cost
+'''
+
+
+def initialize_tables(conn):
+    """Create the usage table and daily view if they don't exist"""
+    cursor = conn.cursor()
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS llm_usage (
+        id INTEGER PRIMARY KEY,
+        timestamp TEXT NOT NULL,
+        day TEXT NOT NULL,
+        feature TEXT NOT NULL,
+        provider TEXT,
+        model TEXT,
+        input_tokens INTEGER DEFAULT 0,
+        output_tokens INTEGER DEFAULT 0,
+        cache_read_tokens INTEGER DEFAULT 0,
+        cache_write_tokens INTEGER DEFAULT 0,
+        latency REAL,
+        total_latency REAL,
+        attempts INTEGER,
+        fallback INTEGER DEFAULT 0,
+        success INTEGER NOT NULL,
+        error TEXT,
+        estimated_cost REAL
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_llm_usage_day_feature ON llm_usage(day, feature)
+    ''')
+
+    cursor.execute(f'''
+    CREATE VIEW IF NOT EXISTS llm_usage_daily AS
+    SELECT day, feature, {_AGGREGATES}
+    FROM ({_ranked_usage("day, feature")})
+    GROUP BY day, feature
+    ''')
+
+    conn.commit()
+
+
+def _row_from_record(record):
+    timestamp = record.get("timestamp") or datetime.datetime.now().isoformat()
+    input_tokens = record.get("input_tokens") or 0
+    output_tokens = record.get("output_tokens") or 0
+    cache_read_tokens = record.get("cache_read_tokens") or 0
+    cache_write_tokens = record.get("cache_write_tokens") or 0
+
+    return (
+        timestamp,
+        timestamp[:10],
+        record.get("feature") or "general",
+        record.get("provider"),
+        record.get("model"),
+        input_tokens,
+        output_tokens,
+        cache_read_tokens,
+        cache_write_tokens,
+        record.get("latency"),
+        record.get("total_latency", record.get("latency")),
+        record.get("attempts"),
+        1 if record.get("fallback") else 0,
+        1 if record.get("success") else 0,
+        record.get("error"),
+        estimate_cost(record.get("provider"), record.get("model"), input_tokens, output_tokens,
+                      cache_read_tokens, cache_write_tokens)
+    )
+
+
+class UsageLedger:
+    """
+    Writes router call records to the llm_usage table from a background thread.
+
+    Register it with LLMRouter.add_listener(); records are queued on the
+    calling thread and inserted in batches.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, batch_size=100, flush_interval=0.5):
+        """
+        Args:
+            db_path: Path to the SQLite database holding the llm_usage table
+            batch_size: Maximum rows written per transaction
+            flush_interval: Seconds the writer waits for more rows before writing a batch
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._write_lock = threading.Lock()
+        self._tables_ready = False
+
+        self._thread = threading.Thread(target=self._run, name="usage-ledger", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def record(self, record):
+        """Queue a router call record for writing"""
+        self._queue.put(_row_from_record(record))
+
+    def _drain(self, first=None):
+        rows = [first] if first is not None else []
+        while len(rows) < self.batch_size:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _write(self, rows):
+        if not rows:
+            return
+
+        with self._write_lock:
+            conn = None
+            try:
+                conn = sqlite3.connect(self.db_path, timeout=30)
+                if not self._tables_ready:
+                    initialize_tables(conn)
+                    self._tables_ready = True
+
+                conn.executemany('''
+                INSERT INTO llm_usage
+                (timestamp, day, feature, provider, model, input_tokens, output_tokens,
+                 cache_read_tokens, cache_write_tokens, latency, total_latency, attempts,
+                 fallback, success, error, estimated_cost)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+                conn.commit()
+            except sqlite3.Error as e:
+                # Accounting must never break the call that's being accounted for
+                logger.error(f"Could not write {len(rows)} LLM usage rows: {e}")
+            finally:
+                if conn is not None:
+                    conn.close()
+                for _ in rows:
+                    self._queue.task_done()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            # Give concurrent calls a moment to finish so they share a transaction
+            time.sleep(self.flush_interval)
+            self._write(self._drain(first))
+
+    def flush(self):
+        """Write every queued row now and wait for rows the writer is holding"""
+        while not self._queue.empty():
+            self._write(self._drain())
+        self._queue.join()
+
+
+def daily_usage(conn, days=7, feature=None):
+    """
+    Per-feature, per-day usage from the llm_usage_daily view.
+
+    Args:
+        conn: Open database connection with row_factory = sqlite3.Row
+        days: Number of days back to include
+        feature: Only include this feature
+
+    Returns:
+        List of dictionaries, newest day first
+    """
+    since = (datetime.date.today() - datetime.timedelta(days=days - 1)).isoformat()
+
+    query = 'SELECT * FROM llm_usage_daily WHERE day >= ?'
+    params = [since]
+    if feature:
+        query += ' AND feature = ?'
+        params.append(feature)
+    query += ' ORDER BY day DESC, estimated_cost DESC'
+
+    return [dict(row) for row in conn.execute(query, params).fetchall()]
+
+
+def feature_usage(conn, start_day, end_day=None):
+    """
+    Usage per feature over a range of days.
+
+    Args:
+        conn: Open database connection with row_factory = sqlite3.Row
+        start_day: First day included (YYYY-MM-DD)
+        end_day: Last day included (defaults to today)
+
+    Returns:
+        Dictionary of feature -> aggregate dictionary (see the llm_usage_daily view)
+    """
+    end_day = end_day or datetime.date.today().isoformat()
+
+    rows = conn.execute(f'''
+    SELECT feature, {_AGGREGATES}
+    FROM ({_ranked_usage("feature", "day BETWEEN ? AND ?")})
+    GROUP BY feature
+    ''', (start_day, end_day)).fetchall()
+
+    return {row['feature']: dict(row) for row in rows}
+
+
+def most_expensive(conn, days=7, limit=10):
+    """
+    Call sites ordered by estimated cost (then total seconds) over the last days.
+
+    Returns:
+        List of aggregate dictionaries with a "feature" key
+    """
+    since = (datetime.date.today() - datetime.timedelta(days=days - 1)).isoformat()
+    usage = feature_usage(conn, since)
+    ranked = sorted(usage.values(), key=lambda u: (u["estimated_cost"] or 0, u["total_seconds"] or 0), reverse=True)
+    return ranked[:limit]
+
+
+def find_regressions(conn, days=7, threshold=REGRESSION_THRESHOLD):
+    """
+    Features whose average input tokens or p95 latency grew versus the previous period.
+
+    Compares the last days with the days before them.
+
+    Returns:
+        List of {"feature", "metric", "previous", "current", "change"} dictionaries
+    """
+    today = datetime.date.today()
+    current_start = today - datetime.timedelta(days=days - 1)
+    previous_start = current_start - datetime.timedelta(days=days)
+    previous_end = current_start - datetime.timedelta(days=1)
+
+    current = feature_usage(conn, current_start.isoformat(), today.isoformat())
+    previous = feature_usage(conn, previous_start.isoformat(), previous_end.isoformat())
+
+    regressions = []
+    for feature, now in current.items():
+        before = previous.get(feature)
+        if not before:
+            continue
+        for metric in ("avg_input_tokens", "p95_latency"):
+            if not before[metric] or now[metric] is None:
+                continue
+            change = (now[metric] - before[metric]) / before[metric]
+            if change >= threshold:
+                regressions.append({"feature": feature, "metric": metric, "previous": before[metric],
+                                    "current": now[metric], "change": change})
+
+    return sorted(regressions, key=lambda r: r["change"], reverse=True)
+
+
+def _format_cost(cost):
+    return f"${cost:.2f}" if cost is not None else "n/a"
+
+
+def _format_seconds(seconds):
+    return f"{seconds:.1f}s" if seconds is not None else "n/a"
+
+
+def print_report(conn, days=7, limit=10):
+    """Print the most expensive call sites and any regressions"""
+    top = most_expensive(conn, days, limit)
+    if not top:
+        print(f"No LLM usage recorded in the last {days} days")
+        return
+
+    print(f"\n=== MOST EXPENSIVE CALL SITES (last {days} days) ===")
+    print(f"{'Feature':<26} {'Calls':>6} {'Errors':>6} {'Input':>10} {'Output':>9} {'Cached':>9} "
+          f"{'p50':>7} {'p95':>7} {'Cost':>9}")
+    for usage in top:
+        print(f"{usage['feature']:<26} {usage['calls']:>6} {usage['errors']:>6} {usage['input_tokens']:>10} "
+              f"{usage['output_tokens']:>9} {usage['cache_read_tokens']:>9} {_format_seconds(usage['p50_latency']):>7} "
+              f"{_format_seconds(usage['p95_latency']):>7} {_format_cost(usage['estimated_cost']):>9}")
+
+    total_cost = sum(u["estimated_cost"] or 0 for u in top)
+    print(f"\nEstimated cost of listed call sites: {_format_cost(total_cost)}")
+
+    regressions = find_regressions(conn, days)
+    if regressions:
+        print(f"\n=== REGRESSIONS (vs previous {days} days) ===")
+        for r in regressions:
+            print(f"{r['feature']:<26} {r['metric']:<18} {r['previous']:.1f} -> {r['current']:.1f} (+{r['change']:.0%})")
+
+
+def print_daily(conn, days=7, feature=None):
+    """Print per-day usage for each feature"""
+    rows = daily_usage(conn, days, feature)
+    if not rows:
+        print(f"No LLM usage recorded in the last {days} days")
+        return
+
+    print(f"{'Day':<11} {'Feature':<26} {'Calls':>6} {'Avg input':>10} {'p95 input':>10} "
+          f"{'p50':>7} {'p95':>7} {'Cache hits':>10} {'Cost':>9}")
+    for row in rows:
+        print(f"{row['day']:<11} {row['feature']:<26} {row['calls']:>6} {row['avg_input_tokens']:>10} "
+              f"{row['p95_input_tokens']:>10} {_format_seconds(row['p50_latency']):>7} "
+              f"{_format_seconds(row['p95_latency']):>7} {row['cache_hits']:>10} {_format_cost(row['estimated_cost']):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM token and latency usage reports")
+    parser.add_argument("--db_path", default=DEFAULT_DB_PATH, help="Path to SQLite database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    report_parser = subparsers.add_parser("report", help="Most expensive call sites and regressions")
+    report_parser.add_argument("--days", type=int, default=7, help="Number of days to include")
+    report_parser.add_argument("--limit", type=int, default=10, help="Number of call sites to show")
+
+    daily_parser = subparsers.add_parser("daily", help="Usage per feature per day")
+    daily_parser.add_argument("--days", type=int, default=7, help="Number of days to include")
+    daily_parser.add_argument("--feature", help="Only show this feature")
+
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db_path)
+    conn.row_factory = sqlite3.Row
+    initialize_tables(conn)
+
+    if args.command == "report":
+        print_report(conn, days=args.days, limit=args.limit)
+    elif args.command == "daily":
+        print_daily(conn, days=args.days, feature=args.feature)
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,12 @@ This module analyzes player insights to determine the most relevant betting mark
 """
 
 import os
+import json
 import logging
-import anthropic
 from dotenv import load_dotenv
 
+from llm.router import complete
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -28,25 +30,28 @@ class MarketAnalyzer:
         if not self.api_key:
             raise ValueError("Anthropic API key is required. Set ANTHROPIC_API_KEY environment variable.")
         
-        self.client = anthropic.Anthropic(api_key=self.api_key)
         logger.info("Initialized MarketAnalyzer")
     
-    def analyze_insight(self, player_name, insight_text):
+    SYSTEM_PROMPT = "You are a golf betting expert identifying the most relevant betting markets based on player insights."
+    
+    # Valid market types
+    VALID_MARKETS = ["win", "top_5", "top_10", "top_20", "make_cut", "mc", "frl"]
+    
+    # Markets used when Claude's answer can't be parsed
+    DEFAULT_MARKETS = ["win", "top_20"]
+    
+    @classmethod
+    def create_prompt(cls, player_name, insight_text):
         """
-        Analyze a player's insight to determine the most relevant betting markets.
+        Create the market selection prompt for a player's insight.
         
         Args:
             player_name: The player's name
             insight_text: The player's insight text
             
         Returns:
-            List of relevant market types to query
+            Prompt text
         """
-        logger.info(f"Analyzing insights for {player_name}")
-        
-        # Valid market types
-        valid_markets = ["win", "top_5", "top_10", "top_20", "make_cut", "mc", "frl"]
-        
         # Create prompt for Claude with structured output format
         prompt = f"""
         Based on the following golf betting insight for {player_name}, please identify the most relevant betting markets 
@@ -78,55 +83,84 @@ class MarketAnalyzer:
         Choose only 1-3 markets that are MOST relevant based on the insights. The format of your MARKETS section 
         must be a valid JSON array with quoted strings.
         """
+        return prompt
+    
+    @classmethod
+    def parse_markets(cls, player_name, response_text):
+        """
+        Extract the list of markets from Claude's response.
+        
+        Args:
+            player_name: The player's name (for logging)
+            response_text: Claude's response text
+            
+        Returns:
+            List of valid market types (defaults if none could be parsed)
+        """
+        markets = []
+        
+        if "MARKETS:" in response_text:
+            markets_section = response_text.split("MARKETS:")[1].strip()
+            
+            # Look for an array format with square brackets
+            if "[" in markets_section and "]" in markets_section:
+                array_text = markets_section[markets_section.find("["):markets_section.find("]")+1]
+                
+                # Parse the markets, handling both comma-separated strings and JSON format
+                try:
+                    markets = json.loads(array_text)
+                except json.JSONDecodeError:
+                    # Fallback to simple parsing if JSON parsing fails
+                    array_content = array_text.strip("[]")
+                    markets = [m.strip().strip('"\'') for m in array_content.split(",")]
+                    markets = [m for m in markets if m]  # Remove empty strings
+        
+        # Validate the markets against our list of valid markets
+        markets = [m for m in markets if m in cls.VALID_MARKETS]
+        
+        # If no valid markets found, default to win and top_20
+        if not markets:
+            logger.warning(f"No valid markets identified for {player_name}, using defaults")
+            markets = list(cls.DEFAULT_MARKETS)
+        
+        # Log the final selected markets
+        logger.info(f"Selected markets for {player_name}: {markets}")
+        return markets
+    
+    def analyze_insight(self, player_name, insight_text):
+        """
+        Analyze a player's insight to determine the most relevant betting markets.
+        
+        Args:
+            player_name: The player's name
+            insight_text: The player's insight text
+            
+        Returns:
+            List of relevant market types to query
+        """
+        logger.info(f"Analyzing insights for {player_name}")
+        
+        prompt = self.create_prompt(player_name, insight_text)
         
         try:
             # Query Claude
-            response = self.client.messages.create(
-                model="claude-3-7-sonnet-20250219",
+            response = complete(
+                prompt,
+                system=self.SYSTEM_PROMPT,
                 max_tokens=1000,
                 temperature=0,
-                system="You are a golf betting expert identifying the most relevant betting markets based on player insights.",
-                messages=[{"role": "user", "content": prompt}]
+                feature="market_analysis",
+                api_key=self.api_key
             )
             
-            response_text = response.content[0].text.strip()
+            response_text = response.text.strip()
             
             # Always log Claude's full response for testing
             logger.info(f"Claude's full response for {player_name}:\n{response_text}")
             
-            # Extract the markets from the response
-            markets = []
-            
-            if "MARKETS:" in response_text:
-                markets_section = response_text.split("MARKETS:")[1].strip()
-                
-                # Look for an array format with square brackets
-                if "[" in markets_section and "]" in markets_section:
-                    array_text = markets_section[markets_section.find("["):markets_section.find("]")+1]
-                    
-                    # Parse the markets, handling both comma-separated strings and JSON format
-                    try:
-                        import json
-                        markets = json.loads(array_text)
-                    except json.JSONDecodeError:
-                        # Fallback to simple parsing if JSON parsing fails
-                        array_content = array_text.strip("[]")
-                        markets = [m.strip().strip('"\'') for m in array_content.split(",")]
-                        markets = [m for m in markets if m]  # Remove empty strings
-            
-            # Validate the markets against our list of valid markets
-            markets = [m for m in markets if m in valid_markets]
-            
-            # If no valid markets found, default to win and top_20
-            if not markets:
-                logger.warning(f"No valid markets identified for {player_name}, using defaults")
-                markets = ["win", "top_20"]
-            
-            # Log the final selected markets
-            logger.info(f"Selected markets for {player_name}: {markets}")
-            return markets
+            return self.parse_markets(player_name, response_text)
             
         except Exception as e:
             logger.error(f"Error analyzing markets for {player_name}: {e}")
             # Fallback to safe defaults
-            return ["win", "top_20"]
\ No newline at end of file
+            return list(self.DEFAULT_MARKETS)
@@ -10,6 +10,8 @@ import sqlite3
 from datetime import datetime
 from dotenv import load_dotenv
 
+from opportunity_scanner import mental_adjustment
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -148,17 +150,13 @@ class OddsRetriever:
         if mental_score is None:
             return base_ev, 0
         
-        # Determine adjustment direction based on market type
-        # For "miss cut" (MC) market, reverse the adjustment direction
-        # because poor mental form (negative score) increases chance of missing cut
-        adjustment_direction = -1 if market == "mc" else 1
-        
         # Adjust model probability based on mental score and market type
         # For standard markets (like win, top_5):
         #   - Positive mental scores increase the probability (max +40%)
         #   - Negative mental scores decrease the probability (max -40%)
         # For "miss cut" market, the adjustment is reversed
-        adjustment_factor = mental_score * 0.40 * adjustment_direction
+        # because poor mental form (negative score) increases chance of missing cut
+        adjustment_factor = float(mental_adjustment(mental_score, market))
         adjusted_probability = model_probability * (1 + adjustment_factor)
         
         # Ensure probability doesn't exceed 100% or go below 0%
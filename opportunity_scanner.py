@@ -0,0 +1,288 @@
+"""
+Vectorized value scanning for DataGolf betting markets.
+
+A market response is turned into aligned NumPy arrays - one row per player
+(or per matchup side), one column per sportsbook the user can bet at - so
+model probability, best price, EV and fractional Kelly are computed for the
+whole field at once. The result is a candidate table ranked by EV; callers
+apply their stateful rules (stake caps, weekly limits, duplicate checks) only
+to the rows that clear their EV threshold.
+
+Matchups and 3-balls are flattened into one row per side. DataGolf's model
+odds are made vig-free by normalizing each matchup's implied probabilities to
+sum to 1, and each side also gets an EV that accounts for ties: a push
+returns the stake in 2-ball matchups, while 3-balls settle ties dead heat.
+"""
+
+import numpy as np
+
+# Keys of a betting-tools/outrights player record that aren't sportsbooks
+OUTRIGHT_METADATA_KEYS = {'player_name', 'dg_id', 'datagolf'}
+
+# DataGolf model fields, in order of preference
+MODEL_ODDS_FIELDS = ('baseline_history_fit', 'baseline')
+
+CANDIDATE_COLUMNS = ['player_name', 'dg_id', 'model_odds', 'model_prob', 'best_book',
+                     'best_odds', 'implied_prob', 'ev_percentage', 'kelly']
+
+MATCHUP_COLUMNS = ['matchup_idx', 'slot', 'is_3ball', 'player_name', 'dg_id', 'opponent_id',
+                   'opponent_name', 'model_prob', 'best_book', 'best_odds', 'implied_prob',
+                   'ev_percentage', 'tie_prob', 'tie_adjusted_ev', 'kelly']
+
+# Rough chance that a side's result is a tie, by market. Round matchups tie far
+# more often than 72-hole ones; for 3-balls this is the chance of sharing low.
+TIE_PROBABILITIES = {
+    'tournament_matchups': 0.03,
+    'round_matchups': 0.09,
+    '3_balls': 0.06,
+}
+
+TIE_PUSH = "push"            # stake returned
+TIE_DEAD_HEAT = "dead_heat"  # half the stake paid at full odds, half lost
+
+TIE_RULES = {
+    'tournament_matchups': TIE_PUSH,
+    'round_matchups': TIE_PUSH,
+    '3_balls': TIE_DEAD_HEAT,
+}
+
+# Largest relative change to a model probability from a mental form score of
+# +/-1. Markets that pay on a bad week move the other way.
+MENTAL_ADJUSTMENT_FACTOR = 0.40
+MENTAL_INVERSE_MARKETS = ('mc',)
+
+
+def mental_adjustment(mental_score, market, factor=MENTAL_ADJUSTMENT_FACTOR):
+    """
+    Relative adjustment to a model probability from mental form.
+
+    Works on scalars or aligned arrays; a missing (None/NaN) score gives 0.
+
+    Args:
+        mental_score: Mental form score (-1 to 1)
+        market: Market type (e.g., "win", "top_5", "mc")
+        factor: Adjustment at a score of +/-1
+
+    Returns:
+        Fraction to scale the probability by, e.g. 0.2 for +20%
+    """
+    score = np.nan_to_num(np.asarray(mental_score, dtype=float))
+    direction = np.where(np.isin(market, MENTAL_INVERSE_MARKETS), -1, 1)
+    return score * factor * direction
+
+
+def _price_matrix(records, books, price):
+    """
+    Build a (records x books) matrix of decimal odds, with 0 where a book has no price.
+
+    Args:
+        records: Sequence of market records
+        books: Sportsbook names, one per column
+        price: Callable (record, book) -> decimal odds or None
+    """
+    matrix = np.array([[price(record, book) or 0 for book in books] for record in records],
+                      dtype=float).reshape(len(records), len(books))
+    matrix[~np.isfinite(matrix)] = 0
+    return matrix
+
+
+def price_candidates(model_prob, prices, books):
+    """
+    Pick the best price per row and compute EV and full Kelly.
+
+    Args:
+        model_prob: Array of model win probabilities, one per row
+        prices: (rows x books) matrix of decimal odds, 0 where unavailable
+        books: Sportsbook names, one per column of prices
+
+    Returns:
+        Dict of arrays: best_book, best_odds, implied_prob, ev_percentage and
+        kelly (full Kelly fraction of bankroll, 0 without an edge). Rows
+        without any price have best_odds 0 and best_book None.
+    """
+    rows = len(model_prob)
+    if prices.shape[1]:
+        best_idx = prices.argmax(axis=1)
+        best_odds = prices[np.arange(rows), best_idx]
+    else:
+        best_idx = np.zeros(rows, dtype=int)
+        best_odds = np.zeros(rows)
+
+    priced = best_odds > 1
+    safe_odds = np.where(priced, best_odds, 2.0)
+    b = safe_odds - 1
+
+    ev_percentage = np.where(priced, (model_prob * safe_odds - 1) * 100, np.nan)
+    kelly = np.where(priced, np.clip((b * model_prob - (1 - model_prob)) / b, 0, None), 0.0)
+
+    book_names = np.array(list(books) or [None], dtype=object)
+    return {
+        'best_book': np.where(priced, book_names[best_idx], None),
+        'best_odds': best_odds,
+        'implied_prob': np.where(priced, 1 / safe_odds, np.nan),
+        'ev_percentage': ev_percentage,
+        'kelly': kelly,
+    }
+
+
+def scan_outright_market(odds_data, available_books, kelly_fraction=0.25):
+    """
+    Rank every player in an outright market by EV at their best available price.
+
+    Args:
+        odds_data: Response from GolfBettingTracker.fetch_betting_odds()
+        available_books: Sportsbooks the user can bet at
+        kelly_fraction: Fraction of full Kelly to stake
+
+    Returns:
+        DataFrame with CANDIDATE_COLUMNS, one row per player that has model
+        odds and at least one allowed price, sorted by ev_percentage descending.
+        kelly is the fractional Kelly stake as a fraction of bankroll.
+    """
+    import pandas as pd
+    records = []
+    model_odds = []
+    for player_odds in odds_data.get('odds') or []:
+        datagolf = player_odds.get('datagolf')
+        if not datagolf:
+            continue
+        odds = next((datagolf.get(f) for f in MODEL_ODDS_FIELDS if datagolf.get(f) is not None), None)
+        if not odds or odds <= 0:
+            continue
+        records.append(player_odds)
+        model_odds.append(odds)
+
+    books = [b for b in dict.fromkeys(available_books) if b not in OUTRIGHT_METADATA_KEYS]
+    if not records:
+        return pd.DataFrame(columns=CANDIDATE_COLUMNS)
+
+    model_odds = np.array(model_odds, dtype=float)
+    model_prob = 1 / model_odds
+    prices = _price_matrix(records, books, lambda record, book: record.get(book))
+
+    priced = price_candidates(model_prob, prices, books)
+    table = pd.DataFrame({
+        'player_name': [r.get('player_name') for r in records],
+        # Kept as Python objects so IDs bind to sqlite without conversion
+        'dg_id': pd.Series([r.get('dg_id') for r in records], dtype=object),
+        'model_odds': model_odds,
+        'model_prob': model_prob,
+        **priced,
+    }, columns=CANDIDATE_COLUMNS)
+    table['kelly'] *= kelly_fraction
+
+    table = table[table['best_odds'] > 1]
+    return table.sort_values('ev_percentage', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def _flatten_matchups(match_list, market_type):
+    """
+    Flatten a match_list into one dict per side, with raw model probabilities.
+
+    Matchups without usable DataGolf odds are skipped. A 2-ball missing the
+    second model price gets 1 - p1, as DataGolf only quotes one side at times.
+    """
+    sides = []
+    for idx, matchup in enumerate(match_list):
+        is_3ball = market_type == '3_balls' or 'p3_player_name' in matchup
+        slots = (1, 2, 3) if is_3ball else (1, 2)
+
+        dg_odds = (matchup.get('odds') or {}).get('datagolf') or {}
+        raw = [1 / dg_odds[f"p{slot}"] if (dg_odds.get(f"p{slot}") or 0) > 0 else None for slot in slots]
+        if raw[0] is None:
+            continue
+        if is_3ball and None in raw:
+            continue
+        if raw[1] is None:
+            raw[1] = 1 - raw[0]
+
+        players = [(matchup.get(f"p{slot}_dg_id"), matchup.get(f"p{slot}_player_name")) for slot in slots]
+        tie_rule = TIE_DEAD_HEAT if 'dead' in str(matchup.get('ties', '')).lower() else TIE_RULES.get(market_type, TIE_PUSH)
+
+        for i, slot in enumerate(slots):
+            others = [p for j, p in enumerate(players) if j != i]
+            sides.append({
+                'matchup_idx': idx,
+                'slot': slot,
+                'is_3ball': is_3ball,
+                'player_name': players[i][1],
+                'dg_id': players[i][0],
+                # 3-balls have no single opponent
+                'opponent_id': None if is_3ball else others[0][0],
+                'opponent_name': " & ".join(str(p[1]) for p in others),
+                'raw_prob': raw[i],
+                'dead_heat': tie_rule == TIE_DEAD_HEAT,
+                'odds': matchup['odds'],
+            })
+    return sides
+
+
+def scan_matchup_market(matchup_odds, market_type, available_books, kelly_fraction=0.25, tie_prob=None):
+    """
+    Price every side of a tournament_matchups, round_matchups or 3_balls card at once.
+
+    Args:
+        matchup_odds: Response from GolfBettingTracker.fetch_matchup_odds()
+        market_type: tournament_matchups, round_matchups or 3_balls
+        available_books: Sportsbooks the user can bet at
+        kelly_fraction: Fraction of full Kelly to stake
+        tie_prob: Chance a side's result is a tie (defaults to TIE_PROBABILITIES)
+
+    Returns:
+        DataFrame with MATCHUP_COLUMNS, one row per side with at least one
+        allowed price, sorted by ev_percentage descending. model_prob is the
+        vig-free chance of beating the other side(s) with ties excluded, and
+        ev_percentage/kelly use it as-is, as the agent always has.
+        tie_adjusted_ev is the EV once ties are settled by the market's rule.
+    """
+    import pandas as pd
+    match_list = matchup_odds.get('match_list') if matchup_odds else None
+    # DataGolf sends a message string when a market isn't offered
+    if not match_list or isinstance(match_list, str):
+        return pd.DataFrame(columns=MATCHUP_COLUMNS)
+
+    sides = _flatten_matchups(match_list, market_type)
+    if not sides:
+        return pd.DataFrame(columns=MATCHUP_COLUMNS)
+
+    # Vig-free probabilities: normalize each matchup's implied probabilities to 1
+    matchup_idx = np.array([s['matchup_idx'] for s in sides])
+    raw_prob = np.array([s['raw_prob'] for s in sides], dtype=float)
+    totals = np.bincount(matchup_idx, weights=raw_prob)
+    model_prob = raw_prob / totals[matchup_idx]
+
+    books = [b for b in dict.fromkeys(available_books) if b != 'datagolf']
+    prices = _price_matrix(sides, books,
+                           lambda side, book: (side['odds'].get(book) or {}).get(f"p{side['slot']}"))
+    priced = price_candidates(model_prob, prices, books)
+
+    # Ties: the side wins with p(1 - t), loses with (1 - p)(1 - t) and ties with t
+    if tie_prob is None:
+        tie_prob = TIE_PROBABILITIES.get(market_type, 0.0)
+    odds = priced['best_odds']
+    dead_heat = np.array([s['dead_heat'] for s in sides])
+    tie_profit = np.where(dead_heat, odds / 2 - 1, 0.0)
+    tie_adjusted_ev = np.where(
+        odds > 1,
+        ((1 - tie_prob) * (model_prob * (odds - 1) - (1 - model_prob)) + tie_prob * tie_profit) * 100,
+        np.nan
+    )
+
+    table = pd.DataFrame({
+        'matchup_idx': matchup_idx,
+        'slot': [s['slot'] for s in sides],
+        'is_3ball': [s['is_3ball'] for s in sides],
+        'player_name': [s['player_name'] for s in sides],
+        # Kept as Python objects so IDs bind to sqlite without conversion
+        'dg_id': pd.Series([s['dg_id'] for s in sides], dtype=object),
+        'opponent_id': pd.Series([s['opponent_id'] for s in sides], dtype=object),
+        'opponent_name': [s['opponent_name'] for s in sides],
+        'model_prob': model_prob,
+        'tie_prob': tie_prob,
+        'tie_adjusted_ev': tie_adjusted_ev,
+        **priced,
+    }, columns=MATCHUP_COLUMNS)
+    table['kelly'] *= kelly_fraction
+
+    table = table[table['best_odds'] > 1]
+    return table.sort_values('ev_percentage', ascending=False, kind='stable').reset_index(drop=True)
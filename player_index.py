@@ -0,0 +1,179 @@
+"""
+In-memory player identity index for resolving names mentioned in transcripts.
+
+Names come out of podcast transcripts in "First Last" form, frequently
+misspelled by the speech-to-text step, while the players table stores the
+DataGolf "Last, First" form. PlayerNameIndex loads the players table once and
+resolves any number of names with the same rules as
+insights_extractor.get_player_by_name, without a query per name.
+"""
+
+# Transcription errors and spelling variants that fuzzy matching can't recover
+SPECIAL_CASES = {
+    "JT POSTON": "Poston, J.T.",
+    "VICTOR HOVLAND": "Hovland, Viktor",
+    "NICOLAI HØJGAARD": "Hojgaard, Nicolai",
+    "NIKOLAI HØJGAARD": "Hojgaard, Nicolai",
+    "NIKOLAI HOJGAARD": "Hojgaard, Nicolai",
+    "RASMUS HØJGAARD": "Hojgaard, Rasmus",
+    "AILANO GRILLO": "Grillo, Emiliano",
+    "AILANO GRIO": "Grillo, Emiliano",
+    "EMILIANO GRIO": "Grillo, Emiliano",
+    "CRISTOBAL DEL SOLAR": "Del Solar, Cristobal",
+    "WINDHAM CLARK": "Clark, Wyndham",
+    "MEN WOO LEE": "Lee, Min Woo",
+    "MENWOO LEE": "Lee, Min Woo",
+    "MINWOO LEE": "Lee, Min Woo",
+    "MINU LEE": "Lee, Min Woo",
+    "LUDVIG ÅBERG": "Aberg, Ludvig",
+    "LUDVIG OBERG": "Aberg, Ludvig",
+    "LUDVIG ÄBERG": "Aberg, Ludvig",
+    "STEPHEN JAEGER": "Jaeger, Stephan",
+    "STEVEN Jaeger": "Jaeger, Stephan",
+    "JJ SPAUN": "Spaun, J.J.",
+    "JJ SPAWN": "Spaun, J.J.",
+    "CHARLIE HOFFMAN": "Hoffman, Charley",
+    "TOM MCKIBBEN": "McKibbin, Tom",
+    "ROY MCILROY": "McIlroy, Rory",
+    "JOHN RAHM": "Rahm, Jon",
+    "JOHN ROM": "Rahm, Jon",
+    "HOWTON LEE": "Li, Haotong",
+    "RICKY FOWLER": "Fowler, Rickie",
+    "THOMAS DIETRY": "Detry, Thomas",
+    "ADRIEN MERONK": "Meronk, Adrian",
+    "MAVERICK MCNEELY": "McNealy, Maverick",
+    "COLIN MORIKAWA": "Morikawa, Collin",
+    "PATRICK ROGERS": "Rodgers, Patrick",
+    "WINDAM CLARK": "Clark, Wyndham",
+    "ALDRI POTGATER": "Potgieter, Aldrich",
+    "JUSTIN SU": "Suh, Justin",
+    "RYAN PEAK": "PEAKE, RYAN",
+    "JOE HEITH": "Highsmith, Joe",
+    "CALLUM HILL": "Hill, Calum",
+    "CARL VILIPS": "Vilips, Karl",
+    "CARL VILLIPS": "Vilips, Karl",
+    "NEIL SHIPLEY": "Shipley, Neal",
+    "JOHNNY VEGAS": "Vegas, Jhonattan",
+    "BRIAN HARMON": "Harman, Brian",
+    "MARK LEISHMAN": "Leishman, Marc",
+    "THORBJØRN OLESEN": "Olesen, Thorbjorn",
+    "SEBASTIAN MUÑOZ": "Munoz, Sebastian",
+    "JOAQUÍN NIEMANN": "Niemann, Joaquin",
+    "JOSE LUIS BALLESTER": "Ballester Barrio, Jose Luis",
+    "JOSÉ LUIS BALLESTER": "Ballester Barrio, Jose Luis",
+    "SCOTTY SCHEFFLER": "Scheffler, Scottie",
+    "EMILIO GONZÁLEZ": "Gonzalez, Emilio",
+    "JULIÁN ETULAIN": "Etulain, Julian",
+    "JORGE FERNÁNDEZ VALDÉS": "Fernandez Valdes, Jorge",
+    "TYRELL HATTON": "Hatton, Tyrrell",
+    "STEVEN YEAGER": "Jaeger, Stephan",
+    "NICO ECHEVARRIA": "Echavarria, Nico",
+    "JHONNY VEGAS": "Vegas, Jhonattan",
+    "RYAN GERRARD": "Gerard, Ryan",
+    "JOHN RAM": "Rahm, Jon",
+    "MATTHEW PAVON": "Pavon, Matthieu",
+    "HAROLD OTT": "Ott, Harrison"
+}
+
+
+class PlayerNameIndex:
+    """Resolves transcript player names against a snapshot of the players table"""
+
+    def __init__(self, conn):
+        """
+        Load every player into memory.
+
+        Args:
+            conn: Open database connection with row_factory = sqlite3.Row
+        """
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM players ORDER BY id')
+        self.players = cursor.fetchall()
+
+        self.by_name = {}      # lowercase full name -> first player with that name
+        self.by_surname = {}   # lowercase surname (and its last word) -> players
+        self.lower_names = []  # (lowercase name, player) for substring fallback
+
+        for player in self.players:
+            name_lower = player['name'].lower()
+            self.by_name.setdefault(name_lower, player)
+            self.lower_names.append((name_lower, player))
+
+            if ',' in name_lower:
+                surname = name_lower.split(',')[0].strip()
+                self.by_surname.setdefault(surname, []).append(player)
+                # "Ballester Barrio, Jose Luis" should also match a transcript "... Barrio"
+                surname_last_word = surname.split()[-1] if surname.split() else surname
+                if surname_last_word != surname:
+                    self.by_surname.setdefault(surname_last_word, []).append(player)
+
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.players)
+
+    def lookup(self, name, fuzzy=True):
+        """
+        Find the player a name refers to.
+
+        Args:
+            name: Player name as written in the transcript ("First Last")
+            fuzzy: Allow reversed-name, surname and substring matching
+
+        Returns:
+            Player row or None if no match is found
+        """
+        key = (name, fuzzy)
+        if key not in self._cache:
+            self._cache[key] = self._resolve(name, fuzzy)
+        return self._cache[key]
+
+    def resolve_all(self, names, fuzzy=True):
+        """
+        Resolve a batch of names.
+
+        Returns:
+            Dictionary mapping each distinct name to a player row or None
+        """
+        return {name: self.lookup(name, fuzzy) for name in set(names)}
+
+    def _resolve(self, name, fuzzy):
+        name_lower = name.lower()
+
+        if fuzzy:
+            name_parts = name_lower.split()
+
+            if len(name_parts) > 1:
+                # First try an exact match with reversed name (last, first)
+                last_name = name_parts[-1]
+                first_name = ' '.join(name_parts[:-1])
+
+                player = self.by_name.get(f"{last_name}, {first_name}")
+                if player:
+                    return player
+
+                # Then players with a matching last name whose first name also matches
+                for player in self.by_surname.get(last_name, []):
+                    player_name_parts = player['name'].lower().split(', ')
+                    if len(player_name_parts) > 1:
+                        player_first = player_name_parts[1]
+                        if first_name in player_first or player_first in first_name:
+                            return player
+
+            # Try a simple contains match as fallback
+            for player_name, player in self.lower_names:
+                if name_lower in player_name:
+                    return player
+
+        else:
+            player = self.by_name.get(name_lower)
+            if player:
+                return player
+
+        # Handle special cases
+        special_case_name = SPECIAL_CASES.get(name.upper())
+        if special_case_name:
+            return self.by_name.get(special_case_name.lower())
+
+        return None
+
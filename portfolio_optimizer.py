@@ -0,0 +1,228 @@
+"""
+Portfolio Kelly sizing for correlated outright bets.
+
+Sizing each bet on its own over-bets positions that pay out together - the
+same player to win, top 5 and top 10 - and a greedy weekly budget makes the
+result depend on the order the markets are scanned in. Instead, all candidate
+bets for an event are sized together to maximize expected log bankroll under
+the per-bet and weekly caps. Bets already placed on the event are held
+fixed in every scenario, so a new top 10 on a player is sized knowing the
+win bet on them is already riding.
+
+Outcomes are sampled as scenarios. Each player gets one uniform draw per
+scenario and finishes inside the top N when the draw is below P(top N), so a
+win is always a top 5, a top 5 always a top 10 and so on. Players are drawn
+independently, which slightly overstates how often several longshots land
+together; tournament_simulator can pass full-field scenarios instead. The
+expected log bankroll is then maximized by projected gradient ascent over the
+whole stake vector at once.
+"""
+
+import logging
+import numpy as np
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('golf.portfolio_optimizer')
+
+# Finishing position each outright market pays out on
+MARKET_POSITIONS = {
+    'win': 1,
+    'top_5': 5,
+    'top_10': 10,
+    'top_20': 20,
+}
+
+DEFAULT_SCENARIOS = 20000
+DEFAULT_SEED = 20250401
+
+# The weekly budget is a fraction of bankroll; keep every scenario solvent
+MAX_TOTAL_FRACTION = 0.99
+
+
+def cumulative_position_probs(market_probs):
+    """
+    Make a player's top-N probabilities consistent with win ⊂ top 5 ⊂ top 10 ⊂ top 20.
+
+    Args:
+        market_probs: Dict of market -> model probability for one player
+
+    Returns:
+        Dict of market -> probability, non-decreasing in finishing position
+    """
+    ranked = sorted((MARKET_POSITIONS[m], m) for m in market_probs if m in MARKET_POSITIONS)
+    probs = np.maximum.accumulate([min(max(market_probs[m], 0.0), 1.0) for _, m in ranked]) if ranked else []
+    consistent = dict(market_probs)
+    consistent.update({m: float(p) for (_, m), p in zip(ranked, probs)})
+    return consistent
+
+
+def sample_outcomes(player_ids, markets, probs, num_scenarios=DEFAULT_SCENARIOS, seed=DEFAULT_SEED,
+                    player_probs=None):
+    """
+    Sample which bets win in each scenario.
+
+    Args:
+        player_ids: Player of each bet
+        markets: Market of each bet (win, top_5, top_10, top_20; anything
+                 else is treated as independent of the player's other bets)
+        probs: Model probability of each bet
+        num_scenarios: Number of scenarios to draw
+        seed: Random seed, fixed so repeated runs size the same slate the same way
+        player_probs: Optional dict of player_id -> {market: prob} with the
+                      player's other market probabilities, which tighten the
+                      nesting when only some of their markets are candidates
+
+    Returns:
+        Boolean array (scenarios x bets), True where the bet wins
+    """
+    num_bets = len(player_ids)
+    rng = np.random.default_rng(seed)
+
+    # Gather each player's probabilities and make them nest
+    per_player = {}
+    for pid, market, prob in zip(player_ids, markets, probs):
+        per_player.setdefault(pid, dict((player_probs or {}).get(pid, {})))[market] = prob
+    per_player = {pid: cumulative_position_probs(p) for pid, p in per_player.items()}
+
+    # One draw per player for position markets, one per bet for anything else
+    columns = {pid: i for i, pid in enumerate(per_player)}
+    column = np.empty(num_bets, dtype=int)
+    threshold = np.empty(num_bets)
+    next_column = len(columns)
+    for i, (pid, market) in enumerate(zip(player_ids, markets)):
+        threshold[i] = per_player[pid][market]
+        if market in MARKET_POSITIONS:
+            column[i] = columns[pid]
+        else:
+            column[i] = next_column
+            next_column += 1
+
+    draws = rng.random((num_scenarios, next_column))
+    return draws[:, column] < threshold
+
+
+def _project(y, upper, budget):
+    """Euclidean projection onto {0 <= f <= upper, sum(f) <= budget}"""
+    f = np.clip(y, 0, upper)
+    if f.sum() <= budget:
+        return f
+
+    # Shift by the lambda that meets the budget exactly, found by bisection
+    lo, hi = 0.0, float(np.max(y))
+    for _ in range(60):
+        lam = (lo + hi) / 2
+        if np.clip(y - lam, 0, upper).sum() > budget:
+            lo = lam
+        else:
+            hi = lam
+    return np.clip(y - hi, 0, upper)
+
+
+def maximize_log_growth(returns, upper, budget, max_iter=500, tol=1e-10, offset=None):
+    """
+    Maximize mean(log(1 + offset + returns @ f)) over 0 <= f <= upper, sum(f) <= budget.
+
+    Args:
+        returns: (scenarios x bets) net return per unit staked
+        upper: Per-bet cap as a fraction of bankroll
+        budget: Total stake cap as a fraction of bankroll (below 1)
+        offset: Optional per-scenario net return of positions already held,
+                as a fraction of bankroll (above -1 - budget in every scenario)
+
+    Returns:
+        Optimal fraction of bankroll for each bet
+    """
+    num_scenarios = returns.shape[0]
+    upper = np.asarray(upper, dtype=float)
+    base = 1 + (np.zeros(num_scenarios) if offset is None else np.asarray(offset, dtype=float))
+
+    def objective(f):
+        return np.log(base + returns @ f).mean()
+
+    f = np.zeros(returns.shape[1])
+    value = objective(f)
+    step = 1.0
+    for _ in range(max_iter):
+        gradient = returns.T @ (1 / (base + returns @ f)) / num_scenarios
+
+        # Backtracking line search along the projected gradient
+        while True:
+            candidate = _project(f + step * gradient, upper, budget)
+            candidate_value = objective(candidate)
+            if candidate_value >= value + 1e-4 * gradient @ (candidate - f) or step < 1e-8:
+                break
+            step /= 2
+
+        improvement = candidate_value - value
+        f, value = candidate, candidate_value
+        if improvement < tol:
+            break
+        step = min(step * 2, 1.0)
+
+    return f
+
+
+def optimize_portfolio(player_ids, markets, odds, probs, bankroll, max_stake_per_bet, budget,
+                       kelly_fraction=1.0, player_probs=None, outcomes=None,
+                       num_scenarios=DEFAULT_SCENARIOS, seed=DEFAULT_SEED, existing=None):
+    """
+    Size a slate of outright bets together for maximum expected log bankroll.
+
+    Args:
+        player_ids: Player of each bet
+        markets: Market of each bet
+        odds: Decimal odds of each bet
+        probs: Model probability of each bet
+        bankroll: Current bankroll in dollars
+        max_stake_per_bet: Largest stake allowed on one bet, in dollars
+        budget: Most that can be staked on the whole slate, in dollars
+        kelly_fraction: Fraction of the growth-optimal stakes to bet
+        player_probs: Optional dict of player_id -> {market: prob}, see sample_outcomes()
+        outcomes: Optional (scenarios x bets) matrix used instead of sampling:
+                  booleans, or the share of each bet paid out (dead heats),
+                  e.g. from TournamentSimulator.outcome_fractions(). With
+                  existing positions it has a further column for each, after
+                  the slate's bets
+        num_scenarios: Number of scenarios to sample
+        seed: Random seed for sampling
+        existing: Optional list of bets already placed on the event, as dicts
+                  with player_id, market, odds, prob and stake (dollars).
+                  Their stakes are fixed; they only shape the scenarios the
+                  new bets are sized in
+
+    Returns:
+        Array of stakes in dollars, one per bet
+    """
+    num_bets = len(odds)
+    if num_bets == 0 or bankroll <= 0 or budget <= 0 or kelly_fraction <= 0:
+        return np.zeros(num_bets)
+
+    existing = list(existing or [])
+    odds = np.concatenate([np.asarray(odds, dtype=float), [e['odds'] for e in existing]])
+    if outcomes is None:
+        outcomes = sample_outcomes(list(player_ids) + [e['player_id'] for e in existing],
+                                   list(markets) + [e['market'] for e in existing],
+                                   list(probs) + [e['prob'] for e in existing],
+                                   num_scenarios, seed, player_probs)
+    returns = np.asarray(outcomes, dtype=float) * odds - 1
+
+    # Solve for full Kelly with the caps scaled up, so the fractional stakes meet them
+    held = np.array([e['stake'] for e in existing], dtype=float) / bankroll / kelly_fraction
+    room = MAX_TOTAL_FRACTION - held.sum()
+    if room <= 0:
+        logger.info(f"Positions already held use up the bankroll, sizing {num_bets} bets at zero")
+        return np.zeros(num_bets)
+    upper = np.full(num_bets, max_stake_per_bet / bankroll / kelly_fraction)
+    total = min(budget / bankroll / kelly_fraction, room)
+    fractions = maximize_log_growth(returns[:, :num_bets], upper, total,
+                                    offset=returns[:, num_bets:] @ held if existing else None)
+
+    stakes = fractions * kelly_fraction * bankroll
+    logger.info(f"Sized {num_bets} bets: {np.count_nonzero(stakes > 0.005)} funded, "
+                f"${stakes.sum():.2f} of ${budget:.2f} budget"
+                + (f", alongside {len(existing)} bets already placed" if existing else ""))
+    return stakes
@@ -0,0 +1,103 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm.llm_provider import LLMResponse
+from llm.resilience import CircuitBreaker
+from llm.router import LLMRouter
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class ScriptedProvider:
+    """Provider that raises or answers from a list of scripted outcomes"""
+
+    def __init__(self, name, outcomes):
+        self.name = name
+        self.outcomes = outcomes
+        self.calls = []
+
+    def generate(self, messages, system=None, max_tokens=1000, temperature=0, model=None):
+        self.calls.append(model)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return LLMResponse(outcome, self.name, model or "default")
+
+
+def make_router(outcomes, built=None, **kwargs):
+    providers = {}
+
+    def factory(name, api_key=None):
+        if built is not None:
+            built.append((name, api_key))
+        providers.setdefault(name, ScriptedProvider(name, outcomes[name]))
+        return providers[name]
+
+    kwargs.setdefault("requests_per_minute", None)
+    kwargs.setdefault("max_retries", 0)
+    return LLMRouter(provider_factory=factory, **kwargs), providers
+
+
+def test_caller_error_during_half_open_trial_releases_the_trial():
+    router, _ = make_router({"anthropic": [StatusError(500), StatusError(400), "ok"]},
+                            failure_threshold=1, reset_timeout=0)
+    breaker = router.breakers["anthropic"]
+
+    with pytest.raises(StatusError):
+        router.complete("prompt")
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # The half-open trial is a malformed request: no verdict on the provider
+    with pytest.raises(StatusError):
+        router.complete("prompt")
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    assert router.complete("prompt").text == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_key_and_model_only_reach_the_provider_they_belong_to():
+    built = []
+    router, providers = make_router({"google": ["gemini"]}, built=built, primary="google")
+
+    response = router.complete("prompt", model="claude-3-7-sonnet-20250219", api_key="ANTHROPIC-KEY")
+
+    assert response.text == "gemini"
+    assert built == [("google", None)]
+    assert providers["google"].calls == [None]
+
+
+def test_key_and_model_for_the_fallback_provider():
+    built = []
+    router, providers = make_router({"anthropic": [StatusError(500)], "google": ["gemini"]},
+                                    built=built, fallback="google")
+
+    router.complete("prompt", model="gemini-2.0-flash", api_key="GOOGLE-KEY", provider="google")
+
+    assert built == [("anthropic", None), ("google", "GOOGLE-KEY")]
+    assert providers["anthropic"].calls == [None]
+    assert providers["google"].calls == ["gemini-2.0-flash"]
+
+
+def test_caller_error_is_raised_without_trying_the_fallback():
+    router, providers = make_router({"anthropic": [StatusError(400)], "google": ["gemini"]}, fallback="google")
+
+    with pytest.raises(StatusError) as raised:
+        router.complete("prompt")
+
+    assert raised.value.status_code == 400
+    assert "google" not in providers
+
+
+def test_provider_failure_still_falls_back():
+    router, providers = make_router({"anthropic": [StatusError(500)], "google": ["gemini"]}, fallback="google")
+
+    assert router.complete("prompt").text == "gemini"
@@ -0,0 +1,324 @@
+"""
+Monte Carlo tournament simulation for finishing positions and bankroll risk.
+
+DataGolf gives us marginal probabilities per player and market (win, top 5,
+top 10, top 20) but nothing about the field as a whole. This module samples
+complete tournaments: each player's 72-hole score is a normal draw around a
+per-player mean, rounded to whole strokes so ties happen as often as they do
+on tour. The means are fitted so the simulated win/top-N frequencies match the
+market marginals, and can then be shifted by mental form scores.
+
+From the simulated fields it produces:
+    - dead-heat-aware top-N EV (ties at the cut-off position split the payout)
+    - the joint P&L distribution of a slate of outright bets
+    - risk of ruin and drawdown percentiles from repeating that slate
+    - scenario payouts for portfolio_optimizer.optimize_portfolio()
+
+Large runs are split into chunks and spread across cores with a process pool.
+The pool is created once and reused. Its workers are started with forkserver
+(spawn where that isn't available), never forked from the caller: the agent
+process also runs an asyncio loop and worker threads, and a forked child can
+inherit a lock one of them holds.
+
+Usage:
+    sim = TournamentSimulator(player_ids, {'win': win_probs, 'top_10': top10_probs})
+    result = sim.simulate(1_000_000, bets=slate)
+    risk = bankroll_risk(result['pnl'], bankroll=1000)
+"""
+
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+
+from portfolio_optimizer import MARKET_POSITIONS
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('golf.tournament_simulator')
+
+# Spread of a player's 72-hole score around their mean, in strokes
+STROKE_SD = 5.5
+
+# Strokes gained over 72 holes per unit of mental form score (-1 to 1)
+MENTAL_STROKE_SHIFT = 1.0
+
+DEFAULT_SEED = 20250401
+CHUNK_SIZE = 20000
+
+DRAWDOWN_PERCENTILES = (50, 90, 95, 99)
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _process_pool(workers):
+    """The shared process pool, recreated only when a different size is asked for or it broke"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _pool_workers = workers
+        return _pool
+
+
+def _discard_pool(pool):
+    """Drop a pool whose worker died, so the next run starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def _simulate_fields(mu, stroke_sd, rng, num_sims, markets=MARKET_POSITIONS, payouts=True):
+    """
+    Simulate num_sims fields and return payout fractions per market.
+
+    Returns:
+        Dict of market -> (num_sims x players) array. 'win' holds 1 for the
+        playoff winner; top-N markets hold the dead-heat fraction of the
+        payout (1 inside the cut-off, tied slots / tied players across it).
+        Also 'hit_<market>': 1 where the player finished inside or tied at
+        the cut-off, i.e. what "P(top N)" measures. With payouts=False only
+        the hit arrays are returned.
+    """
+    num_players = len(mu)
+    scores = np.rint(mu + stroke_sd * rng.standard_normal((num_sims, num_players))).astype(np.int64)
+
+    # Scores are whole strokes in a narrow range, so a histogram per field
+    # gives how many players are strictly ahead of and tied with each player
+    low = scores.min()
+    span = int(scores.max() - low) + 1
+    cells = (scores - low) + span * np.arange(num_sims)[:, None]
+    counts = np.bincount(cells.ravel(), minlength=num_sims * span)
+    ahead_of_cell = np.cumsum(counts).reshape(num_sims, span) - counts.reshape(num_sims, span)
+    ahead_of_cell -= num_players * np.arange(num_sims)[:, None]
+    ahead = ahead_of_cell.ravel()[cells]
+    tied = counts[cells]
+
+    fractions = {}
+    if 'win' in markets:
+        # Ties for the win go to a playoff; jitter below one stroke picks its winner
+        winner = np.argmin(scores + rng.random((num_sims, num_players)), axis=1)
+        win = np.zeros((num_sims, num_players))
+        win[np.arange(num_sims), winner] = 1.0
+        fractions['hit_win'] = win
+        if payouts:
+            fractions['win'] = win
+
+    for market in markets:
+        position = MARKET_POSITIONS[market]
+        if position == 1:
+            continue
+        fractions[f'hit_{market}'] = (ahead < position).astype(float)
+        if payouts:
+            fractions[market] = np.clip(position - ahead, 0, tied) / tied
+    return fractions
+
+
+def _simulate_chunk(mu, stroke_sd, seed, num_sims, bet_players, bet_markets, bet_odds, bet_stakes):
+    """Process-pool worker: simulate one chunk and return its aggregates"""
+    rng = np.random.default_rng(seed)
+    fractions = _simulate_fields(mu, stroke_sd, rng, num_sims)
+
+    totals = {market: f.sum(axis=0) for market, f in fractions.items()}
+    pnl = None
+    if len(bet_players):
+        payout = np.column_stack([fractions[m][:, p] for p, m in zip(bet_players, bet_markets)])
+        pnl = (payout * bet_odds - 1) @ bet_stakes
+    return totals, pnl
+
+
+class TournamentSimulator:
+    """
+    Field simulator fitted to market marginals.
+
+    Args:
+        player_ids: IDs of every player in the field
+        market_probs: Dict of market -> sequence of model probabilities aligned
+                      with player_ids (None or NaN where a market has no price)
+        stroke_sd: Spread of a 72-hole score in strokes
+        mental_scores: Optional dict of player_id -> mental form score (-1 to 1)
+        mental_shift: Strokes gained per unit of mental score
+        fit_sims: Fields simulated per fitting iteration
+        fit_iterations: Number of fitting iterations
+        seed: Random seed
+    """
+
+    def __init__(self, player_ids, market_probs, stroke_sd=STROKE_SD, mental_scores=None,
+                 mental_shift=MENTAL_STROKE_SHIFT, fit_sims=CHUNK_SIZE, fit_iterations=30,
+                 seed=DEFAULT_SEED):
+        self.player_ids = list(player_ids)
+        self.index = {pid: i for i, pid in enumerate(self.player_ids)}
+        self.stroke_sd = stroke_sd
+        self.seed = seed
+
+        self.targets = {
+            market: np.array([np.nan if p is None else p for p in probs], dtype=float)
+            for market, probs in market_probs.items() if market in MARKET_POSITIONS
+        }
+        self.mu = self._fit(fit_sims, fit_iterations)
+
+        # Mental form moves a player's mean after fitting, so it shifts them
+        # away from the market rather than being fitted away
+        if mental_scores:
+            shift = np.array([mental_scores.get(pid) or 0.0 for pid in self.player_ids])
+            self.mu = self.mu - mental_shift * shift
+
+    def _fit(self, num_sims, iterations):
+        """Fit per-player mean scores so simulated marginals match the targets"""
+        num_players = len(self.player_ids)
+        win = self.targets.get('win')
+        if win is not None and np.isfinite(win).any():
+            # Start from the win market: longer odds, higher expected score
+            p = np.where(np.isfinite(win), win, np.nanmin(win))
+            mu = -self.stroke_sd * 0.5 * np.log(np.clip(p, 1e-6, 1) * num_players)
+        else:
+            mu = np.zeros(num_players)
+
+        floor = 1 / num_sims
+        for _ in range(iterations):
+            # Common random numbers: the same draws every iteration
+            fractions = _simulate_fields(mu, self.stroke_sd, np.random.default_rng(self.seed), num_sims,
+                                         markets=self.targets, payouts=False)
+            error = np.zeros(num_players)
+            count = np.zeros(num_players)
+            for market, target in self.targets.items():
+                known = np.isfinite(target)
+                simulated = fractions[f'hit_{market}'].mean(axis=0)
+                gap = np.log(np.clip(target, floor, 1)) - np.log(np.clip(simulated, floor, 1))
+                error[known] += gap[known]
+                count[known] += 1
+            mu -= 0.5 * self.stroke_sd * error / np.maximum(count, 1) / 2
+        return mu
+
+    def fit_error(self, num_sims=CHUNK_SIZE):
+        """Largest absolute gap between simulated and target probabilities, per market"""
+        fractions = _simulate_fields(self.mu, self.stroke_sd, np.random.default_rng(self.seed + 1), num_sims,
+                                     markets=self.targets, payouts=False)
+        return {
+            market: float(np.nanmax(np.abs(fractions[f'hit_{market}'].mean(axis=0) - target)))
+            for market, target in self.targets.items() if np.isfinite(target).any()
+        }
+
+    def _bet_arrays(self, bets):
+        players = np.array([self.index[b['player_id']] for b in bets], dtype=int)
+        markets = [b['market'] for b in bets]
+        odds = np.array([b['odds'] for b in bets], dtype=float)
+        stakes = np.array([b.get('stake', 0.0) for b in bets], dtype=float)
+        return players, markets, odds, stakes
+
+    def simulate(self, num_sims, bets=(), workers=None, chunk_size=CHUNK_SIZE):
+        """
+        Simulate num_sims tournaments, across processes when there's more than one chunk.
+
+        Args:
+            num_sims: Number of tournaments to simulate
+            bets: Optional slate of dicts with player_id, market, odds and stake
+            workers: Worker processes (defaults to the CPU count; 1 runs inline)
+            chunk_size: Tournaments per chunk
+
+        Returns:
+            Dict with:
+                position_probs: market -> P(finishing inside or tied at the cut-off) per player
+                dead_heat_fractions: market -> expected share of the payout per player
+                pnl: P&L of the slate in each tournament (None without bets)
+        """
+        players, markets, odds, stakes = self._bet_arrays(bets)
+        sizes = [chunk_size] * (num_sims // chunk_size)
+        if num_sims % chunk_size:
+            sizes.append(num_sims % chunk_size)
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        jobs = [(self.mu, self.stroke_sd, seed, size, players, markets, odds, stakes)
+                for seed, size in zip(seeds, sizes)]
+
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(jobs) > 1:
+            pool = _process_pool(workers)
+            try:
+                results = list(pool.map(_simulate_chunk, *zip(*jobs)))
+            except BrokenProcessPool:
+                _discard_pool(pool)
+                raise
+        else:
+            results = [_simulate_chunk(*job) for job in jobs]
+
+        totals = {}
+        for chunk_totals, _ in results:
+            for market, total in chunk_totals.items():
+                totals[market] = totals.get(market, 0) + total
+
+        logger.info(f"Simulated {num_sims} tournaments in {len(jobs)} chunks")
+        return {
+            'num_sims': num_sims,
+            'position_probs': {m: totals[f'hit_{m}'] / num_sims for m in MARKET_POSITIONS},
+            'dead_heat_fractions': {m: totals[m] / num_sims for m in MARKET_POSITIONS},
+            'pnl': np.concatenate([pnl for _, pnl in results]) if len(players) else None,
+        }
+
+    def top_n_ev(self, result, player_id, market, odds):
+        """
+        Dead-heat-aware EV percentage of a bet, from a simulate() result.
+
+        A top-N bet whose player ties across the cut-off is paid on the share
+        of tied places inside it, which the plain model probability ignores.
+        """
+        fraction = result['dead_heat_fractions'][market][self.index[player_id]]
+        return (fraction * odds - 1) * 100
+
+    def outcome_fractions(self, bets, num_sims=CHUNK_SIZE):
+        """
+        Scenario payouts of a slate for portfolio_optimizer.optimize_portfolio().
+
+        Returns:
+            (num_sims x bets) array of the share of each bet that is paid out
+        """
+        players, markets, _, _ = self._bet_arrays(bets)
+        fractions = _simulate_fields(self.mu, self.stroke_sd, np.random.default_rng(self.seed), num_sims)
+        return np.column_stack([fractions[m][:, p] for p, m in zip(players, markets)])
+
+
+def bankroll_risk(pnl, bankroll, horizon=50, num_paths=10000, ruin_fraction=0.5, seed=DEFAULT_SEED):
+    """
+    Risk of ruin and drawdowns from repeating a slate event after event.
+
+    Args:
+        pnl: Simulated P&L of one event's slate (from simulate())
+        bankroll: Starting bankroll
+        horizon: Number of events per path
+        num_paths: Number of bankroll paths
+        ruin_fraction: Bankroll fraction at or below which a path counts as ruined
+
+    Returns:
+        Dict with expected_pnl, pnl percentiles for one event, risk_of_ruin and
+        max drawdown percentiles (as a fraction of the running peak)
+    """
+    pnl = np.asarray(pnl, dtype=float)
+    rng = np.random.default_rng(seed)
+    steps = pnl[rng.integers(0, len(pnl), size=(num_paths, horizon))]
+    equity = bankroll + np.cumsum(steps, axis=1)
+    equity = np.concatenate([np.full((num_paths, 1), float(bankroll)), equity], axis=1)
+
+    peak = np.maximum.accumulate(equity, axis=1)
+    drawdown = ((peak - equity) / peak).max(axis=1)
+    ruined = (equity <= bankroll * ruin_fraction).any(axis=1)
+
+    return {
+        'expected_pnl': float(pnl.mean()),
+        'pnl_percentiles': {q: float(v) for q, v in zip((5, 50, 95), np.percentile(pnl, (5, 50, 95)))},
+        'risk_of_ruin': float(ruined.mean()),
+        'drawdown_percentiles': {q: float(v) for q, v in
+                                 zip(DRAWDOWN_PERCENTILES, np.percentile(drawdown, DRAWDOWN_PERCENTILES))},
+    }
@@ -0,0 +1,185 @@
+"""
+Split long transcripts into overlapping chunks and merge the insights
+extracted from each chunk.
+
+Multi-hour podcasts either overflow the extraction prompt or lose
+late-transcript insights to the output token cap. Chunking on speaker and
+sentence boundaries keeps every chunk small enough to be extracted in full,
+and the overlap makes sure an insight straddling a boundary is seen whole by
+at least one chunk. Insights picked up twice in an overlap are dropped when
+the chunk results are merged.
+"""
+
+import re
+import unicodedata
+
+# Roughly 6k tokens of transcript per chunk - about 25 minutes of speech
+DEFAULT_CHUNK_CHARS = 24000
+DEFAULT_OVERLAP_CHARS = 1500
+
+# Two insights for the same player sharing this fraction of their words are duplicates
+DUPLICATE_SIMILARITY = 0.8
+
+# Speaker turns: caption markers (">>") or "Name:" / "SPEAKER 1:" at the start of a line
+SPEAKER_PATTERN = re.compile(r'(?:\n|^)(?=\s*(?:>>|[A-Z][\w .\'-]{0,40}:\s))')
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?])\s+')
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def _split_units(text, max_unit_chars):
+    """Break text into speaker turns, then sentences, then word runs if still too long"""
+    units = []
+    for turn in SPEAKER_PATTERN.split(text):
+        turn = turn.strip()
+        if not turn:
+            continue
+
+        for sentence in SENTENCE_PATTERN.split(turn):
+            if len(sentence) <= max_unit_chars:
+                units.append(sentence)
+                continue
+
+            # Auto-generated captions often have no punctuation at all
+            words = sentence.split()
+            current = []
+            current_len = 0
+            for word in words:
+                if current and current_len + len(word) + 1 > max_unit_chars:
+                    units.append(" ".join(current))
+                    current = []
+                    current_len = 0
+                current.append(word)
+                current_len += len(word) + 1
+            if current:
+                units.append(" ".join(current))
+
+    return units
+
+
+def _word_tail(text, max_chars):
+    """The longest run of whole words at the end of text that fits in max_chars"""
+    if max_chars <= 0:
+        return ""
+    tail = text[-max_chars:]
+    if len(tail) < len(text) and not text[-max_chars - 1].isspace() and not tail[0].isspace():
+        # Started mid-word - drop the partial word
+        _, _, tail = tail.partition(" ")
+    return tail.strip()
+
+
+def split_transcript(text, chunk_chars=DEFAULT_CHUNK_CHARS, overlap_chars=DEFAULT_OVERLAP_CHARS):
+    """
+    Split a transcript into overlapping chunks on speaker/sentence boundaries.
+
+    Args:
+        text: Full transcript text
+        chunk_chars: Target maximum characters per chunk
+        overlap_chars: Characters of trailing context repeated at the start of the next chunk
+
+    Returns:
+        List of chunk strings (a single chunk for short transcripts)
+    """
+    if len(text) <= chunk_chars:
+        return [text]
+
+    units = _split_units(text, max(chunk_chars // 4, 200))
+
+    chunks = []
+    current = []
+    current_len = 0
+
+    for unit in units:
+        if current and current_len + len(unit) + 1 > chunk_chars:
+            chunks.append(" ".join(current))
+
+            # Carry the last overlap_chars of this chunk into the next one
+            carried = []
+            carried_len = 0
+            for previous in reversed(current):
+                if carried_len + len(previous) > overlap_chars:
+                    # A unit longer than what's left is cut at a word boundary, so
+                    # unpunctuated captions still share text across the boundary
+                    tail = _word_tail(previous, overlap_chars - carried_len)
+                    if tail:
+                        carried.insert(0, tail)
+                        carried_len += len(tail) + 1
+                    break
+                carried.insert(0, previous)
+                carried_len += len(previous) + 1
+
+            current = carried
+            current_len = carried_len
+
+        current.append(unit)
+        current_len += len(unit) + 1
+
+    if current:
+        chunks.append(" ".join(current))
+
+    return chunks
+
+
+def normalize_player_name(name):
+    """Lowercase, strip accents and punctuation so name variants compare equal"""
+    name = unicodedata.normalize('NFKD', name)
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    return " ".join(WORD_PATTERN.findall(name.lower()))
+
+
+def _word_set(text):
+    return set(WORD_PATTERN.findall(text.lower()))
+
+
+def _similarity(words_a, words_b):
+    """Overlap coefficient - catches one extraction being a trimmed version of the other"""
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / min(len(words_a), len(words_b))
+
+
+def merge_insights(chunk_results, similarity=DUPLICATE_SIMILARITY):
+    """
+    Merge per-chunk insight lists, dropping duplicates from chunk overlaps.
+
+    Only consecutive chunks share text, so each insight is only compared with
+    those extracted from the previous chunk. Distinct insights about the same
+    player elsewhere in the episode are kept even if worded similarly.
+
+    Args:
+        chunk_results: List of insight lists in transcript order, each item a
+                       {"player_name", "insight"} dictionary
+        similarity: Word-overlap threshold above which two insights for the
+                    same player are considered the same insight
+
+    Returns:
+        Merged list of insights in transcript order. When two insights are
+        duplicates, the more detailed (longer) wording is kept.
+    """
+    merged = []
+    previous_chunk = {}  # normalized player name -> list of (index in merged, word set)
+
+    for insights in chunk_results:
+        current_chunk = {}
+
+        for insight in insights:
+            player_key = normalize_player_name(insight["player_name"])
+            words = _word_set(insight["insight"])
+
+            duplicate_of = None
+            for index, existing_words in previous_chunk.get(player_key, []):
+                if _similarity(words, existing_words) >= similarity:
+                    duplicate_of = index
+                    break
+
+            if duplicate_of is None:
+                current_chunk.setdefault(player_key, []).append((len(merged), words))
+                merged.append(insight)
+            else:
+                if len(insight["insight"]) > len(merged[duplicate_of]["insight"]):
+                    merged[duplicate_of] = insight
+                # The insight may also appear in the next chunk's overlap
+                current_chunk.setdefault(player_key, []).append((duplicate_of, words))
+
+        previous_chunk = current_chunk
+
+    return merged
@@ -5,15 +5,48 @@ content about golfers' mental states and betting recommendations.
 """
 
 import os
+import sys
 import json
 import datetime
 import sqlite3
-import anthropic
 from typing import Dict, List, Optional, Any, Tuple
 from dotenv import load_dotenv
 
+# Add the parent directory to the path so we can import the shared LLM layer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm.llm_provider import cacheable, segment_text
+from llm.router import complete
+
 load_dotenv()
 
+# Static tweet instructions, sent before the player-specific part of the prompt so they can be cached
+TWEET_INSTRUCTIONS = """
+=== ANALYSIS INSTRUCTIONS ===
+Your task is to compose a tweet (maximum 280 characters) analyzing one or two of the bets described after these instructions. Here are your betting guidelines:
+
+    1. BACK a bet when:
+        - The EV is over +7% for placement bets (or over +20% for outright winner bets) AND
+        - The player's mental score is over +0.25. Never recommend backing a player with a negative mental score, even if the model shows +EV. The mental flags override the model.
+
+    2. FADE a bet when:
+        - The EV is less than 7%
+        - The player's mental score is negative
+
+    3. WAIT AND SEE when:
+        - The player has a positive mental score over +0.25 but the EV is barely negative or not positive enough
+        - The player's mental score is slightly positive (less than +0.25) - you need more positive mental indicators
+
+=== OUTPUT INSTRUCTIONS ===
+Your tweet MUST be UNDER 280 CHARACTERS and completely SELF-CONTAINED.
+
+A self-contained tweet means:
+1. Write like your followers don't have access to the assessment, because they don't! Assume your followers know nothing about the player.
+2. Always use either the player's full name or a nickname so your followers know who you're talking about. Say either "Charlie Hoffman" or "Chuck Hoffman" instead of just "Hoffman."
+3. Never mention raw numbers without context
+4. Never explicitly reference the prompt (don't say shit like "That +3000" or "WAIT AND SEE"). In fact, don't use quotation marks at all. No direct quotes either!
+"""
+
 class HeadProTweetGenerator:
     def __init__(self, persona_file: str = "head_pro_persona.txt", db_path: str = "data/db/mental_form.db"):
         """
@@ -228,11 +261,8 @@ class HeadProTweetGenerator:
         # Create the initial tweet generation prompt
         prompt = self._create_prompt(context)
         
-        print(f"\n==== FULL PROMPT ====\n{prompt}\n==== END PROMPT ====\n")
+        print(f"\n==== FULL PROMPT ====\n{segment_text(prompt)}\n==== END PROMPT ====\n")
         
-        # Initialize the Anthropic client
-        client = anthropic.Anthropic(api_key=self.api_key)
-
         # Set up for retries if needed
         max_attempts = 3
         attempt = 0
@@ -244,18 +274,17 @@ class HeadProTweetGenerator:
             
             if attempt == 1:
                 # First attempt - create the initial tweet
-                initial_message = client.messages.create(
-                    model="claude-3-7-sonnet-20250219",
+                initial_message = complete(
+                    prompt,
                     max_tokens=1000,
                     temperature=0.7,
-                    system=self.persona,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
+                    system=[cacheable(self.persona)],
+                    feature="tweet",
+                    api_key=self.api_key
                 )
                 
                 # Extract the initial tweet
-                tweet_text = initial_message.content[0].text.strip()
+                tweet_text = initial_message.text.strip()
                 print(f"Initial tweet ({len(tweet_text)} chars):\n{tweet_text}\n")
                 
                 # Validation step - continue the conversation
@@ -269,19 +298,21 @@ class HeadProTweetGenerator:
 
         Note: If you need to revise the tweet at any step, make sure your revised version meets ALL previous requirements."""
                 
-                validation_message = client.messages.create(
-                    model="claude-3-7-sonnet-20250219",
-                    max_tokens=1000,
-                    temperature=0.7,
-                    messages=[
+                validation_message = complete(
+                    [
                         {"role": "user", "content": prompt},
                         {"role": "assistant", "content": tweet_text},
                         {"role": "user", "content": validation_prompt}
-                    ]
+                    ],
+                    max_tokens=1000,
+                    temperature=0.7,
+                    system=[cacheable(self.persona)],
+                    feature="tweet_validation",
+                    api_key=self.api_key
                 )
                 
                 # Extract the validated tweet
-                final_tweet = validation_message.content[0].text.strip()
+                final_tweet = validation_message.text.strip()
                 
             else:
                 # Check if the tweet is actually too long before telling the LLM it's too long
@@ -302,20 +333,22 @@ class HeadProTweetGenerator:
         
         Just provide the rewritten tweet with no explanation."""
                 
-                retry_message = client.messages.create(
-                    model="claude-3-7-sonnet-20250219",
-                    max_tokens=1000,
-                    temperature=0.7,
-                    messages=[
+                retry_message = complete(
+                    [
                         {"role": "user", "content": prompt},
                         {"role": "assistant", "content": tweet_text},
                         {"role": "user", "content": validation_prompt},
                         {"role": "assistant", "content": final_tweet},
                         {"role": "user", "content": retry_prompt}
-                    ]
+                    ],
+                    max_tokens=1000,
+                    temperature=0.7,
+                    system=[cacheable(self.persona)],
+                    feature="tweet_retry",
+                    api_key=self.api_key
                 )
                 
-                final_tweet = retry_message.content[0].text.strip()
+                final_tweet = retry_message.text.strip()
             
             # Check if the tweet is within the character limit
             print(f"Validated tweet ({len(final_tweet)} chars):\n{final_tweet}\n")
@@ -332,15 +365,19 @@ class HeadProTweetGenerator:
         # Return the final tweet AND context as a tuple
         return final_tweet, context
  
-    def _create_prompt(self, context: Dict[str, Any]) -> str:
+    def _create_prompt(self, context: Dict[str, Any]) -> List[Any]:
         """
         Create a prompt for an LLM to generate a tweet.
 
+        The static TWEET_INSTRUCTIONS come first and the player-specific part
+        last; both are marked cacheable, since the validation and retry calls
+        repeat the whole prompt.
+
         Args:
             context: Dictionary containing all the data needed for the tweet
 
         Returns:
-            Prompt string to send to Claude
+            Prompt segments to send to Claude
         """
 
         player = context["player"]
@@ -411,21 +448,6 @@ The best available sportsbook odds and their expected values ("EV") are as follo
 
         prompt += f"""
 
-=== ANALYSIS INSTRUCTIONS ===
-Your task is to compose a tweet (maximum 280 characters) analyzing one or two of these bets. Here are your betting guidelines:
-
-    1. BACK a bet when:
-        - The EV is over +7% for placement bets (or over +20% for outright winner bets) AND
-        - The player's mental score is over +0.25. Never recommend backing a player with a negative mental score, even if the model shows +EV. The mental flags override the model.
-
-    2. FADE a bet when:
-        - The EV is less than 7%
-        - The player's mental score is negative
-
-    3. WAIT AND SEE when:
-        - The player has a positive mental score over +0.25 but the EV is barely negative or not positive enough
-        - The player's mental score is slightly positive (less than +0.25) - you need more positive mental indicators
-
 === NICKNAMES AND NOTES ===
 To give you a little more flavor, here are some nicknames and background notes for the player. They don't factor into the model - they're just for fun. Use them sparingly, if at all:
         
@@ -450,18 +472,10 @@ For variety, please avoid being too similar to your recent tweets. Create someth
                 prompt += f"\n{i+1}. {tweet}"
 
         prompt += f"""
-=== OUTPUT INSTRUCTIONS ===
-Your tweet MUST be UNDER 280 CHARACTERS and completely SELF-CONTAINED.
-
-A self-contained tweet means:
-1. Write like your followers don't have access to the assessment, because they don't! Assume your followers know nothing about the player.
-2. Always use either the player's full name or a nickname so your followers know who you're talking about. Say either "Charlie Hoffman" or "Chuck Hoffman" instead of just "Hoffman."
-3. Never mention raw numbers without context
-4. Never explicitly reference the prompt (don't say shit like "That +3000" or "WAIT AND SEE"). In fact, don't use quotation marks at all. No direct quotes either!
 
-Now go do your thing, Head Pro. Just write the tweet text itself with no additional explanation.
+Now go do your thing, Head Pro. Follow the analysis and output instructions above and just write the tweet text itself with no additional explanation.
 """
-        return prompt
+        return [cacheable(TWEET_INSTRUCTIONS), cacheable(prompt)]
 
 if __name__ == "__main__":
     # Example usage
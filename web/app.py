@@ -7,14 +7,19 @@ from datetime import datetime
 # Add parent directory to path to find the modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from insights_extractor import create_claude_prompt, query_claude, parse_claude_response, get_player_by_name
-from odds_retriever import OddsRetriever, format_market_name
+# insights_extractor and odds_retriever (requests, numpy, the LLM clients) are
+# imported by the views and jobs that use them, so workers boot quickly
 from db_utils import (
     get_db_connection, 
     add_insight, 
+    add_insights_bulk,
     calculate_mental_form, 
     search_players
 )
+from insight_dedup import InsightDedupIndex
+from bet_rollups import get_totals, get_breakdown
+from bankroll_ledger import initialize_tables as initialize_ledger_tables, BankrollLedger
+from job_queue import JobQueue
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev_key_for_testing")
@@ -27,6 +32,23 @@ app.config['DATAGOLF_API_KEY'] = os.environ.get('DATAGOLF_API_KEY')
 
 # Default database path - resolves to the correct location from the web directory
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data/db/mental_form.db")
+DEFAULT_BANKROLL = 1000  # Default starting bankroll
+TRANSCRIPT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "transcripts/cache")
+
+# Background jobs for slow Claude/API work, so requests return immediately
+jobs = JobQueue(DB_PATH, workers=int(os.environ.get("JOB_WORKERS", "2")))
+
+@app.before_request
+def flash_job_notifications():
+    """Tell the user about background jobs that finished since their last page load"""
+    if request.endpoint in (None, 'static', 'job_status', 'fetch_youtube_transcript') or request.method != 'GET':
+        return
+    
+    for job in jobs.pop_notifications():
+        if job['status'] == 'succeeded':
+            flash((job['result'] or {}).get('message', f"Job {job['id']} finished"), 'success')
+        else:
+            flash(f"Background {job['kind'].replace('_', ' ')} job failed: {job['error']}", 'error')
 
 # Add the current date to all templates
 @app.context_processor
@@ -214,22 +236,27 @@ def update_player_info(player_id):
 
 @app.route('/calculate_mental_form/<int:player_id>', methods=['POST'])
 def recalculate_mental_form(player_id):
-    """Recalculate mental form for a player"""
+    """Queue a mental form recalculation for a player"""
     try:
-        print(f"Database path: {DB_PATH}")
-        print(f"Database exists: {os.path.exists(DB_PATH)}")
-        print(f"Current working directory: {os.getcwd()}")
-
-        score, justification = calculate_mental_form(player_id)
-
-        flash(f'Mental form recalculated: {score}', 'success')
+        job_id = jobs.enqueue('calculate_mental_form', {'player_id': player_id})
+        flash(f'Mental form recalculation started (job {job_id}) - you\'ll be notified when it finishes', 'info')
     except Exception as e:
         flash(f'Error calculating mental form: {str(e)}', 'error')
-        import traceback
-        print(traceback.format_exc())  # Print full stack trace
     
     return redirect(url_for('player_detail', player_id=player_id))
 
+def run_calculate_mental_form(payload):
+    """Job handler: recalculate a player's mental form (two Claude calls)"""
+    player_id = payload['player_id']
+    score, justification = calculate_mental_form(player_id)
+    
+    return {
+        'player_id': player_id,
+        'score': score,
+        'justification': justification,
+        'message': f'Mental form recalculated for player {player_id}: {score}'
+    }
+
 @app.route('/insights')
 def insights():
     """Manage insights"""
@@ -278,6 +305,8 @@ def insights():
 def add_new_insight():
     """Add a new insight manually"""
     if request.method == 'POST':
+        from insights_extractor import get_player_by_name
+        
         player_name = request.form.get('player_name')
         text = request.form.get('text')
         source = request.form.get('source')
@@ -289,16 +318,20 @@ def add_new_insight():
         # Find player
         conn = get_db_connection(DB_PATH)
         player = get_player_by_name(conn, player_name)
-        conn.close()
         
         if not player:
+            conn.close()
             flash(f'Player not found: {player_name}', 'error')
             return redirect(url_for('add_new_insight'))
         
         player_id = player['id']
         
-        # Add the insight
+        # Add the insight (a near-duplicate of a stored insight is merged into it)
         try:
+            dedup_index = InsightDedupIndex(conn)
+            dedup_check = dedup_index.check(player_id, text)
+            duplicate_of, similarity, _ = dedup_check
+            
             insight_id = add_insight(
                 player_id=player_id,
                 text=text,
@@ -306,11 +339,22 @@ def add_new_insight():
                 source_type=source_type,
                 content_title=content_title,
                 content_url=content_url,
-                date=date
+                date=date,
+                conn=conn,
+                dedup_index=dedup_index,
+                dedup_check=dedup_check
             )
-            flash(f'Insight added successfully for {player_name}', 'success')
+            conn.commit()
+            conn.close()
+            
+            if duplicate_of is not None:
+                flash(f'A near-identical insight (#{duplicate_of}, {similarity:.0%} similar) already exists '
+                      f'for {player_name} - recorded this source against it instead', 'warning')
+            else:
+                flash(f'Insight added successfully for {player_name}', 'success')
             return redirect(url_for('player_detail', player_id=player_id))
         except Exception as e:
+            conn.close()
             flash(f'Error adding insight: {str(e)}', 'error')
             return redirect(url_for('add_new_insight'))
     
@@ -350,6 +394,8 @@ def add_new_insight():
 @app.route('/edit_insight/<int:insight_id>', methods=['GET', 'POST'])
 def edit_insight(insight_id):
     """Edit an existing insight"""
+    from insights_extractor import get_player_by_name
+    
     conn = get_db_connection(DB_PATH)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
@@ -399,6 +445,9 @@ def edit_insight(insight_id):
         WHERE id = ?
         """, (text, new_player_id, source, source_type, content_title, content_url, date, insight_id))
         
+        # Match future duplicates against the new text (and player)
+        InsightDedupIndex(conn).reindex(insight_id, new_player_id, text)
+        
         # Mark mental form for recalculation for both original and new player (if different)
         cursor.execute("""
         UPDATE mental_form
@@ -463,7 +512,8 @@ def delete_insight(insight_id):
     
     player_id = result[0]
     
-    # Delete the insight
+    # Delete the insight, handing its duplicates and merged sources to a flagged copy if there is one
+    InsightDedupIndex(conn).forget(insight_id)
     cursor.execute("DELETE FROM insights WHERE id = ?", (insight_id,))
     
     # Mark mental form for recalculation
@@ -495,74 +545,27 @@ def process_transcript():
             flash('Please fill out all required fields', 'error')
             return redirect(url_for('process_transcript'))
         
+        # Get API key from environment
+        api_key = os.environ.get("ANTHROPIC_API_KEY")
+        if not api_key:
+            flash("Error: No Claude API key provided. Set ANTHROPIC_API_KEY env variable", 'error')
+            return redirect(url_for('process_transcript'))
+        
         try:
-            # Get API key from environment
-            api_key = os.environ.get("ANTHROPIC_API_KEY")
-            if not api_key:
-                flash("Error: No Claude API key provided. Set ANTHROPIC_API_KEY env variable", 'error')
-                return redirect(url_for('process_transcript'))
-            
-            # Create prompt and query Claude
-            prompt = create_claude_prompt(transcript_text, event_name)
-            claude_response = query_claude(prompt, api_key)
-            
-            # Parse response to get insights
-            insights = parse_claude_response(claude_response)
-            
-            # Store extracted insights for the template
-            extracted_insights = []
-            
-            # Connect to database
-            conn = get_db_connection(DB_PATH)
-            conn.row_factory = sqlite3.Row
-            
-            # Process each insight
-            for insight_item in insights:
-                player_name = insight_item["player_name"]
-                insight_text = insight_item["insight"]
-
-                # Create the insight data structure
-                insight_data = {
-                    'player_name': player_name,
-                    'text': insight_text,
-                    'matched': False,
-                    'player_id': None
-    }
-                
-                # Try to find the player in the database
-                player = get_player_by_name(conn, player_name)
-
-                if player:
-                    # Add insight to database
-                    player_id = player["id"]
-                    add_insight(
-                        player_id=player_id,
-                        text=insight_text,
-                        source=source,
-                        source_type=source_type,
-                        content_title=episode_title,
-                        content_url=content_url,
-                        date=insight_date
-                    )
-                    insight_data['matched'] = True
-                    insight_data['player_id'] = player_id
-                
-                extracted_insights.append(insight_data)
-            
-            conn.close()
-            
-            return render_template('process_results.html', 
-                                 insights=extracted_insights,
-                                 event_name=event_name,
-                                 source=source,
-                                 source_type=source_type,
-                                 content_title=episode_title,
-                                 content_url=content_url,
-                                 insight_date=insight_date)
-                
+            job_id = jobs.enqueue('process_transcript', {
+                'transcript': transcript_text,
+                'event_name': event_name,
+                'source': source,
+                'source_type': source_type,
+                'episode_title': episode_title,
+                'content_url': content_url,
+                'insight_date': insight_date
+            })
         except Exception as e:
             flash(f'Error processing transcript: {str(e)}', 'error')
             return redirect(url_for('process_transcript'))
+        
+        return redirect(url_for('process_job_results', job_id=job_id))
     
     # GET request - show form
     conn = get_db_connection(DB_PATH)
@@ -576,6 +579,86 @@ def process_transcript():
     
     return render_template('process.html', sources=sources, today=datetime.now().strftime("%Y-%m-%d"))
 
+def run_process_transcript(payload):
+    """Job handler: extract insights from a transcript and store them"""
+    from insights_extractor import extract_insights
+    
+    api_key = os.environ.get("ANTHROPIC_API_KEY")
+    if not api_key:
+        raise ValueError("No Claude API key provided. Set ANTHROPIC_API_KEY env variable")
+    
+    # Query Claude (long transcripts are chunked and extracted in parallel)
+    insights, _ = extract_insights(payload['transcript'], payload['event_name'], api_key)
+    
+    # Connect to database
+    conn = get_db_connection(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    
+    # Resolve every player and insert all insights in one transaction
+    try:
+        results = add_insights_bulk(
+            insights,
+            source=payload['source'],
+            source_type=payload['source_type'],
+            content_title=payload['episode_title'],
+            content_url=payload['content_url'],
+            date=payload['insight_date'],
+            conn=conn
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    
+    # Store extracted insights for the template
+    extracted_insights = [{
+        'player_name': result["player_name"],
+        'text': result["insight"],
+        'matched': result["player_id"] is not None,
+        'player_id': result["player_id"]
+    } for result in results]
+    
+    matched = sum(1 for insight in extracted_insights if insight['matched'])
+    return {
+        'insights': extracted_insights,
+        'message': f"Processed transcript for {payload['event_name']}: {matched} of {len(extracted_insights)} insights matched to players"
+    }
+
+@app.route('/process/results/<job_id>')
+def process_job_results(job_id):
+    """Show the results of a transcript processing job, or its progress"""
+    job = jobs.get(job_id)
+    if not job or job['kind'] != 'process_transcript':
+        flash(f'Unknown transcript job: {job_id}', 'error')
+        return redirect(url_for('process_transcript'))
+    
+    if job['status'] == 'failed':
+        flash(f"Error processing transcript: {job['error']}", 'error')
+        return redirect(url_for('process_transcript'))
+    
+    if job['status'] != 'succeeded':
+        return render_template('job_status.html', job=job)
+    
+    payload = job['payload']
+    return render_template('process_results.html', 
+                         insights=job['result']['insights'],
+                         event_name=payload['event_name'],
+                         source=payload['source'],
+                         source_type=payload['source_type'],
+                         content_title=payload['episode_title'],
+                         content_url=payload['content_url'],
+                         insight_date=payload['insight_date'])
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Poll endpoint for background job status"""
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    # The transcript itself can be large and isn't needed by pollers
+    job['payload'].pop('transcript', None)
+    return jsonify({'success': True, 'job': job})
+
 @app.route('/fetch_youtube_transcript', methods=['POST'])
 def fetch_youtube_transcript():
     """Fetch transcript from a YouTube video URL"""
@@ -586,21 +669,20 @@ def fetch_youtube_transcript():
             return jsonify({'success': False, 'error': 'No YouTube URL provided'})
         
         # Import the necessary functions from youtube_transcript.py
-        from youtube_transcript import get_video_id_from_url, get_transcript, format_transcript
+        from youtube_transcript import get_video_id_from_url, fetch_transcripts, TranscriptCache
         
         # Get video ID from URL
         video_id = get_video_id_from_url(youtube_url)
         
-        # Get transcript
-        transcript_list = get_transcript(video_id)
-        if not transcript_list:
+        # Get transcript (videos fetched before are served from the disk cache)
+        result = fetch_transcripts([video_id], cache=TranscriptCache(TRANSCRIPT_CACHE_DIR))[video_id]
+        if result["error"]:
             return jsonify({
                 'success': False, 
                 'error': 'Failed to fetch transcript. Make sure the video has closed captions available.'
             })
         
-        # Format transcript
-        transcript_text = format_transcript(transcript_list)
+        transcript_text = result["text"]
         
         # Try to get video title using pytube (optional)
         video_title = None
@@ -627,6 +709,8 @@ def fetch_youtube_transcript():
 @app.route('/betting')
 def betting_dashboard():
     """Betting dashboard with all players and filters"""
+    from odds_retriever import format_market_name
+    
     # Get filter parameters
     market = request.args.get('market', 'win')
     sportsbook = request.args.get('sportsbook', '')  # New sportsbook filter
@@ -849,51 +933,57 @@ def betting_dashboard():
 
 @app.route('/betting/update', methods=['POST'])
 def update_betting_recommendations():
-    """Update betting recommendations"""
+    """Queue an update of betting recommendations"""
     try:
-        print("Starting odds data update...")
-        
-        # Initialize OddsRetriever
-        from odds_retriever import OddsRetriever
-        odds_retriever = OddsRetriever(db_path=DB_PATH)
-        
-        print("OddsRetriever initialized")
-        print(f"Database path: {DB_PATH}")
-        print(f"API key available: {'Yes' if odds_retriever.api_key else 'No'}")
-        
-        # Update recommendations
-        print("Calling update_odds_data()...")
-        result = odds_retriever.update_odds_data()
-        
-        print(f"Update completed. Result keys: {list(result.keys() if result else [])}")
-        
-        if result and "event_name" in result:
-            event_name = result["event_name"]
-            print(f"Successfully updated data for event: {event_name}")
-            
-            # Count entries added
-            market_counts = {}
-            for market_name, market_data in result.get("markets", {}).items():
-                market_counts[market_name] = len(market_data)
-            
-            print(f"Market data counts: {market_counts}")
-            
-            flash(f'Betting data updated successfully for {event_name}', 'success')
-        else:
-            print("No event data found to update")
-            flash('No event data found to update', 'warning')
+        job_id = jobs.enqueue('betting_update')
+        flash(f'Odds update started (job {job_id}) - you\'ll be notified when it finishes', 'info')
     except Exception as e:
-        print(f"Error updating betting data: {str(e)}")
         flash(f'Error updating betting data: {str(e)}', 'error')
-        import traceback
-        traceback_str = traceback.format_exc()
-        print(f"Full traceback:\n{traceback_str}")
     
     return redirect(url_for('betting_dashboard'))
 
+def run_betting_update(payload):
+    """Job handler: pull the latest odds and rebuild betting recommendations"""
+    from odds_retriever import OddsRetriever
+    
+    print("Starting odds data update...")
+    
+    # Initialize OddsRetriever
+    odds_retriever = OddsRetriever(db_path=DB_PATH)
+    
+    print(f"Database path: {DB_PATH}")
+    print(f"API key available: {'Yes' if odds_retriever.api_key else 'No'}")
+    
+    # Update recommendations
+    result = odds_retriever.update_odds_data()
+    
+    if not result or "event_name" not in result:
+        raise ValueError("No event data found to update")
+    
+    event_name = result["event_name"]
+    
+    # Count entries added
+    market_counts = {}
+    for market_name, market_data in result.get("markets", {}).items():
+        market_counts[market_name] = len(market_data)
+    
+    print(f"Market data counts: {market_counts}")
+    
+    return {
+        'event_name': event_name,
+        'market_counts': market_counts,
+        'message': f'Betting data updated successfully for {event_name}'
+    }
+
+jobs.register('process_transcript', run_process_transcript)
+jobs.register('calculate_mental_form', run_calculate_mental_form)
+jobs.register('betting_update', run_betting_update)
+
 @app.route('/betting/player/<int:player_id>')
 def player_betting_detail(player_id):
     """Show betting recommendations for a specific player"""
+    from odds_retriever import format_market_name
+    
     # Get filter parameter
     market = request.args.get('market', '')
     
@@ -1217,47 +1307,27 @@ def update_bankroll():
     conn = get_db_connection(DB_PATH)
     cursor = conn.cursor()
     
-    # Get the latest performance metric
-    cursor.execute('SELECT * FROM performance_metrics ORDER BY date DESC LIMIT 1')
-    latest = cursor.fetchone()
+    # Record the change as an adjustment in the bankroll ledger
+    _bankroll_ledger(conn).adjust_to(new_bankroll, notes="Set on /update-bankroll")
     
-    # Calculate metrics
-    cursor.execute('''
-    SELECT 
-        COUNT(*) as total_bets,
-        SUM(CASE WHEN outcome = 'win' THEN 1 ELSE 0 END) as winning_bets,
-        SUM(CASE WHEN outcome = 'loss' THEN 1 ELSE 0 END) as losing_bets,
-        SUM(CASE WHEN outcome = 'pending' THEN 1 ELSE 0 END) as pending_bets,
-        SUM(stake) as total_staked,
-        SUM(CASE WHEN outcome = 'win' THEN potential_return ELSE 0 END) as total_returns,
-        SUM(CASE WHEN outcome != 'pending' THEN profit_loss ELSE 0 END) as profit_loss
-    FROM bets
-    ''')
+    # Current totals from the bet rollups
+    metrics = get_totals(conn)
+    total_staked = metrics['staked']
+    profit_loss = metrics['profit_loss']
     
-    metrics = cursor.fetchone()
+    # Calculate ROI
+    roi = (profit_loss / total_staked) * 100 if total_staked > 0 else 0
     
     # Insert new performance metrics
-    if metrics:
-        total_bets = metrics['total_bets'] or 0
-        winning_bets = metrics['winning_bets'] or 0
-        losing_bets = metrics['losing_bets'] or 0
-        pending_bets = metrics['pending_bets'] or 0
-        total_staked = metrics['total_staked'] or 0
-        total_returns = metrics['total_returns'] or 0
-        profit_loss = metrics['profit_loss'] or 0
-        
-        # Calculate ROI
-        roi = (profit_loss / total_staked) * 100 if total_staked > 0 else 0
-        
-        cursor.execute('''
-        INSERT INTO performance_metrics (
-            date, total_bets, winning_bets, losing_bets, pending_bets,
-            total_staked, total_returns, profit_loss, roi, current_bankroll
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            datetime.now(), total_bets, winning_bets, losing_bets, pending_bets,
-            total_staked, total_returns, profit_loss, roi, new_bankroll
-        ))
+    cursor.execute('''
+    INSERT INTO performance_metrics (
+        date, total_bets, winning_bets, losing_bets, pending_bets,
+        total_staked, total_returns, profit_loss, roi, current_bankroll
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        datetime.now(), metrics['bets'], metrics['wins'], metrics['losses'], metrics['pending'],
+        total_staked, metrics['returns'], profit_loss, roi, new_bankroll
+    ))
     
     conn.commit()
     conn.close()
@@ -1265,203 +1335,78 @@ def update_bankroll():
     flash(f'Bankroll updated to ${new_bankroll:.2f}', 'success')
     return redirect(url_for('my_bets'))
 
-def calculate_betting_stats(conn):
-    """Calculate betting statistics for display"""
+def _bankroll_ledger(conn):
+    """
+    The bankroll ledger for this database, created on first use.
+
+    A new ledger opens with the default starting bankroll and then carries
+    over the last bankroll set on /update-bankroll, if there is one.
+    """
     cursor = conn.cursor()
-    
-    # Get overall counts
-    cursor.execute('''
-    SELECT 
-        COUNT(*) as total_bets,
-        SUM(CASE WHEN outcome = 'win' THEN 1 ELSE 0 END) as winning_bets,
-        SUM(CASE WHEN outcome = 'loss' THEN 1 ELSE 0 END) as losing_bets,
-        SUM(CASE WHEN outcome != 'pending' THEN 1 ELSE 0 END) as total_settled_bets,
-        SUM(stake) as total_staked,
-        SUM(CASE WHEN outcome = 'win' THEN potential_return ELSE 0 END) as total_returns,
-        SUM(CASE WHEN outcome != 'pending' THEN profit_loss ELSE 0 END) as total_profit_loss
-    FROM bets
-    ''')
-    
-    overall = cursor.fetchone()
-    
-    # Initialize with default values in case no bets exist
-    win_rate = 0
-    roi = 0
-    total_settled_bets = 0
-    winning_bets = 0
-    losing_bets = 0
-    total_staked = 0
-    total_profit_loss = 0
-    
-    # Only calculate stats if we have overall data
-    if overall:
-        # Make sure values are not None - use 0 as default
-        winning_bets = overall['winning_bets'] or 0
-        losing_bets = overall['losing_bets'] or 0
-        total_settled_bets = overall['total_settled_bets'] or 0
-        total_staked = overall['total_staked'] or 0
-        total_profit_loss = overall['total_profit_loss'] or 0
-        
-        # Calculate win rate and ROI
-        win_rate = winning_bets / total_settled_bets if total_settled_bets > 0 else 0
-        roi = (total_profit_loss / total_staked) * 100 if total_staked > 0 else 0
-    
-    # Get the latest bankroll
-    cursor.execute('SELECT current_bankroll FROM performance_metrics ORDER BY date DESC LIMIT 1')
-    bankroll_row = cursor.fetchone()
-    current_bankroll = bankroll_row['current_bankroll'] if bankroll_row else 1000  # Default starting bankroll
-    
-    # Performance by market
-    cursor.execute('''
-    SELECT 
-        bet_market as market,
-        COUNT(*) as count,
-        SUM(CASE WHEN outcome = 'win' THEN 1 ELSE 0 END) as wins,
-        SUM(CASE WHEN outcome != 'pending' THEN profit_loss ELSE 0 END) as profit_loss,
-        SUM(CASE WHEN outcome != 'pending' THEN stake ELSE 0 END) as total_staked
-    FROM bets
-    WHERE outcome != 'pending'
-    GROUP BY bet_market
-    ''')
-    
-    market_rows = cursor.fetchall()
-    market_breakdown = []
-    
-    for market in market_rows:
-        market_win_rate = market['wins'] / market['count'] if market['count'] > 0 else 0
-        market_roi = (market['profit_loss'] / market['total_staked']) * 100 if market['total_staked'] > 0 else 0
-        
-        market_breakdown.append({
-            'name': market['market'],
-            'count': market['count'],
-            'win_rate': market_win_rate,
-            'profit_loss': market['profit_loss'] or 0,
-            'roi': market_roi
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'bankroll_ledger'")
+    if not cursor.fetchone():
+        cursor.execute('SELECT current_bankroll FROM performance_metrics ORDER BY date DESC LIMIT 1')
+        bankroll_row = cursor.fetchone()
+        initialize_ledger_tables(
+            conn,
+            opening_balance=DEFAULT_BANKROLL,
+            current_bankroll=bankroll_row['current_bankroll'] if bankroll_row else None
+        )
+    return BankrollLedger(conn)
+
+def _rollup_breakdown(conn, dimension, unknown_name=None):
+    """
+    Per-bucket win rate, P&L and ROI over settled bets, from the bet rollups.
+
+    Bets without a bucket (e.g. no EV) are listed as unknown_name, or left out if it's None.
+    """
+    breakdown = []
+    for row in get_breakdown(conn, dimension):
+        if row['bucket'] is None and unknown_name is None:
+            continue
+        breakdown.append({
+            'name': row['bucket'] or unknown_name,
+            'count': row['settled'],
+            'win_rate': row['wins'] / row['settled'],
+            'profit_loss': row['profit_loss'],
+            'roi': (row['profit_loss'] / row['settled_staked']) * 100 if row['settled_staked'] > 0 else 0
         })
+    return breakdown
+
+def calculate_betting_stats(conn):
+    """Calculate betting statistics for display"""
+    # Overall counts are kept current in bet_rollups as bets are recorded and settled
+    overall = get_totals(conn)
     
-    # Performance by sportsbook
-    cursor.execute('''
-    SELECT 
-        sportsbook,
-        COUNT(*) as count,
-        SUM(CASE WHEN outcome = 'win' THEN 1 ELSE 0 END) as wins,
-        SUM(CASE WHEN outcome != 'pending' THEN profit_loss ELSE 0 END) as profit_loss,
-        SUM(CASE WHEN outcome != 'pending' THEN stake ELSE 0 END) as total_staked
-    FROM bets
-    WHERE outcome != 'pending'
-    GROUP BY sportsbook
-    ''')
-    
-    sportsbook_rows = cursor.fetchall()
-    sportsbook_breakdown = []
-    
-    for book in sportsbook_rows:
-        book_win_rate = book['wins'] / book['count'] if book['count'] > 0 else 0
-        book_roi = (book['profit_loss'] / book['total_staked']) * 100 if book['total_staked'] > 0 else 0
-        
-        sportsbook_breakdown.append({
-            'name': book['sportsbook'] or 'Unknown',
-            'count': book['count'],
-            'win_rate': book_win_rate,
-            'profit_loss': book['profit_loss'] or 0,
-            'roi': book_roi
-        })
+    winning_bets = overall['wins']
+    losing_bets = overall['losses']
+    total_settled_bets = overall['settled']
+    total_staked = overall['staked']
+    total_profit_loss = overall['profit_loss']
     
-    # Performance by EV range - only run this query if we have settled bets
-    ev_breakdown = []
-    if total_settled_bets > 0:
-        try:
-            cursor.execute('''
-            SELECT 
-                CASE
-                    WHEN expected_value < 0 THEN 'Negative'
-                    WHEN expected_value < 5 THEN '0-5%'
-                    WHEN expected_value < 10 THEN '5-10%'
-                    WHEN expected_value < 20 THEN '10-20%'
-                    ELSE '20%+'
-                END as ev_range,
-                COUNT(*) as count,
-                SUM(CASE WHEN outcome = 'win' THEN 1 ELSE 0 END) as wins,
-                SUM(CASE WHEN outcome != 'pending' THEN profit_loss ELSE 0 END) as profit_loss,
-                SUM(CASE WHEN outcome != 'pending' THEN stake ELSE 0 END) as total_staked
-            FROM bets
-            WHERE outcome != 'pending'
-            GROUP BY ev_range
-            ORDER BY MIN(expected_value)
-            ''')
-            
-            ev_rows = cursor.fetchall()
-            
-            for ev in ev_rows:
-                ev_win_rate = ev['wins'] / ev['count'] if ev['count'] > 0 else 0
-                ev_roi = (ev['profit_loss'] / ev['total_staked']) * 100 if ev['total_staked'] > 0 else 0
-                
-                ev_breakdown.append({
-                    'name': ev['ev_range'],
-                    'count': ev['count'],
-                    'win_rate': ev_win_rate,
-                    'profit_loss': ev['profit_loss'] or 0,
-                    'roi': ev_roi
-                })
-        except Exception as e:
-            print(f"Error processing EV breakdown: {e}")
+    # Calculate win rate and ROI
+    win_rate = winning_bets / total_settled_bets if total_settled_bets > 0 else 0
+    roi = (total_profit_loss / total_staked) * 100 if total_staked > 0 else 0
     
-    # Performance by mental form range - only run this query if we have settled bets
-    mental_form_breakdown = []
-    if total_settled_bets > 0:
-        try:
-            cursor.execute('''
-            SELECT 
-                CASE
-                    WHEN mental_form_score <= -0.5 THEN 'Strong Negative'
-                    WHEN mental_form_score <= -0.2 THEN 'Moderate Negative'
-                    WHEN mental_form_score < 0.2 THEN 'Neutral'
-                    WHEN mental_form_score < 0.5 THEN 'Moderate Positive'
-                    WHEN mental_form_score IS NOT NULL THEN 'Strong Positive'
-                    ELSE 'Unknown'
-                END as mental_form_range,
-                COUNT(*) as count,
-                SUM(CASE WHEN outcome = 'win' THEN 1 ELSE 0 END) as wins,
-                SUM(CASE WHEN outcome != 'pending' THEN profit_loss ELSE 0 END) as profit_loss,
-                SUM(CASE WHEN outcome != 'pending' THEN stake ELSE 0 END) as total_staked
-            FROM bets
-            WHERE outcome != 'pending'
-            GROUP BY mental_form_range
-            ORDER BY MIN(mental_form_score)
-            ''')
-            
-            mental_form_rows = cursor.fetchall()
-            
-            for mf in mental_form_rows:
-                mf_win_rate = mf['wins'] / mf['count'] if mf['count'] > 0 else 0
-                mf_roi = (mf['profit_loss'] / mf['total_staked']) * 100 if mf['total_staked'] > 0 else 0
-                
-                mental_form_breakdown.append({
-                    'name': mf['mental_form_range'],
-                    'count': mf['count'],
-                    'win_rate': mf_win_rate,
-                    'profit_loss': mf['profit_loss'] or 0,
-                    'roi': mf_roi
-                })
-        except Exception as e:
-            print(f"Error processing mental form breakdown: {e}")
+    # Current bankroll from the ledger
+    current_bankroll = _bankroll_ledger(conn).bankroll()
     
     # Return all the stats
     return {
-        'total_bets': overall['total_bets'] if overall else 0,
+        'total_bets': overall['bets'],
         'winning_bets': winning_bets,
         'losing_bets': losing_bets,
         'total_settled_bets': total_settled_bets,
         'total_staked': total_staked,
-        'total_returns': overall['total_returns'] if overall and overall['total_returns'] is not None else 0,
+        'total_returns': overall['returns'],
         'total_profit_loss': total_profit_loss,
         'win_rate': win_rate,
         'roi': roi,
         'current_bankroll': current_bankroll,
-        'market_breakdown': market_breakdown,
-        'sportsbook_breakdown': sportsbook_breakdown,
-        'ev_breakdown': ev_breakdown,
-        'mental_form_breakdown': mental_form_breakdown
+        'market_breakdown': _rollup_breakdown(conn, 'market'),
+        'sportsbook_breakdown': _rollup_breakdown(conn, 'sportsbook', 'Unknown'),
+        'ev_breakdown': _rollup_breakdown(conn, 'ev_bucket'),
+        'mental_form_breakdown': _rollup_breakdown(conn, 'mental_bucket')
     }
 
 @app.route('/delete-bet', methods=['POST'])
@@ -1,7 +1,12 @@
 import os
-from youtube_transcript_api import YouTubeTranscriptApi
 import argparse
 import json
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Default location of the on-disk transcript cache
+DEFAULT_CACHE_DIR = "transcripts/cache"
 
 def get_video_id_from_url(url):
     """Extract video ID from a YouTube URL"""
@@ -12,10 +17,94 @@ def get_video_id_from_url(url):
     else:
         return url  # Assume it's already a video ID
 
-def get_transcript(video_id):
+class YouTubeTranscriptTransport:
+    """Fetches caption segments from YouTube via youtube_transcript_api"""
+
+    def fetch(self, video_id):
+        """
+        Fetch the transcript segments for a video.
+
+        Returns:
+            List of {"text", "start", "duration"} dictionaries
+        """
+        from youtube_transcript_api import YouTubeTranscriptApi
+
+        # youtube_transcript_api 1.x replaced the static get_transcript with an instance fetch()
+        if hasattr(YouTubeTranscriptApi, "fetch"):
+            return YouTubeTranscriptApi().fetch(video_id).to_raw_data()
+        return YouTubeTranscriptApi.get_transcript(video_id)
+
+class FakeTranscriptTransport:
+    """Offline transport returning canned transcripts, for tests and dry runs"""
+
+    def __init__(self, transcripts=None, delay=0.0):
+        """
+        Args:
+            transcripts: Dictionary of video_id -> transcript text or segment list.
+                         Unknown IDs get a generated placeholder transcript.
+            delay: Seconds each fetch takes, to simulate network latency
+        """
+        self.transcripts = transcripts or {}
+        self.delay = delay
+        self.calls = []
+
+    def fetch(self, video_id):
+        self.calls.append(video_id)
+        if self.delay:
+            time.sleep(self.delay)
+
+        transcript = self.transcripts.get(video_id, f"Placeholder transcript for video {video_id}.")
+        if transcript is None:
+            raise ValueError(f"No transcript available for video {video_id}")
+        if isinstance(transcript, str):
+            return [{"text": line, "start": float(i), "duration": 1.0}
+                    for i, line in enumerate(transcript.split("\n"))]
+        return transcript
+
+class TranscriptCache:
+    """
+    Normalized transcripts stored on disk, one JSON file per video ID.
+
+    Each entry records a SHA-256 of the transcript text so changed captions
+    can be detected when a video is deliberately refreshed.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, video_id):
+        return os.path.join(self.cache_dir, f"{video_id}.json")
+
+    def get(self, video_id):
+        """Return the cached entry for a video, or None"""
+        path = self._path(video_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def put(self, video_id, text, segment_count):
+        """Store a normalized transcript and return its entry"""
+        entry = {
+            "video_id": video_id,
+            "sha256": hashlib.sha256(text.encode('utf-8')).hexdigest(),
+            "segment_count": segment_count,
+            "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "text": text
+        }
+
+        # Write then rename so concurrent readers never see a partial file
+        tmp_path = self._path(video_id) + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._path(video_id))
+        return entry
+
+def get_transcript(video_id, transport=None):
     """Get transcript using youtube_transcript_api"""
     try:
-        transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
+        transcript_list = (transport or YouTubeTranscriptTransport()).fetch(video_id)
         return transcript_list
     except Exception as e:
         print(f"Error fetching transcript: {e}")
@@ -25,49 +114,149 @@ def format_transcript(transcript_list):
     """Format transcript into readable text"""
     if not transcript_list:
         return ""
-    
-    full_text = ""
-    for item in transcript_list:
-        full_text += item["text"] + " "
-    
-    return full_text
+
+    # Caption segments often contain line breaks and padding
+    return " ".join(
+        " ".join(item["text"].split()) for item in transcript_list if item["text"].strip()
+    )
+
+def expand_sources(sources):
+    """
+    Expand a mix of video URLs/IDs, playlist URLs and list files into video IDs.
+
+    Args:
+        sources: Iterable of YouTube URLs, video IDs, playlist URLs (with list=)
+                 or paths to text files containing one of those per line
+
+    Returns:
+        List of unique video IDs in input order
+    """
+    video_ids = []
+
+    for source in sources:
+        source = source.strip()
+        if not source or source.startswith("#"):
+            continue
+
+        if os.path.isfile(source):
+            with open(source, 'r', encoding='utf-8') as f:
+                video_ids.extend(expand_sources(f.read().splitlines()))
+        elif "list=" in source and "watch?v=" not in source:
+            try:
+                from pytube import Playlist
+            except ImportError:
+                raise ImportError("pytube is required to expand playlists. Run: pip install pytube")
+            video_ids.extend(get_video_id_from_url(url) for url in Playlist(source).video_urls)
+        else:
+            video_ids.append(get_video_id_from_url(source))
+
+    # Remove duplicates while keeping order
+    return list(dict.fromkeys(video_ids))
+
+def fetch_transcripts(sources, max_workers=4, cache=None, transport=None, refresh=False):
+    """
+    Fetch transcripts for many videos concurrently, using the disk cache.
+
+    Args:
+        sources: Video URLs/IDs, playlist URLs or list files (see expand_sources)
+        max_workers: Maximum concurrent fetches
+        cache: TranscriptCache to read from and write to (defaults to DEFAULT_CACHE_DIR)
+        transport: Transport used for uncached videos (defaults to YouTube)
+        refresh: Re-fetch videos even if they are cached
+
+    Returns:
+        Dictionary of video_id -> {"text", "cached", "error"}. "text" is None
+        when the fetch failed.
+    """
+    cache = cache or TranscriptCache()
+    transport = transport or YouTubeTranscriptTransport()
+    video_ids = expand_sources(sources)
+
+    results = {}
+    to_fetch = []
+    for video_id in video_ids:
+        entry = None if refresh else cache.get(video_id)
+        if entry:
+            results[video_id] = {"text": entry["text"], "cached": True, "error": None}
+        else:
+            to_fetch.append(video_id)
+
+    def fetch_one(video_id):
+        try:
+            segments = transport.fetch(video_id)
+            if not segments:
+                return video_id, {"text": None, "cached": False, "error": "Empty transcript"}
+            entry = cache.put(video_id, format_transcript(segments), len(segments))
+            return video_id, {"text": entry["text"], "cached": False, "error": None}
+        except Exception as e:
+            return video_id, {"text": None, "cached": False, "error": str(e)}
+
+    if to_fetch:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(to_fetch)))) as executor:
+            for video_id, result in executor.map(fetch_one, to_fetch):
+                results[video_id] = result
+
+    # Return in input order
+    return {video_id: results[video_id] for video_id in video_ids}
 
 def save_transcript(text, filename):
     """Save transcript to a file"""
     # Create transcripts directory if it doesn't exist
     os.makedirs("transcripts", exist_ok=True)
-    
+
     # If filename doesn't include a path, save it to the transcripts directory
     if not os.path.dirname(filename):
         filename = os.path.join("transcripts", filename)
-        
+
     with open(filename, "w", encoding="utf-8") as f:
         f.write(text)
     print(f"Transcript saved to {filename}")
 
 def main():
     parser = argparse.ArgumentParser(description="Fetch YouTube video transcripts")
-    parser.add_argument("--url", required=True, help="YouTube video URL or ID")
+    source_group = parser.add_mutually_exclusive_group(required=True)
+    source_group.add_argument("--url", help="YouTube video URL or ID")
+    source_group.add_argument("--urls", nargs="+", help="Several video URLs/IDs, playlist URLs or list files")
     parser.add_argument("--output", help="Output filename (default: transcript.txt)")
-    
+    parser.add_argument("--output_dir", default="transcripts", help="Directory for bulk transcripts (one <video_id>.txt each)")
+    parser.add_argument("--workers", type=int, default=4, help="Maximum concurrent fetches")
+    parser.add_argument("--cache_dir", default=DEFAULT_CACHE_DIR, help="Transcript cache directory")
+    parser.add_argument("--refresh", action="store_true", help="Re-fetch videos that are already cached")
+
     args = parser.parse_args()
-    
+    cache = TranscriptCache(args.cache_dir)
+
+    if args.urls:
+        start = time.time()
+        results = fetch_transcripts(args.urls, max_workers=args.workers, cache=cache, refresh=args.refresh)
+
+        os.makedirs(args.output_dir, exist_ok=True)
+        for video_id, result in results.items():
+            if result["error"]:
+                print(f"{video_id}: failed ({result['error']})")
+                continue
+            save_transcript(result["text"], os.path.join(args.output_dir, f"{video_id}.txt"))
+
+        fetched = sum(1 for r in results.values() if not r["cached"] and not r["error"])
+        cached = sum(1 for r in results.values() if r["cached"])
+        failed = sum(1 for r in results.values() if r["error"])
+        print(f"\n{len(results)} videos: {fetched} fetched, {cached} from cache, {failed} failed "
+              f"in {time.time() - start:.1f}s")
+        return
+
     # Get video ID from URL
     video_id = get_video_id_from_url(args.url)
     print(f"Fetching transcript for video ID: {video_id}")
-    
-    # Get transcript
-    transcript_list = get_transcript(video_id)
-    if not transcript_list:
+
+    # Get transcript (served from the cache if we've fetched this video before)
+    result = fetch_transcripts([video_id], cache=cache, refresh=args.refresh)[video_id]
+    if result["error"]:
         print("Failed to fetch transcript. Make sure the video has closed captions.")
         return
-    
-    # Format transcript
-    transcript_text = format_transcript(transcript_list)
-    
+
     # Save transcript
     output_file = args.output or "transcript.txt"
-    save_transcript(transcript_text, output_file)
+    save_transcript(result["text"], output_file)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()